@@ -0,0 +1,48 @@
+"""Add HNSW ANN indexes on RAG embedding columns
+
+Revision ID: i3d4e5f6a7b8
+Revises: h2c3d4e5f6a7
+Create Date: 2026-10-19
+
+RAG 檢索（/rag/ask）對 transcript_segments.content_embedding 與
+meetings.summary_embedding 做 cosine 排序，原本沒有任何 ANN index（001_enable_pgvector.sql
+的 IVFFlat 一直是註解），資料量一大就是整表掃描。
+
+此 migration 以 CONCURRENTLY 建立 HNSW index（vector_cosine_ops，與查詢的 <=> 一致），
+不鎖寫入。注意：Cloud Run 部署不自動跑 alembic；正式環境請呼叫
+POST /api/v1/admin/rag-vector-index（可選 hnsw / ivfflat、rebuild、reindex）。
+定義與 app.rag.vector_index.VECTOR_INDEXES 相同。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "i3d4e5f6a7b8"
+down_revision: Union[str, None] = "h2c3d4e5f6a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_INDEXES = (
+    ("idx_segments_content_embedding", "transcript_segments", "content_embedding"),
+    ("idx_meetings_summary_embedding", "meetings", "summary_embedding"),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, column in _INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} USING hnsw ({column} vector_cosine_ops) "
+                f"WITH (m = 16, ef_construction = 64);"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in _INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
@@ -0,0 +1,48 @@
+"""Add CJK bigram lexical index on transcript segments (hybrid retrieval)
+
+Revision ID: j4e5f6a7b8c9
+Revises: i3d4e5f6a7b8
+Create Date: 2026-10-19
+
+Phase B hybrid retriever（app.rag.hybrid）的 lexical 路徑：
+  - rag_cjk_bigrams(text)：lower + 去非英數字元後切重疊二字組，IMMUTABLE 才能做 expression index
+  - GIN index ON to_tsvector('simple', rag_cjk_bigrams(COALESCE(content_polished, content_raw)))
+
+不加新欄位、不加 trigger，寫入路徑不變（002 的 search_vector 已隨 FTS 移除）。
+Cloud Run 部署不自動跑 alembic；正式環境請呼叫 POST /api/v1/admin/rag-lexical-index。
+定義與 app.rag.hybrid.BIGRAM_FUNCTION_DDL / LEXICAL_INDEX_DDL 相同。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "j4e5f6a7b8c9"
+down_revision: Union[str, None] = "i3d4e5f6a7b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION rag_cjk_bigrams(t text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT COALESCE(string_agg(substr(s, i, 2), ' ' ORDER BY i), '')
+            FROM (SELECT regexp_replace(lower(COALESCE(t, '')), '[^[:alnum:]]+', '', 'g') AS s) x,
+                 generate_series(1, GREATEST(length(s) - 1, 0)) AS i
+        $$;
+    """)
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_segments_lexical_bigrams "
+            "ON transcript_segments USING gin "
+            "(to_tsvector('simple', rag_cjk_bigrams(COALESCE(content_polished, content_raw))));"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_segments_lexical_bigrams;")
+    op.execute("DROP FUNCTION IF EXISTS rag_cjk_bigrams(text);")
@@ -0,0 +1,37 @@
+"""Add rag_query_cache table (L2 for query embedding / intent cache)
+
+Revision ID: k5f6a7b8c9d0
+Revises: j4e5f6a7b8c9
+Create Date: 2026-10-19
+
+app.rag.query_cache 的 DB tier（RAG_QUERY_CACHE_DB=true 時使用）：
+多個 Cloud Run instance 共享 query embedding / QueryIntent 結果，冷啟動不歸零。
+cache_key = sha256(kind, model, [date,] normalized query)；過期由讀取端依 created_at 判斷。
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "k5f6a7b8c9d0"
+down_revision: Union[str, None] = "j4e5f6a7b8c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rag_query_cache",
+        sa.Column("cache_key", sa.String(64), primary_key=True),
+        sa.Column("kind", sa.String(16), nullable=False),
+        sa.Column("value", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("idx_rag_query_cache_created_at", "rag_query_cache", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_rag_query_cache_created_at", table_name="rag_query_cache")
+    op.drop_table("rag_query_cache")
@@ -0,0 +1,36 @@
+"""Add embedding_cache table (content-hash cache in front of the embedding provider)
+
+Revision ID: l6a7b8c9d0e1
+Revises: k5f6a7b8c9d0
+Create Date: 2026-10-19
+
+app.embedding_cache：(provider model_id, sha256(text)) → float32 向量 bytes。
+embed_texts 先 bulk lookup，只對 miss 呼叫 embedding API；重新 embed / 重試 /
+重複會議幾乎零成本。換模型時 model 欄位不同，舊資料自然不會被使用。
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "l6a7b8c9d0e1"
+down_revision: Union[str, None] = "k5f6a7b8c9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_cache",
+        sa.Column("model", sa.String(128), nullable=False),
+        sa.Column("text_hash", sa.String(64), nullable=False),
+        sa.Column("embedding", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("model", "text_hash"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("embedding_cache")
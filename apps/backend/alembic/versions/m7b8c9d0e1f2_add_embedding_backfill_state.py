@@ -0,0 +1,36 @@
+"""Add embedding_backfill_state table (resumable backfill checkpoints)
+
+Revision ID: m7b8c9d0e1f2
+Revises: l6a7b8c9d0e1
+Create Date: 2026-10-19
+
+app.embedding_backfill 的 checkpoint：每個 job（mode:model_id）一列，
+last_meeting_id 為 low-watermark（≤ 它的會議都已寫完），status=running 表示
+未完成、下次 resume 從這裡接續；stats 為最後一次的進度 snapshot（JSON）。
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "m7b8c9d0e1f2"
+down_revision: Union[str, None] = "l6a7b8c9d0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_backfill_state",
+        sa.Column("job", sa.String(160), primary_key=True),
+        sa.Column("last_meeting_id", sa.String(36), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("stats", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("embedding_backfill_state")
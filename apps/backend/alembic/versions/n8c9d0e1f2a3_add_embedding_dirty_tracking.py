@@ -0,0 +1,40 @@
+"""Add dirty-tracking / version columns for incremental re-embedding
+
+Revision ID: n8c9d0e1f2a3
+Revises: m7b8c9d0e1f2
+Create Date: 2026-10-19
+
+app.embedding_refresh：改講者 / 詞彙校正 / 摘要修補時標記 dirty，背景 re-embedder
+只重算受影響的滑動視窗，不再需要全庫 force_reembed_all。
+  - transcript_segments.embedding_dirty（partial index，只索引 dirty 的列）
+  - meetings.summary_embedding_dirty
+  - meetings.embedding_version：向量每寫入一次 +1
+注意：Cloud Run 實際靠 app/main.py startup 的 ADD COLUMN IF NOT EXISTS safety net。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "n8c9d0e1f2a3"
+down_revision: Union[str, None] = "m7b8c9d0e1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE transcript_segments ADD COLUMN IF NOT EXISTS embedding_dirty BOOLEAN NOT NULL DEFAULT false")
+    op.execute("ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_embedding_dirty BOOLEAN NOT NULL DEFAULT false")
+    op.execute("ALTER TABLE meetings ADD COLUMN IF NOT EXISTS embedding_version INTEGER NOT NULL DEFAULT 0")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ts_embedding_dirty "
+        "ON transcript_segments (meeting_id) WHERE embedding_dirty"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_ts_embedding_dirty")
+    op.execute("ALTER TABLE meetings DROP COLUMN IF EXISTS embedding_version")
+    op.execute("ALTER TABLE meetings DROP COLUMN IF EXISTS summary_embedding_dirty")
+    op.execute("ALTER TABLE transcript_segments DROP COLUMN IF EXISTS embedding_dirty")
@@ -0,0 +1,64 @@
+"""Add halfvec quantized ANN index on transcript_segments.content_embedding
+
+Revision ID: o9d0e1f2a3b4
+Revises: n8c9d0e1f2a3
+Create Date: 2026-10-19
+
+transcript_segments 是最大的表；float32 HNSW 每列 3 KB。此 migration 以
+expression index 建立 halfvec（2 bytes/維）HNSW，heap 仍保留 float32 供精確重排
+（app.rag.vector_index.segment_knn_sql）。
+
+過渡期：float32 index idx_segments_content_embedding 保留，兩個 index 每次寫入都由
+PostgreSQL 同時維護（dual-write）；RAG_VECTOR_QUANT=halfvec 才切換讀取。確認
+GET /api/v1/admin/rag-quant-report 的 recall 後，以
+POST /api/v1/admin/rag-vector-index/quantized?drop_full=true 移除 float32 index。
+binary（1 bit/維）index 以同一個 admin endpoint mode=binary 建立。
+
+需 pgvector >= 0.7（halfvec）；版本不足時略過，不擋 migration 鏈。
+定義與 app.rag.vector_index.QUANT_INDEXES["halfvec"] 相同。
+"""
+
+import logging
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+revision: str = "o9d0e1f2a3b4"
+down_revision: Union[str, None] = "n8c9d0e1f2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_NAME = "idx_segments_content_embedding_half"
+
+
+def _pgvector_version() -> tuple:
+    version = op.get_bind().execute(
+        sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    ).scalar()
+    try:
+        return tuple(int(p) for p in (version or "0").split(".")[:2])
+    except ValueError:
+        return (0, 0)
+
+
+def upgrade() -> None:
+    if _pgvector_version() < (0, 7):
+        logger.warning(f"[o9d0e1f2a3b4] pgvector < 0.7, skipping {_NAME}")
+        return
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {_NAME} "
+            f"ON transcript_segments USING hnsw ((content_embedding::halfvec(768)) halfvec_cosine_ops) "
+            f"WITH (m = 16, ef_construction = 64);"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_NAME};")
@@ -0,0 +1,43 @@
+"""Add materialized summary digest columns on meetings
+
+Revision ID: p0e1f2a3b4c5
+Revises: o9d0e1f2a3b4
+Create Date: 2026-10-19
+
+app.summary_digest：summary_json 寫入時同步算好 /rag/ask citation、greeting 主題 /
+重點、摘要 embedding 本文，讀取路徑不再 json.loads 整份摘要。
+  - meetings.summary_citation / summary_embed_text / summary_topics /
+    summary_key_actions
+  - partial index：只索引尚未回填（summary_citation IS NULL）的會議
+既有資料由 app startup 的 backfill_summary_digests() 回填。
+注意：Cloud Run 實際靠 app/main.py startup 的 ADD COLUMN IF NOT EXISTS safety net。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "p0e1f2a3b4c5"
+down_revision: Union[str, None] = "o9d0e1f2a3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_citation TEXT")
+    op.execute("ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_embed_text TEXT")
+    op.execute("ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_topics TEXT")
+    op.execute("ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_key_actions TEXT")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_meetings_summary_digest_pending ON meetings (id) "
+        "WHERE summary_citation IS NULL AND summary_json IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_meetings_summary_digest_pending")
+    op.execute("ALTER TABLE meetings DROP COLUMN IF EXISTS summary_key_actions")
+    op.execute("ALTER TABLE meetings DROP COLUMN IF EXISTS summary_topics")
+    op.execute("ALTER TABLE meetings DROP COLUMN IF EXISTS summary_embed_text")
+    op.execute("ALTER TABLE meetings DROP COLUMN IF EXISTS summary_citation")
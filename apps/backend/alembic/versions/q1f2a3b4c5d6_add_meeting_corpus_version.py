@@ -0,0 +1,29 @@
+"""Add meetings.corpus_version for the RAG answer cache
+
+Revision ID: q1f2a3b4c5d6
+Revises: p0e1f2a3b4c5
+Create Date: 2026-10-19
+
+app.rag.answer_cache 以「可檢索範圍內每場會議的 (id, corpus_version)」為快取指紋。
+段落 / 摘要 / 標題 / 講者對應 / 向量寫入時 corpus_version +1（app.models before_flush、
+app.embedding.bump_embedding_version），只讓真正受影響的答案失效。
+注意：Cloud Run 實際靠 app/main.py startup 的 ADD COLUMN IF NOT EXISTS safety net。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "q1f2a3b4c5d6"
+down_revision: Union[str, None] = "p0e1f2a3b4c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE meetings ADD COLUMN IF NOT EXISTS corpus_version INTEGER NOT NULL DEFAULT 0")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE meetings DROP COLUMN IF EXISTS corpus_version")
@@ -0,0 +1,35 @@
+"""Add transcript_segments.meeting_id btree for the access-set ID filter
+
+Revision ID: r2a3b4c5d6e7
+Revises: q1f2a3b4c5d6
+Create Date: 2026-10-19
+
+app.access_set 把使用者可存取的 meeting id 集合以 `ts.meeting_id = ANY(:allowed_ids)`
+推進 RAG segment 查詢，取代 JOIN meeting_participants。範圍小時 planner 需要這個
+btree 才能「先取範圍內 segment 再精確排序」，範圍大時則走 HNSW + filter。
+注意：Cloud Run 實際靠 app/main.py startup 的 CREATE INDEX CONCURRENTLY IF NOT EXISTS safety net。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "r2a3b4c5d6e7"
+down_revision: Union[str, None] = "q1f2a3b4c5d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ts_meeting_id "
+            "ON transcript_segments (meeting_id);"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_ts_meeting_id;")
@@ -0,0 +1,51 @@
+"""Store the CJK bigram tsvector as a generated column for the lexical leg
+
+Revision ID: s3b4c5d6e7f8
+Revises: r2a3b4c5d6e7
+Create Date: 2026-10-19
+
+j4e5f6a7b8c9 的 GIN expression index 只能加速 @@ 比對；ts_rank_cd 排序仍要對每個
+候選列重算 rag_cjk_bigrams(...)，常見 CJK bigram 幾乎命中整個語料。改為：
+  - transcript_segments.lexical_tsv：GENERATED ALWAYS AS (to_tsvector('simple',
+    rag_cjk_bigrams(COALESCE(content_polished, content_raw)))) STORED，寫入時算一次
+  - GIN index idx_segments_lexical_tsv ON lexical_tsv（查詢與排序都對欄位）
+  - 移除舊的 expression index idx_segments_lexical_bigrams
+注意：ADD COLUMN ... STORED 會重寫整張表（ACCESS EXCLUSIVE）。Cloud Run 部署不自動跑
+alembic；正式環境請在離峰呼叫 POST /api/v1/admin/rag-lexical-index。
+定義與 app.rag.hybrid.LEXICAL_COLUMN_DDL / LEXICAL_INDEX_DDL 相同。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "s3b4c5d6e7f8"
+down_revision: Union[str, None] = "r2a3b4c5d6e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE transcript_segments ADD COLUMN IF NOT EXISTS lexical_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', rag_cjk_bigrams(COALESCE(content_polished, content_raw)))) STORED;"
+    )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_segments_lexical_tsv "
+            "ON transcript_segments USING gin (lexical_tsv);"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_segments_lexical_bigrams;")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_segments_lexical_bigrams "
+            "ON transcript_segments USING gin "
+            "(to_tsvector('simple', rag_cjk_bigrams(COALESCE(content_polished, content_raw))));"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_segments_lexical_tsv;")
+    op.execute("ALTER TABLE transcript_segments DROP COLUMN IF EXISTS lexical_tsv;")
@@ -0,0 +1,199 @@
+"""
+Access set — 每個使用者可存取的 meeting id 集合（process 內快取），取代熱路徑上的
+`JOIN meeting_participants mp ON mp.meeting_id = m.id AND mp.user_upn = :upn`。
+
+/rag/ask 的 segment 向量、lexical、摘要向量、標題比對與 answer cache 指紋都先 JOIN
+participants 再排序 / 篩選。對 pgvector 查詢來說 JOIN 讓 planner 很難用好 ANN index
+（HNSW 掃完再逐筆 JOIN 過濾，或先 JOIN 再整批精確排序，二選一且常估錯）。
+只有這些 RAG 檢索路徑改用快取的 ID filter；list_meetings、dashboard、RAG greeting
+統計不是 ANN 查詢，照舊 JOIN meeting_participants — 使用者剛建立的會議（可能寫在
+另一個 instance）必須立刻出現在自己的列表，不能等 TTL。
+
+現在：
+  - allowed_meeting_ids(db, upn) → frozenset：meeting_participants 裡該使用者的
+    meeting_id，LRU + TTL 快取。不看 deleted_at — 查詢端照舊帶 m.deleted_at IS NULL，
+    軟刪除不會因快取而外洩
+  - resolve_scope(db, upn, meeting_ids)：本次搜尋範圍（access set ∩ meeting_ids；
+    None = 不限，全域查詢）
+  - id_filter(db, column, ids)：PostgreSQL 為單一 text[] 參數 `col = ANY(:allowed_ids)`，
+    其他 dialect 展開成 IN (...)。segment 查詢變成單表 + 索引欄位過濾
+    （transcript_segments.meeting_id 的 btree idx_ts_meeting_id）：範圍小時 planner
+    走 btree 再精確排序，範圍大時走 HNSW 並在 index scan 上過濾
+  - 失效：MeetingParticipant 經 ORM 新增 / 修改 / 刪除（含 bulk query）時，於 commit
+    **之後**丟掉受影響使用者的集合（app.models after_flush / after_commit）；載入期間
+    若發生失效（epoch 改變），載入結果不寫回快取，避免把舊集合放回去
+  - 多 instance 之間靠 TTL（RAG_ACCESS_SET_TTL）兜底；目前沒有撤權 API，延遲只會讓
+    新授權晚幾十秒出現
+
+JOIN vs ID filter 的 ANN 延遲 / 結果比較見 app.rag.vector_index.access_filter_report
+（GET /api/v1/admin/rag-access-report）；快取統計在 /api/v1/rag/status。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+RAG_ACCESS_SET_TTL = float(os.getenv("RAG_ACCESS_SET_TTL", "60"))
+RAG_ACCESS_SET_MAX_USERS = int(os.getenv("RAG_ACCESS_SET_MAX_USERS", "1024"))
+
+ACCESS_FILTER_INDEX = "idx_ts_meeting_id"
+ACCESS_FILTER_INDEX_DDL = (
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {ACCESS_FILTER_INDEX} "
+    "ON transcript_segments (meeting_id)"
+)
+
+
+def _is_postgres(db) -> bool:
+    bind = db.get_bind() if hasattr(db, "get_bind") else db
+    return getattr(getattr(bind, "dialect", None), "name", "") == "postgresql"
+
+
+def ensure_access_filter_index(engine) -> None:
+    """segment ID filter 用的 btree（CONCURRENTLY，需 AUTOCOMMIT 連線）。"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(ACCESS_FILTER_INDEX_DDL))
+
+
+# ============================================
+# Process-wide cache
+# ============================================
+
+class _AccessSetCache:
+    def __init__(self, max_users: int, ttl: float):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sets: "OrderedDict[str, Tuple[FrozenSet[str], float]]" = OrderedDict()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Tuple[Optional[FrozenSet[str]], int]:
+        """(ids 或 None, 目前 epoch)；miss 時 epoch 交給 put 檢查載入期間是否失效過。"""
+        with self._lock:
+            entry = self._sets.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._sets.move_to_end(key)
+                self.hits += 1
+                return entry[0], self._epoch
+            if entry is not None:
+                del self._sets[key]
+            self.misses += 1
+            return None, self._epoch
+
+    def put(self, key: str, ids: FrozenSet[str], epoch: int) -> bool:
+        with self._lock:
+            if epoch != self._epoch:
+                return False
+            self._sets[key] = (ids, time.monotonic())
+            self._sets.move_to_end(key)
+            while len(self._sets) > self.max_users:
+                self._sets.popitem(last=False)
+            return True
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> int:
+        with self._lock:
+            self._epoch += 1
+            if keys is None:
+                removed = len(self._sets)
+                self._sets.clear()
+            else:
+                removed = sum(1 for k in set(keys) if self._sets.pop(k, None) is not None)
+            self.invalidations += removed
+            return removed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._sets),
+                "meeting_ids": sum(len(ids) for ids, _ in self._sets.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "ttl_seconds": self.ttl,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._sets.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+
+_cache = _AccessSetCache(RAG_ACCESS_SET_MAX_USERS, RAG_ACCESS_SET_TTL)
+
+
+def load_allowed_ids(db, user_upn: str) -> FrozenSet[str]:
+    rows = db.execute(
+        text("SELECT meeting_id FROM meeting_participants WHERE user_upn = :user_upn"),
+        {"user_upn": user_upn},
+    ).fetchall()
+    return frozenset(r[0] for r in rows)
+
+
+def allowed_meeting_ids(db, user_upn: str) -> FrozenSet[str]:
+    """user_upn 是 participant 的 meeting id（含軟刪除的會議）；miss 時查 DB。"""
+    ids, epoch = _cache.get(user_upn)
+    if ids is None:
+        ids = load_allowed_ids(db, user_upn)
+        _cache.put(user_upn, ids, epoch)
+    return ids
+
+
+def resolve_scope(db, user_upn: Optional[str] = None,
+                  meeting_ids: Optional[Sequence[str]] = None) -> Optional[FrozenSet[str]]:
+    """
+    搜尋範圍（MemPlace 隔離）：
+      user_upn            → access set（meeting_ids 有給時取交集）
+      只有 meeting_ids    → meeting_ids
+      都沒有              → None（不限範圍，全域搜尋）
+    回傳空集合代表「沒有可搜尋的會議」，呼叫端應直接回空結果。
+    """
+    if user_upn:
+        allowed = allowed_meeting_ids(db, user_upn)
+        return allowed.intersection(meeting_ids) if meeting_ids else allowed
+    if meeting_ids:
+        return frozenset(meeting_ids)
+    return None
+
+
+def id_filter(db, column: str, ids: Iterable[str], name: str = "allowed_ids") -> Tuple[str, dict]:
+    """(" AND <column> ...", params)：把 meeting id 集合推進 SQL 當索引欄位過濾。"""
+    ids = sorted(ids)
+    if _is_postgres(db):
+        return f" AND {column} = ANY(:{name})", {name: ids}
+    if not ids:
+        return " AND 1 = 0", {}
+    placeholders = ",".join(f":{name}_{i}" for i in range(len(ids)))
+    return f" AND {column} IN ({placeholders})", {f"{name}_{i}": mid for i, mid in enumerate(ids)}
+
+
+def invalidate_users(user_upns: Iterable[str]) -> int:
+    """Participant 異動：這些使用者的 access set 下次重新載入。"""
+    return _cache.invalidate(keys=[u for u in user_upns if u])
+
+
+def invalidate_all() -> int:
+    return _cache.invalidate()
+
+
+def get_stats() -> dict:
+    return _cache.snapshot()
+
+
+def reset_stats():
+    _cache.clear()
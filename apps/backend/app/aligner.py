@@ -7,14 +7,92 @@ Provides:
     cross-zone detection and auto-advance
 
 Extracted from main.py as part of the refactor; logic unchanged.
+
+Alignment engine: the DP is vectorized with NumPy one query row at a time.
+With a linear gap penalty the in-row "left" dependency has a closed form,
+
+    H[i][j] = max_{k<=j} (E[k] + GAP * (j - k)),   E = max(0, diag, up)
+
+which is a running maximum (np.maximum.accumulate), so the cost is O(len(query))
+NumPy calls instead of O(len(query) x len(target)) Python operations. Script
+characters are encoded once at load_script as integer ids, and homophones are
+a precomputed integer substitution matrix over homophone classes. An optional
+diagonal band restricts the DP to a strip around an expected alignment: the
+normal window is first aligned in a band centred on the cursor (matches that
+start between NORMAL_WINDOW_BACK behind and NORMAL_BAND_FORWARD ahead of it)
+and falls back to the full window only when that band has no match above the
+threshold.
+Scores, match positions and the traceback are identical to the original
+cell-by-cell implementation (kept as _smith_waterman_python for benchmarks).
+
+Global resync: load_script also builds a k-gram inverted index over the script
+with homophone-normalized keys (sorted key array + np.searchsorted). A resync
+looks up the query's k-grams, votes for alignment diagonals and runs the DP only
+inside a few short candidate windows, so its cost no longer grows with the
+script length.
 """
 
 import logging
 import re
+from typing import Optional, Tuple
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+def _sw_fill(q_ids, q_homo, t_ids, t_homo, sub, match_score, gap_score,
+             band: Optional[Tuple[int, int]] = None):
+    """
+    Fill the Smith-Waterman matrix row by row.
+
+    Args:
+        q_ids / t_ids: int32 char ids (equal id <=> equal char)
+        q_homo / t_homo: homophone class index per char (0 = none)
+        sub: (K+1, K+1) int32 substitution matrix over homophone classes,
+             MISMATCH wherever the pair is not a homophone
+        band: optional (lo, hi) — only cells with lo <= j - i <= hi are
+              computed; the rest stay 0 (a local-alignment reset)
+
+    Returns:
+        (H, best_score, best_end) with the same tie-breaking as the original
+        loop (first strict maximum in row-major order).
+    """
+    m, n = len(q_ids), len(t_ids)
+    H = np.zeros((m + 1, n + 1), dtype=np.int32)
+    # GAP * j, reused by the running-max trick
+    ramp = gap_score * np.arange(n + 1, dtype=np.int32)
+
+    best_score = 0
+    best_end = 0
+    for i in range(1, m + 1):
+        if band is None:
+            lo, hi = 1, n
+        else:
+            lo, hi = max(1, i + band[0]), min(n, i + band[1])
+            if lo > hi:
+                continue
+
+        prev = H[i - 1]
+        scores = sub[q_homo[i - 1]][t_homo[lo - 1:hi]]
+        scores = np.where(t_ids[lo - 1:hi] == q_ids[i - 1], match_score, scores)
+
+        diag = prev[lo - 1:hi] + scores
+        up = prev[lo:hi + 1] + gap_score
+        e = np.maximum(np.maximum(diag, up), 0)
+
+        # Left chain: H[j] = max_{k<=j}(E[k] - GAP*k) + GAP*j
+        row = np.maximum.accumulate(e - ramp[lo:hi + 1]) + ramp[lo:hi + 1]
+        H[i, lo:hi + 1] = row
+
+        row_best = int(row.max())
+        if row_best > best_score:
+            best_score = row_best
+            best_end = lo + int(row.argmax())
+
+    return H, best_score, best_end
+
+
 class ScriptAligner:
     """
     Smith-Waterman Based Script Aligner for real-time alignment.
@@ -36,6 +114,13 @@ class ScriptAligner:
     NORMAL_WINDOW_FORWARD = 600   # Characters to search forward (increased for slow speech)
     MAX_CONSECUTIVE_FAILURES = 3  # Trigger global resync after this many failures (reduced for faster recovery)
     MIN_MATCH_SCORE = 6           # Minimum score to consider a valid match (lowered for short fragments)
+    NORMAL_BAND_FORWARD = 120     # Banded first pass: match may start this far past the cursor
+
+    # Global resync via k-gram anchors
+    RESYNC_KGRAM = 3              # k-gram length for the anchor index
+    RESYNC_MAX_CANDIDATES = 4     # Candidate windows aligned per resync
+    RESYNC_MAX_POSTINGS = 256     # Skip k-grams more frequent than this (no anchor value)
+    RESYNC_WINDOW_PAD = 20        # Extra chars around each candidate window
     
     def __init__(self):
         self.segments = []            # List of {source, target, start_idx, end_idx}
@@ -44,6 +129,7 @@ class ScriptAligner:
         self.current_cursor = 0       # Current character position
         self.consecutive_failures = 0 # Track failures for global resync
         self.last_matched_segments = set()  # Avoid duplicate segment sends
+        self._build_index()
     
     def load_script(self, script_text: str):
         """
@@ -58,6 +144,7 @@ class ScriptAligner:
         self.last_matched_segments = set()
         
         if not script_text:
+            self._build_index()
             return
         
         lines = script_text.split('\n')
@@ -97,6 +184,8 @@ class ScriptAligner:
                     self.char_to_segment.append(len(self.segments) - 1)
                 
                 self.full_cn_text += normalized
+
+        self._build_index()
     
     def _normalize(self, text: str) -> str:
         """Remove punctuation and whitespace, keep Chinese/English characters."""
@@ -115,6 +204,155 @@ class ScriptAligner:
         '晚': {'碗', '萬'}, '萬': {'晚'},
     }
     
+    # Partial match for homophones (75% of match score)
+    HOMOPHONE_SCORE = int(MATCH_SCORE * 0.75)
+
+    @classmethod
+    def _homophone_tables(cls):
+        """
+        Build (once per class) the homophone class index and the integer
+        substitution matrix. Only single characters take part — the DP is
+        character level, so multi-character keys could never match anyway.
+        """
+        if cls.__dict__.get('_homo_cache') is None:
+            chars = sorted({
+                c for k, vs in cls.HOMOPHONES.items() if len(k) == 1
+                for c in [k, *vs] if len(c) == 1
+            })
+            index = {c: k + 1 for k, c in enumerate(chars)}
+            sub = np.full((len(chars) + 1, len(chars) + 1), cls.MISMATCH_SCORE, dtype=np.int32)
+            for k, vs in cls.HOMOPHONES.items():
+                if len(k) != 1:
+                    continue
+                for v in vs:
+                    if len(v) == 1 and v != k:
+                        sub[index[k], index[v]] = cls.HOMOPHONE_SCORE
+            # Connected components of the (symmetrized) homophone relation,
+            # used as normalized keys by the k-gram index
+            canon = np.arange(len(chars) + 1, dtype=np.int64)
+
+            def root(x):
+                while canon[x] != x:
+                    x = canon[x]
+                return x
+
+            for k, vs in cls.HOMOPHONES.items():
+                for v in vs:
+                    if k in index and v in index:
+                        a, b = root(index[k]), root(index[v])
+                        canon[max(a, b)] = min(a, b)
+            canon = np.array([root(x) for x in range(len(chars) + 1)], dtype=np.int64)
+            cls._homo_cache = (index, sub, canon)
+        return cls._homo_cache
+
+    def _encode(self, text: str, vocab: dict):
+        """Encode text as (char ids, homophone class ids). Unknown chars get -1."""
+        homo_index = self._homophone_tables()[0]
+        ids = np.fromiter((vocab.get(c, -1) for c in text), dtype=np.int32, count=len(text))
+        homo = np.fromiter((homo_index.get(c, 0) for c in text), dtype=np.int32, count=len(text))
+        return ids, homo
+
+    def _build_index(self):
+        """Encode the flattened script once so each alignment skips per-char work."""
+        self._vocab = {c: k for k, c in enumerate(dict.fromkeys(self.full_cn_text))}
+        self._script_ids, self._script_homo = self._encode(self.full_cn_text, self._vocab)
+        self._build_kgram_index()
+
+    def _kgram_keys(self, ids, homo):
+        """
+        Homophone-normalized k-gram keys (int64) for every start offset.
+        Keys containing a char unknown to the script (and not a homophone)
+        are returned as -1 so they never hit.
+        """
+        k = self.RESYNC_KGRAM
+        n = len(ids) - k + 1
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        canon = self._homophone_tables()[2]
+        offset = len(canon)
+        # Homophone chars collapse to their class root; other chars are shifted past them
+        norm = np.where(homo > 0, canon[homo], ids.astype(np.int64) + offset)
+        unknown = (ids < 0) & (homo == 0)
+        base = len(self._vocab) + offset + 1
+
+        keys = np.zeros(n, dtype=np.int64)
+        bad = np.zeros(n, dtype=bool)
+        for d in range(k):
+            keys = keys * base + norm[d:d + n]
+            bad |= unknown[d:d + n]
+        keys[bad] = -1
+        return keys
+
+    def _build_kgram_index(self):
+        """Inverted k-gram index: sorted keys with their script positions."""
+        keys = self._kgram_keys(self._script_ids, self._script_homo)
+        order = np.argsort(keys, kind='stable')
+        self._kgram_sorted = keys[order]
+        self._kgram_pos = order.astype(np.int64)
+
+    def _resync_candidates(self, query: str, search_start: int, search_end: int):
+        """
+        Vote for alignment diagonals using the k-gram index.
+        Returns up to RESYNC_MAX_CANDIDATES script offsets where the query
+        probably starts, best first.
+        """
+        q_ids, q_homo = self._encode(query, self._vocab)
+        q_keys = self._kgram_keys(q_ids, q_homo)
+        if len(q_keys) == 0 or len(self._kgram_sorted) == 0:
+            return []
+
+        lo = np.searchsorted(self._kgram_sorted, q_keys, side='left')
+        hi = np.searchsorted(self._kgram_sorted, q_keys, side='right')
+
+        diagonals = []
+        for q_off, key, a, b in zip(range(len(q_keys)), q_keys, lo, hi):
+            if key < 0 or b == a or b - a > self.RESYNC_MAX_POSTINGS:
+                continue
+            pos = self._kgram_pos[a:b]
+            pos = pos[(pos >= search_start) & (pos < search_end)]
+            diagonals.append(pos - q_off)
+        if not diagonals:
+            return []
+
+        # Bucket diagonals so small indels in the transcript still vote together
+        bucket = max(len(query) // 2, self.RESYNC_KGRAM)
+        diag = np.concatenate(diagonals)
+        bins, counts = np.unique(diag // bucket, return_counts=True)
+        top = np.argsort(-counts, kind='stable')[:self.RESYNC_MAX_CANDIDATES]
+        return [int(diag[diag // bucket == bins[t]].min()) for t in top]
+
+    def _resync_search(self, query: str, search_start: int, search_end: int):
+        """
+        Global resync over [search_start, search_end) via k-gram anchors.
+        Returns (match_start, match_end, score) relative to search_start,
+        like a full-range _align_script call.
+        """
+        span = len(query) + self.RESYNC_WINDOW_PAD
+        if search_end - search_start <= self.NORMAL_WINDOW_BACK + self.NORMAL_WINDOW_FORWARD:
+            # Short range: exhaustive DP is already cheap
+            return self._align_script(query, search_start, search_end)
+
+        q_ids, q_homo = self._encode(query, self._vocab)
+        best = (0, 0, 0)
+        best_global = None
+        for anchor in sorted(self._resync_candidates(query, search_start, search_end)):
+            win_start = max(search_start, anchor - span)
+            win_end = min(search_end, anchor + len(query) + span)
+            # Band around the anchor diagonal (j - i), in window coordinates
+            diag = anchor - win_start
+            band = (diag - span, diag + span)
+            start, end, score = self._align_ids(
+                q_ids, q_homo,
+                self._script_ids[win_start:win_end], self._script_homo[win_start:win_end],
+                band,
+            )
+            if score > best[2]:
+                best = (start, end, score)
+                best_global = win_start
+        if best_global is None:
+            return (0, 0, 0)
+        return (best[0] + best_global - search_start, best[1] + best_global - search_start, best[2])
+
     def _is_homophone(self, char1: str, char2: str) -> bool:
         """Check if two characters are homophones (similar sounds)"""
         if char1 == char2:
@@ -122,9 +360,78 @@ class ScriptAligner:
         homophones1 = self.HOMOPHONES.get(char1, set())
         return char2 in homophones1
     
-    def smith_waterman(self, query: str, target: str):
+    def smith_waterman(self, query: str, target: str, band: Optional[Tuple[int, int]] = None):
+        """
+        Smith-Waterman local alignment algorithm (NumPy-vectorized).
+        Returns: (best_start, best_end, best_score) - position in target where query best matches
+
+        band: optional (lo, hi) diagonal range (j - i) to restrict the DP to.
+        """
+        if not query or not target:
+            return (0, 0, 0)
+        vocab = {c: k for k, c in enumerate(dict.fromkeys(query + target))}
+        q_ids, q_homo = self._encode(query, vocab)
+        t_ids, t_homo = self._encode(target, vocab)
+        return self._align_ids(q_ids, q_homo, t_ids, t_homo, band)
+
+    def _align_ids(self, q_ids, q_homo, t_ids, t_homo, band=None):
+        """Vectorized fill + the original traceback, on pre-encoded ids."""
+        if len(q_ids) == 0 or len(t_ids) == 0:
+            return (0, 0, 0)
+        sub = self._homophone_tables()[1]
+        H, best_score, best_end = _sw_fill(
+            q_ids, q_homo, t_ids, t_homo, sub,
+            self.MATCH_SCORE, self.GAP_SCORE, band,
+        )
+
+        # Traceback to find start position
+        best_start = best_end
+        if best_score > 0:
+            # Simple traceback: find where the match started
+            i, j = len(q_ids), best_end
+            while i > 0 and j > 0 and H[i, j] > 0:
+                if q_ids[i-1] == t_ids[j-1]:
+                    i -= 1
+                    j -= 1
+                elif H[i-1, j] >= H[i, j-1]:
+                    i -= 1
+                else:
+                    j -= 1
+            best_start = j
+
+        return (best_start, best_end, best_score)
+
+    def _align_script(self, query: str, start: int, end: int):
+        """Align a query against full_cn_text[start:end] using the precomputed ids."""
+        q_ids, q_homo = self._encode(query, self._vocab)
+        return self._align_ids(q_ids, q_homo, self._script_ids[start:end], self._script_homo[start:end])
+
+    def _window_search(self, query: str, search_start: int, search_end: int, min_normalized: float):
         """
-        Smith-Waterman local alignment algorithm.
+        Normal-window alignment over [search_start, search_end).
+        Runs the DP in a diagonal band centred on the cursor first; if that band
+        has no match scoring at least min_normalized, aligns the full window
+        (slow speech / skipped lines). Returns (match_start, match_end, score)
+        relative to search_start, like _align_script.
+        """
+        q_ids, q_homo = self._encode(query, self._vocab)
+        t_ids = self._script_ids[search_start:search_end]
+        t_homo = self._script_homo[search_start:search_end]
+        cursor = self.current_cursor - search_start
+        # Diagonal j - i ~ match start minus skipped query prefix; allow a query's
+        # worth of slack on both sides for prefixes and script-side gaps.
+        band = (cursor - self.NORMAL_WINDOW_BACK - len(q_ids),
+                cursor + self.NORMAL_BAND_FORWARD + len(q_ids))
+        if band[1] - band[0] < len(t_ids):
+            result = self._align_ids(q_ids, q_homo, t_ids, t_homo, band)
+            if result[2] >= min_normalized * len(q_ids) * self.MATCH_SCORE:
+                return result
+        return self._align_ids(q_ids, q_homo, t_ids, t_homo)
+
+    def _smith_waterman_python(self, query: str, target: str):
+        """
+        Original cell-by-cell Smith-Waterman. Reference for tests and
+        scripts/bench_aligner.py — not used on the live path.
         Returns: (best_start, best_end, best_score) - position in target where query best matches
         """
         if not query or not target:
@@ -222,8 +529,13 @@ class ScriptAligner:
         if not search_window:
             return None
         
-        # Run Smith-Waterman
-        match_start, match_end, score = self.smith_waterman(normalized_input, search_window)
+        # Run Smith-Waterman (cursor band on the normal window, anchored candidate windows on global resync)
+        if is_global_search:
+            match_start, match_end, score = self._resync_search(normalized_input, search_start, search_end)
+        else:
+            match_start, match_end, score = self._window_search(
+                normalized_input, search_start, search_end, effective_threshold
+            )
         
         # Convert to global indices
         global_start = search_start + match_start
@@ -356,6 +668,7 @@ class MultiSpeakerScriptAligner(ScriptAligner):
         self.current_zone_index = 0
         
         if not script_text:
+            self._build_index()
             return
         
         # Check if multi-speaker format
@@ -435,6 +748,8 @@ class MultiSpeakerScriptAligner(ScriptAligner):
                         current_speaker,
                         (segment_start, segment_end)
                     ))
+
+        self._build_index()
         
         logger.info(f"[MultiSpeaker] Loaded {len(self.speaker_zones)} speaker zones, {len(self.segments)} total segments")
         for i, zone in enumerate(self.speaker_zones):
@@ -555,8 +870,13 @@ class MultiSpeakerScriptAligner(ScriptAligner):
                     return self.find_match(transcript_text, threshold)
             return None
         
-        # Run Smith-Waterman on restricted range
-        match_start, match_end, score = self.smith_waterman(normalized_input, search_window)
+        # Run Smith-Waterman on restricted range (cursor band first, anchored candidate windows on resync)
+        if is_global_search:
+            match_start, match_end, score = self._resync_search(normalized_input, search_start, search_end)
+        else:
+            match_start, match_end, score = self._window_search(
+                normalized_input, search_start, search_end, effective_threshold
+            )
         
         global_start = search_start + match_start
         global_end = search_start + match_end
@@ -1,42 +1,52 @@
 """
-ASR helpers — Gemini multimodal ASR + optional local-ASR fallback shims.
+ASR helpers — live (WebSocket) ASR backends.
 
 Why a separate module?
   - main.py is being slimmed down; this code has clear single responsibility
     (ASR transcription helpers) and is shared between WebSocket route and
     main.py's startup hook (load_asr_model).
-  - The conditional import of `scripts.transcribe_sprint0` is GPU-dependent
-    and must fail gracefully on CPU-only Cloud Run instances.
+  - Optional dependencies (faster-whisper, `scripts.transcribe_sprint0`)
+    must fail gracefully on CPU-only Cloud Run instances.
+
+Backend Pattern (LIVE_ASR_BACKEND env):
+  LiveASRBackend (ABC)
+    ├── GeminiLiveASRBackend        — Gemini multimodal, one WAV per VAD segment (default)
+    └── FasterWhisperLiveASRBackend — on-box CPU faster-whisper int8, warm shared
+                                      model + bounded worker pool ("local")
 """
 
 import io
+import os
 import logging
 import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# "gemini" (default) | "local" (faster-whisper on CPU)
+LIVE_ASR_BACKEND = os.getenv("LIVE_ASR_BACKEND", "gemini").lower()
+# 即時路徑要 sub-second：預設 small（int8 CPU），可換 Breeze 等 CTranslate2 模型
+LIVE_ASR_LOCAL_MODEL = os.getenv("LIVE_ASR_LOCAL_MODEL", "small")
+LIVE_ASR_LOCAL_COMPUTE_TYPE = os.getenv("LIVE_ASR_LOCAL_COMPUTE_TYPE", "int8")
+# 同時推論數上限（全進程共用）；對應 CTranslate2 num_workers
+LIVE_ASR_LOCAL_WORKERS = int(os.getenv("LIVE_ASR_LOCAL_WORKERS", "2"))
+# 每個推論使用的 CPU threads（0 = CTranslate2 自行決定）
+LIVE_ASR_LOCAL_CPU_THREADS = int(os.getenv("LIVE_ASR_LOCAL_CPU_THREADS", "0"))
+LIVE_ASR_LOCAL_BEAM_SIZE = int(os.getenv("LIVE_ASR_LOCAL_BEAM_SIZE", "1"))
+# Whisper initial_prompt 上限 224 tokens；中文約一字一 token，保留尾端最相關的上下文
+LIVE_ASR_LOCAL_PROMPT_CHARS = 200
+
 
 # ============================================
-# Local ASR (optional, GPU-dependent)
+# Keyword corrections (shared with the GPU transcribe script)
 # ============================================
 try:
-    from scripts.transcribe_sprint0 import (
-        get_transcription,
-        load_asr_model,
-        correct_keywords,
-        logger as asr_logger,
-    )
-    LOCAL_ASR_AVAILABLE = True
+    from scripts.transcribe_sprint0 import correct_keywords
 except ImportError as e:
-    asr_logger = logging.getLogger("asr_fallback")
-    asr_logger.info(f"Local ASR not available: {e}. Using Gemini API for ASR.")
-    LOCAL_ASR_AVAILABLE = False
-
-    def get_transcription(*args, **kwargs):
-        raise NotImplementedError("Local ASR not available. Use Gemini API.")
-
-    def load_asr_model(*args, **kwargs):
-        pass
+    logger.info(f"Keyword corrections not available: {e}.")
 
     def correct_keywords(text):
         return text
@@ -57,7 +67,7 @@ async def get_transcription_gemini(audio_np, lang: str = "zh", prompt: str = "")
     Returns:
         Transcribed text string (empty if no speech detected)
     """
-    from app.llm_utils import get_gemini_client, GEMINI_MODEL
+    from app.llm_utils import get_gemini_client, reset_gemini_client_on_transport_error, GEMINI_MODEL
 
     client = get_gemini_client()
     if client is None:
@@ -98,7 +108,169 @@ async def get_transcription_gemini(audio_np, lang: str = "zh", prompt: str = "")
         )
 
     # Run synchronous Gemini call in thread pool
-    response = await asyncio.to_thread(_call_gemini_asr)
+    try:
+        response = await asyncio.to_thread(_call_gemini_asr)
+    except Exception as e:
+        reset_gemini_client_on_transport_error(e)
+        raise
 
     result = response.text.strip() if response.text else ""
     return result
+
+
+# ============================================
+# Live ASR backends
+# ============================================
+
+class LiveASRBackend(ABC):
+    """Interface for the live (per VAD segment) transcription path."""
+
+    @abstractmethod
+    async def transcribe(self, audio_np, lang: str = "zh", prompt: str = "") -> str:
+        """Transcribe a float32 16kHz mono segment. Empty string if no speech."""
+        ...
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Check if this backend can be used in the current environment."""
+        ...
+
+    @property
+    @abstractmethod
+    def backend_name(self) -> str:
+        """Human-readable backend name."""
+        ...
+
+    def warm_up(self):
+        """Load models ahead of the first session (blocking). No-op by default."""
+
+
+class GeminiLiveASRBackend(LiveASRBackend):
+    """Cloud ASR via Gemini multimodal (see get_transcription_gemini)."""
+
+    @property
+    def backend_name(self) -> str:
+        return "Gemini multimodal ASR"
+
+    def is_available(self) -> bool:
+        return True
+
+    async def transcribe(self, audio_np, lang: str = "zh", prompt: str = "") -> str:
+        return await get_transcription_gemini(audio_np, lang, prompt)
+
+
+class FasterWhisperLiveASRBackend(LiveASRBackend):
+    """
+    On-box CPU ASR with faster-whisper (CTranslate2, int8).
+
+    One warm model is shared by every session; inference runs on a bounded
+    thread pool so concurrent rooms queue instead of oversubscribing the CPU.
+    """
+
+    def __init__(
+        self,
+        model_name: str = LIVE_ASR_LOCAL_MODEL,
+        compute_type: str = LIVE_ASR_LOCAL_COMPUTE_TYPE,
+        workers: int = LIVE_ASR_LOCAL_WORKERS,
+        cpu_threads: int = LIVE_ASR_LOCAL_CPU_THREADS,
+        beam_size: int = LIVE_ASR_LOCAL_BEAM_SIZE,
+    ):
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.workers = max(1, workers)
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="live-asr"
+        )
+
+    @property
+    def backend_name(self) -> str:
+        return f"faster-whisper {self.model_name} (CPU {self.compute_type})"
+
+    def is_available(self) -> bool:
+        try:
+            import faster_whisper  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _load_model(self):
+        if self._model is not None:
+            return self._model
+        with self._load_lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+
+                logger.info(f"[LiveASR] Loading {self.backend_name} (workers={self.workers})...")
+                self._model = WhisperModel(
+                    self.model_name,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.workers,
+                )
+                logger.info("[LiveASR] Local ASR model loaded.")
+        return self._model
+
+    def warm_up(self):
+        self._load_model()
+
+    def _transcribe_sync(self, audio_np, lang: str, prompt: str) -> str:
+        model = self._load_model()
+        # zh-nan 等 MeetChi 內部模式標記非 faster-whisper 語言碼，正規化為 zh。
+        if lang and lang.startswith("zh-"):
+            lang = "zh"
+        segments, _info = model.transcribe(
+            audio_np,
+            language=lang or None,
+            initial_prompt=prompt[-LIVE_ASR_LOCAL_PROMPT_CHARS:] or None,
+            beam_size=self.beam_size,
+            temperature=0,
+            condition_on_previous_text=False,
+            vad_filter=False,  # segments are already VAD-split upstream
+        )
+        return "".join(seg.text for seg in segments).strip()
+
+    async def transcribe(self, audio_np, lang: str = "zh", prompt: str = "") -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._transcribe_sync, audio_np, lang, prompt
+        )
+
+
+_live_backend: Optional[LiveASRBackend] = None
+
+
+def get_live_asr_backend() -> LiveASRBackend:
+    """
+    Get or create the live ASR backend singleton (selected by LIVE_ASR_BACKEND).
+
+    Falls back to Gemini when the local backend's dependencies are missing.
+    """
+    global _live_backend
+    if _live_backend is not None:
+        return _live_backend
+
+    if LIVE_ASR_BACKEND in ("local", "faster-whisper"):
+        backend = FasterWhisperLiveASRBackend()
+        if backend.is_available():
+            _live_backend = backend
+        else:
+            logger.warning(
+                "[LiveASR] LIVE_ASR_BACKEND=local but faster-whisper is not installed; "
+                "falling back to Gemini."
+            )
+
+    if _live_backend is None:
+        _live_backend = GeminiLiveASRBackend()
+
+    logger.info(f"Live ASR backend: {_live_backend.backend_name}")
+    return _live_backend
+
+
+def load_asr_model():
+    """Startup hook: warm the configured live ASR backend (blocking)."""
+    get_live_asr_backend().warm_up()
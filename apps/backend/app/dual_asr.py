@@ -10,7 +10,7 @@ import asyncio
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
-from app.llm_utils import get_gemini_client, GEMINI_MODEL
+from app.llm_utils import get_gemini_client, reset_gemini_client_on_transport_error, GEMINI_MODEL
 
 logger = logging.getLogger(__name__)
 
@@ -328,6 +328,7 @@ class DualASREngine:
             return result.get("text", zh_text).strip()
             
         except Exception as e:
+            reset_gemini_client_on_transport_error(e)
             logger.error(f"LLM selection failed: {e}")
         
         # Fallback to Mandarin
@@ -1,22 +1,39 @@
 """
 Embedding Pipeline for MeetChi Cross-Meeting RAG
 
-Generates 768-dimensional embeddings using Gemini text-embedding-004
-for both TranscriptSegment content and Meeting summaries.
+Generates 768-dimensional embeddings for both TranscriptSegment content and
+Meeting summaries, through a pluggable EmbeddingProvider:
+
+  EmbeddingProvider (ABC)
+    ├── GeminiEmbeddingProvider — Gemini text-embedding-004 API (default)
+    └── LocalEmbeddingProvider  — on-box CPU model (sentence-transformers / ONNX
+                                  Runtime), dynamic batching + thread pool,
+                                  projected to EMBEDDING_DIMENSION
+
+EMBEDDING_PROVIDER=gemini|local 選擇後端。兩者的向量空間不相容：切換後必須
+force_reembed_all（query cache 以 provider.model_id 為 key，不會混用舊向量）。
 
 Integrates with the existing task pipeline (tasks.py) to auto-embed
 after transcription and summarization complete.
 """
 
+import hashlib
 import logging
 import os
-from typing import List, Optional
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
 
 from sqlalchemy.orm import Session
 from google import genai
 
 from app.models import Meeting, TranscriptSegment
-from app.llm_utils import get_gemini_client
+from app.llm_utils import get_gemini_client, reset_gemini_client_on_transport_error
+from app.embedding_cache import embed_with_cache
+from app.summary_digest import embed_body, embed_body_or_parse
 
 logger = logging.getLogger(__name__)
 
@@ -26,47 +43,455 @@ EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "text-embedding-004")
 EMBEDDING_DIMENSION = 768
 # Batch size for Gemini embed_content API (max 100 per request)
 EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "50"))
+# 滑動視窗：前後各取 EMBED_WINDOW 個 segment 合併成段落做 embedding
+EMBED_WINDOW = int(os.getenv("EMBED_WINDOW", "5"))
+
+# gemini | local
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini").lower()
+# 本機模型：paraphrase-multilingual-mpnet-base-v2 原生 768 維、中英皆可；
+# 換成 384 維等小模型時由 projection 補到 768（見 _projection_matrix）
+EMBEDDING_LOCAL_MODEL = os.getenv(
+    "EMBEDDING_LOCAL_MODEL", "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+)
+# sentence-transformers | onnx（onnx 需 EMBEDDING_LOCAL_ONNX_DIR 內含 model.onnx + tokenizer.json）
+EMBEDDING_LOCAL_BACKEND = os.getenv("EMBEDDING_LOCAL_BACKEND", "sentence-transformers").lower()
+EMBEDDING_LOCAL_ONNX_DIR = os.getenv("EMBEDDING_LOCAL_ONNX_DIR", "")
+EMBEDDING_LOCAL_MAX_TOKENS = int(os.getenv("EMBEDDING_LOCAL_MAX_TOKENS", "256"))
+# Dynamic batching：等最多 MAX_WAIT_MS 湊滿 BATCH_SIZE 筆（跨呼叫端合併）再推論
+EMBEDDING_LOCAL_BATCH_SIZE = int(os.getenv("EMBEDDING_LOCAL_BATCH_SIZE", "32"))
+EMBEDDING_LOCAL_MAX_WAIT_MS = float(os.getenv("EMBEDDING_LOCAL_MAX_WAIT_MS", "5"))
+# 推論 worker 數（ONNX Runtime / torch 推論時釋放 GIL，多 batch 可並行）
+EMBEDDING_LOCAL_WORKERS = int(os.getenv("EMBEDDING_LOCAL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 每個 worker 的 intra-op threads（workers × threads ≈ CPU 核數）
+EMBEDDING_LOCAL_THREADS = int(os.getenv("EMBEDDING_LOCAL_THREADS", "0")) or max(
+    1, (os.cpu_count() or 1) // max(EMBEDDING_LOCAL_WORKERS, 1)
+)
+
+
+# ============================================
+# Provider interface
+# ============================================
+
+class EmbeddingProvider(ABC):
+    """
+    Text → EMBEDDING_DIMENSION-dim vectors.
+
+    embed() keeps indices aligned with its input: items that failed are None
+    (callers skip them and leave the DB column NULL for the next backfill).
+    """
+
+    dimension: int = EMBEDDING_DIMENSION
+
+    @property
+    @abstractmethod
+    def provider_name(self) -> str:
+        """Human-readable provider name."""
+        ...
+
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        """Stable identifier of the vector space (cache keys; changes ⇒ re-embed)."""
+        ...
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Check if this provider is ready to use."""
+        ...
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts; failed items are None."""
+        ...
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """One request's worth of texts; raises on failure (caller owns retries)."""
+        vectors = self.embed(texts)
+        if any(v is None for v in vectors):
+            raise RuntimeError(f"{self.provider_name}: embedding failed for part of the batch")
+        return vectors
+
+    def describe(self) -> dict:
+        return {"provider": self.provider_name, "model_id": self.model_id, "dimension": self.dimension}
 
 
-def embed_texts(client: genai.Client, texts: List[str]) -> List[List[float]]:
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Gemini embed_content API, EMBEDDING_BATCH_SIZE texts per request."""
+
+    def __init__(self, client: Optional[genai.Client] = None, model: str = EMBEDDING_MODEL,
+                 batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+
+    @property
+    def provider_name(self) -> str:
+        return f"Gemini ({self.model})"
+
+    @property
+    def model_id(self) -> str:
+        # 歷來 query cache 直接以 EMBEDDING_MODEL 當 key，維持相同值避免整批失效
+        return self.model
+
+    def _client(self) -> Optional[genai.Client]:
+        return self.client or get_gemini_client()
+
+    def is_available(self) -> bool:
+        return self._client() is not None
+
+    def _request(self, client: genai.Client, batch: List[str]) -> List[List[float]]:
+        response = client.models.embed_content(
+            model=self.model,
+            contents=batch,
+        )
+        return [embedding_obj.values for embedding_obj in response.embeddings]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        client = self._client()
+        if client is None:
+            raise RuntimeError("Gemini client unavailable")
+        return self._request(client, texts)
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        if not texts:
+            return []
+        client = self._client()
+        if client is None:
+            logger.error("[Embedding] Gemini client unavailable")
+            return [None] * len(texts)
+
+        embeddings = []
+        # Process in batches to respect API limits
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            try:
+                embeddings.extend(self._request(client, batch))
+            except Exception as e:
+                reset_gemini_client_on_transport_error(e)
+                logger.error(f"Embedding batch {i//self.batch_size} failed: {e}")
+                # Fill with None for failed batch items so indices stay aligned
+                embeddings.extend([None] * len(batch))
+        return embeddings
+
+
+# ============================================
+# Local CPU provider
+# ============================================
+
+def _projection_matrix(src_dim: int, dst_dim: int, seed: str):
+    """
+    Fixed (src_dim, dst_dim) projection, deterministic per model.
+
+    src_dim ≤ dst_dim：列正交（semi-orthogonal）→ 內積 / cosine 完全保留。
+    src_dim > dst_dim：Gaussian random projection（Johnson–Lindenstrauss，近似保留）。
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(int(hashlib.sha256(seed.encode()).hexdigest()[:16], 16))
+    if src_dim <= dst_dim:
+        q, _ = np.linalg.qr(rng.standard_normal((dst_dim, src_dim)))
+        return q.T.astype(np.float32)  # rows orthonormal
+    return (rng.standard_normal((src_dim, dst_dim)) / np.sqrt(dst_dim)).astype(np.float32)
+
+
+class _DynamicBatcher:
+    """
+    Coalesce embed requests from any number of callers into model batches.
+
+    一個 dispatcher thread 從 queue 取 item：湊滿 max_batch 或等到 max_wait 就把
+    這批交給 ThreadPoolExecutor 推論；每個 item 有自己的 Future。同時進來的
+    backfill 與線上 query 會被合併，長短文字各自依長度排序以減少 padding。
+    """
+
+    def __init__(self, infer: Callable, max_batch: int, max_wait_ms: float, workers: int):
+        self._infer = infer
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="embed")
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._dispatch, name="embed-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        self._ensure_started()
+        futures = []
+        for t in texts:
+            f: Future = Future()
+            self._queue.put((t, f))
+            futures.append(f)
+        return futures
+
+    def _dispatch(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    # 已排隊的直接取；空了才等到 deadline
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch) -> None:
+        batch.sort(key=lambda item: len(item[0]))
+        try:
+            vectors = self._infer([t for t, _ in batch])
+        except Exception as e:
+            with self._lock:
+                self.failures += len(batch)
+            for _, f in batch:
+                f.set_exception(e)
+            return
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+        for (_, f), vec in zip(batch, vectors):
+            f.set_result(vec)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "failures": self.failures,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else None,
+                "queued": self._queue.qsize(),
+            }
+
+
+def _load_sentence_transformer(model_name: str, threads: int):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, device="cpu")
+    model.max_seq_length = EMBEDDING_LOCAL_MAX_TOKENS
+
+    def encode(texts: List[str]):
+        return model.encode(texts, batch_size=len(texts), convert_to_numpy=True,
+                            normalize_embeddings=True, show_progress_bar=False)
+
+    return encode, model.get_sentence_embedding_dimension()
+
+
+def _load_onnx(model_dir: str, threads: int):
+    import numpy as np
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+    tokenizer.enable_truncation(max_length=EMBEDDING_LOCAL_MAX_TOKENS)
+    tokenizer.enable_padding()
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = threads
+    session = ort.InferenceSession(
+        os.path.join(model_dir, "model.onnx"), sess_options=opts, providers=["CPUExecutionProvider"]
+    )
+    input_names = {i.name for i in session.get_inputs()}
+
+    def encode(texts: List[str]):
+        encoded = tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = session.run(None, feeds)[0]  # (batch, seq, dim)
+        # mean pooling over real tokens
+        m = mask[..., None].astype(np.float32)
+        return (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+
+    return encode, int(session.get_outputs()[0].shape[-1])
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    On-box CPU embedding (no network), output projected to EMBEDDING_DIMENSION.
+
+    encoder: optional (texts → ndarray[n, d]) override; by default the model is
+    loaded lazily on first use from EMBEDDING_LOCAL_BACKEND.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_LOCAL_MODEL, backend: str = EMBEDDING_LOCAL_BACKEND,
+                 encoder: Optional[Callable] = None, native_dim: Optional[int] = None,
+                 max_batch: int = EMBEDDING_LOCAL_BATCH_SIZE,
+                 max_wait_ms: float = EMBEDDING_LOCAL_MAX_WAIT_MS,
+                 workers: int = EMBEDDING_LOCAL_WORKERS):
+        self.model_name = model_name
+        self.backend = backend
+        self._encoder = encoder
+        self._native_dim = native_dim
+        self._projection = None
+        self._load_lock = threading.Lock()
+        self._last_error: Optional[str] = None
+        self._batcher = _DynamicBatcher(self._infer, max_batch, max_wait_ms, workers)
+
+    @property
+    def provider_name(self) -> str:
+        return f"Local CPU ({self.backend}: {self.model_name})"
+
+    @property
+    def model_id(self) -> str:
+        return f"local:{self.model_name}@{self.dimension}"
+
+    def is_available(self) -> bool:
+        if self._encoder is not None:
+            return True
+        try:
+            if self.backend == "onnx":
+                import onnxruntime  # noqa: F401
+                import tokenizers  # noqa: F401
+                return bool(EMBEDDING_LOCAL_ONNX_DIR) and os.path.isdir(EMBEDDING_LOCAL_ONNX_DIR)
+            import sentence_transformers  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _ensure_loaded(self) -> None:
+        if self._encoder is not None:
+            return
+        with self._load_lock:
+            if self._encoder is None:
+                t0 = time.perf_counter()
+                if self.backend == "onnx":
+                    self._encoder, self._native_dim = _load_onnx(EMBEDDING_LOCAL_ONNX_DIR, EMBEDDING_LOCAL_THREADS)
+                else:
+                    self._encoder, self._native_dim = _load_sentence_transformer(
+                        self.model_name, EMBEDDING_LOCAL_THREADS
+                    )
+                logger.info(
+                    f"[Embedding] Loaded {self.provider_name} dim={self._native_dim} "
+                    f"in {time.perf_counter() - t0:.1f}s"
+                )
+
+    def _infer(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        self._ensure_loaded()
+        vecs = np.asarray(self._encoder(texts), dtype=np.float32)
+        dim = self._native_dim = vecs.shape[1]
+        if dim != self.dimension:
+            if self._projection is None or self._projection.shape[0] != dim:
+                self._projection = _projection_matrix(dim, self.dimension, self.model_name)
+            vecs = vecs @ self._projection
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        vecs = vecs / np.clip(norms, 1e-12, None)
+        return [v.tolist() for v in vecs]
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        if not texts:
+            return []
+        out: List[Optional[List[float]]] = []
+        for f in self._batcher.submit(texts):
+            try:
+                out.append(f.result())
+            except Exception as e:
+                if self._last_error != str(e):  # 同一個錯誤（如模型載入失敗）只記一次
+                    self._last_error = str(e)
+                    logger.error(f"[Embedding] Local embedding failed: {e}")
+                out.append(None)
+        return out
+
+    def describe(self) -> dict:
+        info = super().describe()
+        info["backend"] = self.backend
+        info["native_dimension"] = self._native_dim
+        info["batcher"] = self._batcher.stats()
+        return info
+
+
+# ============================================
+# Provider Factory
+# ============================================
+
+_provider_instance: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    Get or create the embedding provider singleton (EMBEDDING_PROVIDER env).
+
+    local 不可用時**不** fallback 到 Gemini：向量空間不同，混用會讓檢索靜默失準；
+    改為記錄錯誤，embed 回傳 None（與 Gemini API 失敗時相同的處理路徑）。
+    """
+    global _provider_instance
+    if _provider_instance is None:
+        with _provider_lock:
+            if _provider_instance is None:
+                if EMBEDDING_PROVIDER == "local":
+                    provider: EmbeddingProvider = LocalEmbeddingProvider()
+                    if not provider.is_available():
+                        logger.error(
+                            f"[Embedding] EMBEDDING_PROVIDER=local but {provider.provider_name} "
+                            "is not installed/configured; embeddings will fail"
+                        )
+                else:
+                    provider = GeminiEmbeddingProvider()
+                logger.info(f"Embedding provider: {provider.provider_name}")
+                _provider_instance = provider
+    return _provider_instance
+
+
+def set_embedding_provider(provider: Optional[EmbeddingProvider]) -> None:
+    """Override the process-wide provider (tests / scripts); None → re-create from env."""
+    global _provider_instance
+    with _provider_lock:
+        _provider_instance = provider
+
+
+def _resolve_provider(client: Optional[genai.Client]) -> EmbeddingProvider:
+    """Caller-supplied Gemini client wins over the pooled one (keeps old call sites' semantics)."""
+    provider = get_embedding_provider()
+    if client is not None and isinstance(provider, GeminiEmbeddingProvider) and provider.client is None:
+        return GeminiEmbeddingProvider(client=client, model=provider.model, batch_size=provider.batch_size)
+    return provider
+
+
+def embed_texts(client: Optional[genai.Client], texts: List[str]) -> List[List[float]]:
     """
-    Generate embeddings for a batch of texts using Gemini Embedding API.
+    Generate embeddings for a batch of texts with the configured provider.
+    Consults the (model, text hash) embedding cache first — see app.embedding_cache.
     
     Args:
-        client: Initialized Gemini client
+        client: Gemini client (used by the Gemini provider; ignored by local)
         texts: List of text strings to embed
         
     Returns:
-        List of 768-dimensional embedding vectors
+        List of 768-dimensional embedding vectors (None for failed items)
     """
     if not texts:
         return []
-    
-    embeddings = []
-    # Process in batches to respect API limits
-    for i in range(0, len(texts), EMBEDDING_BATCH_SIZE):
-        batch = texts[i:i + EMBEDDING_BATCH_SIZE]
-        try:
-            response = client.models.embed_content(
-                model=EMBEDDING_MODEL,
-                contents=batch,
-            )
-            for embedding_obj in response.embeddings:
-                embeddings.append(embedding_obj.values)
-        except Exception as e:
-            logger.error(f"Embedding batch {i//EMBEDDING_BATCH_SIZE} failed: {e}")
-            # Fill with None for failed batch items so indices stay aligned
-            embeddings.extend([None] * len(batch))
-    
-    return embeddings
+    return embed_with_cache(_resolve_provider(client), texts)
 
 
-def embed_single_text(client: genai.Client, text: str) -> Optional[List[float]]:
+def embed_single_text(client: Optional[genai.Client], text: str) -> Optional[List[float]]:
     """
     Generate embedding for a single text string.
     
     Args:
-        client: Initialized Gemini client
+        client: Gemini client (used by the Gemini provider; ignored by local)
         text: Text to embed
         
     Returns:
@@ -76,16 +501,67 @@ def embed_single_text(client: genai.Client, text: str) -> Optional[List[float]]:
         return None
     
     try:
-        response = client.models.embed_content(
-            model=EMBEDDING_MODEL,
-            contents=[text.strip()],
-        )
-        return response.embeddings[0].values
+        return _resolve_provider(client).embed([text.strip()])[0]
     except Exception as e:
         logger.error(f"Single text embedding failed: {e}")
         return None
 
 
+def _segment_text(seg) -> str:
+    content = seg.content_polished or seg.content_raw or ""
+    if seg.speaker:
+        return f"[{seg.speaker}] {content}"
+    return content
+
+
+def build_window_texts(all_segments, targets, window: int) -> List[str]:
+    """
+    Sliding-window paragraph text for each target segment.
+
+    all_segments: the meeting's segments ordered by "order"（需有 order / speaker /
+    content_polished / content_raw）；targets: 要 embed 的子集。
+    每個 target 取前後各 window 個 segment（含自己）以空白串接。
+    """
+    # Build order→index map for fast window lookup
+    order_to_idx = {seg.order: i for i, seg in enumerate(all_segments)}
+    seg_texts = [_segment_text(seg) for seg in all_segments]
+
+    texts = []
+    for seg in targets:
+        idx = order_to_idx.get(seg.order)
+        if idx is None:
+            texts.append(_segment_text(seg))
+            continue
+        # Collect window: [idx - window, ..., idx, ..., idx + window]
+        start_idx = max(0, idx - window)
+        end_idx = min(len(all_segments) - 1, idx + window)
+        # Join with space (Chinese doesn't need word separators but newline preserves flow)
+        texts.append(" ".join(seg_texts[start_idx:end_idx + 1]))
+    return texts
+
+
+def summary_embedding_text(title: Optional[str], summary_data: Optional[dict] = None,
+                           body: Optional[str] = None) -> str:
+    """Text embedded for a meeting summary: title + summary + action items + decisions.
+
+    body = 預先算好的 Meeting.summary_embed_text（app.summary_digest）；未提供才由 summary_data 組。
+    """
+    if body is None:
+        body = embed_body(summary_data or {})
+    return "\n".join(filter(None, [f"會議標題: {title}" if title else "", body]))
+
+
+def bump_embedding_version(db: Session, meeting_ids) -> None:
+    """meetings.embedding_version / corpus_version += 1（不 commit）；向量一寫入就呼叫，下游快取據此失效。"""
+    ids = sorted(set(meeting_ids))
+    if ids:
+        db.query(Meeting).filter(Meeting.id.in_(ids)).update(
+            {Meeting.embedding_version: Meeting.embedding_version + 1,
+             Meeting.corpus_version: Meeting.corpus_version + 1},
+            synchronize_session=False,
+        )
+
+
 def embed_transcript_segments(db: Session, meeting_id: str) -> int:
     """
     Generate and store embeddings for all TranscriptSegments of a meeting.
@@ -110,11 +586,9 @@ def embed_transcript_segments(db: Session, meeting_id: str) -> int:
     Returns:
         Number of segments successfully embedded
     """
-    EMBED_WINDOW = int(os.getenv("EMBED_WINDOW", "5"))
-    
-    client = get_gemini_client()
-    if not client:
-        logger.error(f"[Embedding] Cannot embed segments for {meeting_id}: Gemini client unavailable")
+    provider = get_embedding_provider()
+    if not provider.is_available():
+        logger.error(f"[Embedding] Cannot embed segments for {meeting_id}: {provider.provider_name} unavailable")
         return 0
     
     # Query ALL segments (ordered) to build context windows
@@ -136,40 +610,15 @@ def embed_transcript_segments(db: Session, meeting_id: str) -> int:
     # (all segments from same meeting get near-identical embeddings dominated by prefix)
     # Title-based queries are now handled by A3 title-match pre-filter in rag.py
     
-    # Build order→index map for fast window lookup
-    order_to_idx = {seg.order: i for i, seg in enumerate(all_segments)}
-    
-    def _get_segment_text(seg) -> str:
-        content = seg.content_polished or seg.content_raw or ""
-        if seg.speaker:
-            return f"[{seg.speaker}] {content}"
-        return content
-    
-    # Build windowed text for each segment to embed
-    texts = []
-    for seg in segments_to_embed:
-        idx = order_to_idx.get(seg.order)
-        if idx is None:
-            texts.append(_get_segment_text(seg))
-            continue
-        
-        # Collect window: [idx - EMBED_WINDOW, ..., idx, ..., idx + EMBED_WINDOW]
-        start_idx = max(0, idx - EMBED_WINDOW)
-        end_idx = min(len(all_segments) - 1, idx + EMBED_WINDOW)
-        
-        window_parts = []
-        for wi in range(start_idx, end_idx + 1):
-            window_parts.append(_get_segment_text(all_segments[wi]))
-        
-        # Join with space (Chinese doesn't need word separators but newline preserves flow)
-        texts.append(" ".join(window_parts))
+    texts = build_window_texts(all_segments, segments_to_embed, EMBED_WINDOW)
     
     logger.info(
         f"[Embedding] Generating embeddings for {len(texts)} segments of meeting {meeting_id} "
         f"(window={EMBED_WINDOW}, avg_len={sum(len(t) for t in texts)//max(len(texts),1)} chars)"
     )
     
-    embeddings = embed_texts(client, texts)
+    # 視窗文字與上次相同（講者改名、重試、force re-embed）時直接命中 embedding cache
+    embeddings = embed_with_cache(provider, texts)
     
     # Write embeddings back to DB
     embedded_count = 0
@@ -177,6 +626,8 @@ def embed_transcript_segments(db: Session, meeting_id: str) -> int:
         if embedding is not None:
             seg.content_embedding = embedding
             embedded_count += 1
+    if embedded_count:
+        bump_embedding_version(db, [meeting_id])
     
     try:
         db.commit()
@@ -203,9 +654,9 @@ def embed_meeting_summary(db: Session, meeting_id: str) -> bool:
     Returns:
         True if embedding was generated successfully
     """
-    client = get_gemini_client()
-    if not client:
-        logger.error(f"[Embedding] Cannot embed summary for {meeting_id}: Gemini client unavailable")
+    provider = get_embedding_provider()
+    if not provider.is_available():
+        logger.error(f"[Embedding] Cannot embed summary for {meeting_id}: {provider.provider_name} unavailable")
         return False
     
     meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
@@ -217,43 +668,25 @@ def embed_meeting_summary(db: Session, meeting_id: str) -> bool:
         logger.warning(f"[Embedding] No summary_json for {meeting_id}, skipping summary embedding")
         return False
     
-    # Extract meaningful text from summary JSON for embedding
-    import json
-    try:
-        summary_data = json.loads(meeting.summary_json)
-    except (json.JSONDecodeError, TypeError):
+    # Precomputed digest body (app.summary_digest); parse summary_json only if not materialized
+    body = embed_body_or_parse(meeting.summary_embed_text, meeting.summary_json)
+    if body is None:
         logger.error(f"[Embedding] Invalid summary_json for {meeting_id}")
         return False
-    
-    # Build embedding text from key summary fields
-    parts = []
-    if meeting.title:
-        parts.append(f"會議標題: {meeting.title}")
-    if summary_data.get("summary"):
-        parts.append(summary_data["summary"])
-    for item in summary_data.get("action_items", []):
-        if isinstance(item, str):
-            parts.append(item)
-        elif isinstance(item, dict):
-            parts.append(item.get("task", ""))
-    for decision in summary_data.get("decisions", []):
-        if isinstance(decision, str):
-            parts.append(decision)
-        elif isinstance(decision, dict):
-            parts.append(decision.get("decision", ""))
-    
-    embedding_text = "\n".join(filter(None, parts))
+    embedding_text = summary_embedding_text(meeting.title, body=body)
     if not embedding_text.strip():
         logger.warning(f"[Embedding] Empty summary text for {meeting_id}")
         return False
     
     logger.info(f"[Embedding] Generating summary embedding for {meeting_id} ({len(embedding_text)} chars)")
     
-    embedding = embed_single_text(client, embedding_text)
+    embedding = embed_with_cache(provider, [embedding_text.strip()])[0]
     if embedding is None:
         return False
     
     meeting.summary_embedding = embedding
+    meeting.summary_embedding_dirty = False
+    bump_embedding_version(db, [meeting_id])
     
     try:
         db.commit()
@@ -357,82 +790,55 @@ def find_cross_meeting_refs(
     return refs
 
 
-def backfill_all_embeddings(db: Session) -> dict:
+def backfill_all_embeddings(db: Session, resume: bool = True) -> dict:
     """
     Backfill: generate embeddings for meetings/segments with NULL embeddings.
 
-    Two-pass strategy:
-      Pass 1 — meetings with summary_json but no summary_embedding
-      Pass 2 — ALL COMPLETED meetings that still have un-embedded segments
-               (covers cases where summary_embedding was set but segment
-               embedding never ran, e.g. after pipeline was added later)
+    Runs app.embedding_backfill.BackfillEngine (mode="missing"):
+      - summaries with summary_json but no summary_embedding
+      - every segment whose content_embedding is NULL, packed across meetings
+        into full batches, with bounded concurrency / rate limiting / retries
+      - checkpointed; an interrupted run resumes after its last finished meeting
 
     Returns:
-        Summary dict with counts of processed items
+        Summary dict with counts of processed items and throughput
     """
-    client = get_gemini_client()
-    if not client:
-        logger.error("[Embedding] Cannot backfill: Gemini client unavailable")
-        return {"error": "Gemini client unavailable"}
-
-    from sqlalchemy import text as sa_text
-    from app.models import MeetingStatus
-
-    summary_count = 0
-    segment_count = 0
-    meetings_touched: set = set()
-
-    # Pass 1: meetings with summary_json but no summary_embedding
-    meetings_need_summary = db.query(Meeting).filter(
-        Meeting.summary_embedding == None,  # noqa: E711
-        Meeting.summary_json != None,       # noqa: E711
-    ).all()
-    for meeting in meetings_need_summary:
-        meetings_touched.add(meeting.id)
-        if embed_meeting_summary(db, meeting.id):
-            summary_count += 1
-
-    # Pass 2: COMPLETED meetings that have un-embedded segments
-    # Subquery: meeting_ids with at least one segment lacking content_embedding
-    rows = db.execute(sa_text(
-        "SELECT DISTINCT meeting_id FROM transcript_segments "
-        "WHERE content_embedding IS NULL"
-    )).fetchall()
-    meeting_ids_with_unembedded = {r[0] for r in rows}
-
-    for mid in meeting_ids_with_unembedded:
-        seg_embedded = embed_transcript_segments(db, mid)
-        if seg_embedded:
-            segment_count += seg_embedded
-            meetings_touched.add(mid)
-
-    result = {
-        "meetings_processed": len(meetings_touched),
-        "summaries_embedded": summary_count,
-        "segments_embedded": segment_count,
+    from app.embedding_backfill import run_backfill
+
+    provider = get_embedding_provider()
+    if not provider.is_available():
+        logger.error(f"[Embedding] Cannot backfill: {provider.provider_name} unavailable")
+        return {"error": f"{provider.provider_name} unavailable"}
+
+    result = run_backfill(db.get_bind(), mode="missing", resume=resume, provider=provider)
+    return {
+        "meetings_processed": result["meetings_done"],
+        "summaries_embedded": result["summaries_embedded"],
+        "segments_embedded": result["segments_embedded"],
+        "backfill": result,
     }
-    logger.info(f"[Embedding] Backfill complete: {result}")
-    return result
 
 
-def force_reembed_all(db: Session) -> dict:
+def force_reembed_all(db: Session, resume: bool = True) -> dict:
     """
-    Force re-embed ALL segments with the new windowed strategy.
-    Clears existing embeddings first, then triggers full backfill.
+    Force re-embed ALL segments and summaries with the current windowed strategy.
     
     Use after changing EMBED_WINDOW or embedding strategy.
+    視窗文字沒變的 segment 會命中 embedding_cache，只有真的變動的文字才呼叫 API。
+    不再先清空 embedding：BackfillEngine(mode="all") 逐批覆寫，舊向量在被覆寫前
+    仍可檢索；中斷後 resume 從 checkpoint 接續。
     """
-    from sqlalchemy import text as sa_text
-    
-    # Clear all segment embeddings
-    cleared = db.execute(sa_text(
-        "UPDATE transcript_segments SET content_embedding = NULL WHERE content_embedding IS NOT NULL"
-    ))
-    db.commit()
-    cleared_count = cleared.rowcount
-    logger.info(f"[Embedding] Cleared {cleared_count} segment embeddings for force re-embed")
-    
-    # Run backfill (will now re-embed all with windowed strategy)
-    result = backfill_all_embeddings(db)
-    result["cleared_embeddings"] = cleared_count
-    return result
+    from app.embedding_backfill import run_backfill
+
+    provider = get_embedding_provider()
+    if not provider.is_available():
+        logger.error(f"[Embedding] Cannot re-embed: {provider.provider_name} unavailable")
+        return {"error": f"{provider.provider_name} unavailable"}
+
+    result = run_backfill(db.get_bind(), mode="all", resume=resume, provider=provider)
+    return {
+        "meetings_processed": result["meetings_done"],
+        "summaries_embedded": result["summaries_embedded"],
+        "segments_embedded": result["segments_embedded"],
+        "backfill": result,
+    }
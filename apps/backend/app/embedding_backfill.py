@@ -0,0 +1,557 @@
+"""
+Embedding backfill engine — cross-meeting batching, bounded concurrency,
+token-bucket rate limiting, retries with jitter, resumable checkpoints.
+
+過去 backfill_all_embeddings 逐場會議呼叫 embed_transcript_segments：小會議送出
+未滿的 batch、batch 依序送、任何錯誤就變成 None 留給下次。全庫 re-embed 要數小時。
+
+BackfillEngine:
+  planner（呼叫端 thread）
+    - 依 meeting_id 排序做 keyset 分頁，逐場算出滑動視窗文字（與線上路徑同一個
+      build_window_texts），把「多場會議」的 item 裝滿 batch_size 才送出
+    - in-flight batch 數以 semaphore 限制（concurrency × 2），planner 不會無限超前
+  workers（ThreadPoolExecutor, EMBED_BACKFILL_CONCURRENCY）
+    - 先查 embedding_cache（命中的不打 API）
+    - TokenBucket 控制 API request 速率（EMBED_BACKFILL_RPS / BURST）
+    - provider.embed_batch 失敗 → exponential backoff + full jitter 重試
+    - 以 ORM bulk UPDATE（by primary key）寫回，每個 batch 一個 transaction
+  checkpoint（embedding_backfill_state 表）
+    - low-watermark：所有 meeting_id ≤ last_meeting_id 的會議都已寫完
+    - 每 EMBED_BACKFILL_CHECKPOINT_EVERY 秒寫一次；status=running 的 job 下次
+      run(resume=True) 從 watermark 之後接續
+  progress：items/s、ETA、重試、被限速時間，log 並可由 /rag/backfill/status 查詢
+
+mode:
+  missing — 只補 content_embedding / summary_embedding 為 NULL 的（backfill_all_embeddings）
+  all     — 全部重算並覆寫（force_reembed_all）；不先清空，舊向量在覆寫前持續可查
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.orm import sessionmaker
+
+from app import embedding_cache
+from app.embedding import (
+    EMBED_WINDOW,
+    EMBEDDING_BATCH_SIZE,
+    build_window_texts,
+    bump_embedding_version,
+    get_embedding_provider,
+    summary_embedding_text,
+)
+from app.models import Meeting, TranscriptSegment
+from app.summary_digest import embed_body_or_parse
+
+logger = logging.getLogger(__name__)
+
+EMBED_BACKFILL_CONCURRENCY = int(os.getenv("EMBED_BACKFILL_CONCURRENCY", "4"))
+# Gemini embed_content 配額以 request 計；0 = 不限速
+EMBED_BACKFILL_RPS = float(os.getenv("EMBED_BACKFILL_RPS", "5"))
+EMBED_BACKFILL_BURST = int(os.getenv("EMBED_BACKFILL_BURST", "5"))
+EMBED_BACKFILL_MAX_RETRIES = int(os.getenv("EMBED_BACKFILL_MAX_RETRIES", "5"))
+EMBED_BACKFILL_RETRY_BASE = float(os.getenv("EMBED_BACKFILL_RETRY_BASE", "1.0"))
+EMBED_BACKFILL_RETRY_MAX = float(os.getenv("EMBED_BACKFILL_RETRY_MAX", "30"))
+EMBED_BACKFILL_MEETING_PAGE = int(os.getenv("EMBED_BACKFILL_MEETING_PAGE", "20"))
+EMBED_BACKFILL_CHECKPOINT_EVERY = float(os.getenv("EMBED_BACKFILL_CHECKPOINT_EVERY", "5"))
+EMBED_BACKFILL_REPORT_EVERY = float(os.getenv("EMBED_BACKFILL_REPORT_EVERY", "15"))
+
+BACKFILL_MODES = ("missing", "all")
+
+STATE_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS embedding_backfill_state (
+    job             VARCHAR(160) PRIMARY KEY,
+    last_meeting_id VARCHAR(36) NOT NULL,
+    status          VARCHAR(16) NOT NULL,
+    stats           TEXT,
+    updated_at      TIMESTAMP NOT NULL
+)
+"""
+
+
+class BackfillBusy(RuntimeError):
+    """Another backfill is already running in this process."""
+
+
+# ============================================
+# Rate limiting / retry primitives
+# ============================================
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, blocking until available; returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+
+def backoff_delay(attempt: int, base: float = EMBED_BACKFILL_RETRY_BASE,
+                  cap: float = EMBED_BACKFILL_RETRY_MAX,
+                  rand: Callable[[], float] = random.random) -> float:
+    """Exponential backoff with full jitter: U(0, min(cap, base·2^attempt))."""
+    return rand() * min(cap, base * (2 ** attempt))
+
+
+# ============================================
+# Checkpoint store
+# ============================================
+
+def ensure_backfill_state_table(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(STATE_TABLE_DDL))
+
+
+def load_state(bind, job: str) -> Optional[dict]:
+    try:
+        with bind.connect() as conn:
+            row = conn.execute(
+                text("SELECT last_meeting_id, status, stats, updated_at "
+                     "FROM embedding_backfill_state WHERE job = :job"),
+                {"job": job},
+            ).first()
+    except Exception as e:
+        logger.warning(f"[Backfill] checkpoint read failed (non-fatal, starting fresh): {e}")
+        return None
+    if row is None:
+        return None
+    return {
+        "job": job,
+        "last_meeting_id": row.last_meeting_id,
+        "status": row.status,
+        "stats": json.loads(row.stats) if row.stats else {},
+        "updated_at": str(row.updated_at),
+    }
+
+
+def save_state(bind, job: str, last_meeting_id: str, status: str, stats: dict) -> None:
+    try:
+        with bind.begin() as conn:
+            conn.execute(text("DELETE FROM embedding_backfill_state WHERE job = :job"), {"job": job})
+            conn.execute(
+                text("INSERT INTO embedding_backfill_state (job, last_meeting_id, status, stats, updated_at) "
+                     "VALUES (:job, :mid, :status, :stats, :ts)"),
+                {"job": job, "mid": last_meeting_id, "status": status,
+                 "stats": json.dumps(stats, ensure_ascii=False, default=str), "ts": datetime.utcnow()},
+            )
+    except Exception as e:
+        logger.warning(f"[Backfill] checkpoint write failed (non-fatal): {e}")
+
+
+# ============================================
+# Engine
+# ============================================
+
+@dataclass
+class _Item:
+    kind: str  # "segment" | "summary"
+    target_id: str
+    meeting_id: str
+    text: str
+
+
+class BackfillEngine:
+    """One backfill run. Not reusable; create a new engine per run."""
+
+    def __init__(self, bind, provider=None, *, mode: str = "missing",
+                 batch_size: int = EMBEDDING_BATCH_SIZE,
+                 concurrency: int = EMBED_BACKFILL_CONCURRENCY,
+                 rate: float = EMBED_BACKFILL_RPS,
+                 burst: int = EMBED_BACKFILL_BURST,
+                 max_retries: int = EMBED_BACKFILL_MAX_RETRIES,
+                 window: int = EMBED_WINDOW,
+                 meeting_page: int = EMBED_BACKFILL_MEETING_PAGE,
+                 sleep: Callable[[float], None] = time.sleep):
+        if mode not in BACKFILL_MODES:
+            raise ValueError(f"mode must be one of {BACKFILL_MODES}")
+        self.bind = bind
+        self.session_factory = sessionmaker(bind=bind)
+        self.provider = provider or get_embedding_provider()
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.window = window
+        self.meeting_page = max(1, meeting_page)
+        self._sleep = sleep
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.job = f"{mode}:{self.provider.model_id}"
+
+        self._lock = threading.Lock()
+        self._pending: List[_Item] = []
+        self._remaining: Dict[str, int] = {}
+        self._order: deque = deque()
+        self._watermark = ""
+        self._last_checkpoint = 0.0
+        self._last_report = 0.0
+        self._inflight = threading.BoundedSemaphore(self.concurrency * 2)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._futures: List = []
+        self._failed_meetings: List[str] = []
+        self._summaries_done = False
+
+        self.status = "pending"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.resumed_from: Optional[str] = None
+        self.counts = {
+            "planned": 0, "segments_embedded": 0, "summaries_embedded": 0, "cached": 0,
+            "failed": 0, "batches": 0, "api_requests": 0, "retries": 0, "meetings_done": 0,
+        }
+        self.items_total: Optional[int] = None
+        self.throttled_s = 0.0
+
+    # ---------- planning ----------
+
+    def _count_total(self, db, after: str) -> Optional[int]:
+        missing = " AND content_embedding IS NULL" if self.mode == "missing" else ""
+        try:
+            return db.execute(
+                text(f"SELECT COUNT(*) FROM transcript_segments WHERE meeting_id > :after{missing}"),
+                {"after": after},
+            ).scalar()
+        except Exception:
+            return None
+
+    def _summary_items(self, db) -> List[_Item]:
+        missing = " AND summary_embedding IS NULL" if self.mode == "missing" else ""
+        rows = db.execute(text(
+            "SELECT id, title, summary_embed_text, "
+            "CASE WHEN summary_embed_text IS NULL THEN summary_json END AS summary_json "
+            f"FROM meetings WHERE summary_json IS NOT NULL{missing}"
+        )).fetchall()
+        items = []
+        for r in rows:
+            digest_body = embed_body_or_parse(r.summary_embed_text, r.summary_json)
+            if digest_body is None:
+                logger.warning(f"[Backfill] Invalid summary_json for {r.id}, skipping")
+                continue
+            body = summary_embedding_text(r.title, body=digest_body)
+            if body.strip():
+                items.append(_Item("summary", r.id, r.id, body.strip()))
+        return items
+
+    def _meeting_page(self, db, after: str) -> List[str]:
+        missing = " AND content_embedding IS NULL" if self.mode == "missing" else ""
+        rows = db.execute(
+            text(f"SELECT DISTINCT meeting_id FROM transcript_segments "
+                 f"WHERE meeting_id > :after{missing} ORDER BY meeting_id LIMIT :limit"),
+            {"after": after, "limit": self.meeting_page},
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def _segment_items(self, db, meeting_id: str) -> List[_Item]:
+        rows = db.execute(
+            text('SELECT id, "order", speaker, content_polished, content_raw, '
+                 "content_embedding IS NULL AS missing "
+                 'FROM transcript_segments WHERE meeting_id = :mid ORDER BY "order"'),
+            {"mid": meeting_id},
+        ).fetchall()
+        targets = rows if self.mode == "all" else [r for r in rows if r.missing]
+        texts = build_window_texts(rows, targets, self.window)
+        return [_Item("segment", r.id, meeting_id, t) for r, t in zip(targets, texts)]
+
+    # ---------- batching ----------
+
+    def _add(self, item: _Item) -> None:
+        self._pending.append(item)
+        if len(self._pending) >= self.batch_size:
+            self._submit(self._pending[:self.batch_size])
+            self._pending = self._pending[self.batch_size:]
+
+    def _submit(self, batch: List[_Item]) -> None:
+        self._inflight.acquire()  # 背壓：planner 最多超前 concurrency × 2 個 batch
+        fut = self._pool.submit(self._process, batch)
+        fut.add_done_callback(lambda f, b=batch: self._on_done(b, f))
+        self._futures.append(fut)
+
+    def _register_meeting(self, meeting_id: str, n_items: int) -> None:
+        with self._lock:
+            self._order.append(meeting_id)
+            self._remaining[meeting_id] = n_items
+            self.counts["planned"] += n_items
+            self._advance_locked()
+
+    def _advance_locked(self) -> None:
+        while self._order and self._remaining.get(self._order[0], 0) == 0:
+            mid = self._order.popleft()
+            self._remaining.pop(mid, None)
+            self._watermark = mid
+            self.counts["meetings_done"] += 1
+
+    # ---------- workers ----------
+
+    def _embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        model = self.provider.model_id
+        hashes = [embedding_cache.text_hash(t) for t in texts]
+        unique = dict(zip(hashes, texts))
+        cached = embedding_cache.lookup(model, unique) if embedding_cache.EMBEDDING_CACHE_ENABLED else {}
+        missing = [h for h in unique if h not in cached]
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            vectors = None
+            for attempt in range(self.max_retries + 1):
+                waited = self.bucket.acquire()
+                with self._lock:
+                    self.throttled_s += waited
+                    self.counts["api_requests"] += 1
+                try:
+                    vectors = self.provider.embed_batch([unique[h] for h in missing])
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        logger.error(f"[Backfill] batch failed after {attempt + 1} attempts: {e}")
+                        break
+                    delay = backoff_delay(attempt)
+                    with self._lock:
+                        self.counts["retries"] += 1
+                    logger.warning(f"[Backfill] batch attempt {attempt + 1} failed ({e}); retry in {delay:.1f}s")
+                    self._sleep(delay)
+            if vectors is not None:
+                fresh = dict(zip(missing, vectors))
+                if embedding_cache.EMBEDDING_CACHE_ENABLED:
+                    embedding_cache.store(model, fresh)
+        with self._lock:
+            self.counts["cached"] += sum(1 for h in hashes if h in cached)
+        return [cached.get(h) or fresh.get(h) for h in hashes]
+
+    def _write(self, batch: List[_Item], vectors: List[Optional[List[float]]]) -> int:
+        segs = [{"id": it.target_id, "content_embedding": v}
+                for it, v in zip(batch, vectors) if v is not None and it.kind == "segment"]
+        sums = [{"id": it.target_id, "summary_embedding": v}
+                for it, v in zip(batch, vectors) if v is not None and it.kind == "summary"]
+        if not segs and not sums:
+            return 0
+        session = self.session_factory()
+        try:
+            if segs:
+                session.execute(update(TranscriptSegment), segs)
+            if sums:
+                session.execute(update(Meeting), sums)
+            bump_embedding_version(session, [
+                it.meeting_id for it, v in zip(batch, vectors) if v is not None
+            ])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"[Backfill] write failed for batch of {len(batch)}: {e}")
+            return -1
+        finally:
+            session.close()
+        return len(segs) + len(sums)
+
+    def _process(self, batch: List[_Item]) -> List[bool]:
+        """Embed + write one batch; returns per-item success."""
+        try:
+            vectors = self._embed([it.text for it in batch])
+        except Exception as e:
+            logger.error(f"[Backfill] batch embed crashed: {e}")
+            vectors = [None] * len(batch)
+        if self._write(batch, vectors) < 0:
+            return [False] * len(batch)
+        return [v is not None for v in vectors]
+
+    def _on_done(self, batch: List[_Item], fut) -> None:
+        try:
+            ok = fut.result()
+        except Exception:
+            ok = [False] * len(batch)
+        finally:
+            self._inflight.release()
+        with self._lock:
+            self.counts["batches"] += 1
+            for it, success in zip(batch, ok):
+                if success:
+                    self.counts["segments_embedded" if it.kind == "segment" else "summaries_embedded"] += 1
+                else:
+                    self.counts["failed"] += 1
+                    if it.meeting_id not in self._failed_meetings and len(self._failed_meetings) < 50:
+                        self._failed_meetings.append(it.meeting_id)
+                if it.kind == "segment":
+                    self._remaining[it.meeting_id] -= 1
+            self._advance_locked()
+        self._maybe_checkpoint()
+
+    # ---------- reporting ----------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            watermark = self._watermark
+            failed_meetings = list(self._failed_meetings)
+        end = self.finished_at or time.monotonic()
+        elapsed = (end - self.started_at) if self.started_at else 0.0
+        done = counts["segments_embedded"] + counts["summaries_embedded"] + counts["failed"]
+        rate = done / elapsed if elapsed > 0 else None
+        eta = None
+        if rate and self.items_total is not None and self.status == "running":
+            eta = round(max(0, self.items_total - counts["segments_embedded"] - counts["failed"]) / rate, 1)
+        return {
+            "job": self.job,
+            "mode": self.mode,
+            "status": self.status,
+            "resumed_from": self.resumed_from,
+            "last_meeting_id": watermark,
+            "items_total": self.items_total,
+            **counts,
+            "failed_meetings": failed_meetings,
+            "elapsed_s": round(elapsed, 1),
+            "items_per_sec": round(rate, 2) if rate else None,
+            "eta_s": eta,
+            "throttled_s": round(self.throttled_s, 1),
+            "avg_batch": round(done / counts["batches"], 1) if counts["batches"] else None,
+            "summaries_done": self._summaries_done,
+        }
+
+    def _maybe_checkpoint(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_checkpoint < EMBED_BACKFILL_CHECKPOINT_EVERY:
+            return
+        self._last_checkpoint = now
+        snap = self.snapshot()
+        # 未完成（含中斷）一律存成 running，下次 run(resume=True) 才會從 watermark 接續
+        stored = "done" if self.status == "done" else "running"
+        save_state(self.bind, self.job, snap["last_meeting_id"], stored, snap)
+        if force or now - self._last_report >= EMBED_BACKFILL_REPORT_EVERY:
+            self._last_report = now
+            logger.info(
+                f"[Backfill] {self.job}: {snap['segments_embedded']} segments / "
+                f"{snap['summaries_embedded']} summaries "
+                f"({snap['cached']} cached, {snap['failed']} failed) "
+                f"{snap['items_per_sec']} items/s, eta {snap['eta_s']}s, "
+                f"watermark={snap['last_meeting_id'] or '-'}"
+            )
+
+    # ---------- run ----------
+
+    def run(self, resume: bool = True) -> dict:
+        state = load_state(self.bind, self.job) if resume else None
+        cursor = ""
+        if state and state["status"] == "running" and state["last_meeting_id"] is not None:
+            cursor = state["last_meeting_id"]
+            self.resumed_from = cursor or None
+            self._summaries_done = bool(state["stats"].get("summaries_done"))
+            logger.info(f"[Backfill] Resuming {self.job} after meeting {cursor or '-'}")
+        self._watermark = cursor
+
+        self.status = "running"
+        self.started_at = time.monotonic()
+        db = self.session_factory()
+        try:
+            self.items_total = self._count_total(db, cursor)
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed-backfill") as pool:
+                self._pool = pool
+                if not self._summaries_done:
+                    summaries = self._summary_items(db)
+                    with self._lock:
+                        self.counts["planned"] += len(summaries)
+                    for item in summaries:
+                        self._add(item)
+                after = cursor
+                while True:
+                    page = self._meeting_page(db, after)
+                    if not page:
+                        break
+                    for mid in page:
+                        items = self._segment_items(db, mid)
+                        self._register_meeting(mid, len(items))
+                        for item in items:
+                            self._add(item)
+                    after = page[-1]
+                    db.rollback()  # 不長時間持有 planner 的 read transaction
+                if self._pending:
+                    self._submit(self._pending)
+                    self._pending = []
+            self._summaries_done = True
+            self.status = "done"
+        except BaseException:
+            self.status = "interrupted"
+            raise
+        finally:
+            db.close()
+            self.finished_at = time.monotonic()
+            self._maybe_checkpoint(force=True)
+
+        result = self.snapshot()
+        logger.info(f"[Backfill] Complete: {result}")
+        return result
+
+
+# ============================================
+# Process-wide entry points
+# ============================================
+
+_run_lock = threading.Lock()
+_current: Optional[BackfillEngine] = None
+_last_result: Optional[dict] = None
+
+
+def run_backfill(bind, mode: str = "missing", resume: bool = True, provider=None, **kwargs) -> dict:
+    """Run one backfill job (blocking). Raises BackfillBusy if one is already running."""
+    global _current, _last_result
+    if not _run_lock.acquire(blocking=False):
+        raise BackfillBusy("an embedding backfill is already running")
+    try:
+        engine = BackfillEngine(bind, provider, mode=mode, **kwargs)
+        _current = engine
+        _last_result = engine.run(resume=resume)
+        return _last_result
+    finally:
+        _current = None
+        _run_lock.release()
+
+
+def get_backfill_status(bind=None) -> dict:
+    """Live progress of the running job (or the last result) plus stored checkpoints."""
+    engine = _current
+    out = {"running": engine.snapshot() if engine else None, "last": _last_result}
+    if bind is not None:
+        try:
+            with bind.connect() as conn:
+                rows = conn.execute(text(
+                    "SELECT job, last_meeting_id, status, updated_at FROM embedding_backfill_state "
+                    "ORDER BY updated_at DESC"
+                )).fetchall()
+            out["checkpoints"] = [
+                {"job": r.job, "last_meeting_id": r.last_meeting_id, "status": r.status,
+                 "updated_at": str(r.updated_at)}
+                for r in rows
+            ]
+        except Exception as e:
+            out["checkpoints_error"] = str(e)
+    return out
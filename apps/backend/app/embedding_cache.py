@@ -0,0 +1,187 @@
+"""
+Content-hash embedding cache — (model_id, sha256(text)) → vector.
+
+embed_transcript_segments 以滑動視窗文字做 embedding；講者改名、重試、
+force_reembed_all、重複上傳的會議，視窗文字常常與上次逐字相同，卻每次都重新
+呼叫 embedding API。embed_texts 先查這張表（bulk lookup），只對 miss 的文字
+呼叫 provider，結果再 bulk insert 回表。
+
+  - key 含 provider.model_id：換模型 / 換 provider 自然全部 miss，不會混到舊向量
+  - 向量以 float32 bytes 存（pgvector 本身也是 float32，不損失精度）
+  - 用獨立連線讀寫（不碰呼叫端 session 的 transaction）；任何失敗只 warn，
+    退回直接 embed
+  - 同一批內重複的文字只 embed 一次
+
+Table: embedding_cache（alembic l6a7b8c9d0e1；main.py 啟動時 safety-net 建表）
+Query embeddings (/rag/ask) 不經過這裡，走 app.rag.query_cache。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() not in ("false", "0", "no")
+# 每個 SQL 的 key 數上限（IN 清單 / multi-row VALUES）
+EMBEDDING_CACHE_CHUNK = int(os.getenv("EMBEDDING_CACHE_CHUNK", "200"))
+
+_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model      VARCHAR(128) NOT NULL,
+    text_hash  VARCHAR(64) NOT NULL,
+    embedding  {blob} NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (model, text_hash)
+)
+"""
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stored": 0, "deduped": 0, "errors": 0}
+
+
+def _db_engine():
+    from app.database import engine
+    return engine
+
+
+def _bump(**deltas) -> None:
+    with _lock:
+        for k, v in deltas.items():
+            _stats[k] += v
+
+
+def text_hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _pack(vector) -> bytes:
+    import numpy as np
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _unpack(raw) -> List[float]:
+    import numpy as np
+    return np.frombuffer(bytes(raw), dtype=np.float32).tolist()
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def ensure_embedding_cache_table(engine) -> None:
+    blob = "BYTEA" if engine.dialect.name == "postgresql" else "BLOB"
+    with engine.begin() as conn:
+        conn.execute(text(_TABLE_DDL.format(blob=blob)))
+
+
+def lookup(model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+    """Bulk fetch cached vectors for hashes (missing keys are simply absent)."""
+    hashes = list(dict.fromkeys(hashes))
+    found: Dict[str, List[float]] = {}
+    if not hashes:
+        return found
+    try:
+        with _db_engine().connect() as conn:
+            for chunk in _chunks(hashes, EMBEDDING_CACHE_CHUNK):
+                params = {"model": model}
+                placeholders = []
+                for i, h in enumerate(chunk):
+                    params[f"h_{i}"] = h
+                    placeholders.append(f":h_{i}")
+                rows = conn.execute(
+                    text(
+                        "SELECT text_hash, embedding FROM embedding_cache "
+                        f"WHERE model = :model AND text_hash IN ({', '.join(placeholders)})"
+                    ),
+                    params,
+                ).fetchall()
+                for row in rows:
+                    found[row.text_hash] = _unpack(row.embedding)
+    except Exception as e:
+        _bump(errors=1)
+        logger.warning(f"[Embedding cache] lookup failed (non-fatal): {e}")
+        return {}
+    return found
+
+
+def store(model: str, vectors: Dict[str, List[float]]) -> int:
+    """Bulk insert hash → vector; existing keys are left untouched."""
+    if not vectors:
+        return 0
+    items = list(vectors.items())
+    now = datetime.utcnow()
+    try:
+        engine = _db_engine()
+        verb = "INSERT OR IGNORE INTO" if engine.dialect.name == "sqlite" else "INSERT INTO"
+        conflict = "" if engine.dialect.name == "sqlite" else " ON CONFLICT (model, text_hash) DO NOTHING"
+        with engine.begin() as conn:
+            for chunk in _chunks(items, EMBEDDING_CACHE_CHUNK):
+                params = {"model": model, "ts": now}
+                values = []
+                for i, (h, vec) in enumerate(chunk):
+                    params[f"h_{i}"] = h
+                    params[f"e_{i}"] = _pack(vec)
+                    values.append(f"(:model, :h_{i}, :e_{i}, :ts)")
+                conn.execute(
+                    text(
+                        f"{verb} embedding_cache (model, text_hash, embedding, created_at) "
+                        f"VALUES {', '.join(values)}{conflict}"
+                    ),
+                    params,
+                )
+    except Exception as e:
+        _bump(errors=1)
+        logger.warning(f"[Embedding cache] store failed (non-fatal): {e}")
+        return 0
+    _bump(stored=len(items))
+    return len(items)
+
+
+def embed_with_cache(provider, texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    provider.embed(texts) with the content-hash cache in front.
+    Output is index-aligned with texts; failed items stay None (and are not cached).
+    """
+    if not texts:
+        return []
+    if not EMBEDDING_CACHE_ENABLED:
+        return provider.embed(texts)
+
+    model = provider.model_id
+    hashes = [text_hash(t) for t in texts]
+    unique: Dict[str, str] = dict(zip(hashes, texts))
+
+    cached = lookup(model, unique)
+    missing = [h for h in unique if h not in cached]
+    fresh: Dict[str, List[float]] = {}
+    if missing:
+        vectors = provider.embed([unique[h] for h in missing])
+        fresh = {h: v for h, v in zip(missing, vectors) if v is not None}
+        store(model, fresh)
+
+    _bump(hits=len(cached), misses=len(missing), deduped=len(texts) - len(unique))
+    return [cached.get(h) or fresh.get(h) for h in hashes]
+
+
+def get_stats() -> dict:
+    with _lock:
+        out = dict(_stats)
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else None
+    out["enabled"] = EMBEDDING_CACHE_ENABLED
+    return out
+
+
+def reset_stats() -> None:
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
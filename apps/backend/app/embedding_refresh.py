@@ -0,0 +1,365 @@
+"""
+Incremental windowed re-embedding — dirty segments → coalesced background refresh.
+
+embed_transcript_segments 以滑動視窗（前後各 EMBED_WINDOW 段）做 embedding：改一段
+的講者或文字，會讓最多 2×EMBED_WINDOW+1 個鄰居的視窗文字跟著變。過去改講者 /
+詞彙校正 / 摘要修補都不會重算向量，只能全庫 force_reembed_all。
+
+寫入路徑（同一個 transaction，不 commit）：
+  mark_segments_dirty(db, ids)   — TranscriptSegment.embedding_dirty = true
+  mark_summary_dirty(db, mid)    — Meeting.summary_embedding_dirty = true
+commit 後呼叫 schedule_reembed(mid) 通知背景 re-embedder。
+
+ReembedScheduler（單一 daemon thread）
+  - debounce：同一場會議在 EMBED_REFRESH_DEBOUNCE_S 內連續編輯只跑一次；
+    但從第一次標記起最多延後 EMBED_REFRESH_MAX_DELAY_S（持續編輯也會刷新）
+  - 同一時間只處理一場會議，處理中又被標記 → 跑完後再排一次
+  - 失敗（provider 不可用 / 部分向量失敗）→ 重新標 dirty，EMBED_REFRESH_RETRY_S 後重試
+
+refresh_meeting(bind, meeting_id)
+  1. claim：把目前 dirty 的 segment 清成 false（同一 transaction 內再讀全場 segment）
+  2. 受影響集合 = 每個 dirty segment 前後 window 範圍的聯集，只重算已有向量的列
+     （尚未 embed 的由 pipeline / backfill 負責）
+  3. embed_with_cache → ORM bulk UPDATE，Meeting.embedding_version += 1
+
+啟動時 schedule_dirty_meetings() 把上次未處理完的 dirty 會議重新排入。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.orm import Session
+
+from app.embedding import (
+    EMBED_WINDOW,
+    build_window_texts,
+    bump_embedding_version,
+    get_embedding_provider,
+    summary_embedding_text,
+)
+from app.embedding_cache import embed_with_cache
+from app.models import Meeting, TranscriptSegment
+from app.summary_digest import embed_body_or_parse
+
+logger = logging.getLogger(__name__)
+
+EMBED_REFRESH_ENABLED = os.getenv("EMBED_REFRESH_ENABLED", "true").lower() not in ("false", "0", "no")
+EMBED_REFRESH_DEBOUNCE_S = float(os.getenv("EMBED_REFRESH_DEBOUNCE_S", "5"))
+EMBED_REFRESH_MAX_DELAY_S = float(os.getenv("EMBED_REFRESH_MAX_DELAY_S", "60"))
+EMBED_REFRESH_RETRY_S = float(os.getenv("EMBED_REFRESH_RETRY_S", "60"))
+
+# Postgres safety net（alembic n8c9d0e1f2a3）；create_all 不會替既有表加欄位
+DIRTY_TRACKING_DDL = (
+    "ALTER TABLE transcript_segments ADD COLUMN IF NOT EXISTS embedding_dirty BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_embedding_dirty BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE meetings ADD COLUMN IF NOT EXISTS embedding_version INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS idx_ts_embedding_dirty ON transcript_segments (meeting_id) WHERE embedding_dirty",
+)
+
+
+def ensure_dirty_tracking_columns(engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for stmt in DIRTY_TRACKING_DDL:
+            conn.execute(text(stmt))
+
+
+def _db_engine():
+    from app.database import engine
+    return engine
+
+
+# ============================================
+# Write-path helpers
+# ============================================
+
+def mark_segments_dirty(db: Session, segment_ids: Iterable[str]) -> int:
+    """Flag segments whose window text changed (caller commits)."""
+    ids = list(dict.fromkeys(segment_ids))
+    if not ids:
+        return 0
+    db.query(TranscriptSegment).filter(TranscriptSegment.id.in_(ids)).update(
+        {TranscriptSegment.embedding_dirty: True}, synchronize_session=False
+    )
+    return len(ids)
+
+
+def mark_summary_dirty(db: Session, meeting_id: str) -> None:
+    """Flag the meeting's summary embedding text as changed (caller commits)."""
+    db.query(Meeting).filter(Meeting.id == meeting_id).update(
+        {Meeting.summary_embedding_dirty: True}, synchronize_session=False
+    )
+
+
+def affected_indices(n: int, dirty: Iterable[int], window: int) -> List[int]:
+    """Union of [i - window, i + window] over dirty positions, clipped to [0, n)."""
+    out = set()
+    for i in dirty:
+        out.update(range(max(0, i - window), min(n, i + window + 1)))
+    return sorted(out)
+
+
+# ============================================
+# Refresh one meeting
+# ============================================
+
+def _claim(session: Session, meeting_id: str):
+    """Clear the dirty flags we are about to process, then read the meeting's current state."""
+    dirty_ids = [r[0] for r in session.execute(
+        text("SELECT id FROM transcript_segments WHERE meeting_id = :mid AND embedding_dirty"),
+        {"mid": meeting_id},
+    ).fetchall()]
+    if dirty_ids:
+        session.execute(
+            update(TranscriptSegment)
+            .where(TranscriptSegment.id.in_(dirty_ids))
+            .values(embedding_dirty=False)
+        )
+    meeting = session.execute(
+        text("SELECT title, summary_embed_text, summary_json IS NOT NULL AS has_summary, "
+             "CASE WHEN summary_embed_text IS NULL THEN summary_json END AS summary_json, "
+             "summary_embedding_dirty, summary_embedding IS NOT NULL AS embedded "
+             "FROM meetings WHERE id = :mid"),
+        {"mid": meeting_id},
+    ).first()
+    summary_dirty = bool(meeting and meeting.summary_embedding_dirty)
+    if summary_dirty:
+        session.execute(update(Meeting).where(Meeting.id == meeting_id).values(summary_embedding_dirty=False))
+    rows = session.execute(
+        text('SELECT id, "order", speaker, content_polished, content_raw, '
+             "content_embedding IS NOT NULL AS embedded "
+             'FROM transcript_segments WHERE meeting_id = :mid ORDER BY "order"'),
+        {"mid": meeting_id},
+    ).fetchall() if dirty_ids else []
+    session.commit()
+    return set(dirty_ids), rows, meeting, summary_dirty
+
+
+def _remark(session: Session, meeting_id: str, segment_ids: Iterable[str], summary: bool) -> None:
+    try:
+        mark_segments_dirty(session, segment_ids)
+        if summary:
+            mark_summary_dirty(session, meeting_id)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[Re-embed] could not re-flag {meeting_id} as dirty: {e}")
+
+
+def refresh_meeting(bind, meeting_id: str, provider=None, window: int = EMBED_WINDOW) -> dict:
+    """Re-embed the windows touched by dirty segments (and the summary if flagged)."""
+    provider = provider or get_embedding_provider()
+    result = {"meeting_id": meeting_id, "dirty": 0, "segments": 0, "summary": False, "retry": False}
+    if not provider.is_available():
+        # 不 claim：dirty 保留，等 provider 回來後重試
+        logger.warning(f"[Re-embed] {provider.provider_name} unavailable; {meeting_id} stays dirty")
+        result["retry"] = True
+        return result
+
+    session = Session(bind=bind)
+    dirty_ids, summary_dirty = set(), False
+    try:
+        dirty_ids, rows, meeting, summary_dirty = _claim(session, meeting_id)
+        result["dirty"] = len(dirty_ids)
+
+        dirty_pos = [i for i, r in enumerate(rows) if r.id in dirty_ids]
+        targets = [rows[i] for i in affected_indices(len(rows), dirty_pos, window) if rows[i].embedded]
+        texts = build_window_texts(rows, targets, window)
+
+        summary_text = None
+        if summary_dirty and meeting.embedded and meeting.has_summary:
+            body = embed_body_or_parse(meeting.summary_embed_text, meeting.summary_json)
+            if body is None:
+                logger.warning(f"[Re-embed] Invalid summary_json for {meeting_id}, skipping summary")
+            else:
+                summary_text = summary_embedding_text(meeting.title, body=body).strip()
+
+        batch = texts + ([summary_text] if summary_text else [])
+        if not batch:
+            return result
+        vectors = embed_with_cache(provider, batch)
+
+        seg_updates = [{"id": r.id, "content_embedding": v}
+                       for r, v in zip(targets, vectors) if v is not None]
+        summary_vec = vectors[-1] if summary_text else None
+        if seg_updates:
+            session.execute(update(TranscriptSegment), seg_updates)
+        if summary_vec is not None:
+            session.execute(update(Meeting).where(Meeting.id == meeting_id).values(summary_embedding=summary_vec))
+        if seg_updates or summary_vec is not None:
+            bump_embedding_version(session, [meeting_id])
+        session.commit()
+
+        result["segments"] = len(seg_updates)
+        result["summary"] = summary_vec is not None
+        seg_failed = len(seg_updates) < len(targets)
+        summary_failed = bool(summary_text) and summary_vec is None
+        if seg_failed or summary_failed:
+            # 部分失敗：把原本 dirty 的標回去，整批稍後重算（成功的大多會命中 embedding cache）
+            _remark(session, meeting_id, dirty_ids if seg_failed else (), summary_failed)
+            result["retry"] = True
+        logger.info(
+            f"[Re-embed] {meeting_id}: {len(dirty_ids)} dirty → {len(seg_updates)}/{len(targets)} windows, "
+            f"summary={result['summary']}"
+        )
+        return result
+    except Exception:
+        session.rollback()
+        _remark(session, meeting_id, dirty_ids, summary_dirty)
+        raise
+    finally:
+        session.close()
+
+
+# ============================================
+# Coalescing background scheduler
+# ============================================
+
+class ReembedScheduler:
+    """Debounced per-meeting queue drained by one daemon thread."""
+
+    def __init__(self, runner: Optional[Callable[[str], dict]] = None,
+                 debounce: float = EMBED_REFRESH_DEBOUNCE_S,
+                 max_delay: float = EMBED_REFRESH_MAX_DELAY_S,
+                 retry_delay: float = EMBED_REFRESH_RETRY_S,
+                 clock: Callable[[], float] = time.monotonic,
+                 autostart: bool = True):
+        self._runner = runner or (lambda mid: refresh_meeting(_db_engine(), mid))
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self._clock = clock
+        self._autostart = autostart
+        self._cond = threading.Condition()
+        self._due: Dict[str, float] = {}
+        self._first: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"scheduled": 0, "coalesced": 0, "runs": 0, "failures": 0, "retries": 0,
+                       "segments_reembedded": 0, "summaries_reembedded": 0}
+
+    def schedule(self, meeting_id: str, delay: Optional[float] = None) -> None:
+        with self._cond:
+            now = self._clock()
+            if meeting_id in self._due:
+                self._stats["coalesced"] += 1
+            else:
+                self._stats["scheduled"] += 1
+                self._first[meeting_id] = now
+            due = now + (self.debounce if delay is None else delay)
+            self._due[meeting_id] = min(due, self._first[meeting_id] + max(self.max_delay, 0))
+            if self._autostart:
+                self._ensure_started()
+            self._cond.notify()
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="embed-refresh", daemon=True)
+            self._thread.start()
+
+    def _pop_due(self) -> List[str]:
+        now = self._clock()
+        ready = sorted((d, m) for m, d in self._due.items() if d <= now)
+        for _, mid in ready:
+            del self._due[mid]
+            del self._first[mid]
+        return [mid for _, mid in ready]
+
+    def run_due(self) -> int:
+        """Process every meeting whose debounce has elapsed; returns how many ran."""
+        with self._cond:
+            ready = self._pop_due()
+        for mid in ready:
+            self._run_one(mid)
+        return len(ready)
+
+    def _run_one(self, meeting_id: str) -> None:
+        try:
+            result = self._runner(meeting_id) or {}
+        except Exception as e:
+            logger.error(f"[Re-embed] refresh failed for {meeting_id}: {e}")
+            result = {"retry": True}
+            with self._cond:
+                self._stats["failures"] += 1
+        with self._cond:
+            self._stats["runs"] += 1
+            self._stats["segments_reembedded"] += result.get("segments", 0)
+            self._stats["summaries_reembedded"] += 1 if result.get("summary") else 0
+            if result.get("retry"):
+                self._stats["retries"] += 1
+        if result.get("retry"):
+            self.schedule(meeting_id, delay=self.retry_delay)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._due:
+                    self._cond.wait()
+                wait = min(self._due.values()) - self._clock()
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+            self.run_due()
+
+    def pending(self) -> Dict[str, float]:
+        """meeting_id → seconds until due."""
+        with self._cond:
+            now = self._clock()
+            return {m: round(max(0.0, d - now), 2) for m, d in self._due.items()}
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out["pending"] = len(self._due)
+        return out
+
+
+_scheduler: Optional[ReembedScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ReembedScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = ReembedScheduler()
+    return _scheduler
+
+
+def schedule_reembed(meeting_id: str) -> None:
+    """Call after committing dirty flags. Never raises into the request path."""
+    if not EMBED_REFRESH_ENABLED:
+        return
+    try:
+        get_scheduler().schedule(meeting_id)
+    except Exception as e:
+        logger.warning(f"[Re-embed] could not schedule {meeting_id} (non-fatal): {e}")
+
+
+def schedule_dirty_meetings(bind) -> int:
+    """Startup recovery: queue meetings left dirty by a previous process."""
+    if not EMBED_REFRESH_ENABLED:
+        return 0
+    with bind.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT DISTINCT meeting_id FROM transcript_segments WHERE embedding_dirty "
+            "UNION SELECT id FROM meetings WHERE summary_embedding_dirty"
+        )).fetchall()
+    for r in rows:
+        get_scheduler().schedule(r[0])
+    return len(rows)
+
+
+def get_stats() -> dict:
+    out = {"enabled": EMBED_REFRESH_ENABLED, "debounce_s": EMBED_REFRESH_DEBOUNCE_S,
+           "max_delay_s": EMBED_REFRESH_MAX_DELAY_S}
+    if _scheduler is not None:
+        out.update(_scheduler.stats())
+    return out
@@ -183,6 +183,8 @@ def classify_intent(
         )
     except Exception as e:
         # 包含 API 錯誤、network、auth 等
+        from app.llm_utils import reset_gemini_client_on_transport_error
+        reset_gemini_client_on_transport_error(e)
         logger.warning(f"[intent_classifier] LLM call failed: {type(e).__name__}: {e}")
         return IntentResult(
             template_name=DEFAULT_TEMPLATE,
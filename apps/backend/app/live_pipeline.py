@@ -0,0 +1,767 @@
+"""
+Live ASR Pipeline — 將 /ws/transcribe 的「收音」與「ASR」解耦。
+
+舊流程在 receive loop 內直接 await get_transcription_gemini（timeout 最長 30s）：
+ASR 進行中不讀 socket，音訊 frame 在 proxy/TCP buffer 堆積、VAD 落後即時、
+client 的 ping 也得不到回應。Gemini 一慢，字幕延遲就是「所有排隊段落 ASR 時間總和」。
+
+新流程（每個 WebSocket session 一個 LiveASRPipeline）：
+
+  receive loop ──submit()──▶ [bounded FIFO of jobs] ──▶ emitter（依切段順序送出結果）
+                                   │
+                                   └─ 每個 job 送入即建立 ASR task，
+                                      以 semaphore 限制同時在途數（max_in_flight）
+
+- 順序保證：emitter 依 FIFO 等待每個 job，結果送出順序 = VAD 切段順序。
+- 背壓：尚未送出的 job 超過 max_pending 時，丟棄最舊、尚未開始 ASR 的 job
+  （live 字幕以即時性優先），計入 dropped，其結果視為空字串（前端會清掉該段 partial）。
+- 延遲：ASR 可重疊進行，端到端延遲 ≈ 單段 ASR 延遲，而非排隊段數 × ASR 延遲。
+- 指標：queue depth / peak、queue wait、ASR latency、end-to-end latency；
+  per-session 於結束時 log，process-wide 彙總見 get_stats()（admin endpoint 提供）。
+
+Interim results（PartialCaptioner）：
+  VAD 尚未切段時，每 LIVE_PARTIAL_INTERVAL 秒把「成長中的段落」重轉一次，送出
+  {"type": "partial"}；同一 id 的 final（"raw"）送出時前端會取代之。
+  成本上限：每 session 每分鐘最多 LIVE_PARTIAL_MAX_PER_MIN 次、同時最多 1 個在途；
+  段落一切（flush）即取消該段未完成的 partial，避免 final 之後又冒出舊 partial。
+
+Script alignment（LiveAligner）：
+  script_aligner.find_match 是同步 CPU 工作，原本直接在 async handler 內執行，
+  整個 worker 的其他連線都被卡住。改為送到 process-wide 的有界 thread pool
+  （LIVE_ALIGN_WORKERS），每 session 同時最多 1 個 alignment（aligner 有狀態、
+  非 thread-safe，且 emitter 本身依段落順序呼叫 → 順序保證）。
+  超過 LIVE_ALIGN_BUDGET 秒未完成 → 該段字幕退回 raw transcript（不等待）；
+  仍在跑的那次 alignment 完成後照樣推進 cursor，期間的新段落直接退回 raw。
+  per-session alignment latency 見 get_stats()["alignment_sessions"]。
+
+Polish/translate（PolishCoalescer）：
+  舊流程每個 final 段落各開一個 polish_text task，無上限；講話快時一個房間就有
+  數十個 Gemini 呼叫同時在途，撞 rate limit。改為每 session 一個 coalescer：
+  LIVE_POLISH_WINDOW 秒內到達的段落（最多 LIVE_POLISH_MAX_BATCH 段）合併成一次
+  結構化請求（polish_text_batch），所有 session 共用 LIVE_POLISH_MAX_CONCURRENCY
+  個在途名額；從段落送入起超過 LIVE_POLISH_DEADLINE 秒仍未完成（含排隊）即保留
+  raw 文字（送出 degraded 的 polished），晚到的結果丟棄。
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 單一 session 同時在途的 ASR 呼叫數（>1 才能在 Gemini 變慢時重疊延遲）
+LIVE_ASR_MAX_IN_FLIGHT = int(os.getenv("LIVE_ASR_MAX_IN_FLIGHT", "2"))
+# 單一 session 尚未送出的段落上限（含在途），超過即丟棄最舊的未開始段落
+LIVE_ASR_MAX_PENDING = int(os.getenv("LIVE_ASR_MAX_PENDING", "6"))
+# 單段 ASR timeout（秒），逾時視為空結果
+LIVE_ASR_TIMEOUT = float(os.getenv("LIVE_ASR_TIMEOUT", "30"))
+
+# Interim results（partial captions）— 預設關閉，client 可在 config 帶 "partials": true 開啟
+LIVE_PARTIALS_ENABLED = os.getenv("LIVE_PARTIALS_ENABLED", "false").lower() == "true"
+# 重轉成長中段落的間隔（秒）；client 只能調大，不能低於此值
+LIVE_PARTIAL_INTERVAL = float(os.getenv("LIVE_PARTIAL_INTERVAL", "1.5"))
+# 段落累積不足此秒數不送 partial（太短 ASR 幾乎沒字，純浪費）
+LIVE_PARTIAL_MIN_AUDIO = float(os.getenv("LIVE_PARTIAL_MIN_AUDIO", "1.0"))
+# 每 session 每分鐘 partial ASR 呼叫上限（成本上限）；0 = 不限
+LIVE_PARTIAL_MAX_PER_MIN = int(os.getenv("LIVE_PARTIAL_MAX_PER_MIN", "20"))
+
+# Script alignment：process-wide thread pool 大小（所有 session 共用）
+LIVE_ALIGN_WORKERS = int(os.getenv("LIVE_ALIGN_WORKERS", "2"))
+# 單段 alignment 的延遲預算（秒），超過即退回 raw transcript
+LIVE_ALIGN_BUDGET = float(os.getenv("LIVE_ALIGN_BUDGET", "1.0"))
+
+# Polish coalescing：合併視窗（秒）、單批段落上限、process-wide 在途上限、deadline（秒）
+LIVE_POLISH_WINDOW = float(os.getenv("LIVE_POLISH_WINDOW", "0.5"))
+LIVE_POLISH_MAX_BATCH = int(os.getenv("LIVE_POLISH_MAX_BATCH", "6"))
+LIVE_POLISH_MAX_CONCURRENCY = int(os.getenv("LIVE_POLISH_MAX_CONCURRENCY", "8"))
+LIVE_POLISH_DEADLINE = float(os.getenv("LIVE_POLISH_DEADLINE", "10"))
+
+TranscribeFn = Callable[[np.ndarray, str, str], Awaitable[str]]
+ResultFn = Callable[[str, str], Awaitable[None]]
+SendPartialFn = Callable[[str, str], Awaitable[None]]
+PolishBatchFn = Callable[[List[str], str, str], Awaitable[List[dict]]]
+SendPolishedFn = Callable[[str, str, str, bool], Awaitable[None]]
+
+
+class LivePipelineStats:
+    """Thread-safe 統計追蹤（per-session 與 process-wide 共用同一結構）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active_sessions = 0
+        self.total_submitted = 0
+        self.total_emitted = 0
+        self.total_dropped = 0
+        self.total_failed = 0  # timeout / exception → 空結果
+        self.partial_calls = 0
+        self.partial_emitted = 0
+        self.partial_capped = 0  # 因成本上限略過
+        self.partial_stale = 0   # 結果回來時段落已 final，丟棄
+        self.peak_depth = 0
+        self.align_calls = 0
+        self.align_overrun = 0  # 超過 budget → raw
+        self.align_skipped = 0  # 前一次 alignment 仍在跑 → raw
+        self.align_failed = 0
+        self.align_latencies: deque = deque(maxlen=200)
+        self.polish_batches = 0
+        self.polish_segments = 0
+        self.polish_degraded = 0  # deadline / error → raw 保留
+        self.polish_latencies: deque = deque(maxlen=200)
+        self.queue_wait_times: deque = deque(maxlen=200)
+        self.asr_latencies: deque = deque(maxlen=200)
+        self.e2e_latencies: deque = deque(maxlen=200)
+
+    def on_session(self, delta: int):
+        with self._lock:
+            self.active_sessions += delta
+
+    def on_submit(self, depth: int):
+        with self._lock:
+            self.total_submitted += 1
+            if depth > self.peak_depth:
+                self.peak_depth = depth
+
+    def on_drop(self):
+        with self._lock:
+            self.total_dropped += 1
+
+    def on_failed(self):
+        with self._lock:
+            self.total_failed += 1
+
+    def on_partial(self, outcome: str):
+        """outcome: 'call' | 'emitted' | 'capped' | 'stale'"""
+        with self._lock:
+            if outcome == "call":
+                self.partial_calls += 1
+            elif outcome == "emitted":
+                self.partial_emitted += 1
+            elif outcome == "capped":
+                self.partial_capped += 1
+            elif outcome == "stale":
+                self.partial_stale += 1
+
+    def on_align(self, outcome: str, latency: Optional[float] = None):
+        """outcome: 'ok' | 'overrun' | 'skipped' | 'failed'"""
+        with self._lock:
+            self.align_calls += 1
+            if outcome == "overrun":
+                self.align_overrun += 1
+            elif outcome == "skipped":
+                self.align_skipped += 1
+            elif outcome == "failed":
+                self.align_failed += 1
+            if latency is not None:
+                self.align_latencies.append(latency)
+
+    def on_align_latency(self, latency: float):
+        """Late latency sample for an alignment that already overran its budget."""
+        with self._lock:
+            self.align_latencies.append(latency)
+
+    def on_polish_batch(self, size: int, latency: Optional[float], degraded: int):
+        with self._lock:
+            self.polish_batches += 1
+            self.polish_segments += size
+            self.polish_degraded += degraded
+            if latency is not None:
+                self.polish_latencies.append(latency)
+
+    def on_emit(self, queue_wait: Optional[float], asr_latency: Optional[float], e2e: float):
+        with self._lock:
+            self.total_emitted += 1
+            if queue_wait is not None:
+                self.queue_wait_times.append(queue_wait)
+            if asr_latency is not None:
+                self.asr_latencies.append(asr_latency)
+            self.e2e_latencies.append(e2e)
+
+    @staticmethod
+    def _avg(values) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    @staticmethod
+    def _p95(values) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "active_sessions": self.active_sessions,
+                "total_submitted": self.total_submitted,
+                "total_emitted": self.total_emitted,
+                "total_dropped": self.total_dropped,
+                "total_failed": self.total_failed,
+                "partial_calls": self.partial_calls,
+                "partial_emitted": self.partial_emitted,
+                "partial_capped": self.partial_capped,
+                "partial_stale": self.partial_stale,
+                "peak_depth": self.peak_depth,
+                "avg_queue_wait_sec": round(self._avg(self.queue_wait_times), 3),
+                "max_queue_wait_sec": round(max(self.queue_wait_times, default=0.0), 3),
+                "avg_asr_latency_sec": round(self._avg(self.asr_latencies), 3),
+                "p95_asr_latency_sec": round(self._p95(self.asr_latencies), 3),
+                "avg_e2e_latency_sec": round(self._avg(self.e2e_latencies), 3),
+                "p95_e2e_latency_sec": round(self._p95(self.e2e_latencies), 3),
+                "max_in_flight": LIVE_ASR_MAX_IN_FLIGHT,
+                "max_pending": LIVE_ASR_MAX_PENDING,
+                "polish_batches": self.polish_batches,
+                "polish_segments": self.polish_segments,
+                "polish_degraded": self.polish_degraded,
+                "avg_polish_batch_size": round(self.polish_segments / self.polish_batches, 2) if self.polish_batches else 0.0,
+                "p95_polish_latency_sec": round(self._p95(self.polish_latencies), 3),
+                "polish_max_concurrency": LIVE_POLISH_MAX_CONCURRENCY,
+                **self._alignment_fields(),
+            }
+
+    def alignment_snapshot(self) -> dict:
+        with self._lock:
+            return self._alignment_fields()
+
+    def _alignment_fields(self) -> dict:
+        return {
+            "align_calls": self.align_calls,
+            "align_overrun": self.align_overrun,
+            "align_skipped": self.align_skipped,
+            "align_failed": self.align_failed,
+            "avg_align_latency_sec": round(self._avg(self.align_latencies), 4),
+            "p95_align_latency_sec": round(self._p95(self.align_latencies), 4),
+            "max_align_latency_sec": round(max(self.align_latencies, default=0.0), 4),
+            "align_budget_sec": LIVE_ALIGN_BUDGET,
+        }
+
+
+# --- Module-level singleton (process-wide) ---
+_stats = LivePipelineStats()
+
+# Alignment thread pool（lazy，所有 session 共用）與 per-session 統計登記
+_align_executor: Optional[ThreadPoolExecutor] = None
+_align_executor_lock = threading.Lock()
+_align_sessions: dict = {}
+
+
+def _get_align_executor() -> ThreadPoolExecutor:
+    global _align_executor
+    if _align_executor is None:
+        with _align_executor_lock:
+            if _align_executor is None:
+                _align_executor = ThreadPoolExecutor(
+                    max_workers=max(1, LIVE_ALIGN_WORKERS),
+                    thread_name_prefix="live-align",
+                )
+    return _align_executor
+
+
+@dataclass
+class _Job:
+    segment_id: str
+    audio: Optional[np.ndarray]
+    lang: str
+    prompt: str
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = None
+    dropped: bool = False
+
+
+class LiveASRPipeline:
+    """
+    Per-session ordered ASR pipeline.
+
+    Args:
+        transcribe: async (audio_np, lang, prompt) -> text
+        on_result: async (segment_id, text) -> None, called in submission order
+    """
+
+    def __init__(
+        self,
+        transcribe: TranscribeFn,
+        on_result: ResultFn,
+        max_in_flight: int = LIVE_ASR_MAX_IN_FLIGHT,
+        max_pending: int = LIVE_ASR_MAX_PENDING,
+        timeout: float = LIVE_ASR_TIMEOUT,
+    ):
+        self._transcribe = transcribe
+        self._on_result = on_result
+        self.max_in_flight = max(1, max_in_flight)
+        # 至少要能容納全部在途 job + 1 個等待中的，丟棄策略才有對象
+        self.max_pending = max(max_pending, self.max_in_flight + 1)
+        self.timeout = timeout
+
+        self._sem = asyncio.Semaphore(self.max_in_flight)
+        self._jobs: deque = deque()
+        self._has_jobs = asyncio.Event()
+        self._emitter: Optional[asyncio.Task] = None
+        self.stats = LivePipelineStats()
+
+    @property
+    def depth(self) -> int:
+        """Segments submitted but not yet emitted (excluding dropped ones)."""
+        return sum(1 for job in self._jobs if not job.dropped)
+
+    def start(self):
+        self._emitter = asyncio.create_task(self._emit_loop())
+        _stats.on_session(1)
+
+    def submit(self, segment_id: str, audio: np.ndarray, lang: str, prompt: str):
+        """
+        Queue a segment for ASR without blocking the receive loop.
+
+        `audio` is copied: the VAD buffer reuses its memory on the next chunk.
+        """
+        if self.depth >= self.max_pending:
+            self._drop_oldest_waiting()
+
+        job = _Job(
+            segment_id=segment_id,
+            audio=np.array(audio, dtype=np.float32, copy=True),
+            lang=lang,
+            prompt=prompt,
+            submitted_at=time.monotonic(),
+        )
+        job.task = asyncio.create_task(self._run_asr(job))
+        self._jobs.append(job)
+        self._has_jobs.set()
+
+        depth = self.depth
+        self.stats.on_submit(depth)
+        _stats.on_submit(depth)
+
+    def _drop_oldest_waiting(self):
+        for job in self._jobs:
+            if not job.dropped and job.started_at is None:
+                job.dropped = True
+                job.audio = None
+                job.task.cancel()
+                self.stats.on_drop()
+                _stats.on_drop()
+                logger.warning(
+                    f"[LiveASR] Backpressure: dropped segment {job.segment_id} "
+                    f"(depth={self.depth + 1}, max_pending={self.max_pending})"
+                )
+                return
+
+    async def _run_asr(self, job: _Job) -> str:
+        async with self._sem:
+            job.started_at = time.monotonic()
+            try:
+                return await asyncio.wait_for(
+                    self._transcribe(job.audio, job.lang, job.prompt),
+                    timeout=self.timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"[LiveASR] ASR timed out for segment {job.segment_id}. Skipping segment.")
+            except Exception as e:
+                logger.error(f"[LiveASR] ASR error for segment {job.segment_id}: {e}", exc_info=True)
+            finally:
+                job.finished_at = time.monotonic()
+                job.audio = None
+            self.stats.on_failed()
+            _stats.on_failed()
+            return ""
+
+    async def _emit_loop(self):
+        while True:
+            if not self._jobs:
+                self._has_jobs.clear()
+                await self._has_jobs.wait()
+                continue
+
+            job = self._jobs[0]
+            # asyncio.wait (not await task) so a dropped/cancelled job doesn't
+            # raise CancelledError into the emitter itself.
+            await asyncio.wait({job.task})
+            self._jobs.popleft()
+
+            text = "" if job.task.cancelled() else job.task.result()
+            now = time.monotonic()
+            queue_wait = job.started_at - job.submitted_at if job.started_at else None
+            asr_latency = (
+                job.finished_at - job.started_at if job.started_at and job.finished_at else None
+            )
+            self.stats.on_emit(queue_wait, asr_latency, now - job.submitted_at)
+            _stats.on_emit(queue_wait, asr_latency, now - job.submitted_at)
+
+            try:
+                await self._on_result(job.segment_id, text)
+            except Exception as e:
+                logger.error(f"[LiveASR] Result handler failed for segment {job.segment_id}: {e}", exc_info=True)
+
+    async def close(self):
+        """Cancel pending work (the socket is gone) and log the session summary."""
+        if self._emitter:
+            self._emitter.cancel()
+        for job in self._jobs:
+            if job.task:
+                job.task.cancel()
+        pending = [t for t in [self._emitter] + [j.task for j in self._jobs] if t]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._jobs.clear()
+        if self._emitter:
+            _stats.on_session(-1)
+            self._emitter = None
+        logger.info(f"[LiveASR] Session pipeline closed: {self.stats.snapshot()}")
+
+
+class PartialCaptioner:
+    """
+    Per-session interim results: periodically re-transcribe the growing segment.
+
+    Args:
+        transcribe: async (audio_np, lang, prompt) -> text (same backend as finals)
+        send_partial: async (segment_id, text) -> None
+    """
+
+    def __init__(
+        self,
+        transcribe: TranscribeFn,
+        send_partial: SendPartialFn,
+        interval: float = LIVE_PARTIAL_INTERVAL,
+        min_audio: float = LIVE_PARTIAL_MIN_AUDIO,
+        max_per_minute: int = LIVE_PARTIAL_MAX_PER_MIN,
+        timeout: float = LIVE_ASR_TIMEOUT,
+        sample_rate: int = 16000,
+        enabled: bool = LIVE_PARTIALS_ENABLED,
+    ):
+        self._transcribe = transcribe
+        self._send_partial = send_partial
+        self.interval = interval
+        self.min_audio = min_audio
+        self.max_per_minute = max_per_minute
+        self.timeout = timeout
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+
+        self.last_partial_time = time.monotonic()
+        self._segment_id: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._recent_calls: deque = deque()
+        self.stats = LivePipelineStats()
+
+    def configure(self, enabled: Optional[bool] = None, interval: Optional[float] = None):
+        """Apply client config. The interval can only be raised above the server floor."""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if interval is not None:
+            self.interval = max(float(interval), LIVE_PARTIAL_INTERVAL)
+
+    def _record(self, outcome: str):
+        self.stats.on_partial(outcome)
+        _stats.on_partial(outcome)
+
+    def _under_cap(self, now: float) -> bool:
+        if self.max_per_minute <= 0:
+            return True
+        while self._recent_calls and now - self._recent_calls[0] >= 60.0:
+            self._recent_calls.popleft()
+        return len(self._recent_calls) < self.max_per_minute
+
+    def maybe_submit(self, segment_id: str, audio: Optional[np.ndarray], lang: str, prompt: str) -> bool:
+        """
+        Called after every chunk that didn't split. Starts a partial ASR call if
+        the timer elapsed, the segment is long enough, none is in flight and the
+        session is under its cost cap. `audio` is copied.
+        """
+        if not self.enabled or audio is None:
+            return False
+        now = time.monotonic()
+        if now - self.last_partial_time < self.interval:
+            return False
+        if audio.size < self.min_audio * self.sample_rate:
+            return False
+        if self._task is not None and not self._task.done():
+            return False
+        self.last_partial_time = now
+        if not self._under_cap(now):
+            self._record("capped")
+            return False
+
+        self._recent_calls.append(now)
+        self._segment_id = segment_id
+        self._task = asyncio.create_task(
+            self._run(segment_id, np.array(audio, dtype=np.float32, copy=True), lang, prompt)
+        )
+        self._record("call")
+        return True
+
+    def finalize(self, segment_id: str):
+        """The segment was flushed to the final pipeline — its partials are obsolete."""
+        if self._segment_id == segment_id:
+            self._segment_id = None
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
+        self.last_partial_time = time.monotonic()
+
+    async def _run(self, segment_id: str, audio: np.ndarray, lang: str, prompt: str):
+        try:
+            text = await asyncio.wait_for(self._transcribe(audio, lang, prompt), timeout=self.timeout)
+        except asyncio.CancelledError:
+            self._record("stale")
+            raise
+        except Exception as e:
+            logger.warning(f"[LiveASR] Partial ASR failed for segment {segment_id}: {e}")
+            return
+        if self._segment_id != segment_id:
+            self._record("stale")
+            return
+        if text:
+            await self._send_partial(segment_id, text)
+            self._record("emitted")
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self.stats.partial_calls:
+            logger.info(f"[LiveASR] Session partials: {self.stats.snapshot()}")
+
+
+class LiveAligner:
+    """
+    Per-session wrapper that runs a (stateful) script aligner off the event loop.
+
+    At most one alignment per session is in flight; calls arrive in segment
+    order from the pipeline emitter, so the aligner sees segments in order.
+
+    Args:
+        aligner: object with find_match(...) / load_script(...)
+        session_id: key for per-session metrics in get_stats()
+        budget: seconds to wait before degrading to the raw transcript
+    """
+
+    def __init__(self, aligner: Any, session_id: str, budget: float = LIVE_ALIGN_BUDGET,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.aligner = aligner
+        self.session_id = session_id
+        self.budget = budget
+        self._executor = executor
+        self._inflight: Optional[asyncio.Future] = None
+        self.stats = LivePipelineStats()
+        _align_sessions[session_id] = self.stats
+
+    def _submit(self, fn, *args, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        executor = self._executor or _get_align_executor()
+        self._inflight = loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+        return self._inflight
+
+    def _record(self, outcome: str, latency: Optional[float] = None):
+        self.stats.on_align(outcome, latency)
+        _stats.on_align(outcome, latency)
+
+    async def _wait_idle(self):
+        if self._inflight is not None and not self._inflight.done():
+            await asyncio.wait({self._inflight})
+
+    async def load_script(self, script_text: str):
+        """Reload the script once any running alignment has finished with the old one."""
+        await self._wait_idle()
+        await self._submit(self.aligner.load_script, script_text)
+
+    async def find_match(self, text: str, **kwargs) -> Tuple[Optional[dict], str]:
+        """
+        Returns (match_result, outcome); outcome is 'ok' | 'overrun' | 'skipped' | 'failed'.
+        Anything but 'ok' means the caller should fall back to the raw transcript.
+        """
+        if self._inflight is not None and not self._inflight.done():
+            self._record("skipped")
+            return None, "skipped"
+
+        started = time.monotonic()
+        future = self._submit(self.aligner.find_match, text, **kwargs)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=self.budget)
+        except asyncio.TimeoutError:
+            # The job keeps running in its thread; record its real latency when it lands.
+            future.add_done_callback(lambda _f: self.stats.on_align_latency(time.monotonic() - started))
+            self._record("overrun")
+            logger.warning(f"[LiveAlign] Alignment exceeded {self.budget}s budget (session {self.session_id}); using raw transcript")
+            return None, "overrun"
+        except Exception as e:
+            self._record("failed", time.monotonic() - started)
+            logger.error(f"[LiveAlign] Alignment failed (session {self.session_id}): {e}", exc_info=True)
+            return None, "failed"
+
+        self._record("ok", time.monotonic() - started)
+        return result, "ok"
+
+    def close(self):
+        _align_sessions.pop(self.session_id, None)
+        if self.stats.align_calls:
+            logger.info(f"[LiveAlign] Session alignment: {self.stats.alignment_snapshot()}")
+
+
+# Process-wide polish 在途上限（跨 session）。asyncio.Semaphore 綁定 event loop，
+# 換 loop（例如測試各自 asyncio.run）時重建。
+_polish_sem: Optional[asyncio.Semaphore] = None
+_polish_sem_loop = None
+
+
+def _get_polish_semaphore() -> asyncio.Semaphore:
+    global _polish_sem, _polish_sem_loop
+    loop = asyncio.get_running_loop()
+    if _polish_sem is None or _polish_sem_loop is not loop:
+        _polish_sem = asyncio.Semaphore(max(1, LIVE_POLISH_MAX_CONCURRENCY))
+        _polish_sem_loop = loop
+    return _polish_sem
+
+
+def _release_polish_slot(sem: asyncio.Semaphore):
+    """Done-callback：polish 呼叫真正結束才釋放全域 slot。"""
+    def _done(fut: asyncio.Future):
+        sem.release()
+        if not fut.cancelled():
+            fut.exception()  # 逾時後沒人 await 的失敗不要變成 "exception was never retrieved"
+    return _done
+
+
+@dataclass
+class _PolishItem:
+    segment_id: str
+    text: str
+    submitted_at: float
+
+
+class PolishCoalescer:
+    """
+    Per-session batching of live polish/translate calls.
+
+    Args:
+        polish_batch: async (texts, source_lang, target_lang) -> [result dict per text];
+            a dict with "error" keeps that segment raw
+        send_polished: async (segment_id, content, translated, degraded) -> None
+    """
+
+    def __init__(
+        self,
+        polish_batch: PolishBatchFn,
+        send_polished: SendPolishedFn,
+        window: float = LIVE_POLISH_WINDOW,
+        max_batch: int = LIVE_POLISH_MAX_BATCH,
+        deadline: float = LIVE_POLISH_DEADLINE,
+    ):
+        self._polish_batch = polish_batch
+        self._send_polished = send_polished
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.deadline = deadline
+
+        self._pending: List[_PolishItem] = []
+        self._langs: Optional[Tuple[str, str]] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self.stats = LivePipelineStats()
+
+    def submit(self, segment_id: str, text: str, source_lang: str, target_lang: str):
+        """Queue a finalized segment; it is sent with whatever else arrives within the window."""
+        langs = (source_lang, target_lang)
+        if self._pending and langs != self._langs:
+            self._flush()
+        self._langs = langs
+        self._pending.append(_PolishItem(segment_id, text, time.monotonic()))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window)
+        self._timer = None
+        self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._run(batch, *self._langs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_PolishItem], source_lang: str, target_lang: str):
+        texts = [item.text for item in batch]
+        deadline_at = batch[0].submitted_at + self.deadline
+        started = time.monotonic()
+        results: List[dict] = []
+
+        try:
+            sem = _get_polish_semaphore()
+            await asyncio.wait_for(sem.acquire(), timeout=max(deadline_at - time.monotonic(), 0.0))
+            # polish_batch 實際在 worker thread 跑（to_thread），取消 await 停不了它：
+            # slot 要等呼叫真的結束才釋放，deadline / close() 只放棄「等結果」
+            call = asyncio.ensure_future(self._polish_batch(texts, source_lang, target_lang))
+            call.add_done_callback(_release_polish_slot(sem))
+            results = await asyncio.wait_for(
+                asyncio.shield(call), timeout=max(deadline_at - time.monotonic(), 0.0)
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"[LivePolish] Batch of {len(batch)} missed the {self.deadline}s deadline; keeping raw text")
+        except Exception as e:
+            logger.error(f"[LivePolish] Batch polish failed: {e}", exc_info=True)
+
+        degraded = 0
+        for i, item in enumerate(batch):
+            result = results[i] if i < len(results) else {"error": "no result"}
+            if "error" in result:
+                degraded += 1
+                await self._send_polished(item.segment_id, item.text, "", True)
+            else:
+                await self._send_polished(
+                    item.segment_id,
+                    result.get("polished_text", item.text),
+                    result.get("translated", ""),
+                    False,
+                )
+
+        latency = time.monotonic() - started if results else None
+        self.stats.on_polish_batch(len(batch), latency, degraded)
+        _stats.on_polish_batch(len(batch), latency, degraded)
+
+    async def close(self):
+        """Drop queued segments (the socket is gone) and cancel batches in flight."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = []
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self.stats.polish_batches:
+            logger.info(f"[LivePolish] Session polish: {self.stats.snapshot()}")
+
+
+def get_stats() -> dict:
+    """取得 live ASR pipeline 即時統計（process-wide + per-session alignment）。"""
+    snapshot = _stats.snapshot()
+    snapshot["alignment_sessions"] = {
+        sid: stats.alignment_snapshot() for sid, stats in list(_align_sessions.items())
+    }
+    return snapshot
+
+
+def reset_stats():
+    """重置統計（用於測試 / 壓測前清零）。"""
+    global _stats
+    active = _stats.active_sessions
+    _stats = LivePipelineStats()
+    _stats.active_sessions = active
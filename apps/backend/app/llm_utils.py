@@ -1,7 +1,10 @@
 import os
 import logging
+import itertools
 import json
 import re
+import threading
+import time
 import unicodedata
 from typing import List, Optional, Dict, Any, Union
 from pydantic import BaseModel, Field
@@ -20,45 +23,157 @@ GCP_LOCATION = os.getenv("GCP_LOCATION", "asia-southeast1")
 # Must be "global" or a US/EU region — asia-southeast1 is NOT supported for Gemini models
 GEMINI_LOCATION = os.getenv("GEMINI_LOCATION", "us-central1")
 
-def get_gemini_client() -> Optional[genai.Client]:
-    """Initialize and return a Gemini client."""
+# --- Process-wide client factory ---
+# genai.Client 建構成本不低（Vertex 無 GCP_PROJECT 時每次還會同步打 metadata server），
+# 而 get_gemini_client() 在每個 live 段落 / polish / RAG 問題 / embedding / glossary
+# 批次都會呼叫。改為 process-wide 快取：
+#   - 第一次呼叫（或 startup warm_up_gemini_client）建立，之後直接重用（連線池也跟著重用）
+#   - GEMINI_CLIENT_MAX_AGE 秒後重建，確保輪替後的 API key / ADC 憑證會被套用；
+#     呼叫端 except 區塊呼叫 reset_gemini_client_on_transport_error(e)：連線 / 協定 /
+#     憑證刷新錯誤時立即重建（不必等 max age）
+#   - GEMINI_CLIENT_POOL_SIZE > 1 時建多個 client 輪流發出（高併發時分散 HTTP 連線池）
+#   - metadata server 查到的 project 快取；查詢失敗 60 秒內不重試
+GEMINI_CLIENT_POOL_SIZE = max(1, int(os.getenv("GEMINI_CLIENT_POOL_SIZE", "1")))
+GEMINI_CLIENT_MAX_AGE = float(os.getenv("GEMINI_CLIENT_MAX_AGE", "3000"))
+_PROJECT_RETRY_SECONDS = 60.0
+# reset_gemini_client_on_transport_error 不重建比這更新的 pool（同一波失敗只重建一次）
+_TRANSPORT_RESET_MIN_AGE = 10.0
+
+_client_lock = threading.Lock()
+_client_pool: List[genai.Client] = []
+_client_created_at = 0.0
+_client_next = itertools.count()
+_detected_project: Optional[str] = None
+_project_failed_at: Optional[float] = None
+
+
+def _resolve_gcp_project() -> str:
+    """GCP_PROJECT, else the metadata server (cached; failures retried after a minute)."""
+    global _detected_project, _project_failed_at
+    if GCP_PROJECT:
+        return GCP_PROJECT
+    if _detected_project:
+        return _detected_project
+    if _project_failed_at is not None and time.monotonic() - _project_failed_at < _PROJECT_RETRY_SECONDS:
+        return ""
     try:
-        if GEMINI_API_KEY:
-            # Local development: use API key
-            client = genai.Client(api_key=GEMINI_API_KEY)
-            logger.info(f"Gemini client initialized with API Key, model: {GEMINI_MODEL}")
-            return client
-        else:
-            # GCP Cloud Run: use ADC via Vertex AI
-            # Auto-detect project if not strictly set, but main.py sets it usually
-            project = GCP_PROJECT
-            if not project:
-                # Try metadata server as fallback
+        import requests
+        resp = requests.get(
+            "http://metadata.google.internal/computeMetadata/v1/project/project-id",
+            headers={"Metadata-Flavor": "Google"}, timeout=2
+        )
+        resp.raise_for_status()
+        _detected_project = resp.text
+        logger.info(f"Auto-detected GCP project: {_detected_project}")
+        return _detected_project
+    except Exception:
+        _project_failed_at = time.monotonic()
+        logger.warning("Could not auto-detect GCP project")
+        return ""
+
+
+def _create_gemini_client() -> Optional[genai.Client]:
+    """Build one client: API key (local dev) or ADC via Vertex AI (Cloud Run)."""
+    if GEMINI_API_KEY:
+        return genai.Client(api_key=GEMINI_API_KEY)
+    project = _resolve_gcp_project()
+    if not project:
+        logger.error("No GEMINI_API_KEY and no GCP_PROJECT — cannot initialize Gemini client")
+        return None
+    return genai.Client(vertexai=True, project=project, location=GEMINI_LOCATION)
+
+
+def _build_client_pool() -> List[genai.Client]:
+    pool = []
+    for _ in range(GEMINI_CLIENT_POOL_SIZE):
+        client = _create_gemini_client()
+        if client is None:
+            break
+        pool.append(client)
+    if pool:
+        mode = "API Key" if GEMINI_API_KEY else f"ADC (Vertex AI), project={_resolve_gcp_project()}"
+        logger.info(f"Gemini client pool initialized with {mode}, size={len(pool)}, model: {GEMINI_MODEL}")
+    return pool
+
+
+def get_gemini_client() -> Optional[genai.Client]:
+    """Return a cached, process-wide Gemini client (thread-safe; None if unavailable)."""
+    global _client_pool, _client_created_at
+    now = time.monotonic()
+    pool = _client_pool
+    if not pool or now - _client_created_at >= GEMINI_CLIENT_MAX_AGE:
+        with _client_lock:
+            if not _client_pool or now - _client_created_at >= GEMINI_CLIENT_MAX_AGE:
                 try:
-                    import requests
-                    resp = requests.get(
-                        "http://metadata.google.internal/computeMetadata/v1/project/project-id",
-                        headers={"Metadata-Flavor": "Google"}, timeout=2
-                    )
-                    project = resp.text
-                    logger.info(f"Auto-detected GCP project: {project}")
-                except Exception:
-                    logger.warning("Could not auto-detect GCP project")
-
-            if project:
-                client = genai.Client(
-                    vertexai=True,
-                    project=project,
-                    location=GEMINI_LOCATION
-                )
-                logger.info(f"Gemini client initialized with ADC (Vertex AI), project={project}")
-                return client
-            else:
-                logger.error("No GEMINI_API_KEY and no GCP_PROJECT — cannot initialize Gemini client")
-                return None
-    except Exception as e:
-        logger.error(f"Failed to initialize Gemini client: {e}")
+                    new_pool = _build_client_pool()
+                except Exception as e:
+                    logger.error(f"Failed to initialize Gemini client: {e}")
+                    new_pool = []
+                if new_pool:
+                    _client_pool = new_pool
+                    _client_created_at = now
+                elif _client_pool:
+                    # Refresh failed — keep serving the previous clients, retry later
+                    logger.warning("Gemini client refresh failed; reusing existing clients")
+                    _client_created_at = now - GEMINI_CLIENT_MAX_AGE + _PROJECT_RETRY_SECONDS
+            pool = _client_pool
+    if not pool:
         return None
+    return pool[next(_client_next) % len(pool)]
+
+
+def reset_gemini_client():
+    """Drop cached clients so the next call rebuilds them (e.g. after rotating credentials)."""
+    global _client_pool, _client_created_at, _detected_project, _project_failed_at
+    with _client_lock:
+        _client_pool = []
+        _client_created_at = 0.0
+        _detected_project = None
+        _project_failed_at = None
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    """Connection / protocol / credential-refresh failure anywhere in the exception chain
+    (an API-level error response or a timeout does not count)."""
+    types_: tuple = (ConnectionError,)
+    try:
+        import httpx
+        types_ += (httpx.NetworkError, httpx.ProtocolError)
+    except ImportError:
+        pass
+    try:
+        from google.auth import exceptions as auth_exceptions
+        types_ += (auth_exceptions.TransportError, auth_exceptions.RefreshError)
+    except ImportError:
+        pass
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, types_):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def reset_gemini_client_on_transport_error(exc: BaseException) -> bool:
+    """
+    Call from a Gemini caller's except block: if exc means the pooled clients'
+    transport or credentials are broken, rebuild the pool on the next call
+    instead of reusing it until GEMINI_CLIENT_MAX_AGE. Pools younger than
+    _TRANSPORT_RESET_MIN_AGE are kept, so a burst of failures rebuilds once.
+    """
+    if not _is_transport_error(exc):
+        return False
+    if _client_pool and time.monotonic() - _client_created_at < _TRANSPORT_RESET_MIN_AGE:
+        return False
+    logger.warning(f"Gemini transport error ({type(exc).__name__}); rebuilding client pool")
+    reset_gemini_client()
+    return True
+
+
+def warm_up_gemini_client() -> bool:
+    """Build the client pool ahead of the first request (startup hook)."""
+    return get_gemini_client() is not None
 
 # --- Pydantic Schemas for Structured Output ---
 class SpeakerRole(BaseModel):
@@ -713,6 +828,7 @@ def generate_summary(
                     return {"error": "Failed to parse JSON response", "raw_text": response.text}
             
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"Gemini API Error: {e}")
         return {"error": str(e)}
 
@@ -774,6 +890,7 @@ def infer_speaker_roles(
         logger.info(f"[SpeakerRoles] Inferred {len(roles)} speaker role entries")
         return roles
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.warning(f"[SpeakerRoles] Inference failed (non-fatal): {e}")
         return []
 
@@ -818,10 +935,81 @@ def polish_text(
             return {"error": "Failed to parse JSON", "raw_text": response.text}
             
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"Polish Error: {e}")
         return {"error": str(e)}
 
 
+class PolishBatchItem(BaseModel):
+    id: int
+    refined: str
+    translated: str
+
+
+class PolishBatchResult(BaseModel):
+    items: List[PolishBatchItem]
+
+
+def polish_text_batch(
+    client: genai.Client,
+    raw_texts: List[str],
+    source_lang: str = 'zh',
+    target_lang: str = 'en'
+) -> List[Dict[str, str]]:
+    """Polish + translate several live segments in one structured Gemini call.
+
+    Returns one dict per input, in order, shaped like polish_text()'s result;
+    segments the model skipped (or a failed call) come back as {"error": ...}.
+    """
+    if not raw_texts:
+        return []
+    if len(raw_texts) == 1:
+        return [polish_text(client, raw_texts[0], source_lang, target_lang)]
+
+    numbered = "\n".join(f"[{i}] {text}" for i, text in enumerate(raw_texts))
+    prompt = f"""請幫我潤色以下多段逐字稿（依序為同一場會議的連續段落），使每段更通順自然，同時提供每段的英文翻譯。
+每段獨立處理，不要合併或拆分段落。
+請以 JSON 格式回覆：{{"items": [{{"id": 段落編號, "refined": 潤色後的中文, "translated": 英文翻譯}}]}}，每段一筆。
+
+{numbered}"""
+
+    try:
+        response = client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": PolishBatchResult,
+                "temperature": 0.3
+            }
+        )
+        try:
+            items = json.loads(response.text).get("items", [])
+        except json.JSONDecodeError:
+            logger.error(f"Polish batch JSON Decode Error. Raw: {response.text}")
+            return [{"error": "Failed to parse JSON"} for _ in raw_texts]
+
+        by_id = {item.get("id"): item for item in items if isinstance(item, dict)}
+        results = []
+        for i, raw_text in enumerate(raw_texts):
+            item = by_id.get(i)
+            if item is None:
+                results.append({"error": "missing from batch response"})
+                continue
+            refined = item.get("refined") or raw_text
+            results.append({
+                "polished_text": refined,
+                "refined": refined,
+                "translated": item.get("translated", ""),
+            })
+        return results
+
+    except Exception as e:
+        reset_gemini_client_on_transport_error(e)
+        logger.error(f"Polish batch Error: {e}")
+        return [{"error": str(e)} for _ in raw_texts]
+
+
 # ============================================
 # Feature #3: Summary speaker re-sync (targeted relabel)
 # 2026-07-06: 當使用者更新說話者標籤 / 逐段重指派後，用 LLM 快速掃過摘要，
@@ -902,6 +1090,7 @@ def relabel_summary_speakers(
         changed = json.dumps(orig, ensure_ascii=False, sort_keys=True) != json.dumps(new, ensure_ascii=False, sort_keys=True)
         return {"summary_json": normalized, "changed": changed}
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[relabel] Error: {e}")
         return {"summary_json": summary_json_str, "changed": False, "error": str(e)}
 
@@ -978,6 +1167,7 @@ def correct_segments_glossary_llm(
         logger.error(f"[glossary-llm] JSON parse failed: {je}")
         return {"corrections": [], "error": "invalid JSON from LLM"}
     except Exception as e:  # noqa: BLE001
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[glossary-llm] Error: {e}")
         return {"corrections": [], "error": str(e)}
 
@@ -1042,5 +1232,6 @@ def patch_summary_glossary_llm(
         changed = json.dumps(orig, ensure_ascii=False, sort_keys=True) != json.dumps(new, ensure_ascii=False, sort_keys=True)
         return {"summary_json": normalized, "changed": changed}
     except Exception as e:  # noqa: BLE001
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[glossary-summary-llm] Error: {e}")
         return {"summary_json": summary_json_str, "changed": False, "error": str(e)}
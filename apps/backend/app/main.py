@@ -239,6 +239,47 @@ if DATABASE_URL.startswith("postgresql"):
         
     app_logger.info("[Startup] RAG access control tables verified/created and orphan meetings backfilled.")
 
+# RAG query cache L2 table (alembic k5f6a7b8c9d0; safety net only when the DB tier is on)
+from app.rag.query_cache import RAG_QUERY_CACHE_DB, ensure_cache_table
+if RAG_QUERY_CACHE_DB:
+    ensure_cache_table(engine)
+
+# Embedding content-hash cache (alembic l6a7b8c9d0e1); 建表失敗只停用 cache，不擋啟動
+from app.embedding_cache import EMBEDDING_CACHE_ENABLED, ensure_embedding_cache_table
+if EMBEDDING_CACHE_ENABLED:
+    try:
+        ensure_embedding_cache_table(engine)
+    except Exception as e:
+        app_logger.warning(f"[Startup] embedding_cache table check failed: {e}")
+
+# Embedding backfill checkpoints (alembic m7b8c9d0e1f2)
+from app.embedding_backfill import ensure_backfill_state_table
+try:
+    ensure_backfill_state_table(engine)
+except Exception as e:
+    app_logger.warning(f"[Startup] embedding_backfill_state table check failed: {e}")
+
+# Incremental re-embed dirty tracking columns (alembic n8c9d0e1f2a3)
+from app.embedding_refresh import ensure_dirty_tracking_columns
+try:
+    ensure_dirty_tracking_columns(engine)
+except Exception as e:
+    app_logger.warning(f"[Startup] embedding dirty-tracking columns check failed: {e}")
+
+# Summary digest columns (alembic p0e1f2a3b4c5)
+from app.summary_digest import ensure_summary_digest_columns
+try:
+    ensure_summary_digest_columns(engine)
+except Exception as e:
+    app_logger.warning(f"[Startup] summary digest columns check failed: {e}")
+
+# RAG answer cache corpus version (alembic q1f2a3b4c5d6)
+from app.rag.answer_cache import ensure_corpus_version_column
+try:
+    ensure_corpus_version_column(engine)
+except Exception as e:
+    app_logger.warning(f"[Startup] corpus_version column check failed: {e}")
+
 
 from app.tasks import generate_meeting_minutes  # Now a direct function (not Celery task)
 from app.routes import api_router  # Import routes
@@ -324,12 +365,16 @@ async def on_startup():
     Base.metadata.create_all(bind=engine)
     app_logger.info("Database tables checked/created.")
     
-    # ASR model pre-loading is optional - in Cloud Run CPU environment,
-    # this will fail because faster-whisper requires GPU libraries.
-    # ASR transcription should be handled by a separate GPU-enabled service.
-    enable_asr_preload = os.getenv("ENABLE_ASR_PRELOAD", "false").lower() == "true"
+    # ASR model pre-loading is optional. With the default Gemini live backend
+    # there is nothing to load; with LIVE_ASR_BACKEND=local the shared CPU
+    # faster-whisper model is warmed here so the first session doesn't pay it.
+    from app.asr_helpers import LIVE_ASR_BACKEND
+    enable_asr_preload = (
+        os.getenv("ENABLE_ASR_PRELOAD", "false").lower() == "true"
+        or LIVE_ASR_BACKEND != "gemini"
+    )
     if enable_asr_preload:
-        app_logger.info("Pre-loading ASR model (ENABLE_ASR_PRELOAD=true)...")
+        app_logger.info(f"Pre-loading live ASR backend (LIVE_ASR_BACKEND={LIVE_ASR_BACKEND})...")
         try:
             await asyncio.to_thread(load_asr_model)
             app_logger.info("ASR model pre-loaded successfully.")
@@ -339,6 +384,48 @@ async def on_startup():
     else:
         app_logger.info("Skipping ASR model pre-loading (ENABLE_ASR_PRELOAD not set).")
 
+    # Warm the process-wide Silero VAD model so the first /ws/transcribe
+    # connection doesn't pay the torch.hub load. No-op without torch.
+    try:
+        from app.vad import get_silero_model
+        await asyncio.to_thread(get_silero_model)
+    except Exception as e:
+        app_logger.warning(f"Silero VAD warm-up failed (non-fatal): {e}")
+
+    # Build the process-wide Gemini client pool (and resolve the GCP project
+    # on Vertex) now, instead of inside the first live segment / RAG question.
+    try:
+        from app.llm_utils import warm_up_gemini_client
+        if not await asyncio.to_thread(warm_up_gemini_client):
+            app_logger.warning("Gemini client warm-up: client unavailable (non-fatal)")
+    except Exception as e:
+        app_logger.warning(f"Gemini client warm-up failed (non-fatal): {e}")
+
+    # 上次 process 結束前未處理完的 dirty 會議重新排入背景 re-embedder
+    try:
+        from app.embedding_refresh import schedule_dirty_meetings
+        queued = await asyncio.to_thread(schedule_dirty_meetings, engine)
+        if queued:
+            app_logger.info(f"[Startup] Queued {queued} meetings with stale embeddings for re-embed")
+    except Exception as e:
+        app_logger.warning(f"Dirty re-embed recovery failed (non-fatal): {e}")
+
+    # 舊會議回填 summary digest（讀取端在回填前會退回解析 summary_json）
+    try:
+        from app.summary_digest import backfill_summary_digests
+        filled = await asyncio.to_thread(backfill_summary_digests, engine)
+        if filled:
+            app_logger.info(f"[Startup] Backfilled summary digest for {filled} meetings")
+    except Exception as e:
+        app_logger.warning(f"Summary digest backfill failed (non-fatal): {e}")
+
+    # access set ID filter 用的 transcript_segments.meeting_id btree（alembic r2a3b4c5d6e7；CONCURRENTLY）
+    try:
+        from app.access_set import ensure_access_filter_index
+        await asyncio.to_thread(ensure_access_filter_index, engine)
+    except Exception as e:
+        app_logger.warning(f"Access filter index check failed (non-fatal): {e}")
+
 
 @app.get("/")
 def read_root():
@@ -1,12 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Enum, Float, Boolean, Table, Index, JSON, func
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Enum, Float, Boolean, Table, Index, JSON, event, func, inspect, text, update
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, relationship
 # TSVECTOR removed — SQLite compatible
 from datetime import datetime
 import enum
 import uuid # Import uuid for UUID type
 from pgvector.sqlalchemy import Vector
 
+from app import access_set
+from app.summary_digest import apply_summary_digest
+
 Base = declarative_base()
 
 class MeetingStatus(enum.Enum):
@@ -123,6 +126,11 @@ class Meeting(Base):
     transcript_raw = Column(Text, nullable=True)
     transcript_polished = Column(Text, nullable=True)
     summary_json = Column(Text, nullable=True) # Structured summary in JSON format
+    # Summary digest（app/summary_digest.py）：summary_json 被指派時同步計算，讀取路徑免解析整份 JSON
+    summary_citation = Column(Text, nullable=True)       # /rag/ask 摘要 citation 本文；NULL = 尚未計算
+    summary_embed_text = Column(Text, nullable=True)     # 摘要 embedding 本文（不含標題行）
+    summary_topics = Column(Text, nullable=True)         # JSON [[topic, weight], ...]
+    summary_key_actions = Column(Text, nullable=True)    # JSON [str, ...]
     
     # Phase 8.1: Speaker mappings (JSON) — stores { "Speaker_0": { "display_name": "李經理", "role": "客戶", "color": "#5FB7AC" } }
     speaker_mappings = Column(Text, nullable=True)
@@ -166,6 +174,13 @@ class Meeting(Base):
 
     # pgvector embedding for future semantic search
     summary_embedding = Column(Vector(768), nullable=True)
+    # 增量 re-embed（app/embedding_refresh.py）：摘要 / 標題改過、summary_embedding 待重算
+    summary_embedding_dirty = Column(Boolean, nullable=False, default=False, server_default="false")
+    # 每次這場會議的向量（segment 或 summary）被寫入就 +1；供快取以「語料版本」失效
+    embedding_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # 語料版本：影響 RAG 答案的內容（段落 / 摘要 / 標題 / 講者對應 / 向量）一改就 +1
+    # （見下方 before_flush 與 embedding.bump_embedding_version）；app/rag/answer_cache.py 以此失效
+    corpus_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Full Text Search removed (PostgreSQL-only TSVECTOR)
     # Can be reimplemented with SQLite FTS5 if needed
@@ -180,9 +195,20 @@ class Meeting(Base):
     participants        = relationship("MeetingParticipant", back_populates="meeting", cascade="all, delete-orphan")
     action_items        = relationship("MeetingActionItem", back_populates="meeting", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("idx_meetings_summary_digest_pending", "id",
+              postgresql_where=text("summary_citation IS NULL AND summary_json IS NOT NULL")),
+    )
+
 # GIN Index removed (PostgreSQL-only)
 
 
+@event.listens_for(Meeting.summary_json, "set")
+def _materialize_summary_digest(target, value, oldvalue, initiator):
+    # 任何 ORM 寫入 summary_json（pipeline / 詞彙修補 / 還原版本 / 講者重同步）都同步更新 digest
+    apply_summary_digest(target, value)
+
+
 # ============================================
 # MeetingParticipant Model (Access Control Join Table)
 # ============================================
@@ -234,14 +260,122 @@ class TranscriptSegment(Base):
     
     # pgvector embedding for future semantic search
     content_embedding = Column(Vector(768), nullable=True)
+    # 內容 / 講者改過、向量待重算；背景 re-embedder 重算其前後 EMBED_WINDOW 的視窗後清掉
+    embedding_dirty = Column(Boolean, nullable=False, default=False, server_default="false")
     
     # FTS removed (PostgreSQL-only TSVECTOR)
+    # lexical_tsv（generated tsvector, PostgreSQL only）不映射：只有 app.rag.hybrid 的 raw SQL 讀取
 
     meeting = relationship("Meeting", back_populates="transcript_segments") # Add back_populates
 
+    __table_args__ = (
+        # partial index：dirty 的 segment 永遠只佔極少數
+        Index("idx_ts_embedding_dirty", "meeting_id", postgresql_where=text("embedding_dirty")),
+        # access set ID filter（app.access_set）：meeting_id = ANY(:allowed_ids)
+        Index("idx_ts_meeting_id", "meeting_id"),
+    )
+
 # GIN Index removed (PostgreSQL-only)
 
 
+# 這些欄位改變會讓 RAG 檢索 / citation 內容不同 → meetings.corpus_version += 1
+_CORPUS_MEETING_FIELDS = ("title", "summary_json", "speaker_mappings", "deleted_at",
+                          "is_confidential", "created_at", "summary_embedding")
+_CORPUS_SEGMENT_FIELDS = ("meeting_id", "speaker", "start_time", "end_time",
+                          "content_raw", "content_polished", "content_embedding")
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_corpus_version(session, flush_context, instances):
+    # ORM 寫入（新增 / 修改 / 刪除）統一在 flush 時處理；bulk UPDATE 的向量寫入走 bump_embedding_version
+    segment_meetings = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, TranscriptSegment) and obj.meeting_id:
+            segment_meetings.add(obj.meeting_id)
+    for obj in session.dirty:
+        if isinstance(obj, Meeting):
+            attrs = inspect(obj).attrs
+            if any(attrs[f].history.has_changes() for f in _CORPUS_MEETING_FIELDS):
+                obj.corpus_version = Meeting.corpus_version + 1
+        elif isinstance(obj, TranscriptSegment):
+            attrs = inspect(obj).attrs
+            if any(attrs[f].history.has_changes() for f in _CORPUS_SEGMENT_FIELDS):
+                hist = attrs["meeting_id"].history
+                segment_meetings.update(m for m in list(hist.deleted or ()) + [obj.meeting_id] if m)
+    if segment_meetings:
+        session.connection().execute(
+            update(Meeting.__table__)
+            .where(Meeting.__table__.c.id.in_(sorted(segment_meetings)))
+            .values(corpus_version=Meeting.__table__.c.corpus_version + 1)
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_segment_fts(session, flush_context):
+    # SQLite dev fallback 的 segment_fts（app.rag.hybrid）在寫入時同步；PostgreSQL 由 generated column 處理
+    from app.rag import hybrid
+    if not hybrid.sqlite_fts_active(session):
+        return
+    upserts, deleted = [], []
+    for obj in session.new:
+        if isinstance(obj, TranscriptSegment):
+            upserts.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, TranscriptSegment):
+            attrs = inspect(obj).attrs
+            if any(attrs[f].history.has_changes() for f in ("meeting_id", "content_raw", "content_polished")):
+                upserts.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, TranscriptSegment):
+            deleted.append(obj.id)
+    if upserts or deleted:
+        hybrid.index_sqlite_fts(session.connection(), upserts, deleted)
+
+
+# 參與者異動 → access set（app.access_set）失效；commit 之後才丟，避免並行請求重新載入到
+# 尚未 commit 的舊集合。"*" = bulk query 寫入，不知道影響哪些人，全部失效
+_ACCESS_DIRTY_KEY = "access_set_dirty"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_access_changes(session, flush_context):
+    upns = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, MeetingParticipant):
+            upns.add(obj.user_upn)
+    for obj in session.dirty:
+        if isinstance(obj, MeetingParticipant):
+            attrs = inspect(obj).attrs
+            if attrs["user_upn"].history.has_changes() or attrs["meeting_id"].history.has_changes():
+                upns.update(list(attrs["user_upn"].history.deleted or ()) + [obj.user_upn])
+    upns.discard(None)
+    if upns:
+        session.info.setdefault(_ACCESS_DIRTY_KEY, set()).update(upns)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_access_changes(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is MeetingParticipant and not orm_execute_state.is_select:
+        orm_execute_state.session.info.setdefault(_ACCESS_DIRTY_KEY, set()).add("*")
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_access_changes(session):
+    upns = session.info.pop(_ACCESS_DIRTY_KEY, None)
+    if not upns:
+        return
+    if "*" in upns:
+        access_set.invalidate_all()
+    else:
+        access_set.invalidate_users(upns)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_access_changes(session):
+    session.info.pop(_ACCESS_DIRTY_KEY, None)
+
+
 class Artifact(Base):
     __tablename__ = "artifacts"
 
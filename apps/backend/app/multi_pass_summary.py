@@ -112,6 +112,8 @@ def _pass0_segment_topics(client, transcript_lines: List[str]) -> List[Dict[str,
         logger.info(f"[MultiPass] Pass 0: identified {len(topics)} topics")
         return topics
     except Exception as e:
+        from app.llm_utils import reset_gemini_client_on_transport_error
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[MultiPass] Pass 0 failed: {e}")
         # Fallback: split evenly into 4 chunks
         chunk_size = len(transcript_lines) // 4
@@ -212,6 +214,8 @@ def _pass1_summarize_topic(client, topic: Dict, transcript_lines: List[str]) ->
         )
         return result
     except Exception as e:
+        from app.llm_utils import reset_gemini_client_on_transport_error
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[MultiPass] Pass 1 failed for topic '{topic_title}': {e}")
         return {
             "title": topic_title,
@@ -307,6 +311,8 @@ def _pass2_merge(client, chapters: List[Dict[str, Any]]) -> Dict[str, Any]:
         logger.info(f"[MultiPass] Pass 2: merge complete, {len(response.text)} chars")
         return result
     except Exception as e:
+        from app.llm_utils import reset_gemini_client_on_transport_error
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[MultiPass] Pass 2 merge failed: {e}")
         # Fallback: construct minimal meta from chapters
         all_decisions = []
@@ -397,6 +403,8 @@ def _pass2b_template_sections(
         logger.info(f"[MultiPass] Pass 2b: generated {list(cleaned.keys())}")
         return cleaned
     except Exception as e:  # noqa: BLE001
+        from app.llm_utils import reset_gemini_client_on_transport_error
+        reset_gemini_client_on_transport_error(e)
         logger.warning(f"[MultiPass] Pass 2b (template sections) failed, skipping: {e}")
         return {}
 
@@ -4,8 +4,22 @@ app.rag — RAG grounding-uplift modules (Phase A).
 Phase A (this PR): foundation modules used by routes/rag.py
   - prompt.py    : strict-grounding prompt builder + 4-level confidence
   - chunker.py   : sentence-window expansion for retrieved segments
+  - vector_index.py : pgvector HNSW / IVFFlat indexes, per-query ef_search /
+                      probes, exact-vs-ANN recall report, halfvec / binary
+                      quantized index + full-precision re-rank, JOIN vs
+                      access-set ID filter report
 
-Phase B (future): hybrid retriever (pgvector + BM25 / RRF) — TBD
+Phase B: hybrid retriever
+  - hybrid.py    : CJK bigram lexical index (generated tsvector + GIN / SQLite FTS5) + RRF
+                   fusion with pgvector results
+  - query_cache.py : LRU+TTL (optionally DB-backed) cache for query
+                     embeddings and QueryIntent results
+  - retrieval_plan.py : concurrent /rag/ask stages on pooled connections,
+                        per-stage timings
+  - title_index.py : cached per-user meeting-title bigram index (title match)
+  - answer_cache.py : full /rag/ask answers keyed by access set + per-meeting
+                      corpus_version fingerprint
+  - streaming.py : SSE framing + incremental "answer" decoder for /rag/ask/stream
 Phase C (future): cross-encoder reranker (BGE / cohere-rerank) — TBD
 
 Public API:
@@ -29,6 +43,26 @@ from app.rag.query_intent import (
     build_meeting_sql_filters,
     passthrough_intent,
 )
+from app.rag.vector_index import (
+    apply_search_params,
+    build_vector_indexes,
+    segment_knn_sql,
+    vector_index_status,
+)
+from app.rag import hybrid
+from app.rag.hybrid import (
+    build_lexical_index,
+    rrf_fuse,
+)
+from app.rag import query_cache
+from app.rag.query_cache import (
+    cached_query_embedding,
+    cached_query_intent,
+)
+from app.rag.retrieval_plan import RetrievalPlan
+from app.rag import title_index
+from app.rag import answer_cache
+from app.rag.streaming import AnswerStreamDecoder, sse_event
 
 __all__ = [
     "STRICT_GROUNDING_SYSTEM_PROMPT",
@@ -41,4 +75,19 @@ __all__ = [
     "classify_query_intent",
     "build_meeting_sql_filters",
     "passthrough_intent",
+    "apply_search_params",
+    "build_vector_indexes",
+    "segment_knn_sql",
+    "vector_index_status",
+    "hybrid",
+    "build_lexical_index",
+    "rrf_fuse",
+    "query_cache",
+    "cached_query_embedding",
+    "cached_query_intent",
+    "RetrievalPlan",
+    "title_index",
+    "answer_cache",
+    "AnswerStreamDecoder",
+    "sse_event",
 ]
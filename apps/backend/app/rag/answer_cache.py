@@ -0,0 +1,114 @@
+"""
+app.rag.answer_cache — corpus-versioned cache for full /rag/ask answers.
+
+同一批人對同一批會議常問同樣的問題（尤其 greeting 的建議問題），每次都重跑整條
+檢索 + Gemini 生成。這裡把最終答案（answer / citations / confidence …）快取起來。
+
+key = (PROMPT_VERSION, 生成模型, 台北日期, 語料指紋, 正規化後的 contextualized 問題,
+       meeting_ids 篩選, top_k / ef_search / probes)
+  - 語料指紋 = 本次可檢索範圍（使用者可存取、未刪除、符合 meeting_ids）每場會議的
+    (id, corpus_version) 雜湊。同時涵蓋：
+      * access set：參與者異動 / 刪除會議 → 集合不同 → 指紋不同
+      * 內容：段落 / 摘要 / 標題 / 講者對應 / 向量寫入都讓 meetings.corpus_version +1
+        （app.models before_flush、embedding.bump_embedding_version）
+    → 只有範圍內真的有會議變動時才失效，其他會議的改動不影響；舊 entry 隨 LRU / TTL 淘汰
+  - 日期：意圖路由會解析「上週」「昨天」，與 query_cache 的 intent key 相同理由
+  - 不同使用者若可存取的範圍與版本完全相同，共用同一筆答案
+
+只快取生成成功的答案（Gemini 例外 / 無檢索結果不存）。
+RAGRequest.bypass_cache=true 略過讀取（仍會寫入新結果）；RAGResponse.cached 標示命中。
+process 內 L1（TTLCache）；統計見 get_stats()，/api/v1/rag/status 會帶出。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from app import access_set
+from app.rag.prompt import PROMPT_VERSION
+from app.rag.query_cache import TTLCache, cache_key, normalize_query
+
+logger = logging.getLogger(__name__)
+
+RAG_ANSWER_CACHE_ENABLED = os.getenv("RAG_ANSWER_CACHE_ENABLED", "true").lower() not in ("false", "0", "no")
+RAG_ANSWER_CACHE_SIZE = int(os.getenv("RAG_ANSWER_CACHE_SIZE", "512"))
+RAG_ANSWER_CACHE_TTL = float(os.getenv("RAG_ANSWER_CACHE_TTL", str(6 * 3600)))
+
+CORPUS_VERSION_DDL = (
+    "ALTER TABLE meetings ADD COLUMN IF NOT EXISTS corpus_version INTEGER NOT NULL DEFAULT 0",
+)
+
+_answer_cache = TTLCache("answer", RAG_ANSWER_CACHE_SIZE, RAG_ANSWER_CACHE_TTL)
+
+
+def ensure_corpus_version_column(engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for stmt in CORPUS_VERSION_DDL:
+            conn.execute(text(stmt))
+
+
+def load_scope(db, user_upn: Optional[str], meeting_ids: Optional[Sequence[str]] = None) -> List[Tuple[str, int]]:
+    """本次問題可檢索的會議與其 corpus_version：[(id, version), ...]（依 id 排序）。
+
+    範圍同檢索（app.access_set.resolve_scope）：access set ∩ meeting_ids，無 user_upn
+    且無 meeting_ids 時為全部未刪除會議。
+    """
+    scope = access_set.resolve_scope(db, user_upn, meeting_ids)
+    if scope is not None and not scope:
+        return []
+    id_where, params = ("", {}) if scope is None else access_set.id_filter(db, "m.id", scope)
+    rows = db.execute(text(f"""
+        SELECT m.id, m.corpus_version
+        FROM meetings m
+        WHERE m.deleted_at IS NULL{id_where}
+    """), params).fetchall()
+    return sorted({(r[0], int(r[1] or 0)) for r in rows})
+
+
+def corpus_fingerprint(scope: Iterable[Tuple[str, int]]) -> str:
+    h = hashlib.sha256()
+    for mid, version in sorted(scope):
+        h.update(f"{mid}:{version}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def answer_key(question: str, scope: Iterable[Tuple[str, int]], model: str,
+               meeting_ids: Optional[Sequence[str]] = None, top_k: int = 10,
+               ef_search: Optional[int] = None, probes: Optional[int] = None) -> str:
+    from app.rag.query_intent import TAIPEI_TZ
+
+    today = datetime.now(TAIPEI_TZ).strftime("%Y-%m-%d")
+    return cache_key(
+        "answer", PROMPT_VERSION, model, today, corpus_fingerprint(scope),
+        normalize_query(question), ",".join(sorted(meeting_ids or [])),
+        f"{top_k}/{ef_search}/{probes}",
+    )
+
+
+def get_answer(key: str) -> Optional[dict]:
+    """快取的 RAGResponse 欄位（answer / citations / confidence / used_citation_indices / segments_searched）。"""
+    if not RAG_ANSWER_CACHE_ENABLED:
+        return None
+    return _answer_cache.get(key)
+
+
+def put_answer(key: str, payload: dict) -> None:
+    if RAG_ANSWER_CACHE_ENABLED:
+        _answer_cache.put(key, payload)
+
+
+def get_stats() -> dict:
+    return {"enabled": RAG_ANSWER_CACHE_ENABLED, "prompt_version": PROMPT_VERSION,
+            **_answer_cache.snapshot()}
+
+
+def reset_stats():
+    _answer_cache.clear()
@@ -15,8 +15,10 @@ API:
   expanded_rows = expand_with_context(db, retrieved_rows, window=2)
   → 每個 ExpandedRow.content 已包含前 window + 命中 + 後 window 個 segments 的串接
 
-複雜度：O(N+1) DB queries（1 batch query 取 order map + N 個 contextual range queries）
-       對 top_k=10 約 11 次 round-trip。可接受。批次優化留給未來性能瓶頸時再做。
+複雜度：1 次 DB round-trip（set-based：命中 CTE join (meeting_id, order 區間)，
+       同會議重疊視窗 DISTINCT 去重）。同一場會議視窗重疊的命中預設合併成一個
+       ExpandedRow，prompt 不重複同一段文字。舊版逐筆擴展（O(N+1) round-trips）
+       只留在 scripts/bench_rag_expand.py 當 benchmark 對照組。
 """
 
 from __future__ import annotations
@@ -55,58 +57,6 @@ class ExpandedRow:
     extra: dict = field(default_factory=dict)
 
 
-def _get_segment_orders(db: Session, segment_ids: List[str]) -> dict:
-    """
-    Batch query 取得每個 segment 的 (meeting_id, order)。
-
-    Returns:
-        {segment_id: (meeting_id, order_int)}
-    """
-    if not segment_ids:
-        return {}
-
-    placeholders = ",".join(f":id_{i}" for i in range(len(segment_ids)))
-    sql = text(
-        f'SELECT id, meeting_id, "order" '
-        f"FROM transcript_segments "
-        f"WHERE id IN ({placeholders})"
-    )
-    params = {f"id_{i}": sid for i, sid in enumerate(segment_ids)}
-
-    return {
-        r.id: (r.meeting_id, r.order)
-        for r in db.execute(sql, params).fetchall()
-    }
-
-
-def _fetch_neighbours(
-    db: Session,
-    meeting_id: str,
-    center_order: int,
-    window: int,
-) -> List[Any]:
-    """
-    撈 [center_order - window, center_order + window] 範圍的 segments，
-    依 order 升序回傳。
-    """
-    sql = text(
-        'SELECT id, speaker, start_time, end_time, content_polished, '
-        'content_raw, "order" '
-        'FROM transcript_segments '
-        'WHERE meeting_id = :meeting_id '
-        '  AND "order" BETWEEN :lo AND :hi '
-        'ORDER BY "order"'
-    )
-    return db.execute(
-        sql,
-        {
-            "meeting_id": meeting_id,
-            "lo": center_order - window,
-            "hi": center_order + window,
-        },
-    ).fetchall()
-
-
 def _format_expanded_content(
     neighbours: List[Any],
     center_order: int,
@@ -133,24 +83,109 @@ def _format_expanded_content(
     return "\n".join(parts)
 
 
+def _fetch_windows(
+    db: Session,
+    segment_ids: List[str],
+    window: int,
+) -> List[Any]:
+    """
+    一次查詢取回所有命中段的 [order - window, order + window] 視窗。
+
+    hits CTE 以主鍵查出每個命中的 (meeting_id, order)，再以 (meeting_id, order 區間)
+    join 回 transcript_segments；DISTINCT 讓同一場會議重疊視窗內的 segment 只回一次。
+    命中段本身必落在自己的視窗內，所以 order lookup 也一併完成（不需另一次 round-trip）。
+
+    Returns:
+        依 (meeting_id, order) 排序的 rows：id, meeting_id, speaker, start_time,
+        end_time, content_polished, content_raw, order
+    """
+    if not segment_ids:
+        return []
+
+    placeholders = ",".join(f":id_{i}" for i in range(len(segment_ids)))
+    sql = text(
+        'WITH hits AS ('
+        '  SELECT meeting_id, "order" AS center '
+        '  FROM transcript_segments '
+        f' WHERE id IN ({placeholders})'
+        ') '
+        'SELECT DISTINCT n.id, n.meeting_id, n.speaker, n.start_time, n.end_time, '
+        '       n.content_polished, n.content_raw, n."order" '
+        'FROM transcript_segments n '
+        'JOIN hits h '
+        '  ON n.meeting_id = h.meeting_id '
+        ' AND n."order" BETWEEN h.center - :window AND h.center + :window '
+        'ORDER BY n.meeting_id, n."order"'
+    )
+    params = {f"id_{i}": sid for i, sid in enumerate(segment_ids)}
+    params["window"] = window
+    return db.execute(sql, params).fetchall()
+
+
+def _row_content(row: Any) -> str:
+    return (
+        getattr(row, "content_polished", None)
+        or getattr(row, "content_raw", None)
+        or ""
+    )
+
+
+def _passthrough_row(row: Any) -> ExpandedRow:
+    """找不到 order（資料髒 / race）時原樣包成 ExpandedRow。"""
+    content = _row_content(row)
+    return ExpandedRow(
+        id=str(row.id),
+        meeting_id=getattr(row, "meeting_id", ""),
+        meeting_title=getattr(row, "meeting_title", None),
+        speaker=getattr(row, "speaker", None),
+        start_time=getattr(row, "start_time", None),
+        end_time=getattr(row, "end_time", None),
+        content=content,
+        distance=float(getattr(row, "distance", 0.0)),
+        expansion_size=1,
+        hit_content=content,
+    )
+
+
+def _format_block(neighbours: List[Any], center_orders: set) -> str:
+    """同 _format_expanded_content，但一個 block 可有多個命中中心（各自 ➤）。"""
+    parts = []
+    for nb in neighbours:
+        speaker = getattr(nb, "speaker", None) or ""
+        speaker_prefix = f"[{speaker}] " if speaker else ""
+        marker = "➤ " if nb.order in center_orders else "  "
+        parts.append(f"{marker}{speaker_prefix}{_row_content(nb)}")
+    return "\n".join(parts)
+
+
 def expand_with_context(
     db: Session,
     retrieved_rows: List[Any],
     window: int = 2,
+    merge_overlaps: bool = True,
 ) -> List[ExpandedRow]:
     """
     對每個 retrieved row 向前後擴展 window 個 segments，組成 ExpandedRow。
 
+    單一 set-based 查詢（_fetch_windows）取回所有視窗，1 次 round-trip。
+
     Args:
         db: SQLAlchemy session
         retrieved_rows: routes/rag.py `_find_similar_segments` 回傳的 row list
                         必須含欄位: id, meeting_id, speaker, start_time, end_time,
                         content_polished, content_raw, meeting_title, distance
         window: 前後各取 N 個 segments；window=0 表示不擴展（原樣返回 ExpandedRow 包覆）
+        merge_overlaps: 同一場會議視窗重疊（或相鄰）的命中合併成一個 ExpandedRow，
+                        prompt 不會重複同一段文字。合併後：
+                          - 每個命中中心都標 ➤
+                          - id / speaker / distance 取最相近（distance 最小）的命中
+                          - start_time / end_time 涵蓋所有命中
+                          - extra["hit_ids"] 列出合併進來的命中 id
+                        False 時維持一個 retrieved row 對一個 ExpandedRow。
 
     Returns:
-        List[ExpandedRow]，順序與 retrieved_rows 相同；保證每個 retrieved
-        row 都會有對應 ExpandedRow（即使找不到 neighbours 也不會 drop）
+        List[ExpandedRow]，依 retrieved_rows 順序（合併 block 取其中最前面的命中位置）；
+        每個 retrieved row 都會出現在某個 ExpandedRow 內（找不到 neighbours 也不會 drop）
 
     Notes:
         - window<0 視同 0（防呆）
@@ -162,77 +197,70 @@ def expand_with_context(
     if window < 0:
         window = 0
 
-    # Step 1: batch query 取每個 retrieved row 的 (meeting_id, order)
-    seg_ids = [str(r.id) for r in retrieved_rows]
-    orders_map = _get_segment_orders(db, seg_ids)
-
-    expanded_list: List[ExpandedRow] = []
-
-    for row in retrieved_rows:
+    seg_ids = list(dict.fromkeys(str(r.id) for r in retrieved_rows))
+    rows = _fetch_windows(db, seg_ids, window)
+
+    # meeting_id → 依 order 排序的 neighbour rows（SQL 已排序、已去重）
+    by_meeting: dict = {}
+    order_of: dict = {}
+    for nb in rows:
+        by_meeting.setdefault(nb.meeting_id, []).append(nb)
+        order_of[str(nb.id)] = (nb.meeting_id, nb.order)
+
+    # 每個命中 → block（[lo, hi] order 區間 + 所屬命中）；不合併時每個命中自成一個 block
+    blocks: List[dict] = []
+    passthrough: dict = {}
+    open_block: dict = {}  # meeting_id → 最後一個 block（hits 依 order 掃描）
+    located = []
+    for rank, row in enumerate(retrieved_rows):
         sid = str(row.id)
-
-        # Fallback: 若找不到 order（資料髒），原樣包成 ExpandedRow
-        if sid not in orders_map:
-            content = (
-                getattr(row, "content_polished", None)
-                or getattr(row, "content_raw", None)
-                or ""
-            )
-            expanded_list.append(
-                ExpandedRow(
-                    id=sid,
-                    meeting_id=getattr(row, "meeting_id", ""),
-                    meeting_title=getattr(row, "meeting_title", None),
-                    speaker=getattr(row, "speaker", None),
-                    start_time=getattr(row, "start_time", None),
-                    end_time=getattr(row, "end_time", None),
-                    content=content,
-                    distance=float(getattr(row, "distance", 0.0)),
-                    expansion_size=1,
-                    hit_content=content,
-                )
-            )
+        if sid not in order_of:
+            passthrough[rank] = _passthrough_row(row)
             continue
-
-        meeting_id, center_order = orders_map[sid]
-
-        # window=0 時就只返回命中段本身的內容；用 _fetch_neighbours(0) 仍 work
-        neighbours = _fetch_neighbours(db, meeting_id, center_order, window)
-
-        if not neighbours:
-            # 極端情況：DB 內找不到（race condition）→ fallback 原 content
-            content = (
-                getattr(row, "content_polished", None)
-                or getattr(row, "content_raw", None)
-                or ""
-            )
-            hit_content = content
-        else:
-            content = _format_expanded_content(neighbours, center_order)
-            # 找出命中段的純文字（給 frontend 高亮）
-            hit_content = ""
-            for nb in neighbours:
-                if nb.order == center_order:
-                    hit_content = (
-                        getattr(nb, "content_polished", None)
-                        or getattr(nb, "content_raw", None)
-                        or ""
-                    )
-                    break
-
-        expanded_list.append(
+        meeting_id, center = order_of[sid]
+        located.append((meeting_id, center, rank, row))
+
+    for meeting_id, center, rank, row in sorted(located, key=lambda x: (x[0], x[1], x[2])):
+        lo, hi = center - window, center + window
+        last = open_block.get(meeting_id)
+        if merge_overlaps and last is not None and lo <= last["hi"] + 1:
+            last["hi"] = max(last["hi"], hi)
+            last["hits"].append((rank, center, row))
+            continue
+        block = {"meeting_id": meeting_id, "lo": lo, "hi": hi, "hits": [(rank, center, row)]}
+        blocks.append(block)
+        open_block[meeting_id] = block
+
+    out: List[tuple] = [(rank, er) for rank, er in passthrough.items()]
+    for block in blocks:
+        neighbours = [
+            nb for nb in by_meeting.get(block["meeting_id"], [])
+            if block["lo"] <= nb.order <= block["hi"]
+        ]
+        hits = block["hits"]
+        best_rank, _, best = min(hits, key=lambda h: (float(getattr(h[2], "distance", 0.0)), h[0]))
+        centers = {c for _, c, _ in hits}
+        hit_texts = [_row_content(nb) for nb in neighbours if nb.order in centers]
+        starts = [getattr(r, "start_time", None) for _, _, r in hits]
+        ends = [getattr(r, "end_time", None) for _, _, r in hits]
+        starts = [t for t in starts if t is not None]
+        ends = [t for t in ends if t is not None]
+        out.append((
+            min(rank for rank, _, _ in hits),
             ExpandedRow(
-                id=sid,
-                meeting_id=meeting_id,
-                meeting_title=getattr(row, "meeting_title", None),
-                speaker=getattr(row, "speaker", None),
-                start_time=getattr(row, "start_time", None),
-                end_time=getattr(row, "end_time", None),
-                content=content,
-                distance=float(getattr(row, "distance", 0.0)),
+                id=str(best.id),
+                meeting_id=block["meeting_id"],
+                meeting_title=getattr(best, "meeting_title", None),
+                speaker=getattr(best, "speaker", None),
+                start_time=min(starts) if starts else None,
+                end_time=max(ends) if ends else None,
+                content=_format_block(neighbours, centers),
+                distance=float(getattr(best, "distance", 0.0)),
                 expansion_size=len(neighbours),
-                hit_content=hit_content,
-            )
-        )
+                hit_content="\n".join(hit_texts),
+                extra={"hit_ids": [str(r.id) for _, _, r in sorted(hits)]} if len(hits) > 1 else {},
+            ),
+        ))
 
-    return expanded_list
+    out.sort(key=lambda x: x[0])
+    return [er for _, er in out]
@@ -0,0 +1,241 @@
+"""
+app.rag.hybrid — Phase B hybrid retriever: CJK bigram lexical search + RRF.
+
+純向量檢索對「專有名詞 / 代號 / 人名 / 數字」類問題常漏召回（_find_title_matched_meetings
+的 regex 補丁就是這個症狀）。這裡加一路 lexical 檢索，與向量結果用 Reciprocal
+Rank Fusion 合併。
+
+CJK tokenization：中文沒有空白斷詞，'simple' tsvector 會把整句當一個 token。
+改用「重疊二字組」（bigram）：先 lower + 去掉非英數字元，再切成 s[i:i+2]。
+Python（查詢端）與 DB（索引端）用同一套規則：
+
+  PostgreSQL : IMMUTABLE SQL 函式 rag_cjk_bigrams(text) + STORED generated column
+               transcript_segments.lexical_tsv = to_tsvector('simple', rag_cjk_bigrams(
+               coalesce(content_polished, content_raw)))，GIN index 建在欄位上。
+               bigram 只在寫入時算一次；查詢以 to_tsquery('simple', 'ab | bc | ...')
+               比對，先要求至少 k / n 個 query bigram 命中（lexical_min_match）再以
+               ts_rank_cd 對欄位排序，不再逐列重算 rag_cjk_bigrams。寫入路徑不用改。
+  SQLite     : FTS5 虛擬表 segment_fts(segment_id, meeting_id, tokens)（僅 dev fallback）。
+               ORM 寫入在 flush 時同步（app.models after_flush）；其他寫入在下一次
+               index check（最多每 5 分鐘）補齊，查詢本身不再掃差集。
+
+欄位與索引由 alembic s3b4c5d6e7f8（取代 j4e5f6a7b8c9 的 expression index）或
+POST /api/v1/admin/rag-lexical-index 建立；索引不存在時 lexical 路徑自動略過。
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+RAG_HYBRID_ENABLED = os.getenv("RAG_HYBRID_ENABLED", "true").lower() not in ("false", "0", "no")
+# lexical 路徑最多取幾筆候選
+RAG_LEXICAL_TOP_K = int(os.getenv("RAG_LEXICAL_TOP_K", "50"))
+# RRF 常數（Cormack et al. 建議 60）
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+# 查詢 bigram 上限（長問題只取前 N 個，避免 tsquery 過長）
+RAG_LEXICAL_MAX_TERMS = int(os.getenv("RAG_LEXICAL_MAX_TERMS", "40"))
+# 候選至少要命中 query bigram 的比例（k of n，至少 1 個）；常見 CJK bigram 幾乎命中
+# 整個語料，單一 bigram 命中的列不進入排序
+RAG_LEXICAL_MIN_MATCH = float(os.getenv("RAG_LEXICAL_MIN_MATCH", "0.3"))
+# lexical 已回滿 top_k 時，向量 ANN 最少仍取幾筆（見 routes/rag._hybrid_vector_k）
+RAG_HYBRID_MIN_VECTOR_K = int(os.getenv("RAG_HYBRID_MIN_VECTOR_K", "5"))
+
+LEXICAL_INDEX_NAME = "idx_segments_lexical_tsv"
+LEXICAL_COLUMN = "lexical_tsv"
+# 舊版（j4e5f6a7b8c9）的 expression index；build_lexical_index 建好欄位索引後移除
+LEGACY_LEXICAL_INDEX_NAME = "idx_segments_lexical_bigrams"
+
+BIGRAM_FUNCTION_DDL = """
+CREATE OR REPLACE FUNCTION rag_cjk_bigrams(t text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT COALESCE(string_agg(substr(s, i, 2), ' ' ORDER BY i), '')
+    FROM (SELECT regexp_replace(lower(COALESCE(t, '')), '[^[:alnum:]]+', '', 'g') AS s) x,
+         generate_series(1, GREATEST(length(s) - 1, 0)) AS i
+$$;
+"""
+
+LEXICAL_COLUMN_DDL = (
+    f"ALTER TABLE transcript_segments ADD COLUMN IF NOT EXISTS {LEXICAL_COLUMN} tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', rag_cjk_bigrams(COALESCE(content_polished, content_raw)))) STORED"
+)
+
+LEXICAL_INDEX_DDL = (
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {LEXICAL_INDEX_NAME} ON transcript_segments "
+    f"USING gin ({LEXICAL_COLUMN})"
+)
+
+_NON_ALNUM = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def cjk_bigrams(text_: Optional[str]) -> List[str]:
+    """Overlapping 2-char grams over lowercased alphanumerics (mirrors rag_cjk_bigrams)."""
+    s = _NON_ALNUM.sub("", (text_ or "").lower())
+    return [s[i:i + 2] for i in range(len(s) - 1)]
+
+
+def query_terms(query: str, max_terms: int = RAG_LEXICAL_MAX_TERMS) -> List[str]:
+    """Distinct query bigrams in first-seen order."""
+    return list(dict.fromkeys(cjk_bigrams(query)))[:max_terms]
+
+
+def lexical_min_match(n_terms: int, ratio: float = RAG_LEXICAL_MIN_MATCH) -> int:
+    """How many distinct query bigrams a candidate must contain (k of n, 1 ≤ k ≤ n)."""
+    return min(n_terms, max(1, math.ceil(n_terms * ratio)))
+
+
+def build_tsquery(terms: Sequence[str]) -> str:
+    """OR-query over bigrams. Terms are alphanumeric only; quoted for to_tsquery."""
+    return " | ".join(f"'{t}'" for t in terms if t)
+
+
+def build_fts5_query(terms: Sequence[str]) -> str:
+    return " OR ".join(f'"{t}"' for t in terms if t)
+
+
+def rrf_fuse(ranked_lists: Iterable[Sequence[str]], k: int = RAG_RRF_K) -> Dict[str, float]:
+    """
+    Reciprocal Rank Fusion: score(d) = Σ 1 / (k + rank_i(d)), rank 從 1 開始。
+    Returns {id: score}; callers sort by score desc.
+    """
+    scores: Dict[str, float] = {}
+    for ranked in ranked_lists:
+        for rank, doc_id in enumerate(ranked, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+def fuse_rows(vector_rows: list, lexical_rows: list, top_k: int, k: int = RAG_RRF_K) -> list:
+    """
+    RRF-merge two retrieval result lists (rows need .id). Row objects are kept
+    as-is (vector row preferred when both lists have the segment), best first.
+    """
+    scores = rrf_fuse([[r.id for r in vector_rows], [r.id for r in lexical_rows]], k=k)
+    by_id = {r.id: r for r in lexical_rows}
+    by_id.update({r.id: r for r in vector_rows})
+    ordered = sorted(scores, key=lambda sid: scores[sid], reverse=True)
+    return [by_id[sid] for sid in ordered[:top_k]]
+
+
+# ============================================
+# Index presence (cached — checked at most every 5 min)
+# ============================================
+_INDEX_CHECK_TTL = 300.0
+_index_ready: Optional[bool] = None
+_index_checked_at = 0.0
+# SQLite databases (bind URL) whose segment_fts exists and is caught up — ORM writes sync into it
+_sqlite_fts_binds: set = set()
+
+
+def lexical_index_ready(db: Session) -> bool:
+    global _index_ready, _index_checked_at
+    now = time.monotonic()
+    if _index_ready is not None and now - _index_checked_at < _INDEX_CHECK_TTL:
+        return _index_ready
+    dialect = db.get_bind().dialect.name
+    try:
+        if dialect == "postgresql":
+            ready = bool(db.execute(
+                text("SELECT 1 FROM pg_indexes WHERE indexname = :n"), {"n": LEXICAL_INDEX_NAME}
+            ).first())
+        elif dialect == "sqlite":
+            ready = _sqlite_fts5_available(db)
+        else:
+            ready = False
+    except Exception as e:
+        logger.warning(f"[RAG/hybrid] lexical index check failed: {e}")
+        ready = False
+    if not ready and _index_ready is not False:
+        logger.info("[RAG/hybrid] Lexical index not available — vector-only retrieval")
+    _index_ready, _index_checked_at = ready, now
+    return ready
+
+
+def reset_lexical_index_state():
+    global _index_ready, _index_checked_at
+    _index_ready, _index_checked_at = None, 0.0
+    _sqlite_fts_binds.clear()
+
+
+def build_lexical_index(engine) -> dict:
+    """
+    Install rag_cjk_bigrams(), the generated lexical_tsv column and its GIN index
+    (CONCURRENTLY), then drop the legacy expression index.
+
+    ADD COLUMN ... STORED rewrites transcript_segments once (ACCESS EXCLUSIVE lock);
+    run it off-peak on large tables.
+    """
+    t0 = time.monotonic()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(BIGRAM_FUNCTION_DDL))
+        conn.execute(text(LEXICAL_COLUMN_DDL))
+        conn.execute(text(LEXICAL_INDEX_DDL))
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {LEGACY_LEXICAL_INDEX_NAME}"))
+    reset_lexical_index_state()
+    elapsed = round(time.monotonic() - t0, 2)
+    logger.info(f"[RAG/hybrid] {LEXICAL_INDEX_NAME} ready in {elapsed}s")
+    return {"name": LEXICAL_INDEX_NAME, "seconds": elapsed}
+
+
+# ============================================
+# SQLite FTS5 dev fallback
+# ============================================
+
+def _sqlite_fts5_available(db: Session) -> bool:
+    """Create segment_fts if needed and catch up on segments written outside the ORM."""
+    try:
+        db.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS segment_fts "
+            "USING fts5(segment_id UNINDEXED, meeting_id UNINDEXED, tokens)"
+        ))
+    except Exception as e:
+        logger.info(f"[RAG/hybrid] SQLite FTS5 unavailable: {e}")
+        return False
+    sync_sqlite_fts(db)
+    _sqlite_fts_binds.add(str(db.get_bind().url))
+    return True
+
+
+def sqlite_fts_active(session: Session) -> bool:
+    """segment_fts is live for this session's SQLite DB (flush-time sync applies)."""
+    bind = session.get_bind()
+    return bind.dialect.name == "sqlite" and str(bind.url) in _sqlite_fts_binds
+
+
+def sync_sqlite_fts(db: Session) -> int:
+    """Add segments missing from segment_fts (dev only; runs with the index check, not per query)."""
+    rows = db.execute(text("""
+        SELECT ts.id, ts.meeting_id, COALESCE(ts.content_polished, ts.content_raw) AS content
+        FROM transcript_segments ts
+        WHERE ts.id NOT IN (SELECT segment_id FROM segment_fts)
+    """)).fetchall()
+    for r in rows:
+        db.execute(
+            text("INSERT INTO segment_fts (segment_id, meeting_id, tokens) VALUES (:sid, :mid, :tok)"),
+            {"sid": r.id, "mid": r.meeting_id, "tok": " ".join(cjk_bigrams(r.content))},
+        )
+    if rows:
+        db.commit()
+    return len(rows)
+
+
+def index_sqlite_fts(conn, upserts: Sequence, deleted_ids: Sequence[str]) -> None:
+    """Flush-time segment_fts sync for ORM-written segments (rows need .id / .meeting_id / content)."""
+    stale = [seg.id for seg in upserts] + list(deleted_ids)
+    for sid in stale:
+        conn.execute(text("DELETE FROM segment_fts WHERE segment_id = :sid"), {"sid": sid})
+    for seg in upserts:
+        conn.execute(
+            text("INSERT INTO segment_fts (segment_id, meeting_id, tokens) VALUES (:sid, :mid, :tok)"),
+            {"sid": seg.id, "mid": seg.meeting_id,
+             "tok": " ".join(cjk_bigrams(seg.content_polished or seg.content_raw))},
+        )
@@ -29,6 +29,9 @@ from typing import Any, List, Optional
 CONFIDENCE_LEVELS = ("high", "medium", "low", "no_answer")
 DEFAULT_CONFIDENCE = "no_answer"
 
+# 改了 system prompt / build_grounded_prompt 的組法就 +1：app.rag.answer_cache 以此讓舊答案失效
+PROMPT_VERSION = "grounded-v1"
+
 # 對話歷史控制：避免過長 prompt + 防 prompt injection
 MAX_HISTORY_TURNS = 6
 MAX_HISTORY_CHARS_PER_TURN = 200
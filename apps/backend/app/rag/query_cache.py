@@ -0,0 +1,260 @@
+"""
+app.rag.query_cache — LRU+TTL cache for per-query Gemini results.
+
+每次 /rag/ask 在碰 DB 前最多有三個循序 Gemini round-trip
+（_contextualize_query → classify_query_intent → embed_single_text）。
+使用者重問幾乎相同的問題很常見（greeting 的建議問題、追問），
+這裡快取其中與對話歷史無關的兩個：
+
+  - query embedding : key = (embedding model, 正規化文字)
+  - QueryIntent     : key = (intent model, 台北日期, 正規化問題)
+                      日期要進 key —「上週」「昨天」的解析結果每天都不同
+
+兩層：
+  L1  process 內 OrderedDict LRU + TTL（預設開）
+  L2  rag_query_cache 表（RAG_QUERY_CACHE_DB=true 時才用；Cloud Run 多 instance
+      共享、冷啟動不歸零）。L2 用獨立短連線讀寫，不碰 request session 的交易
+      （那裡可能已有 SET LOCAL 搜尋參數）。
+
+失敗結果不快取（embedding None、intent passthrough fallback）。
+命中率見 get_stats()，/api/v1/rag/status 會帶出。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+RAG_QUERY_CACHE_ENABLED = os.getenv("RAG_QUERY_CACHE_ENABLED", "true").lower() not in ("false", "0", "no")
+RAG_QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "2048"))
+# embedding 對同一模型是決定性的，TTL 只為了控制記憶體 / 模型悄悄更新
+RAG_EMBED_CACHE_TTL = float(os.getenv("RAG_EMBED_CACHE_TTL", str(7 * 24 * 3600)))
+# intent 含相對日期解析，key 已帶日期；TTL 短一點讓 prompt 調整較快生效
+RAG_INTENT_CACHE_TTL = float(os.getenv("RAG_INTENT_CACHE_TTL", str(6 * 3600)))
+RAG_QUERY_CACHE_DB = os.getenv("RAG_QUERY_CACHE_DB", "false").lower() in ("true", "1", "yes")
+
+CACHE_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS rag_query_cache (
+    cache_key  VARCHAR(64) PRIMARY KEY,
+    kind       VARCHAR(16) NOT NULL,
+    value      TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL
+)
+"""
+
+_WS = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s?？!！。.,，、~～]+$")
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """NFKC（全半形統一）+ lower + 壓空白 + 去尾端標點：「預算？」與「預算 ?」同 key。"""
+    q = unicodedata.normalize("NFKC", query or "").lower()
+    q = _WS.sub(" ", q).strip()
+    return _TRAILING_PUNCT.sub("", q)
+
+
+def cache_key(kind: str, *parts: str) -> str:
+    raw = "\x1f".join((kind,) + parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Thread-safe LRU with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def record_db_hit(self) -> None:
+        with self._lock:
+            self.db_hits += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.db_hits = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "db_hits": self.db_hits,
+                # L1 或 L2 任一命中都省掉一次 Gemini 呼叫
+                "hit_rate": round((self.hits + self.db_hits) / lookups, 4) if lookups else None,
+            }
+
+
+_embedding_cache = TTLCache("embedding", RAG_QUERY_CACHE_SIZE, RAG_EMBED_CACHE_TTL)
+_intent_cache = TTLCache("intent", RAG_QUERY_CACHE_SIZE, RAG_INTENT_CACHE_TTL)
+
+
+# ============================================
+# L2 (DB) tier
+# ============================================
+
+def _db_engine():
+    from app.database import engine
+    return engine
+
+
+def _db_get(key: str, ttl: float) -> Optional[str]:
+    try:
+        with _db_engine().connect() as conn:
+            row = conn.execute(
+                text("SELECT value, created_at FROM rag_query_cache WHERE cache_key = :k"),
+                {"k": key},
+            ).first()
+    except Exception as e:
+        logger.warning(f"[RAG/cache] DB read failed (non-fatal): {e}")
+        return None
+    if row is None:
+        return None
+    created_at = row.created_at
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    if (datetime.utcnow() - created_at).total_seconds() > ttl:
+        return None
+    return row.value
+
+
+def _db_put(key: str, kind: str, value: str) -> None:
+    try:
+        with _db_engine().begin() as conn:
+            conn.execute(text("DELETE FROM rag_query_cache WHERE cache_key = :k"), {"k": key})
+            conn.execute(
+                text("INSERT INTO rag_query_cache (cache_key, kind, value, created_at) "
+                     "VALUES (:k, :kind, :v, :ts)"),
+                {"k": key, "kind": kind, "v": value, "ts": datetime.utcnow()},
+            )
+    except Exception as e:
+        logger.warning(f"[RAG/cache] DB write failed (non-fatal): {e}")
+
+
+def ensure_cache_table(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(CACHE_TABLE_DDL))
+
+
+def _cached(cache: TTLCache, key: str, compute: Callable[[], Any],
+            dumps: Callable[[Any], str], loads: Callable[[str], Any],
+            cacheable: Callable[[Any], bool]) -> Any:
+    if not RAG_QUERY_CACHE_ENABLED:
+        return compute()
+    value = cache.get(key)
+    if value is not None:
+        return value
+    if RAG_QUERY_CACHE_DB:
+        raw = _db_get(key, cache.ttl)
+        if raw is not None:
+            try:
+                value = loads(raw)
+            except Exception:
+                value = None
+            if value is not None:
+                cache.record_db_hit()
+                cache.put(key, value)
+                return value
+    value = compute()
+    if value is not None and cacheable(value):
+        cache.put(key, value)
+        if RAG_QUERY_CACHE_DB:
+            _db_put(key, cache.name, dumps(value))
+    return value
+
+
+# ============================================
+# Public API
+# ============================================
+
+def cached_query_embedding(client, query: str) -> Optional[List[float]]:
+    """embed_single_text() behind the cache (provider model_id is part of the key)."""
+    from app.embedding import embed_single_text, get_embedding_provider
+
+    key = cache_key("embedding", get_embedding_provider().model_id, normalize_query(query))
+    return _cached(
+        _embedding_cache, key,
+        compute=lambda: embed_single_text(client, query),
+        dumps=json.dumps,
+        loads=json.loads,
+        cacheable=lambda v: True,
+    )
+
+
+def cached_query_intent(question: str, client, model: str = "gemini-2.5-flash-lite"):
+    """classify_query_intent() behind the cache; passthrough fallbacks are not stored."""
+    from app.rag.query_intent import (
+        TAIPEI_TZ,
+        QueryIntent,
+        classify_query_intent,
+        passthrough_intent,
+    )
+
+    today = datetime.now(TAIPEI_TZ).strftime("%Y-%m-%d")
+    key = cache_key("intent", model, today, normalize_query(question))
+    fallback = passthrough_intent(question)
+    return _cached(
+        _intent_cache, key,
+        compute=lambda: classify_query_intent(question, client, model=model),
+        dumps=lambda v: v.model_dump_json(),
+        loads=QueryIntent.model_validate_json,
+        cacheable=lambda v: v != fallback,
+    )
+
+
+def get_stats() -> dict:
+    return {
+        "enabled": RAG_QUERY_CACHE_ENABLED,
+        "db_backed": RAG_QUERY_CACHE_DB,
+        "embedding": _embedding_cache.snapshot(),
+        "intent": _intent_cache.snapshot(),
+    }
+
+
+def reset_stats():
+    """Drop L1 entries and counters (L2 rows are left to expire)."""
+    _embedding_cache.clear()
+    _intent_cache.clear()
@@ -183,6 +183,8 @@ def classify_query_intent(
         logger.warning(f"[query_intent] JSON parse fail: {e}; raw={raw_text[:200]!r}")
         return passthrough_intent(question)
     except Exception as e:
+        from app.llm_utils import reset_gemini_client_on_transport_error
+        reset_gemini_client_on_transport_error(e)
         logger.warning(f"[query_intent] LLM call failed: {type(e).__name__}: {e}")
         return passthrough_intent(question)
 
@@ -0,0 +1,107 @@
+"""
+app.rag.retrieval_plan — run /rag/ask stages concurrently with per-stage timing.
+
+過去 ask_across_meetings 在同一個 session 上依序跑：segment 向量搜尋 → summary
+向量搜尋 → 標題比對 → 每個標題命中各一次 _fetch_meeting_top_segments → context
+expansion → speaker mappings；再加上前面三個同步 Gemini 呼叫（直接卡住 event loop）。
+p95 = 全部相加。
+
+RetrievalPlan 把每個 stage 丟到 worker thread：
+  - call(stage, fn, ...)  : 非 DB 的阻塞呼叫（Gemini）
+  - query(stage, fn, ...) : DB 查詢，fn(session, ...)；每個 stage 向 pool 借一條
+                            獨立連線（SessionLocal）。同一個 request 同時持有的
+                            stage 連線數上限為 RAG_RETRIEVAL_MAX_CONNECTIONS，
+                            超過的 stage 在 event loop 上排隊（不佔 worker thread）
+呼叫端用 asyncio.gather / create_task 表達依賴關係；每個 stage 的耗時記在
+plan.timings（ms），RAGRequest.debug=true 時回傳給前端。
+
+RAG_PARALLEL_RETRIEVAL=false 時退回舊行為：所有 DB stage 跑在 request session、
+Gemini 呼叫直接在 event loop 上執行（方便排查 pool 耗盡等問題）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing: a parallel /ask holds its own request session plus up to
+# RAG_RETRIEVAL_MAX_CONNECTIONS stage sessions at once, i.e. 1 + 3 = 4 by default.
+# The PG engine allows pool_size + max_overflow = 5 + 10 = 15 connections
+# (app/database.py), so about 3 concurrent /ask requests fit before checkouts
+# start waiting on pool_timeout (30s). Raise the pool (and Cloud SQL
+# max_connections) with the expected /ask concurrency, lower the cap, or set
+# RAG_PARALLEL_RETRIEVAL=false (one connection per request).
+RAG_PARALLEL_RETRIEVAL = os.getenv("RAG_PARALLEL_RETRIEVAL", "true").lower() not in ("false", "0", "no")
+RAG_RETRIEVAL_MAX_CONNECTIONS = max(1, int(os.getenv("RAG_RETRIEVAL_MAX_CONNECTIONS", "3")))
+
+
+def _default_session_factory():
+    from app.database import SessionLocal
+    return SessionLocal()
+
+
+class RetrievalPlan:
+    """Per-request stage runner; not shared across requests."""
+
+    def __init__(self, db, parallel: bool = RAG_PARALLEL_RETRIEVAL,
+                 session_factory: Optional[Callable[[], Any]] = None,
+                 max_connections: int = RAG_RETRIEVAL_MAX_CONNECTIONS):
+        self.db = db
+        self.parallel = parallel
+        self._session_factory = session_factory or _default_session_factory
+        # Created lazily inside the request's event loop
+        self._max_connections = max_connections
+        self._connections: Optional[asyncio.Semaphore] = None
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.timings: Dict[str, float] = {}
+
+    def record(self, stage: str, started: float) -> None:
+        """Record ms elapsed since started (time.perf_counter()) under stage."""
+        with self._lock:
+            self.timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+    def mark(self, stage: str) -> None:
+        """Record a milestone as ms since the plan was created (e.g. first_token = TTFT)."""
+        self.record(stage, self._t0)
+
+    def _in_session(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        session = self._session_factory()
+        try:
+            return fn(session, *args, **kwargs)
+        finally:
+            session.close()
+
+    async def call(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        try:
+            if self.parallel:
+                return await asyncio.to_thread(fn, *args, **kwargs)
+            return fn(*args, **kwargs)
+        finally:
+            self.record(stage, started)
+
+    async def query(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        try:
+            if self.parallel:
+                if self._connections is None:
+                    self._connections = asyncio.Semaphore(self._max_connections)
+                async with self._connections:
+                    return await asyncio.to_thread(self._in_session, fn, args, kwargs)
+            return fn(self.db, *args, **kwargs)
+        finally:
+            self.record(stage, started)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Stage timings plus wall-clock total so far (ms)."""
+        with self._lock:
+            out = dict(self.timings)
+        out["total"] = round((time.perf_counter() - self._t0) * 1000, 1)
+        return out
@@ -0,0 +1,95 @@
+"""
+app.rag.streaming — SSE helpers for /rag/ask/stream.
+
+grounded prompt 要求 Gemini 輸出嚴格 JSON（{"answer": ..., "used_citations": ...,
+"confidence": ...}），串流時收到的是 JSON 原文片段。AnswerStreamDecoder 逐片段
+把 "answer" 字串值解碼出來（處理跨片段的跳脫字元 / \\uXXXX），讓前端只看到純文字；
+串流結束後再用完整原文（decoder.raw）走與 /ask 相同的解析取得 confidence 等欄位。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """One Server-Sent Events frame; data is JSON (single line, no raw newlines)."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class AnswerStreamDecoder:
+    """Incrementally decode one string field ("answer") out of streamed JSON text."""
+
+    def __init__(self, field: str = "answer"):
+        self._start = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._parts: List[str] = []
+        self._pending = ""
+        self._state = "seek"  # seek → value → done
+        self.emitted = 0
+
+    @property
+    def raw(self) -> str:
+        """Full text received so far (for the final json.loads)."""
+        return "".join(self._parts)
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk; return the newly decoded part of the field value."""
+        if not chunk:
+            return ""
+        self._parts.append(chunk)
+        if self._state == "done":
+            return ""
+        self._pending += chunk
+        if self._state == "seek":
+            m = self._start.search(self._pending)
+            if not m:
+                return ""
+            self._pending = self._pending[m.end():]
+            self._state = "value"
+        out = self._decode()
+        self.emitted += len(out)
+        return out
+
+    def _decode(self) -> str:
+        buf, out, i = self._pending, [], 0
+        while i < len(buf):
+            c = buf[i]
+            if c == '"':
+                self._state = "done"
+                self._pending = ""
+                return "".join(out)
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+            if i + 1 >= len(buf):
+                break  # 跳脫字元被切在片段邊界，等下一片
+            esc = buf[i + 1]
+            if esc != "u":
+                out.append(_ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            if i + 6 > len(buf):
+                break
+            code = int(buf[i + 2:i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # surrogate pair（emoji 等）：需要後半的 \\uXXXX 才能組字
+                if i + 12 > len(buf):
+                    break
+                if buf[i + 6:i + 8] == "\\u":
+                    low = int(buf[i + 8:i + 12], 16)
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+            out.append(chr(code))
+            i += 6
+        self._pending = buf[i:]
+        return "".join(out)
@@ -0,0 +1,273 @@
+"""
+app.rag.title_index — cached per-user meeting-title index for title matching (A3).
+
+_find_title_matched_meetings 每個 RAG 問題都會跑：過去是 SELECT 使用者所有可存取
+會議的 id / title / summary_json（整包 JSON），再在 Python 逐筆 regex + 子字串比對。
+重度使用者每題要搬數 MB 的摘要 JSON。
+
+現在：
+  - 每個使用者（無 user_upn 的全域查詢用 "*"）一份 TitleIndex，只含 (id, title)
+  - 以 title 的字元 bigram 建 inverted index，查詢時只對「可能命中」的候選打分：
+      * 與查詢共用 bigram 的 title（title∈query、core∈title、token 命中都必然如此）
+      * 長度相近且至少共用一個字的 title（fuzzy 比對路徑）
+      * 長度 < 2 的 title（沒有 bigram，永遠是候選）
+    打分規則與舊版逐筆比對完全相同（score_title）
+  - 回傳命中的 meeting id；summary_json 由呼叫端只對 ≤3 筆命中補查
+  - 會議新增 / 改名 / 刪除、參與者異動時 invalidate（見 invalidate_meeting /
+    invalidate_users）；多 instance 之間靠 TTL 兜底（RAG_TITLE_INDEX_TTL）
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 其他 instance 的改名 / 刪除最多延遲這麼久才反映
+RAG_TITLE_INDEX_TTL = float(os.getenv("RAG_TITLE_INDEX_TTL", "300"))
+RAG_TITLE_INDEX_MAX_USERS = int(os.getenv("RAG_TITLE_INDEX_MAX_USERS", "512"))
+
+GLOBAL_KEY = "*"
+MIN_MATCH_SCORE = 0.4  # Lowered from 0.5 to catch more fuzzy matches
+MAX_MATCHES = 3
+
+# Remove common question patterns to extract the core topic
+FILLER_PATTERNS = [
+    re.compile(r'會議[在中裡]?[討論談到提到講了說了]+(什麼|哪些|了什麼)'),
+    re.compile(r'[討論談到提到講了說了]+(什麼|哪些|了什麼)'),
+    re.compile(r'(的|之)?主要?(內容|議題|討論|重點|結論|決議)(是什麼|有哪些)?'),
+    re.compile(r'在(討論|談|講|說)(什麼|哪些)'),
+]
+_TOKEN_SPLIT = re.compile(r'[\s\-_—–·()（）\[\]【】,，.。]+')
+
+
+def query_core(query: str) -> Tuple[str, str]:
+    """(query_normalized, query_core) — 去掉「討論了什麼」之類的問句贅字。"""
+    query_normalized = query.strip()
+    core = query_normalized
+    for pat in FILLER_PATTERNS:
+        core = pat.sub('', core)
+    core = core.strip()
+    return query_normalized, core or query_normalized
+
+
+def title_tokens(title: str) -> List[str]:
+    """Split title into meaningful tokens (>= 2 chars)."""
+    return [t for t in _TOKEN_SPLIT.split(title) if len(t) >= 2]
+
+
+def score_title(title: str, tokens: List[str], query_normalized: str, core: str) -> float:
+    """
+    Title ↔ query match score (0–1).
+
+    Strategy 1: Title appears in query (or query_core)
+    Strategy 2: Query core appears in title
+    Strategy 3: Significant overlap (shared tokens / characters)
+    """
+    score = 0.0
+
+    # Exact title in query
+    if title in query_normalized or title in core:
+        score = 1.0
+    # Query core in title
+    elif core and core in title:
+        score = 0.9
+    else:
+        # Character-level fuzzy: compute overlap ratio
+        matched_tokens = [t for t in tokens if t in query_normalized or t in core]
+        if tokens and matched_tokens:
+            score = len(matched_tokens) / len(tokens)
+            # Boost if the matched portion is significant
+            score = max(score, 0.5)
+
+        # Levenshtein-style fuzzy: if title and query_core are similar length
+        # and differ by only 1-2 characters, boost score
+        if score < 0.4 and core and len(core) >= 2:
+            # Simple edit distance approximation for short Chinese strings
+            # 等長時 min/max 會回傳同一個字串（ratio 恆為 1），要明確分開
+            shorter, longer = (title, core) if len(title) <= len(core) else (core, title)
+            if len(shorter) >= 2 and len(longer) <= len(shorter) + 3:
+                common_chars = sum(1 for c in shorter if c in longer)
+                ratio = common_chars / max(len(longer), 1)
+                if ratio >= 0.6:
+                    score = max(score, ratio * 0.8)
+    return score
+
+
+def _bigrams(s: str) -> Set[str]:
+    return {s[i:i + 2] for i in range(len(s) - 1)}
+
+
+@dataclass
+class TitleIndex:
+    """Immutable snapshot of one user's accessible (meeting_id, title) pairs."""
+
+    ids: List[str]
+    titles: List[str]
+    built_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self.tokens = [title_tokens(t) for t in self.titles]
+        self._bigram_postings: Dict[str, List[int]] = {}
+        self._char_postings: Dict[str, List[int]] = {}
+        self._by_length: Dict[int, List[int]] = {}
+        self._short: List[int] = []
+        for i, title in enumerate(self.titles):
+            for bg in _bigrams(title):
+                self._bigram_postings.setdefault(bg, []).append(i)
+            for ch in set(title):
+                self._char_postings.setdefault(ch, []).append(i)
+            self._by_length.setdefault(len(title), []).append(i)
+            if len(title) < 2:
+                self._short.append(i)
+        self.id_set = set(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _candidates(self, query_normalized: str, core: str) -> Set[int]:
+        cands: Set[int] = set(self._short)
+        for bg in _bigrams(query_normalized) | _bigrams(core):
+            cands.update(self._bigram_postings.get(bg, ()))
+        if len(core) < 2:
+            # 單字 core：「core in title」路徑沒有 bigram 可查
+            cands.update(self._char_postings.get(core, ()))
+        else:
+            # fuzzy 路徑：長度差 ≤ 3 且至少共用一個字
+            near = set()
+            for length in range(max(2, len(core) - 3), len(core) + 4):
+                near.update(self._by_length.get(length, ()))
+            if near:
+                shares = set()
+                for ch in set(core):
+                    shares.update(self._char_postings.get(ch, ()))
+                cands.update(near & shares)
+        return cands
+
+    def match(self, query: str, allowed_ids: Optional[Iterable[str]] = None,
+              limit: int = MAX_MATCHES) -> List[Tuple[str, str, float]]:
+        """Top (meeting_id, title, score) with score ≥ MIN_MATCH_SCORE, best first."""
+        query_normalized, core = query_core(query)
+        allowed = set(allowed_ids) if allowed_ids is not None else None
+        matched = []
+        for i in self._candidates(query_normalized, core):
+            if allowed is not None and self.ids[i] not in allowed:
+                continue
+            score = score_title(self.titles[i], self.tokens[i], query_normalized, core)
+            if score >= MIN_MATCH_SCORE:
+                matched.append((i, score))
+        # Sort by match quality (stable on index order, like the old full scan)
+        matched.sort(key=lambda x: (-x[1], x[0]))
+        return [(self.ids[i], self.titles[i], s) for i, s in matched[:limit]]
+
+
+# ============================================
+# Process-wide cache
+# ============================================
+
+class _TitleIndexCache:
+    def __init__(self, max_users: int, ttl: float):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[str, TitleIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[TitleIndex]:
+        with self._lock:
+            idx = self._indexes.get(key)
+            if idx is not None and time.monotonic() - idx.built_at < self.ttl:
+                self._indexes.move_to_end(key)
+                self.hits += 1
+                return idx
+            if idx is not None:
+                del self._indexes[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, idx: TitleIndex) -> None:
+        with self._lock:
+            self._indexes[key] = idx
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None,
+                   meeting_id: Optional[str] = None) -> int:
+        with self._lock:
+            if keys is None and meeting_id is None:
+                dropped = list(self._indexes)
+            else:
+                dropped = [k for k in (keys or ()) if k in self._indexes]
+                if meeting_id is not None:
+                    dropped += [k for k, idx in self._indexes.items() if meeting_id in idx.id_set]
+                # 全域 index 包含所有會議，任何異動都要重建
+                dropped.append(GLOBAL_KEY)
+            removed = 0
+            for k in set(dropped):
+                if self._indexes.pop(k, None) is not None:
+                    removed += 1
+            self.invalidations += removed
+            return removed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._indexes),
+                "titles": sum(len(i) for i in self._indexes.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+
+_cache = _TitleIndexCache(RAG_TITLE_INDEX_MAX_USERS, RAG_TITLE_INDEX_TTL)
+
+
+def get_title_index(user_upn: Optional[str], loader) -> TitleIndex:
+    """
+    Cached index for user_upn; loader() → [(meeting_id, title), ...] on miss.
+    loader 只在 miss 時呼叫（只撈 id + title，不撈 summary_json）。
+    """
+    key = user_upn or GLOBAL_KEY
+    idx = _cache.get(key)
+    if idx is None:
+        pairs = [(mid, (title or "").strip()) for mid, title in loader()]
+        pairs = [(mid, title) for mid, title in pairs if title]
+        idx = TitleIndex(ids=[p[0] for p in pairs], titles=[p[1] for p in pairs])
+        _cache.put(key, idx)
+    return idx
+
+
+def invalidate_meeting(meeting_id: str, user_upns: Optional[Iterable[str]] = None) -> int:
+    """Meeting created / renamed / deleted: drop every index that has (or should have) it."""
+    return _cache.invalidate(keys=[u.lower() for u in (user_upns or ()) if u], meeting_id=meeting_id)
+
+
+def invalidate_users(user_upns: Iterable[str]) -> int:
+    """Participant changes: the user's accessible meeting set changed."""
+    return _cache.invalidate(keys=[u.lower() for u in user_upns if u])
+
+
+def get_stats() -> dict:
+    return _cache.snapshot()
+
+
+def reset_stats():
+    _cache.clear()
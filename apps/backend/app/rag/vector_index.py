@@ -0,0 +1,597 @@
+"""
+app.rag.vector_index — pgvector ANN indexes for RAG retrieval.
+
+沒有 ANN index 時，/rag/ask 的每個 ORDER BY embedding <=> query 都是整表
+brute-force（migrations/001_enable_pgvector.sql 的 IVFFlat 一直被註解掉）。
+
+本模組負責：
+  - 兩個向量欄位的 index 定義（transcript_segments.content_embedding、
+    meetings.summary_embedding；cosine ops，與查詢用的 <=> 一致）
+  - build / rebuild / reindex（CONCURRENTLY，不鎖寫入；需 AUTOCOMMIT 連線）
+  - per-query 搜尋參數：hnsw.ef_search / ivfflat.probes（SET LOCAL，只影響當次交易）
+  - exact vs ANN 的 recall@k / latency 報告（調參用）
+
+Index 方法預設 HNSW（不需先有資料、recall/latency 較穩）；資料量很大且建索引
+記憶體吃緊時可改 IVFFlat（lists 依列數自動取 sqrt(n)，下限 RAG_IVFFLAT_MIN_LISTS）。
+
+Alembic i3d4e5f6a7b8 建立預設 HNSW index；Cloud Run 部署不自動跑 alembic，
+正式環境以 admin endpoint POST /api/v1/admin/rag-vector-index 建立 / 重建。
+
+量化 ANN（RAG_VECTOR_QUANT=halfvec|binary，pgvector >= 0.7）：
+  transcript_segments 是最大的表，float32 HNSW 每列 3 KB。改用 expression index
+  只在「index 內」存量化向量（halfvec 2 bytes/維、binary 1 bit/維），heap 仍保留
+  float32：ANN 先以量化距離取 top_k × oversample 個候選，再用原始精度 <=> 重排。
+  - 過渡期（dual-write）：float 與量化兩個 index 並存，每次寫入由 PostgreSQL 同時
+    維護，寫入路徑不用改；RAG_VECTOR_QUANT 決定讀哪個
+  - quant_recall_report 比較 exact / float ANN / 量化(+re-rank) 的 recall@k 與延遲、
+    index 大小；確認後以 POST /api/v1/admin/rag-vector-index/quantized?drop_full=true
+    移除 float index 結束過渡期
+  Alembic o9d0e1f2a3b4 建立 halfvec index；binary 以 admin endpoint 建立。
+
+存取範圍過濾（app.access_set）：segment 查詢以 `ts.meeting_id = ANY(:allowed_ids)`
+取代 JOIN meeting_participants；access_filter_report 以同一批查詢比較兩種寫法的
+recall@k、延遲與 planner 實際用到的 index。
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+ANN_METHODS = ("hnsw", "ivfflat")
+
+RAG_ANN_METHOD = os.getenv("RAG_ANN_METHOD", "hnsw").lower()
+RAG_HNSW_M = int(os.getenv("RAG_HNSW_M", "16"))
+RAG_HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "64"))
+RAG_IVFFLAT_MIN_LISTS = int(os.getenv("RAG_IVFFLAT_MIN_LISTS", "10"))
+# 查詢預設值；0 = 不下 SET，沿用 pgvector 預設（ef_search=40、probes=1）
+RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "0"))
+RAG_IVFFLAT_PROBES = int(os.getenv("RAG_IVFFLAT_PROBES", "0"))
+# pgvector >= 0.8：有 WHERE 過濾（使用者隔離 / 意圖縮域）時 ANN 可能回不滿 top_k，
+# 開 iterative scan 讓它繼續掃。"off" | "relaxed_order" | "strict_order"
+RAG_HNSW_ITERATIVE_SCAN = os.getenv("RAG_HNSW_ITERATIVE_SCAN", "off").lower()
+
+# ef_search / probes 上限（pgvector 本身 ef_search ≤ 1000）
+MAX_EF_SEARCH = 1000
+MAX_PROBES = 1000
+
+# 量化 ANN：off | halfvec | binary（讀取路徑；index 以 build_quant_index 建立）
+QUANT_MODES = ("off", "halfvec", "binary")
+RAG_VECTOR_QUANT = os.getenv("RAG_VECTOR_QUANT", "off").lower()
+# re-rank 候選數 = top_k × oversample；0 = 依模式預設（binary 失真大，需要多取）
+RAG_QUANT_OVERSAMPLE = int(os.getenv("RAG_QUANT_OVERSAMPLE", "0"))
+DEFAULT_OVERSAMPLE = {"halfvec": 2, "binary": 8}
+MAX_RERANK_CANDIDATES = 1000
+EMBEDDING_DIMENSION = 768
+
+
+@dataclass(frozen=True)
+class VectorIndexSpec:
+    name: str
+    table: str
+    column: str
+
+
+VECTOR_INDEXES = (
+    VectorIndexSpec("idx_segments_content_embedding", "transcript_segments", "content_embedding"),
+    VectorIndexSpec("idx_meetings_summary_embedding", "meetings", "summary_embedding"),
+)
+
+
+@dataclass(frozen=True)
+class QuantIndexSpec:
+    name: str
+    mode: str
+    expr: str         # 以 {col} 代入欄位；建 index 與 ORDER BY 須是同一個 expression
+    query_expr: str
+    operator: str
+    opclass: str
+    bytes_per_vector: int
+
+
+_D = EMBEDDING_DIMENSION
+QUANT_INDEXES = {
+    "halfvec": QuantIndexSpec(
+        "idx_segments_content_embedding_half", "halfvec",
+        f"{{col}}::halfvec({_D})",
+        f"CAST(:query_embedding AS halfvec({_D}))",
+        "<=>", "halfvec_cosine_ops", 2 * _D,
+    ),
+    "binary": QuantIndexSpec(
+        "idx_segments_content_embedding_bin", "binary",
+        f"binary_quantize({{col}})::bit({_D})",
+        f"binary_quantize(CAST(:query_embedding AS vector))::bit({_D})",
+        "<~>", "bit_hamming_ops", _D // 8,
+    ),
+}
+FULL_PRECISION_BYTES = 4 * _D
+
+
+def _is_postgres(db) -> bool:
+    bind = db.get_bind() if hasattr(db, "get_bind") else db
+    return getattr(getattr(bind, "dialect", None), "name", "") == "postgresql"
+
+
+def index_ddl(spec: VectorIndexSpec, method: str = RAG_ANN_METHOD,
+              concurrently: bool = True, lists: Optional[int] = None) -> str:
+    """CREATE INDEX statement for one vector column."""
+    if method not in ANN_METHODS:
+        raise ValueError(f"Unknown ANN method: {method}")
+    if method == "hnsw":
+        with_clause = f"m = {int(RAG_HNSW_M)}, ef_construction = {int(RAG_HNSW_EF_CONSTRUCTION)}"
+    else:
+        with_clause = f"lists = {int(lists or RAG_IVFFLAT_MIN_LISTS)}"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {spec.name} "
+        f"ON {spec.table} USING {method} ({spec.column} vector_cosine_ops) "
+        f"WITH ({with_clause})"
+    )
+
+
+def quant_index_ddl(mode: str, concurrently: bool = True) -> str:
+    """CREATE INDEX for the quantized expression index (HNSW) of one QUANT_MODES entry."""
+    if mode not in QUANT_INDEXES:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    spec = QUANT_INDEXES[mode]
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {spec.name} "
+        f"ON transcript_segments USING hnsw (({spec.expr.format(col='content_embedding')}) {spec.opclass}) "
+        f"WITH (m = {int(RAG_HNSW_M)}, ef_construction = {int(RAG_HNSW_EF_CONSTRUCTION)})"
+    )
+
+
+def quant_oversample(mode: str, oversample: Optional[int] = None) -> int:
+    return max(1, int(oversample or RAG_QUANT_OVERSAMPLE or DEFAULT_OVERSAMPLE.get(mode, 1)))
+
+
+def segment_knn_sql(select_from_where: str, top_k: int, mode: Optional[str] = None,
+                    oversample: Optional[int] = None, alias: str = "ts") -> tuple:
+    """
+    Complete a segment k-NN query: (sql_text, extra_params).
+
+    select_from_where 須選出 `distance`（float32 的 <=> 距離）且以 WHERE 結尾。
+    mode=off → ORDER BY 原始向量 LIMIT :top_k；halfvec / binary → 內層以量化
+    expression（走量化 index）取 :ann_k 個候選，外層依精確 distance 重排取 :top_k。
+    """
+    mode = (mode or RAG_VECTOR_QUANT).lower()
+    if mode not in QUANT_INDEXES:
+        return (
+            f"{select_from_where}\n"
+            f"ORDER BY {alias}.content_embedding <=> CAST(:query_embedding AS vector)\n"
+            f"LIMIT :top_k",
+            {"top_k": top_k},
+        )
+    spec = QUANT_INDEXES[mode]
+    order = spec.expr.format(col=f"{alias}.content_embedding")
+    ann_k = min(MAX_RERANK_CANDIDATES, max(top_k, top_k * quant_oversample(mode, oversample)))
+    return (
+        f"SELECT * FROM (\n{select_from_where}\n"
+        f"ORDER BY ({order}) {spec.operator} {spec.query_expr}\n"
+        f"LIMIT :ann_k\n) AS cand\n"
+        f"ORDER BY cand.distance\nLIMIT :top_k",
+        {"top_k": top_k, "ann_k": ann_k},
+    )
+
+
+def _ivfflat_lists(conn, spec: VectorIndexSpec) -> int:
+    rows = conn.execute(
+        text(f"SELECT COUNT(*) FROM {spec.table} WHERE {spec.column} IS NOT NULL")
+    ).scalar() or 0
+    return max(RAG_IVFFLAT_MIN_LISTS, int(math.sqrt(rows)))
+
+
+def _all_indexes():
+    """(name, table, column, quant mode) for the float32 and quantized ANN indexes."""
+    out = [(spec.name, spec.table, spec.column, "off") for spec in VECTOR_INDEXES]
+    out += [(q.name, "transcript_segments", "content_embedding", q.mode) for q in QUANT_INDEXES.values()]
+    return out
+
+
+def vector_index_status(db: Session) -> List[dict]:
+    """Current ANN indexes (method, size, scans) for the RAG vector columns."""
+    if not _is_postgres(db):
+        return []
+    rows = db.execute(text("""
+        SELECT i.indexname, i.tablename, i.indexdef,
+               pg_relation_size(c.oid) AS size_bytes,
+               COALESCE(s.idx_scan, 0) AS scans,
+               ix.indisvalid AS valid
+        FROM pg_indexes i
+        JOIN pg_class c ON c.relname = i.indexname
+        JOIN pg_index ix ON ix.indexrelid = c.oid
+        LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = c.oid
+        WHERE i.indexname = ANY(:names)
+    """), {"names": [name for name, *_ in _all_indexes()]}).fetchall()
+    found = {r.indexname: r for r in rows}
+    status = []
+    for name, table, column, quant in _all_indexes():
+        r = found.get(name)
+        method = None
+        if r is not None:
+            method = next((m for m in ANN_METHODS if f"using {m}" in r.indexdef.lower()), None)
+        status.append({
+            "name": name,
+            "table": table,
+            "column": column,
+            "quant": quant,
+            "exists": r is not None,
+            "valid": bool(r.valid) if r is not None else False,
+            "method": method,
+            "size_bytes": int(r.size_bytes) if r is not None else 0,
+            "scans": int(r.scans) if r is not None else 0,
+        })
+    return status
+
+
+def build_vector_indexes(engine, method: str = RAG_ANN_METHOD, rebuild: bool = False,
+                         reindex: bool = False) -> List[dict]:
+    """
+    Create the ANN indexes without blocking writes.
+
+    rebuild: drop + recreate (e.g. switching HNSW ↔ IVFFlat, or IVFFlat lists
+             after the table grew a lot)
+    reindex: REINDEX CONCURRENTLY existing indexes (bloat after many updates)
+    """
+    if method not in ANN_METHODS:
+        raise ValueError(f"Unknown ANN method: {method}")
+    results = []
+    # CREATE / DROP / REINDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for spec in VECTOR_INDEXES:
+            t0 = time.monotonic()
+            if reindex and not rebuild:
+                conn.execute(text(f"REINDEX INDEX CONCURRENTLY {spec.name}"))
+                action = "reindexed"
+            else:
+                if rebuild:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {spec.name}"))
+                lists = _ivfflat_lists(conn, spec) if method == "ivfflat" else None
+                conn.execute(text(index_ddl(spec, method, concurrently=True, lists=lists)))
+                action = "rebuilt" if rebuild else "created"
+            elapsed = round(time.monotonic() - t0, 2)
+            logger.info(f"[RAG/ANN] {spec.name} {action} ({method}) in {elapsed}s")
+            results.append({"name": spec.name, "action": action, "method": method, "seconds": elapsed})
+    return results
+
+
+def build_quant_index(engine, mode: str, rebuild: bool = False, drop_full: bool = False) -> List[dict]:
+    """
+    Create the quantized segment index (CONCURRENTLY).
+
+    drop_full: 結束 dual-index 過渡期，移除 float32 的 segment index
+               （先確認 quant_recall_report 的 recall 可接受，且 RAG_VECTOR_QUANT 已切過去）
+    """
+    if mode not in QUANT_INDEXES:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    spec = QUANT_INDEXES[mode]
+    results = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        t0 = time.monotonic()
+        if rebuild:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {spec.name}"))
+        conn.execute(text(quant_index_ddl(mode, concurrently=True)))
+        elapsed = round(time.monotonic() - t0, 2)
+        logger.info(f"[RAG/ANN] {spec.name} {'rebuilt' if rebuild else 'created'} ({mode}) in {elapsed}s")
+        results.append({"name": spec.name, "action": "rebuilt" if rebuild else "created",
+                        "method": "hnsw", "quant": mode, "seconds": elapsed})
+        if drop_full:
+            full = VECTOR_INDEXES[0].name
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {full}"))
+            logger.info(f"[RAG/ANN] {full} dropped (quantized cut-over to {mode})")
+            results.append({"name": full, "action": "dropped", "quant": "off"})
+    return results
+
+
+def apply_search_params(db: Session, ef_search: Optional[int] = None,
+                        probes: Optional[int] = None) -> None:
+    """
+    Per-query ANN knobs for the current transaction (SET LOCAL).
+    Falls back to RAG_HNSW_EF_SEARCH / RAG_IVFFLAT_PROBES; no-op off PostgreSQL.
+    """
+    if not _is_postgres(db):
+        return
+    ef_search = ef_search or RAG_HNSW_EF_SEARCH
+    probes = probes or RAG_IVFFLAT_PROBES
+    # SET does not take bind parameters — values are clamped ints
+    if ef_search:
+        db.execute(text(f"SET LOCAL hnsw.ef_search = {max(1, min(int(ef_search), MAX_EF_SEARCH))}"))
+    if probes:
+        db.execute(text(f"SET LOCAL ivfflat.probes = {max(1, min(int(probes), MAX_PROBES))}"))
+    if RAG_HNSW_ITERATIVE_SCAN in ("relaxed_order", "strict_order"):
+        try:
+            # Savepoint: an unknown GUC would otherwise abort the whole transaction
+            with db.begin_nested():
+                db.execute(text(f"SET LOCAL hnsw.iterative_scan = {RAG_HNSW_ITERATIVE_SCAN}"))
+        except Exception as e:  # pgvector < 0.8
+            logger.warning(f"[RAG/ANN] hnsw.iterative_scan not supported: {e}")
+
+
+def _top_ids(db: Session, spec: VectorIndexSpec, embedding: str, k: int) -> List[str]:
+    rows = db.execute(text(f"""
+        SELECT id FROM {spec.table}
+        WHERE {spec.column} IS NOT NULL
+        ORDER BY {spec.column} <=> CAST(:q AS vector)
+        LIMIT :k
+    """), {"q": embedding, "k": k}).fetchall()
+    return [r.id for r in rows]
+
+
+def ann_recall_report(db: Session, samples: int = 20, k: int = 10,
+                      ef_search_values: Optional[List[int]] = None,
+                      probes_values: Optional[List[int]] = None) -> dict:
+    """
+    Recall@k and latency of ANN vs exact search, per setting.
+
+    Query vectors are embeddings sampled from the table itself (no LLM calls).
+    Exact results come from the same query with index scans disabled.
+    """
+    if not _is_postgres(db):
+        return {"error": "ANN report requires PostgreSQL + pgvector"}
+
+    ef_search_values = ef_search_values or [40, 100, 200]
+    probes_values = probes_values or [1, 5, 10]
+    report = {"k": k, "samples": samples, "indexes": {}}
+    methods = {st["name"]: st["method"] for st in vector_index_status(db)}
+
+    for spec in VECTOR_INDEXES:
+        queries = db.execute(text(f"""
+            SELECT {spec.column}::text AS emb FROM {spec.table}
+            WHERE {spec.column} IS NOT NULL
+            ORDER BY random() LIMIT :n
+        """), {"n": samples}).fetchall()
+        queries = [r.emb for r in queries]
+        if not queries:
+            report["indexes"][spec.name] = {"error": "no embeddings"}
+            continue
+
+        exact, exact_ms = [], []
+        for q in queries:
+            db.execute(text("SET LOCAL enable_indexscan = off"))
+            t0 = time.perf_counter()
+            exact.append(set(_top_ids(db, spec, q, k)))
+            exact_ms.append((time.perf_counter() - t0) * 1000)
+            db.rollback()  # end the transaction so SET LOCAL resets
+
+        method = methods.get(spec.name)
+        if method is None:
+            report["indexes"][spec.name] = {"error": "index missing", "exact_avg_ms": round(sum(exact_ms) / len(exact_ms), 2)}
+            continue
+        if method == "hnsw":
+            settings = [("ef_search", v) for v in ef_search_values]
+        else:
+            settings = [("probes", v) for v in probes_values]
+        rows = []
+        for knob, value in settings:
+            recalls, latencies = [], []
+            for q, truth in zip(queries, exact):
+                if knob == "ef_search":
+                    apply_search_params(db, ef_search=value)
+                else:
+                    apply_search_params(db, probes=value)
+                t0 = time.perf_counter()
+                got = _top_ids(db, spec, q, k)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                db.rollback()
+                recalls.append(len(truth & set(got)) / max(len(truth), 1))
+            rows.append({
+                knob: value,
+                "recall_at_k": round(sum(recalls) / len(recalls), 4),
+                "avg_ms": round(sum(latencies) / len(latencies), 2),
+                "p95_ms": round(sorted(latencies)[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+            })
+        report["indexes"][spec.name] = {
+            "method": method,
+            "exact_avg_ms": round(sum(exact_ms) / len(exact_ms), 2),
+            "ann": rows,
+        }
+    return report
+
+
+def _quant_top_ids(db: Session, mode: str, embedding: str, k: int,
+                   oversample: Optional[int] = None, rerank: bool = True) -> List[str]:
+    base = (
+        "SELECT ts.id, (ts.content_embedding <=> CAST(:query_embedding AS vector)) AS distance "
+        "FROM transcript_segments ts WHERE ts.content_embedding IS NOT NULL"
+    )
+    sql, params = segment_knn_sql(base, k, mode, oversample=oversample if rerank else 1)
+    params["query_embedding"] = embedding
+    return [r.id for r in db.execute(text(sql), params).fetchall()]
+
+
+def quant_recall_report(db: Session, samples: int = 20, k: int = 10,
+                        modes: Optional[List[str]] = None,
+                        oversample_values: Optional[List[int]] = None) -> dict:
+    """
+    Quantized ANN (+ full-precision re-rank) vs exact search on transcript_segments.
+
+    每個模式報告：index 是否存在 / 大小、每向量 bytes 與壓縮比、各 oversample 的
+    recall@k（含不 re-rank 的對照）與延遲；float32 ANN 作為基準。
+    Exact 結果以關閉 index scan 的同一查詢取得。
+    """
+    if not _is_postgres(db):
+        return {"error": "quantization report requires PostgreSQL + pgvector"}
+
+    modes = [m for m in (modes or list(QUANT_INDEXES)) if m in QUANT_INDEXES]
+    oversample_values = oversample_values or [1, 2, 4, 8]
+    spec = VECTOR_INDEXES[0]
+    queries = [r.emb for r in db.execute(text(f"""
+        SELECT {spec.column}::text AS emb FROM {spec.table}
+        WHERE {spec.column} IS NOT NULL
+        ORDER BY random() LIMIT :n
+    """), {"n": samples}).fetchall()]
+    if not queries:
+        return {"error": "no embeddings"}
+
+    status = {st["name"]: st for st in vector_index_status(db)}
+
+    def _measure(fn):
+        recalls, latencies = [], []
+        for q, truth in zip(queries, exact):
+            t0 = time.perf_counter()
+            got = fn(q)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            db.rollback()
+            recalls.append(len(truth & set(got)) / max(len(truth), 1))
+        return {
+            "recall_at_k": round(sum(recalls) / len(recalls), 4),
+            "avg_ms": round(sum(latencies) / len(latencies), 2),
+            "p95_ms": round(sorted(latencies)[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        }
+
+    exact, exact_ms = [], []
+    for q in queries:
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+        t0 = time.perf_counter()
+        exact.append(set(_top_ids(db, spec, q, k)))
+        exact_ms.append((time.perf_counter() - t0) * 1000)
+        db.rollback()
+
+    full = status.get(spec.name, {})
+    report = {
+        "k": k,
+        "samples": len(queries),
+        "exact_avg_ms": round(sum(exact_ms) / len(exact_ms), 2),
+        "full_precision": {
+            "index": spec.name,
+            "exists": bool(full.get("exists")),
+            "index_bytes": full.get("size_bytes", 0),
+            "bytes_per_vector": FULL_PRECISION_BYTES,
+            **(_measure(lambda q: _top_ids(db, spec, q, k)) if full.get("exists") else {}),
+        },
+        "modes": {},
+    }
+    for mode in modes:
+        qspec = QUANT_INDEXES[mode]
+        st = status.get(qspec.name, {})
+        rows = []
+        for factor in oversample_values:
+            row = {"oversample": factor}
+            row.update(_measure(lambda q: _quant_top_ids(db, mode, q, k, oversample=factor)))
+            rows.append(row)
+        report["modes"][mode] = {
+            "index": qspec.name,
+            "exists": bool(st.get("exists")),
+            "index_bytes": st.get("size_bytes", 0),
+            "bytes_per_vector": qspec.bytes_per_vector,
+            "compression": round(FULL_PRECISION_BYTES / qspec.bytes_per_vector, 1),
+            "index_size_ratio": (round(full["size_bytes"] / st["size_bytes"], 2)
+                                 if st.get("size_bytes") and full.get("size_bytes") else None),
+            "no_rerank": _measure(lambda q: _quant_top_ids(db, mode, q, k, rerank=False)),
+            "rerank": rows,
+        }
+    return report
+
+
+_ACCESS_KNN_SELECT = (
+    "SELECT ts.id, ts.meeting_id, "
+    "(ts.content_embedding <=> CAST(:query_embedding AS vector)) AS distance "
+)
+
+
+def _access_knn(db: Session, embedding: str, k: int, user_upn: str,
+                allowed: Optional[frozenset] = None, explain: bool = False):
+    """allowed=None → 舊寫法（JOIN meeting_participants）；否則 ID filter（app.access_set）。"""
+    from app import access_set
+
+    if allowed is None:
+        body = (_ACCESS_KNN_SELECT + "FROM transcript_segments ts "
+                "JOIN meeting_participants mp ON ts.meeting_id = mp.meeting_id AND mp.user_upn = :user_upn "
+                "WHERE ts.content_embedding IS NOT NULL")
+        params = {"user_upn": user_upn}
+    else:
+        where, params = access_set.id_filter(db, "ts.meeting_id", allowed)
+        body = _ACCESS_KNN_SELECT + "FROM transcript_segments ts WHERE ts.content_embedding IS NOT NULL" + where
+    sql, knn_params = segment_knn_sql(body, k)
+    params.update({"query_embedding": embedding, **knn_params})
+    if explain:
+        plan = db.execute(text("EXPLAIN (FORMAT JSON) " + sql), params).scalar()
+        return _plan_indexes(plan[0]["Plan"] if isinstance(plan, list) else plan)
+    return [r.id for r in db.execute(text(sql), params).fetchall()]
+
+
+def _plan_indexes(node: dict) -> List[str]:
+    names = [node["Index Name"]] if node.get("Index Name") else []
+    for child in node.get("Plans") or ():
+        names.extend(n for n in _plan_indexes(child) if n not in names)
+    return names
+
+
+def access_filter_report(db: Session, user_upn: Optional[str] = None,
+                         samples: int = 20, k: int = 10, users: int = 3) -> dict:
+    """
+    ANN segment search：JOIN meeting_participants（舊）vs access set ID filter（新）。
+
+    對 user_upn（未給時取 participant 數最多的前 `users` 位）各跑同一批查詢向量，
+    報告兩種寫法的 recall@k（對照：該使用者範圍內的 exact 結果）、延遲與 planner
+    實際用到的 index（EXPLAIN）。Access set 直接從 DB 載入，不經快取。
+    """
+    from app import access_set
+
+    if not _is_postgres(db):
+        return {"error": "access filter report requires PostgreSQL + pgvector"}
+
+    spec = VECTOR_INDEXES[0]
+    queries = [r.emb for r in db.execute(text(f"""
+        SELECT {spec.column}::text AS emb FROM {spec.table}
+        WHERE {spec.column} IS NOT NULL
+        ORDER BY random() LIMIT :n
+    """), {"n": samples}).fetchall()]
+    if not queries:
+        return {"error": "no embeddings"}
+    if user_upn:
+        upns = [user_upn]
+    else:
+        upns = [r.user_upn for r in db.execute(text("""
+            SELECT user_upn, COUNT(*) AS n FROM meeting_participants
+            GROUP BY user_upn ORDER BY n DESC LIMIT :u
+        """), {"u": users}).fetchall()]
+
+    report = {"k": k, "samples": len(queries), "users": []}
+    for upn in upns:
+        allowed = access_set.load_allowed_ids(db, upn)
+        entry = {"user_upn": upn, "meetings": len(allowed)}
+        if not allowed:
+            report["users"].append({**entry, "error": "no accessible meetings"})
+            continue
+        where, params = access_set.id_filter(db, "meeting_id", allowed)
+        entry["segments"] = db.execute(text(
+            f"SELECT COUNT(*) FROM transcript_segments WHERE content_embedding IS NOT NULL{where}"
+        ), params).scalar()
+
+        exact = []
+        for q in queries:
+            db.execute(text("SET LOCAL enable_indexscan = off"))
+            exact.append(set(_access_knn(db, q, k, upn, allowed)))
+            db.rollback()
+
+        for name, variant in (("join", None), ("id_filter", allowed)):
+            recalls, latencies = [], []
+            for q, truth in zip(queries, exact):
+                apply_search_params(db)
+                t0 = time.perf_counter()
+                got = _access_knn(db, q, k, upn, variant)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                db.rollback()
+                recalls.append(len(truth & set(got)) / max(len(truth), 1))
+            apply_search_params(db)
+            indexes = _access_knn(db, queries[0], k, upn, variant, explain=True)
+            db.rollback()
+            entry[name] = {
+                "recall_at_k": round(sum(recalls) / len(recalls), 4),
+                "avg_ms": round(sum(latencies) / len(latencies), 2),
+                "p95_ms": round(sorted(latencies)[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+                "indexes_used": indexes,
+            }
+        entry["speedup"] = (round(entry["join"]["avg_ms"] / entry["id_filter"]["avg_ms"], 2)
+                            if entry["id_filter"]["avg_ms"] else None)
+        report["users"].append(entry)
+    return report
@@ -55,6 +55,167 @@ async def gpu_queue_reset_stats(_: None = Depends(_check_admin)):
     return {"message": "GPU queue stats reset"}
 
 
+@router.get("/live-asr-stats")
+async def live_asr_stats(_: None = Depends(_check_admin)):
+    """即時轉錄 ASR pipeline 統計（queue depth / drop / latency）。"""
+    from app.live_pipeline import get_stats
+    return get_stats()
+
+
+@router.post("/live-asr-reset-stats")
+async def live_asr_reset_stats(_: None = Depends(_check_admin)):
+    """重置即時轉錄 ASR pipeline 統計（壓測前清零用）。"""
+    from app.live_pipeline import reset_stats
+    reset_stats()
+    return {"message": "Live ASR pipeline stats reset"}
+
+
+@router.get("/rag-vector-index")
+async def rag_vector_index_status(
+    db: Session = Depends(get_db),
+    _: None = Depends(_check_admin),
+):
+    """RAG 向量欄位的 ANN index 狀態（方法 / 大小 / 掃描次數 / 是否 valid）。"""
+    from app.rag.vector_index import vector_index_status
+    return {"indexes": vector_index_status(db)}
+
+
+@router.post("/rag-vector-index")
+async def rag_vector_index_build(
+    method: str = "hnsw",
+    rebuild: bool = False,
+    reindex: bool = False,
+    _: None = Depends(_check_admin),
+):
+    """建立 / 重建（rebuild）/ REINDEX RAG 向量 ANN index，全程 CONCURRENTLY 不鎖寫入。
+
+    method: hnsw | ivfflat（切換方法需 rebuild=true）
+    建索引可能需數分鐘，於 worker thread 執行，不阻塞 event loop。
+    """
+    import asyncio
+    from app.database import engine
+    from app.rag.vector_index import ANN_METHODS, build_vector_indexes
+
+    method = method.lower()
+    if method not in ANN_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {ANN_METHODS}")
+    try:
+        results = await asyncio.to_thread(build_vector_indexes, engine, method, rebuild, reindex)
+    except Exception as e:
+        logger.error(f"[Admin] rag vector index build failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"indexes": results}
+
+
+@router.post("/rag-vector-index/quantized")
+async def rag_quant_index_build(
+    mode: str = "halfvec",
+    rebuild: bool = False,
+    drop_full: bool = False,
+    _: None = Depends(_check_admin),
+):
+    """建立 transcript_segments 的量化 ANN index（halfvec | binary，CONCURRENTLY）。
+
+    建好後與 float32 index 並存（過渡期兩者都由 PostgreSQL 維護），以
+    RAG_VECTOR_QUANT 切換讀取；GET /rag-quant-report 確認 recall 後，再以
+    drop_full=true 移除 float32 segment index。需 pgvector >= 0.7。
+    """
+    import asyncio
+    from app.database import engine
+    from app.rag.vector_index import QUANT_INDEXES, build_quant_index
+
+    mode = mode.lower()
+    if mode not in QUANT_INDEXES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {tuple(QUANT_INDEXES)}")
+    try:
+        results = await asyncio.to_thread(build_quant_index, engine, mode, rebuild, drop_full)
+    except Exception as e:
+        logger.error(f"[Admin] rag quantized index build failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"indexes": results}
+
+
+@router.post("/rag-lexical-index")
+async def rag_lexical_index_build(
+    _: None = Depends(_check_admin),
+):
+    """建立 hybrid retrieval 的 CJK bigram 欄位與 GIN index（rag_cjk_bigrams + lexical_tsv + CONCURRENTLY）。"""
+    import asyncio
+    from app.database import engine
+    from app.rag.hybrid import build_lexical_index
+
+    try:
+        result = await asyncio.to_thread(build_lexical_index, engine)
+    except Exception as e:
+        logger.error(f"[Admin] rag lexical index build failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"index": result}
+
+
+@router.get("/rag-ann-report")
+async def rag_ann_report(
+    samples: int = 20,
+    k: int = 10,
+    db: Session = Depends(get_db),
+    _: None = Depends(_check_admin),
+):
+    """exact vs ANN 的 recall@k 與延遲報告（用來挑 ef_search / probes）。"""
+    from app.rag.vector_index import ann_recall_report
+    samples = max(1, min(samples, 200))
+    k = max(1, min(k, 50))
+    return ann_recall_report(db, samples=samples, k=k)
+
+
+@router.get("/rag-quant-report")
+async def rag_quant_report(
+    samples: int = 20,
+    k: int = 10,
+    db: Session = Depends(get_db),
+    _: None = Depends(_check_admin),
+):
+    """float32 vs halfvec / binary 量化（+ 精確重排）的 recall@k、延遲與 index 大小。"""
+    from app.rag.vector_index import quant_recall_report
+    samples = max(1, min(samples, 200))
+    k = max(1, min(k, 50))
+    return quant_recall_report(db, samples=samples, k=k)
+
+
+@router.get("/rag-access-report")
+async def rag_access_report(
+    user_upn: str = "",
+    samples: int = 20,
+    k: int = 10,
+    db: Session = Depends(get_db),
+    _: None = Depends(_check_admin),
+):
+    """ANN segment 搜尋：JOIN meeting_participants vs access set ID filter 的 recall@k / 延遲 / 使用的 index。
+
+    user_upn 未給時取 participant 數最多的前 3 位。
+    """
+    from app.rag.vector_index import access_filter_report
+    samples = max(1, min(samples, 200))
+    k = max(1, min(k, 50))
+    return access_filter_report(db, user_upn=user_upn or None, samples=samples, k=k)
+
+
+@router.post("/summary-digest-backfill")
+async def summary_digest_backfill(
+    limit: int = 0,
+    _: None = Depends(_check_admin),
+):
+    """回填尚未計算 summary digest 的會議（startup 也會自動跑；limit=0 表示全部）。"""
+    import asyncio
+    from app.database import engine
+    from app.summary_digest import backfill_summary_digests
+
+    try:
+        filled = await asyncio.to_thread(backfill_summary_digests, engine, limit=limit or None)
+    except Exception as e:
+        logger.error(f"[Admin] summary digest backfill failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"backfilled": filled}
+
+
 @router.post("/send-test-email")
 async def send_test_email_endpoint(
     to_email: str,
@@ -152,6 +313,8 @@ async def backfill_participants(
         inserted += 1
 
     db.commit()
+    from app.rag import title_index
+    title_index.invalidate_users([user_upn])
 
     logger.info(
         f"[Admin] backfill_participants: user_upn={user_upn} "
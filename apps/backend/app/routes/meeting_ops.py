@@ -16,6 +16,7 @@ from google.cloud import storage as gcs_storage
 
 from app.models import Meeting, TranscriptSegment, MeetingStatus
 from app.database import get_db
+from app.rag import title_index
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/meetings", tags=["Meeting Operations"])
@@ -143,6 +144,7 @@ async def merge_meetings(
     
     new_meeting.status = MeetingStatus.COMPLETED
     db.commit()
+    title_index.invalidate_meeting(new_meeting_id)
     
     return MeetingOperationResponse(
         success=True,
@@ -339,6 +341,8 @@ async def split_meeting(
         )
     
     db.commit()
+    title_index.invalidate_meeting(meeting1_id)
+    title_index.invalidate_meeting(meeting2_id)
     
     return MeetingOperationResponse(
         success=True,
@@ -50,6 +50,8 @@ from app.schemas import (
     SummarizeResponseModel,
 )
 from app.llm_utils import get_gemini_client, generate_summary, relabel_summary_speakers
+from app.rag import title_index
+from app.embedding_refresh import mark_segments_dirty, mark_summary_dirty, schedule_reembed
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -109,6 +111,7 @@ async def create_meeting(meeting_data: MeetingCreate, db: Session = Depends(get_
 
     db.commit()
     db.refresh(db_meeting)
+    title_index.invalidate_meeting(db_meeting.id, user_upns=[upn])
     return MeetingRead.from_orm(db_meeting)
 
 
@@ -316,6 +319,8 @@ async def bulk_delete_meetings(
             status_code=500,
             detail=f"批次刪除失敗：{type(e).__name__}: {str(e)[:200]}",
         )
+    for mid in payload.meeting_ids:
+        title_index.invalidate_meeting(mid)
 
     logger.info(
         f"Bulk soft-deleted {deleted_count} meetings by "
@@ -379,6 +384,7 @@ async def delete_meeting(
         )
 
         db.commit()
+        title_index.invalidate_meeting(meeting_id)
         logger.info(
             f"Soft-deleted meeting {meeting_id} by {requester_upn or 'anonymous'} "
             f"(title='{meeting.title}', status={meeting.status})"
@@ -543,7 +549,9 @@ async def restore_summary_version(
     meeting.summary_json = version.summary_json
     meeting.template_name = version.template_name
     meeting.updated_at = datetime.utcnow()
+    mark_summary_dirty(db, meeting_id)
     db.commit()
+    schedule_reembed(meeting_id)
 
     return {"message": "Summary restored", "template_name": version.template_name}
 
@@ -568,7 +576,13 @@ async def rename_meeting(
     old_title = meeting.title
     meeting.title = body.title.strip()
     meeting.updated_at = datetime.utcnow()
+    if meeting.title != old_title:
+        # 摘要向量的文字含「會議標題」
+        mark_summary_dirty(db, meeting_id)
     db.commit()
+    title_index.invalidate_meeting(meeting_id)
+    if meeting.title != old_title:
+        schedule_reembed(meeting_id)
 
     return {"message": "Meeting renamed", "meeting_id": meeting_id, "old_title": old_title, "new_title": meeting.title}
 
@@ -742,7 +756,7 @@ async def update_segment_speakers(
             + (" ..." if len(missing) > 5 else ""),
         )
 
-    changed = 0
+    changed_ids = []
     for sid, new_speaker in update.updates.items():
         new_speaker = (new_speaker or "").strip()
         if not new_speaker:
@@ -750,11 +764,15 @@ async def update_segment_speakers(
         seg = seg_map[sid]
         if (seg.speaker or "") != new_speaker:
             seg.speaker = new_speaker
-            changed += 1
+            changed_ids.append(sid)
+    changed = len(changed_ids)
 
     if changed:
         meeting.updated_at = datetime.utcnow()
+        # 講者標籤在 embedding 視窗文字內 → 鄰近視窗的向量都要重算（背景 re-embedder）
+        mark_segments_dirty(db, changed_ids)
         db.commit()
+        schedule_reembed(meeting_id)
 
     logger.info(
         f"[segment-speakers] meeting={meeting_id} requested={len(seg_ids)} changed={changed}"
@@ -870,7 +888,9 @@ async def resync_summary_speakers(
         db.add(version)
         meeting.summary_json = result["summary_json"]
         meeting.updated_at = datetime.utcnow()
+        mark_summary_dirty(db, meeting_id)
         db.commit()
+        schedule_reembed(meeting_id)
 
     logger.info(
         f"[resync-summary] meeting={meeting_id} changed={changed} "
@@ -7,16 +7,21 @@ cited answers via Gemini.
 
 Endpoint:
     POST /api/v1/rag/ask - Ask a question across meetings
-    POST /api/v1/rag/backfill - One-time backfill embeddings for existing data
+    POST /api/v1/rag/ask/stream - Same, streamed as Server-Sent Events
+    POST /api/v1/rag/backfill - Backfill missing embeddings (resumable)
+    GET  /api/v1/rag/backfill/status - Backfill progress / throughput
 """
 
+import asyncio
 import logging
 import json
 import os
 import re
-from typing import List, Optional
+from types import SimpleNamespace
+from typing import Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 
 from sqlalchemy.orm import Session
@@ -25,15 +30,26 @@ from sqlalchemy import text
 from app.database import get_db
 from app.models import Meeting, TranscriptSegment, MeetingParticipant
 from app.timeutil import to_utc_iso
-from app.llm_utils import get_gemini_client, GEMINI_MODEL
-from app.embedding import embed_single_text, backfill_all_embeddings
+from app.llm_utils import get_gemini_client, reset_gemini_client_on_transport_error, GEMINI_MODEL
+from app.embedding import backfill_all_embeddings, get_embedding_provider
+from app import access_set, embedding_cache, embedding_refresh
+from app.rag import vector_index
+from app.summary_digest import citation_or_parse
 from app.rag import (
     build_grounded_prompt,
     expand_with_context,
     CONFIDENCE_LEVELS,
-    classify_query_intent,
     build_meeting_sql_filters,
     passthrough_intent,
+    apply_search_params,
+    segment_knn_sql,
+    hybrid,
+    query_cache,
+    RetrievalPlan,
+    title_index,
+    answer_cache,
+    AnswerStreamDecoder,
+    sse_event,
 )
 
 logger = logging.getLogger(__name__)
@@ -59,6 +75,10 @@ class RAGRequest(BaseModel):
     user_upn:    str            = Field(..., description="當前登入用戶的 AD UPN（user@company.com），強制 MemPlace 隔離存取")
     meeting_ids: Optional[List[str]] = Field(None, description="進一步限定搜索的會議 ID 清單（在 user_upn 範圍內篩選）")
     top_k:       int            = Field(10, ge=1, le=50, description="返回的相關段落數")
+    ef_search:   Optional[int]  = Field(None, ge=1, le=1000, description="HNSW ef_search（本次查詢；越大 recall 越高、越慢）")
+    probes:      Optional[int]  = Field(None, ge=1, le=1000, description="IVFFlat probes（本次查詢）")
+    debug:       bool           = Field(False, description="回傳各 stage 耗時（timings, ms）")
+    bypass_cache: bool          = Field(False, description="略過答案快取，強制重新檢索與生成（新結果仍會寫回快取）")
 
     @field_validator('user_upn', mode='before')
     @classmethod
@@ -94,6 +114,11 @@ class RAGResponse(BaseModel):
         default_factory=list,
         description="LLM 實際引用的 citation 索引 (0-based)",
     )
+    timings: Optional[Dict[str, float]] = Field(
+        None,
+        description="debug=true 時：各 stage 耗時 ms（並行 stage 互相重疊，total 為 wall-clock）",
+    )
+    cached: bool = Field(False, description="答案來自 app.rag.answer_cache（未重新檢索 / 生成）")
 
 
 class LastMeetingSummary(BaseModel):
@@ -192,101 +217,92 @@ def _find_similar_segments(
     """
     Find top-K most similar transcript segments using pgvector cosine distance.
 
-    存取控制隆離优先級（MemPlace 雔離）：
-      1. user_upn  → JOIN meeting_participants ，只搜尋該用戶有權限的會議（首選）
-      2. meeting_ids → 在以上範圍內進一步縮小搜索範圍（選遳）
+    存取控制（MemPlace 隔離，app.access_set.resolve_scope）：
+      1. user_upn  → 只搜尋該用戶有權限的會議（快取的 access set，首選）
+      2. meeting_ids → 在以上範圍內進一步縮小搜索範圍（選用）
       3. 無兩者  → 展開全域搜索（已登入、管理員模式等）
+    範圍以 `ts.meeting_id = ANY(:allowed_ids)` 推進查詢（不再 JOIN meeting_participants），
+    planner 可依範圍大小選 meeting_id btree 或 ANN index。
 
     Q5 (2026-07-03)：extra_where / extra_params 由查詢意圖路由器產生，於語意搜尋前
     先用結構化條件（日期 / 機密）縮小 meetings 範圍。fragment 以 " AND ..." 開頭、
     只含固定欄位名，值全走 bound params（見 app.rag.build_meeting_sql_filters）。
 
+    RAG_VECTOR_QUANT=halfvec|binary 時改走量化 index 取候選、再以 float32 距離重排
+    （app.rag.segment_knn_sql）；回傳的 distance 一律是原始精度。
+
     Returns:
         (results, total_searched): list of result rows and total segments in search scope
     """
     embedding_str = "[" + ",".join(str(v) for v in query_embedding) + "]"
     extra_params = extra_params or {}
 
-    if user_upn:
-        # ============================================================
-        # ★ MemPlace 隔離查詢：JOIN meeting_participants 強制邏存取
-        # ============================================================
-        if meeting_ids:
-            # user_upn + meeting_ids 雙重邏存取
-            placeholders = ",".join(f":mid_{i}" for i in range(len(meeting_ids)))
-            sql = text(f"""
-                SELECT
-                    ts.id, ts.meeting_id, ts.speaker, ts.start_time, ts.end_time,
-                    ts.content_polished, ts.content_raw, m.title as meeting_title,
-                    (ts.content_embedding <=> CAST(:query_embedding AS vector)) as distance
-                FROM transcript_segments ts
-                JOIN meetings m ON ts.meeting_id = m.id
-                JOIN meeting_participants mp
-                    ON m.id = mp.meeting_id AND mp.user_upn = :user_upn
-                WHERE ts.content_embedding IS NOT NULL
-                  AND ts.meeting_id IN ({placeholders}){extra_where}
-                ORDER BY ts.content_embedding <=> CAST(:query_embedding AS vector)
-                LIMIT :top_k
-            """)
-            params = {"query_embedding": embedding_str, "top_k": top_k, "user_upn": user_upn}
-            for i, mid in enumerate(meeting_ids):
-                params[f"mid_{i}"] = mid
-        else:
-            # 純 user_upn 隔離（最常見情境）
-            sql = text(f"""
-                SELECT
-                    ts.id, ts.meeting_id, ts.speaker, ts.start_time, ts.end_time,
-                    ts.content_polished, ts.content_raw, m.title as meeting_title,
-                    (ts.content_embedding <=> CAST(:query_embedding AS vector)) as distance
-                FROM transcript_segments ts
-                JOIN meetings m ON ts.meeting_id = m.id
-                JOIN meeting_participants mp
-                    ON m.id = mp.meeting_id AND mp.user_upn = :user_upn
-                WHERE ts.content_embedding IS NOT NULL{extra_where}
-                ORDER BY ts.content_embedding <=> CAST(:query_embedding AS vector)
-                LIMIT :top_k
-            """)
-            params = {"query_embedding": embedding_str, "top_k": top_k, "user_upn": user_upn}
-
-        params.update(extra_params)
-        results = db.execute(sql, params).fetchall()
-
-        # 搜索範圍：該用戶實際被搜索的 segments 數（不套用意圖縮域，代表全可存取範圍）
-        count_sql = text("""
-            SELECT COUNT(*) FROM transcript_segments ts
-            JOIN meeting_participants mp ON ts.meeting_id = mp.meeting_id
-            WHERE mp.user_upn = :user_upn AND ts.content_embedding IS NOT NULL
-        """)
-        total_searched = db.execute(count_sql, {"user_upn": user_upn}).scalar()
-
-    elif meeting_ids:
-        # 無 user_upn，只有 meeting_ids（公開 API 或管理員專用）
-        placeholders = ",".join(f":mid_{i}" for i in range(len(meeting_ids)))
-        sql = text(f"""
+    scope = access_set.resolve_scope(db, user_upn, meeting_ids)
+    results = []
+    if scope is None or scope:
+        scope_where, params = ("", {}) if scope is None else access_set.id_filter(db, "ts.meeting_id", scope)
+        sql_body, knn_params = segment_knn_sql(f"""
             SELECT
                 ts.id, ts.meeting_id, ts.speaker, ts.start_time, ts.end_time,
                 ts.content_polished, ts.content_raw, m.title as meeting_title,
                 (ts.content_embedding <=> CAST(:query_embedding AS vector)) as distance
             FROM transcript_segments ts
             JOIN meetings m ON ts.meeting_id = m.id
-            WHERE ts.content_embedding IS NOT NULL
-              AND ts.meeting_id IN ({placeholders}){extra_where}
-            ORDER BY ts.content_embedding <=> CAST(:query_embedding AS vector)
-            LIMIT :top_k
-        """)
-        params = {"query_embedding": embedding_str, "top_k": top_k}
-        for i, mid in enumerate(meeting_ids):
-            params[f"mid_{i}"] = mid
-        params.update(extra_params)
-        results = db.execute(sql, params).fetchall()
-        count_sql = text(
-            f"SELECT COUNT(*) FROM transcript_segments "
-            f"WHERE meeting_id IN ({placeholders}) AND content_embedding IS NOT NULL"
-        )
-        total_searched = db.execute(count_sql, {f"mid_{i}": mid for i, mid in enumerate(meeting_ids)}).scalar()
-
+            WHERE ts.content_embedding IS NOT NULL{scope_where}{extra_where}
+            """, top_k)
+        params.update({"query_embedding": embedding_str, **knn_params, **extra_params})
+        results = db.execute(text(sql_body), params).fetchall()
+
+    # 搜索範圍：user_upn 時為該用戶全可存取範圍（不套用 meeting_ids / 意圖縮域）
+    count_scope = access_set.resolve_scope(db, user_upn) if user_upn else scope
+    if count_scope is None:
+        total_searched = db.execute(
+            text("SELECT COUNT(*) FROM transcript_segments WHERE content_embedding IS NOT NULL")
+        ).scalar()
+    elif count_scope:
+        count_where, count_params = access_set.id_filter(db, "meeting_id", count_scope)
+        total_searched = db.execute(text(
+            f"SELECT COUNT(*) FROM transcript_segments WHERE content_embedding IS NOT NULL{count_where}"
+        ), count_params).scalar()
     else:
-        # 全域搜索（管理員或未實作 AD 整合時）
+        total_searched = 0
+
+    return results, total_searched
+
+
+def _find_lexical_segments(
+    db: Session,
+    query: str,
+    query_embedding: list,
+    user_upn: Optional[str] = None,
+    meeting_ids: Optional[List[str]] = None,
+    top_k: int = hybrid.RAG_LEXICAL_TOP_K,
+    extra_where: str = "",
+    extra_params: Optional[dict] = None,
+) -> list:
+    """
+    Phase B lexical leg: CJK bigram match over transcript segments (app.rag.hybrid).
+
+    同 _find_similar_segments 的存取控制（access set / meeting_ids / 意圖縮域），
+    回傳 row 形狀也相同。PostgreSQL 以 lexical_tsv 欄位（GIN）取候選、要求至少
+    k / n 個 query bigram 命中後才排序；同一個查詢內順便算出候選的精確 cosine
+    distance（只算 ≤ top_k 筆，不走 ANN），讓融合後的 similarity 仍可比。
+    SQLite（dev）沒有向量，distance 以 query bigram 覆蓋率近似。
+
+    Index 不存在、查詢沒有可用 bigram 時回傳 []（呼叫端退回純向量）。
+    """
+    terms = hybrid.query_terms(query)
+    if not terms or not hybrid.lexical_index_ready(db):
+        return []
+
+    scope = access_set.resolve_scope(db, user_upn, meeting_ids)
+    if scope is not None and not scope:
+        return []
+    scope_where, params = ("", {}) if scope is None else access_set.id_filter(db, "ts.meeting_id", scope)
+    params["top_k"] = top_k
+    params.update(extra_params or {})
+
+    if db.get_bind().dialect.name == "postgresql":
         sql = text(f"""
             SELECT
                 ts.id, ts.meeting_id, ts.speaker, ts.start_time, ts.end_time,
@@ -294,17 +310,126 @@ def _find_similar_segments(
                 (ts.content_embedding <=> CAST(:query_embedding AS vector)) as distance
             FROM transcript_segments ts
             JOIN meetings m ON ts.meeting_id = m.id
-            WHERE ts.content_embedding IS NOT NULL{extra_where}
-            ORDER BY ts.content_embedding <=> CAST(:query_embedding AS vector)
+            WHERE ts.{hybrid.LEXICAL_COLUMN} @@ to_tsquery('simple', :tsquery)
+              AND length(ts.{hybrid.LEXICAL_COLUMN})
+                  - length(ts_delete(ts.{hybrid.LEXICAL_COLUMN}, CAST(:terms AS text[]))) >= :min_match
+              AND ts.content_embedding IS NOT NULL{scope_where}{extra_where}
+            ORDER BY ts_rank_cd(ts.{hybrid.LEXICAL_COLUMN}, to_tsquery('simple', :tsquery)) DESC
             LIMIT :top_k
         """)
-        params = {"query_embedding": embedding_str, "top_k": top_k}
-        params.update(extra_params)
-        results = db.execute(sql, params).fetchall()
-        total_searched = db.execute(
-            text("SELECT COUNT(*) FROM transcript_segments WHERE content_embedding IS NOT NULL")
-        ).scalar()
+        params["query_embedding"] = "[" + ",".join(str(v) for v in query_embedding) + "]"
+        params["tsquery"] = hybrid.build_tsquery(terms)
+        # k of n：ts_delete 拿掉 query bigram 後少掉的 lexeme 數 = 命中的 distinct bigram 數
+        params["terms"] = list(terms)
+        params["min_match"] = hybrid.lexical_min_match(len(terms))
+        return db.execute(sql, params).fetchall()
+
+    # SQLite FTS5 dev fallback（segment_fts 於寫入 / index check 時同步）
+    sql = text(f"""
+        SELECT
+            ts.id, ts.meeting_id, ts.speaker, ts.start_time, ts.end_time,
+            ts.content_polished, ts.content_raw, m.title as meeting_title, f.tokens
+        FROM segment_fts f
+        JOIN transcript_segments ts ON ts.id = f.segment_id
+        JOIN meetings m ON ts.meeting_id = m.id
+        WHERE segment_fts MATCH :match{scope_where}{extra_where}
+        ORDER BY bm25(segment_fts)
+        LIMIT :top_k
+    """)
+    params["match"] = hybrid.build_fts5_query(terms)
+    rows = []
+    for r in db.execute(sql, params).fetchall():
+        covered = len(set(terms) & set(r.tokens.split()))
+        rows.append(SimpleNamespace(
+            id=r.id, meeting_id=r.meeting_id, speaker=r.speaker,
+            start_time=r.start_time, end_time=r.end_time,
+            content_polished=r.content_polished, content_raw=r.content_raw,
+            meeting_title=r.meeting_title,
+            distance=1.0 - covered / len(terms),
+        ))
+    return rows
+
+
+def _hybrid_vector_k(top_k: int, lexical_hits: int) -> int:
+    """
+    Lexical prefilter → vector top_k.
+
+    lexical 已回滿 top_k 筆（且各自帶精確 distance）時，向量路只需補「語意相近但
+    字面不同」的候選，ANN 取 top_k 的一半即可；lexical 不足時維持原 top_k。
+    """
+    if lexical_hits >= top_k:
+        return max(hybrid.RAG_HYBRID_MIN_VECTOR_K, top_k // 2)
+    return top_k
+
+
+def _search_segments(
+    db: Session,
+    query: str,
+    query_embedding: list,
+    user_upn: Optional[str] = None,
+    meeting_ids: Optional[List[str]] = None,
+    top_k: int = 10,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    extra_where: str = "",
+    extra_params: Optional[dict] = None,
+) -> tuple:
+    """
+    Segment retrieval stage: lexical leg → vector search → RRF (app.rag.hybrid).
+
+    同一個 session / 交易內執行：vector top_k 取決於 lexical 命中數，ANN 參數
+    （SET LOCAL）也只對此交易有效。向量失敗且 lexical 無結果時 raise HTTP 500。
+
+    Returns:
+        (results, total_searched) — 同 _find_similar_segments
+    """
+    # Phase B lexical leg — CJK bigram match on the original wording
+    # (專有名詞 / 代號 / 數字這類向量容易漏的詞)。失敗或無 index 時退回純向量。
+    lexical_results = []
+    if hybrid.RAG_HYBRID_ENABLED:
+        try:
+            lexical_results = _find_lexical_segments(
+                db, query, query_embedding,
+                user_upn=user_upn,
+                meeting_ids=meeting_ids,
+                extra_where=extra_where,
+                extra_params=extra_params,
+            )
+        except Exception as e:
+            logger.warning(f"[RAG/hybrid] Lexical search failed (non-fatal): {e}")
+            db.rollback()
+            lexical_results = []
 
+    # Find similar segments via pgvector (with MemPlace isolation + intent narrowing)
+    try:
+        # ANN knobs (SET LOCAL) for this transaction; defaults from env
+        apply_search_params(db, ef_search=ef_search, probes=probes)
+        results, total_searched = _find_similar_segments(
+            db, query_embedding,
+            user_upn=user_upn,
+            meeting_ids=meeting_ids,
+            top_k=_hybrid_vector_k(top_k, len(lexical_results)),
+            extra_where=extra_where,
+            extra_params=extra_params,
+        )
+    except Exception as e:
+        if not lexical_results:
+            logger.error(f"[RAG] Vector search failed: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Vector search failed. Ensure pgvector extension is enabled: {str(e)}"
+            )
+        logger.warning(f"[RAG/hybrid] Vector search failed, lexical-only: {e}")
+        db.rollback()
+        results, total_searched = [], 0
+
+    # RRF fusion of vector + lexical rankings → top_k
+    if lexical_results:
+        vector_count = len(results)
+        results = hybrid.fuse_rows(results, lexical_results, top_k)
+        logger.info(
+            f"[RAG/hybrid] fused vector={vector_count} lexical={len(lexical_results)} → {len(results)}"
+        )
     return results, total_searched
 
 
@@ -320,76 +445,38 @@ def _find_similar_summaries(
     """
     Search meetings.summary_embedding for high-level meeting-matching.
 
-    Returns list of rows with: meeting_id, title, summary_json, distance.
+    Returns list of rows with: meeting_id, title, summary_citation, summary_json, distance.
+    summary_json is only shipped for rows whose digest is not materialized yet
+    (app.summary_digest; read via citation_or_parse).
     Summary embeddings contain title + decisions + action_items → excellent for
     "which meeting discussed X?" type questions.
 
     Q5：extra_where / extra_params 由查詢意圖路由器產生，與 segment 搜尋一致縮域。
+    存取範圍同 _find_similar_segments（access set，`m.id = ANY(:allowed_ids)`）。
     """
     embedding_str = "[" + ",".join(str(v) for v in query_embedding) + "]"
     extra_params = extra_params or {}
 
-    if user_upn:
-        if meeting_ids:
-            placeholders = ",".join(f":mid_{i}" for i in range(len(meeting_ids)))
-            sql = text(f"""
-                SELECT
-                    m.id as meeting_id, m.title as meeting_title, m.summary_json,
-                    (m.summary_embedding <=> CAST(:query_embedding AS vector)) as distance
-                FROM meetings m
-                JOIN meeting_participants mp
-                    ON m.id = mp.meeting_id AND mp.user_upn = :user_upn
-                WHERE m.summary_embedding IS NOT NULL
-                  AND m.deleted_at IS NULL
-                  AND m.id IN ({placeholders}){extra_where}
-                ORDER BY m.summary_embedding <=> CAST(:query_embedding AS vector)
-                LIMIT :top_k
-            """)
-            params = {"query_embedding": embedding_str, "top_k": top_k, "user_upn": user_upn}
-            for i, mid in enumerate(meeting_ids):
-                params[f"mid_{i}"] = mid
-        else:
-            sql = text(f"""
-                SELECT
-                    m.id as meeting_id, m.title as meeting_title, m.summary_json,
-                    (m.summary_embedding <=> CAST(:query_embedding AS vector)) as distance
-                FROM meetings m
-                JOIN meeting_participants mp
-                    ON m.id = mp.meeting_id AND mp.user_upn = :user_upn
-                WHERE m.summary_embedding IS NOT NULL
-                  AND m.deleted_at IS NULL{extra_where}
-                ORDER BY m.summary_embedding <=> CAST(:query_embedding AS vector)
-                LIMIT :top_k
-            """)
-            params = {"query_embedding": embedding_str, "top_k": top_k, "user_upn": user_upn}
-    elif meeting_ids:
-        placeholders = ",".join(f":mid_{i}" for i in range(len(meeting_ids)))
-        sql = text(f"""
-            SELECT
-                m.id as meeting_id, m.title as meeting_title, m.summary_json,
-                (m.summary_embedding <=> CAST(:query_embedding AS vector)) as distance
-            FROM meetings m
-            WHERE m.summary_embedding IS NOT NULL
-              AND m.deleted_at IS NULL
-              AND m.id IN ({placeholders}){extra_where}
-            ORDER BY m.summary_embedding <=> CAST(:query_embedding AS vector)
-            LIMIT :top_k
-        """)
-        params = {"query_embedding": embedding_str, "top_k": top_k}
-        for i, mid in enumerate(meeting_ids):
-            params[f"mid_{i}"] = mid
-    else:
-        sql = text(f"""
-            SELECT
-                m.id as meeting_id, m.title as meeting_title, m.summary_json,
-                (m.summary_embedding <=> CAST(:query_embedding AS vector)) as distance
-            FROM meetings m
-            WHERE m.summary_embedding IS NOT NULL
-              AND m.deleted_at IS NULL{extra_where}
-            ORDER BY m.summary_embedding <=> CAST(:query_embedding AS vector)
-            LIMIT :top_k
-        """)
-        params = {"query_embedding": embedding_str, "top_k": top_k}
+    try:
+        scope = access_set.resolve_scope(db, user_upn, meeting_ids)
+    except Exception as e:
+        logger.warning(f"[RAG] Summary search failed (non-fatal): {e}")
+        return []
+    if scope is not None and not scope:
+        return []
+    scope_where, params = ("", {}) if scope is None else access_set.id_filter(db, "m.id", scope)
+    sql = text(f"""
+        SELECT
+            m.id as meeting_id, m.title as meeting_title, m.summary_citation,
+            CASE WHEN m.summary_citation IS NULL THEN m.summary_json END AS summary_json,
+            (m.summary_embedding <=> CAST(:query_embedding AS vector)) as distance
+        FROM meetings m
+        WHERE m.summary_embedding IS NOT NULL
+          AND m.deleted_at IS NULL{scope_where}{extra_where}
+        ORDER BY m.summary_embedding <=> CAST(:query_embedding AS vector)
+        LIMIT :top_k
+    """)
+    params.update({"query_embedding": embedding_str, "top_k": top_k})
 
     params.update(extra_params)
     try:
@@ -414,120 +501,62 @@ def _find_title_matched_meetings(
     Find meetings whose title is referenced in the user's query.
     
     Strategy:
-      1. Fetch all accessible meeting titles
-      2. Check if any title (or significant substring) appears in the query
-      3. Return matched meetings sorted by title match quality
+      1. Per-user cached title index (app.rag.title_index; only id + title)
+      2. Score candidate titles sharing bigrams / characters with the query
+      3. Fetch the summary citation digest only for the (≤3) matched meetings
     
     This handles the common case: "鴻才會議討論什麼" → matches meeting "鴻才討論"
     """
-    # Fetch accessible meetings with titles
-    if user_upn:
-        if meeting_ids:
-            placeholders = ",".join(f":mid_{i}" for i in range(len(meeting_ids)))
-            sql = text(f"""
-                SELECT m.id, m.title, m.summary_json
-                FROM meetings m
-                JOIN meeting_participants mp ON m.id = mp.meeting_id AND mp.user_upn = :user_upn
-                WHERE m.deleted_at IS NULL AND m.title IS NOT NULL AND m.title != ''
-                  AND m.id IN ({placeholders})
-            """)
-            params = {"user_upn": user_upn}
-            for i, mid in enumerate(meeting_ids):
-                params[f"mid_{i}"] = mid
-        else:
-            sql = text("""
-                SELECT m.id, m.title, m.summary_json
-                FROM meetings m
-                JOIN meeting_participants mp ON m.id = mp.meeting_id AND mp.user_upn = :user_upn
-                WHERE m.deleted_at IS NULL AND m.title IS NOT NULL AND m.title != ''
-            """)
-            params = {"user_upn": user_upn}
-    else:
-        sql = text("""
-            SELECT m.id, m.title, m.summary_json
+    def _load_titles():
+        # Accessible meetings (id + title only; summary JSON is fetched lazily below)
+        scope_where, params = "", {}
+        if user_upn:
+            allowed = access_set.allowed_meeting_ids(db, user_upn)
+            if not allowed:
+                return []
+            scope_where, params = access_set.id_filter(db, "m.id", allowed)
+        sql = text(f"""
+            SELECT m.id, m.title
             FROM meetings m
-            WHERE m.deleted_at IS NULL AND m.title IS NOT NULL AND m.title != ''
+            WHERE m.deleted_at IS NULL AND m.title IS NOT NULL AND m.title != ''{scope_where}
         """)
-        params = {}
+        return [(r.id, r.title) for r in db.execute(sql, params).fetchall()]
 
     try:
-        rows = db.execute(sql, params).fetchall()
+        index = title_index.get_title_index(user_upn, _load_titles)
+        hits = index.match(query, allowed_ids=meeting_ids)
     except Exception as e:
         logger.warning(f"[RAG] Title match query failed: {e}")
         return []
+    if not hits:
+        return []
 
-    # Normalize query for matching (remove common filler words)
-    query_normalized = query.strip()
-    # Remove common question patterns to extract the core topic
-    filler_patterns = [
-        r'會議[在中裡]?[討論談到提到講了說了]+(什麼|哪些|了什麼)',
-        r'[討論談到提到講了說了]+(什麼|哪些|了什麼)',
-        r'(的|之)?主要?(內容|議題|討論|重點|結論|決議)(是什麼|有哪些)?',
-        r'在(討論|談|講|說)(什麼|哪些)',
+    summaries = {}
+    try:
+        placeholders = ",".join(f":mid_{i}" for i in range(len(hits)))
+        rows = db.execute(
+            text(
+                "SELECT id, summary_citation, "
+                "CASE WHEN summary_citation IS NULL THEN summary_json END AS summary_json "
+                f"FROM meetings WHERE id IN ({placeholders})"
+            ),
+            {f"mid_{i}": mid for i, (mid, _, _) in enumerate(hits)},
+        ).fetchall()
+        summaries = {r.id: citation_or_parse(r.summary_citation, r.summary_json) for r in rows}
+    except Exception as e:
+        logger.warning(f"[RAG] Title match summary fetch failed (non-fatal): {e}")
+
+    matched = [
+        {
+            "meeting_id": mid,
+            "title": title,
+            "summary_citation": summaries.get(mid),
+            "match_score": score,
+        }
+        for mid, title, score in hits
     ]
-    query_core = query_normalized
-    for pat in filler_patterns:
-        query_core = re.sub(pat, '', query_core)
-    query_core = query_core.strip()
-    if not query_core:
-        query_core = query_normalized
-
-    matched = []
-    for row in rows:
-        title = row.title.strip()
-        if not title:
-            continue
-        
-        # Strategy 1: Title appears in query (or query_core)
-        # Strategy 2: Query core appears in title
-        # Strategy 3: Significant overlap (shared characters ratio)
-        
-        score = 0.0
-        
-        # Exact title in query
-        if title in query_normalized or title in query_core:
-            score = 1.0
-        # Query core in title
-        elif query_core and query_core in title:
-            score = 0.9
-        # Title in query core (partial)
-        elif title in query_core:
-            score = 0.85
-        else:
-            # Character-level fuzzy: compute overlap ratio
-            # Split title into meaningful tokens (>= 2 chars)
-            title_tokens = [t for t in re.split(r'[\s\-_—–·()（）\[\]【】,，.。]+', title) if len(t) >= 2]
-            matched_tokens = [t for t in title_tokens if t in query_normalized or t in query_core]
-            if title_tokens and matched_tokens:
-                score = len(matched_tokens) / len(title_tokens)
-                # Boost if the matched portion is significant
-                if len(matched_tokens) >= 1 and any(len(t) >= 2 for t in matched_tokens):
-                    score = max(score, 0.5)
-            
-            # Levenshtein-style fuzzy: if title and query_core are similar length
-            # and differ by only 1-2 characters, boost score
-            if score < 0.4 and query_core and len(query_core) >= 2:
-                # Simple edit distance approximation for short Chinese strings
-                shorter = min(title, query_core, key=len)
-                longer = max(title, query_core, key=len)
-                if len(shorter) >= 2 and len(longer) <= len(shorter) + 3:
-                    common_chars = sum(1 for c in shorter if c in longer)
-                    ratio = common_chars / max(len(longer), 1)
-                    if ratio >= 0.6:
-                        score = max(score, ratio * 0.8)
-        
-        if score >= 0.4:  # Lowered from 0.5 to catch more fuzzy matches
-            matched.append({
-                "meeting_id": row.id,
-                "title": title,
-                "summary_json": row.summary_json,
-                "match_score": score,
-            })
-
-    # Sort by match quality
-    matched.sort(key=lambda x: x["match_score"], reverse=True)
-    logger.info(f"[RAG/A3] Title match for '{query}' (core='{query_core}'): {[(m['title'], m['match_score']) for m in matched[:5]]}")
-    return matched[:3]  # max 3 title-matched meetings
+    logger.info(f"[RAG/A3] Title match for '{query}': {[(m['title'], m['match_score']) for m in matched]}")
+    return matched  # max 3 title-matched meetings
 
 
 def _fetch_meeting_top_segments(
@@ -570,6 +599,16 @@ def _fetch_meeting_top_segments(
         return []
 
 
+def _fetch_title_matched_segments(
+    db: Session,
+    meeting_ids: List[str],
+    query_embedding: list,
+    top_k: int = 8,
+) -> List[list]:
+    """Top-K segments for each title-matched meeting, in order, on one connection."""
+    return [_fetch_meeting_top_segments(db, mid, query_embedding, top_k=top_k) for mid in meeting_ids]
+
+
 def _build_rag_prompt(question: str, citations: List[Citation], history: Optional[List[ChatMessage]] = None) -> str:
     """
     Build a Gemini prompt with retrieved context, conversation history, and clear citation instructions.
@@ -658,34 +697,95 @@ def _contextualize_query(client, question: str, history: List[ChatMessage]) -> s
         logger.info(f"[Query Contextualizer] Original: {question} -> Rewritten: {rewritten}")
         return rewritten
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.warning(f"[Query Contextualizer] Failed to rewrite query: {e}. Falling back to original.")
         return question
 
 
-# ============================================
-# API Endpoints
-# ============================================
+async def _resolved(value):
+    """Awaitable placeholder for a skipped stage in asyncio.gather."""
+    return value
 
-@router.post("/ask", response_model=RAGResponse)
-async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)):
+
+NO_RESULT_ANSWER = "根據現有會議記錄，未找到與您問題相關的段落。可能尚未有會議記錄被索引。"
+
+
+async def _contextualized_question(request: RAGRequest, plan: RetrievalPlan, client) -> str:
+    """Step 1: Query Contextualization — 有對話歷史時把追問改寫成獨立問題。"""
+    if request.history:
+        return await plan.call(
+            "contextualize", _contextualize_query, client, request.question, request.history
+        )
+    return request.question
+
+
+async def _answer_cache_lookup(request: RAGRequest, plan: RetrievalPlan, search_query: str) -> tuple:
+    """(cache key, 快取的答案 payload)。快取停用或範圍查詢失敗 → (None, None)；
+    bypass_cache 只略過讀取，key 照樣回傳讓新答案寫回。"""
+    if not answer_cache.RAG_ANSWER_CACHE_ENABLED:
+        return None, None
+    try:
+        scope = await plan.query("answer_cache", answer_cache.load_scope,
+                                 request.user_upn, request.meeting_ids)
+    except Exception as e:
+        logger.warning(f"[RAG] answer cache scope lookup failed (non-fatal): {e}")
+        return None, None
+    key = answer_cache.answer_key(
+        search_query, scope, GEMINI_MODEL, request.meeting_ids,
+        top_k=request.top_k, ef_search=request.ef_search, probes=request.probes,
+    )
+    if request.bypass_cache:
+        return key, None
+    return key, answer_cache.get_answer(key)
+
+
+def _answer_cache_payload(answer: str, confidence: str, used_citation_indices: List[int],
+                          ctx: SimpleNamespace) -> dict:
+    return {
+        "answer": answer,
+        "citations": [c.model_dump() for c in ctx.citations],
+        "segments_searched": ctx.total_searched,
+        "confidence": confidence,
+        "used_citation_indices": list(used_citation_indices or []),
+    }
+
+
+async def _retrieve_answer_context(request: RAGRequest, db: Session, plan: RetrievalPlan, client,
+                                   search_query: Optional[str] = None) -> SimpleNamespace:
     """
-    Ask a question across all (or selected) meeting transcripts.
-    
-    Pipeline:
-    1. Embed the question → 768-dim vector
-    2. pgvector cosine similarity search → Top-K segments
-    3. Build context prompt → Gemini generates cited answer
+    /ask 與 /ask/stream 共用的檢索段：問題 → citations + grounded prompt。
+
+    獨立的 stage 經 app.rag.RetrievalPlan 並行（各自借 pool 連線）：
+      contextualize → { intent ∥ 預先 embed 問題 ∥ 標題比對 }
+                    → { lexical→vector segment 搜尋 ∥ summary 搜尋 ∥ 每個標題命中的 top segments }
+                    → { context expansion ∥ speaker mappings } → prompt
+
+    Returns namespace(citations, title_match_citations, total_searched, prompt)；
+    找不到任何相關內容時 prompt=None。
     """
-    import time
-    _t0 = time.time()  # Y5 (2026-05-25)：計時用於 history 紀錄
-    client = get_gemini_client()
-    if not client:
-        raise HTTPException(status_code=503, detail="Gemini client unavailable")
+    # Step 1: Query Contextualization (If history exists; callers that already
+    # contextualized for the answer-cache key pass search_query in)
+    if search_query is None:
+        search_query = await _contextualized_question(request, plan, client)
+
+    # Step 1.1: 只依賴問題文字的 stage 先開跑，與 intent 重疊：
+    #   - 標題比對（DB）
+    #   - 以原問題預先 embed（意圖器萃取的 topic 與原問題相同時直接沿用，
+    #     不同時這次呼叫也只是多暖一筆 query_cache）
+    async def _title_matches() -> list:
+        try:
+            return await plan.query(
+                "title_match", _find_title_matched_meetings, search_query,
+                user_upn=request.user_upn, meeting_ids=request.meeting_ids,
+            )
+        except Exception as e:
+            logger.warning(f"[RAG/A3] Title match failed (non-fatal): {e}")
+            return []
 
-    # Step 1: Query Contextualization (If history exists)
-    search_query = request.question
-    if request.history:
-        search_query = _contextualize_query(client, request.question, request.history)
+    title_task = asyncio.create_task(_title_matches())
+    speculative_embed = asyncio.create_task(
+        plan.call("embed_question", query_cache.cached_query_embedding, client, search_query)
+    )
 
     # Step 1.2 (Q5, 2026-07-03): Query Intent Routing
     # 語意搜尋前，先用 LLM 把問題解析成結構化意圖（scope/topic/日期/機密），
@@ -695,7 +795,7 @@ async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)
     intent_where, intent_params = "", {}
     if RAG_INTENT_ROUTER_ENABLED:
         try:
-            intent = classify_query_intent(search_query, client)
+            intent = await plan.call("intent", query_cache.cached_query_intent, search_query, client)
             intent_where, intent_params = build_meeting_sql_filters(intent)
         except Exception as e:
             logger.warning(f"[RAG] intent routing failed (non-fatal): {e}")
@@ -705,75 +805,64 @@ async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)
     embed_query = intent.topic or search_query
 
     # Step 1.5: Embed the (intent-cleaned) query
-    query_embedding = embed_single_text(client, embed_query)
+    # intent / embedding 皆經 app.rag.query_cache（重問相同問題時省掉 Gemini round-trip）
+    if query_cache.normalize_query(embed_query) == query_cache.normalize_query(search_query):
+        query_embedding = await speculative_embed
+    else:
+        query_embedding = await plan.call("embed", query_cache.cached_query_embedding, client, embed_query)
     if query_embedding is None:
         raise HTTPException(status_code=500, detail="Failed to generate query embedding")
-    
-    # Step 2: Find similar segments via pgvector (with MemPlace isolation + intent narrowing)
+
+    # Step 2: Retrieval fan-out. Lexical prefilter → vector search stays chained in one
+    # stage (vector top_k depends on the lexical hit count; SET LOCAL ANN knobs live in
+    # that stage's transaction). Summary search and per-title fetches run alongside.
+    segment_task = asyncio.create_task(plan.query(
+        "segment_search", _search_segments, search_query, query_embedding,
+        user_upn=request.user_upn,
+        meeting_ids=request.meeting_ids,
+        top_k=request.top_k,
+        ef_search=request.ef_search,
+        probes=request.probes,
+        extra_where=intent_where,
+        extra_params=intent_params,
+    ))
+    summary_task = asyncio.create_task(plan.query(
+        "summary_search", _find_similar_summaries, query_embedding,
+        user_upn=request.user_upn,
+        meeting_ids=request.meeting_ids,
+        top_k=3,
+        extra_where=intent_where,
+        extra_params=intent_params,
+    ))
+    title_matches = await title_task
+    # 所有標題命中（≤3 場）在同一個 stage / 同一條連線上依序抓，不各自向 pool 借連線
     try:
-        results, total_searched = _find_similar_segments(
-            db, query_embedding,
-            user_upn=request.user_upn,
-            meeting_ids=request.meeting_ids,
-            top_k=request.top_k,
-            extra_where=intent_where,
-            extra_params=intent_params,
-        )
+        title_segment_outs = await (plan.query(
+            "title_segments", _fetch_title_matched_segments,
+            [tm["meeting_id"] for tm in title_matches], query_embedding, top_k=8,
+        ) if title_matches else _resolved([]))
     except Exception as e:
-        logger.error(f"[RAG] Vector search failed: {e}")
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Vector search failed. Ensure pgvector extension is enabled: {str(e)}"
-        )
+        logger.warning(f"[RAG/A3] Title segment fetch failed (non-fatal): {e}")
+        title_segment_outs = [[] for _ in title_matches]
+
+    try:
+        results, total_searched = await segment_task
+    except HTTPException:
+        summary_task.cancel()
+        raise
 
     # Step 2.1: Also search meeting summaries (A1 optimization)
     # Summary embeddings contain title + decisions + action_items → great for
     # "which meeting discussed X?" or "what were the decisions in meeting Y?"
     summary_citations: List[Citation] = []
     try:
-        summary_results = _find_similar_summaries(
-            db, query_embedding,
-            user_upn=request.user_upn,
-            meeting_ids=request.meeting_ids,
-            top_k=3,
-            extra_where=intent_where,
-            extra_params=intent_params,
-        )
+        summary_results = await summary_task
         for sr in summary_results:
             sim = 1.0 - float(sr.distance)
             if sim < 0.3:
                 continue  # skip low-relevance summaries
-            # Extract meaningful content from summary_json
-            summary_content = ""
-            try:
-                sdata = json.loads(sr.summary_json) if sr.summary_json else {}
-                parts = []
-                if sdata.get("summary"):
-                    parts.append(sdata["summary"])
-                if sdata.get("decisions"):
-                    decisions = sdata["decisions"]
-                    dec_texts = []
-                    for d in decisions:
-                        if isinstance(d, str):
-                            dec_texts.append(d)
-                        elif isinstance(d, dict):
-                            dec_texts.append(d.get("decision", ""))
-                    if dec_texts:
-                        parts.append("決議事項：" + "；".join(filter(None, dec_texts)))
-                if sdata.get("action_items"):
-                    items = sdata["action_items"]
-                    item_texts = []
-                    for item in items[:5]:
-                        if isinstance(item, str):
-                            item_texts.append(item)
-                        elif isinstance(item, dict):
-                            item_texts.append(item.get("task", ""))
-                    if item_texts:
-                        parts.append("行動項目：" + "；".join(filter(None, item_texts)))
-                summary_content = "\n".join(filter(None, parts))
-            except Exception:
-                summary_content = sr.summary_json[:500] if sr.summary_json else ""
-
+            # Precomputed digest (app.summary_digest); parse summary_json only if not materialized yet
+            summary_content = citation_or_parse(sr.summary_citation, sr.summary_json)
             if summary_content:
                 summary_citations.append(Citation(
                     meeting_id=sr.meeting_id,
@@ -793,65 +882,24 @@ async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)
     title_match_citations: List[Citation] = []
     title_match_segments = []
     try:
-        best_segment_sim = max((1.0 - float(r.distance) for r in results), default=0.0) if results else 0.0
-        best_summary_sim = max((c.similarity for c in summary_citations), default=0.0) if summary_citations else 0.0
-        
-        # Always attempt title match; if vector quality is already high,
-        # title-matched content still enriches context
-        title_matches = _find_title_matched_meetings(
-            db, search_query,
-            user_upn=request.user_upn,
-            meeting_ids=request.meeting_ids,
-        )
-        
-        for tm in title_matches:
-            # Fetch this meeting's best segments (by similarity to query)
-            tm_segments = _fetch_meeting_top_segments(
-                db, tm["meeting_id"], query_embedding, top_k=8
-            )
+        # Always attempt title match (started in Step 1.1); if vector quality is
+        # already high, title-matched content still enriches context
+        for tm, tm_segments in zip(title_matches, title_segment_outs):
+            # This meeting's best segments (by similarity to query), fetched in Step 2
             if tm_segments:
                 title_match_segments.extend(tm_segments)
             
             # Also add summary as a citation if available
-            if tm.get("summary_json"):
-                try:
-                    sdata = json.loads(tm["summary_json"])
-                    parts = []
-                    if sdata.get("summary"):
-                        parts.append(sdata["summary"])
-                    if sdata.get("decisions"):
-                        decisions = sdata["decisions"]
-                        dec_texts = []
-                        for d in decisions:
-                            if isinstance(d, str):
-                                dec_texts.append(d)
-                            elif isinstance(d, dict):
-                                dec_texts.append(d.get("decision", ""))
-                        if dec_texts:
-                            parts.append("決議事項：" + "；".join(filter(None, dec_texts)))
-                    if sdata.get("action_items"):
-                        items = sdata["action_items"][:5]
-                        item_texts = []
-                        for item in items:
-                            if isinstance(item, str):
-                                item_texts.append(item)
-                            elif isinstance(item, dict):
-                                item_texts.append(item.get("task", ""))
-                        if item_texts:
-                            parts.append("行動項目：" + "；".join(filter(None, item_texts)))
-                    summary_content = "\n".join(filter(None, parts))
-                    if summary_content:
-                        title_match_citations.append(Citation(
-                            meeting_id=tm["meeting_id"],
-                            meeting_title=tm["title"],
-                            speaker=None,
-                            start_time=None,
-                            end_time=None,
-                            content=f"[會議摘要 - 標題匹配] {summary_content}",
-                            similarity=round(tm["match_score"], 4),
-                        ))
-                except Exception:
-                    pass
+            if tm.get("summary_citation"):
+                title_match_citations.append(Citation(
+                    meeting_id=tm["meeting_id"],
+                    meeting_title=tm["title"],
+                    speaker=None,
+                    start_time=None,
+                    end_time=None,
+                    content=f"[會議摘要 - 標題匹配] {tm['summary_citation']}",
+                    similarity=round(tm["match_score"], 4),
+                ))
         
         if title_match_segments:
             logger.info(f"[RAG/A3] Title match injected {len(title_match_segments)} segments from {len(title_matches)} meetings")
@@ -862,25 +910,31 @@ async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)
         logger.warning(f"[RAG/A3] Title match failed (non-fatal): {e}")
 
     if not results and not summary_citations and not title_match_citations:
-        return RAGResponse(
-            answer="根據現有會議記錄，未找到與您問題相關的段落。可能尚未有會議記錄被索引。",
-            citations=[],
-            segments_searched=total_searched,
-            question=request.question,
-            confidence="no_answer",
-        )
+        return SimpleNamespace(citations=[], title_match_citations=[],
+                               total_searched=total_searched, prompt=None)
 
     # Step 2.5: Sentence-window expansion (劇本 2 - app.rag.chunker)
     # window=5: 短會議口語 segment 平均 5-8 字，需更大視窗才能涵蓋因果上下文
+    # Q3 (2026-07-03)：同時批次抓所有涉及會議的 speaker_mappings，讓 citation 顯示真名
+    # （expanded rows 與 results 的會議集合相同，兩者可並行）
+    expand_out, speaker_map_by_meeting = await asyncio.gather(
+        plan.query("expand", expand_with_context, results, window=5) if results else _resolved([]),
+        plan.query("speaker_mappings", _fetch_speaker_mappings,
+                   {getattr(r, 'meeting_id', '') for r in results or []}),
+        return_exceptions=True,
+    )
     expanded_rows = []
     if results:
-        try:
-            expanded_rows = expand_with_context(db, results, window=5)
-        except Exception as e:
+        if isinstance(expand_out, Exception):
             logger.warning(
-                f"[RAG] expand_with_context failed: {e}; falling back to raw rows"
+                f"[RAG] expand_with_context failed: {expand_out}; falling back to raw rows"
             )
             expanded_rows = results  # graceful fallback
+        else:
+            expanded_rows = expand_out
+    if isinstance(speaker_map_by_meeting, Exception):
+        logger.warning(f"[RAG/Q3] fetch speaker_mappings failed (non-fatal): {speaker_map_by_meeting}")
+        speaker_map_by_meeting = {}
 
     # Build citations from EXPANDED rows for frontend display
     # (expanded content provides 150-250 char paragraphs for better user context)
@@ -894,10 +948,6 @@ async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)
     citation_source = expanded_rows if expanded_rows else results
     sorted_results = sorted(citation_source, key=lambda r: (getattr(r, 'meeting_id', ''), getattr(r, 'start_time', 0) or 0)) if citation_source else []
 
-    # Q3 (2026-07-03)：批次抓所有涉及會議的 speaker_mappings，讓 citation 顯示真名
-    speaker_map_by_meeting = _fetch_speaker_mappings(
-        db, {getattr(r, 'meeting_id', '') for r in sorted_results}
-    )
     # 標題匹配到的會議：使用者明確指名，其 segments 不受相似度門檻剔除
     title_matched_ids = {c.meeting_id for c in title_match_citations}
 
@@ -978,55 +1028,139 @@ async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)
     # 排序：標題匹配 > 摘要 > 段落群組（皆已依相關性排好）。
     citations = title_match_citations + summary_citations + citations
 
-    # Step 3: Generate answer with Gemini using app.rag.prompt.build_grounded_prompt
+    # Step 3: Grounded prompt (app.rag.prompt.build_grounded_prompt)
     # 取代既有 _build_rag_prompt（軟規則） → grounded 5 條硬規則 + 4 級 confidence
     # ⭐ 用與前端「完全相同」的 citations list 組 prompt（BUG#1 對齊關鍵）
     rag_prompt = build_grounded_prompt(request.question, citations, request.history)
+    return SimpleNamespace(citations=citations, title_match_citations=title_match_citations,
+                           total_searched=total_searched, prompt=rag_prompt)
+
+
+def _parse_grounded_answer(raw: Optional[str]) -> tuple:
+    """LLM JSON → (answer, confidence, used_citation_indices)；解析失敗時原文當答案、no_answer。"""
+    try:
+        data = json.loads(raw)
+        answer = data.get("answer", "無法生成回答")
+        # confidence 必須是 4 級之一，否則 fallback no_answer
+        raw_conf = str(data.get("confidence", "no_answer")).lower()
+        confidence = raw_conf if raw_conf in CONFIDENCE_LEVELS else "no_answer"
+        # Extract used citation indices from LLM response
+        return answer, confidence, data.get("used_citations", [])
+    except Exception as parse_err:
+        logger.warning(f"[RAG] LLM JSON parse fail: {parse_err}; raw={(raw or '')[:200]!r}")
+        return raw or "無法生成回答。", "no_answer", []
+
+
+def _title_match_fallback(question: str, answer: str, confidence: str,
+                          title_match_citations: List[Citation]) -> tuple:
+    """
+    Fix F (2026-07-03)：誠實化 no_answer fallback。
+    過去這裡會在 LLM 誠實拒答時「用標題匹配摘要編一個答案」，違反 grounding 誠實原則。
+    現在改為：明確告知「找到你提到的會議，但逐字稿無法直接回答問題」，
+    並清楚標示以下為『會議摘要（供參考）』而非問題的直接解答；純文字、不使用 markdown。
+    """
+    if confidence == "no_answer" and title_match_citations:
+        confidence = "low"
+        if "無法" in answer or "找不到" in answer or "沒有找到" in answer:
+            answer = (
+                f"我找到你提到的會議，但目前的逐字稿內容無法直接回答「{question}」。\n"
+                "以下是該會議的摘要，供你參考：\n\n"
+            )
+            for c in title_match_citations:
+                summary_text = c.content.replace('[會議摘要 - 標題匹配] ', '')
+                answer += f"◆ {c.meeting_title}\n{summary_text}\n\n"
+    return answer, confidence
+
+
+_GENERATION_CONFIG = {
+    "temperature": 0.2,
+    "max_output_tokens": 4096,
+    "response_mime_type": "application/json",
+}
+
+
+# ============================================
+# API Endpoints
+# ============================================
 
+@router.post("/ask", response_model=RAGResponse)
+async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)):
+    """
+    Ask a question across all (or selected) meeting transcripts.
+    
+    Pipeline:
+    1. Embed the question → 768-dim vector
+    2. pgvector cosine similarity search → Top-K segments
+    3. Build context prompt → Gemini generates cited answer
+
+    檢索段見 _retrieve_answer_context；串流版本見 /ask/stream。
+    request.debug=true 時回傳各 stage 耗時（ms）。
+    同範圍、同語料版本的重複問題直接回 app.rag.answer_cache 的答案（cached=true）。
+    """
+    import time
+    _t0 = time.time()  # Y5 (2026-05-25)：計時用於 history 紀錄
+    plan = RetrievalPlan(db)
+    client = get_gemini_client()
+    if not client:
+        raise HTTPException(status_code=503, detail="Gemini client unavailable")
+
+    search_query = await _contextualized_question(request, plan, client)
+    cache_key, cached = await _answer_cache_lookup(request, plan, search_query)
+    if cached is not None:
+        response = RAGResponse(
+            **cached,
+            question=request.question,
+            cached=True,
+            timings=plan.breakdown() if request.debug else None,
+        )
+        _log_rag_query(
+            db,
+            user_upn=request.user_upn,
+            query=request.question,
+            answer=response.answer,
+            citations=response.citations,
+            citation_count=len(response.citations),
+            confidence=response.confidence,
+            response_time_ms=int((time.time() - _t0) * 1000),
+        )
+        return response
+
+    ctx = await _retrieve_answer_context(request, db, plan, client, search_query=search_query)
+    if ctx.prompt is None:
+        return RAGResponse(
+            answer=NO_RESULT_ANSWER,
+            citations=[],
+            segments_searched=ctx.total_searched,
+            question=request.question,
+            confidence="no_answer",
+            timings=plan.breakdown() if request.debug else None,
+        )
+
+    # Step 3: Generate answer with Gemini
     answer = "無法生成回答。"
     confidence = "no_answer"
     used_citation_indices: List[int] = []
+    generated = False
     try:
-        response = client.models.generate_content(
+        response = await plan.call(
+            "generate", client.models.generate_content,
             model=GEMINI_MODEL,
-            contents=rag_prompt,
-            config={
-                "temperature": 0.2,
-                "max_output_tokens": 4096,
-                "response_mime_type": "application/json",
-            },
+            contents=ctx.prompt,
+            config=_GENERATION_CONFIG,
         )
-        try:
-            data = json.loads(response.text)
-            answer = data.get("answer", "無法生成回答")
-            # confidence 必須是 4 級之一，否則 fallback no_answer
-            raw_conf = str(data.get("confidence", "no_answer")).lower()
-            confidence = raw_conf if raw_conf in CONFIDENCE_LEVELS else "no_answer"
-            # Extract used citation indices from LLM response
-            used_citation_indices = data.get("used_citations", [])
-        except Exception as parse_err:
-            logger.warning(f"[RAG] LLM JSON parse fail: {parse_err}; raw={response.text[:200]!r}")
-            answer = response.text or "無法生成回答。"
-            confidence = "no_answer"
+        answer, confidence, used_citation_indices = _parse_grounded_answer(response.text)
+        generated = True
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[RAG] Gemini generation failed: {e}")
         answer = f"（回答生成失敗，但以下是最相關的會議段落供參考）\n\n錯誤: {str(e)}"
         confidence = "no_answer"
 
-    # Fix F (2026-07-03)：誠實化 no_answer fallback。
-    # 過去這裡會在 LLM 誠實拒答時「用標題匹配摘要編一個答案」，違反 grounding 誠實原則。
-    # 現在改為：明確告知「找到你提到的會議，但逐字稿無法直接回答問題」，
-    # 並清楚標示以下為『會議摘要（供參考）』而非問題的直接解答；純文字、不使用 markdown。
-    if confidence == "no_answer" and title_match_citations:
-        confidence = "low"
-        if "無法" in answer or "找不到" in answer or "沒有找到" in answer:
-            answer = (
-                f"我找到你提到的會議，但目前的逐字稿內容無法直接回答「{request.question}」。\n"
-                "以下是該會議的摘要，供你參考：\n\n"
-            )
-            for c in title_match_citations:
-                summary_text = c.content.replace('[會議摘要 - 標題匹配] ', '')
-                answer += f"◆ {c.meeting_title}\n{summary_text}\n\n"
+    answer, confidence = _title_match_fallback(
+        request.question, answer, confidence, ctx.title_match_citations
+    )
+    if cache_key and generated:
+        answer_cache.put_answer(cache_key, _answer_cache_payload(answer, confidence, used_citation_indices, ctx))
 
     # Y5 (2026-05-25)：log to rag_query_logs（寫失敗不影響主回應，只 warn）
     # R-A1 (2026-07-01)：一併存 citations JSON，讓歷史對話可還原引用來源
@@ -1035,19 +1169,156 @@ async def ask_across_meetings(request: RAGRequest, db: Session = Depends(get_db)
         user_upn=request.user_upn,
         query=request.question,
         answer=answer,
-        citations=citations,
-        citation_count=len(citations),
+        citations=ctx.citations,
+        citation_count=len(ctx.citations),
         confidence=confidence,
         response_time_ms=int((time.time() - _t0) * 1000),
     )
 
     return RAGResponse(
         answer=answer,
-        citations=citations,
-        segments_searched=total_searched,
+        citations=ctx.citations,
+        segments_searched=ctx.total_searched,
         question=request.question,
         confidence=confidence,
         used_citation_indices=used_citation_indices,
+        timings=plan.breakdown() if request.debug else None,
+    )
+
+
+@router.post("/ask/stream")
+async def ask_across_meetings_stream(request: RAGRequest, db: Session = Depends(get_db)):
+    """
+    SSE variant of /ask：檢索完成後先送 citations，再邊生成邊送答案文字。
+
+    Events（data 皆為 JSON）：
+      citations : {"citations": [...], "segments_searched": N}
+      token     : {"text": "..."}  答案增量（已從 LLM JSON 的 "answer" 欄位解碼）
+      done      : 與 /ask 相同的 RAGResponse；answer / confidence / used_citation_indices
+                  以此為準（JSON 解析失敗或 Fix F fallback 時 answer 會與串流內容不同）
+    檢索錯誤（503 / 500）在串流開始前以一般 HTTP 錯誤回傳；生成錯誤則在 done 內說明。
+    結束時與 /ask 一樣寫 rag_query_logs；debug=true 時 timings 含 first_token（TTFT）。
+    answer_cache 命中時一次送出整段答案（單一 token 事件），done.cached=true。
+    """
+    import time
+    _t0 = time.time()
+    plan = RetrievalPlan(db)
+    client = get_gemini_client()
+    if not client:
+        raise HTTPException(status_code=503, detail="Gemini client unavailable")
+
+    search_query = await _contextualized_question(request, plan, client)
+    cache_key, cached = await _answer_cache_lookup(request, plan, search_query)
+    if cached is not None:
+        async def _cached_events():
+            response = RAGResponse(
+                **cached,
+                question=request.question,
+                cached=True,
+                timings=plan.breakdown() if request.debug else None,
+            )
+            yield sse_event("citations", {
+                "citations": cached["citations"],
+                "segments_searched": cached["segments_searched"],
+            })
+            yield sse_event("token", {"text": response.answer})
+            _log_rag_query(
+                db,
+                user_upn=request.user_upn,
+                query=request.question,
+                answer=response.answer,
+                citations=response.citations,
+                citation_count=len(response.citations),
+                confidence=response.confidence,
+                response_time_ms=int((time.time() - _t0) * 1000),
+            )
+            yield sse_event("done", response.model_dump())
+
+        return StreamingResponse(
+            _cached_events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    ctx = await _retrieve_answer_context(request, db, plan, client, search_query=search_query)
+
+    async def _events():
+        yield sse_event("citations", {
+            "citations": [c.model_dump() for c in ctx.citations],
+            "segments_searched": ctx.total_searched,
+        })
+        if ctx.prompt is None:
+            yield sse_event("done", RAGResponse(
+                answer=NO_RESULT_ANSWER,
+                citations=[],
+                segments_searched=ctx.total_searched,
+                question=request.question,
+                confidence="no_answer",
+                timings=plan.breakdown() if request.debug else None,
+            ).model_dump())
+            return
+
+        decoder = AnswerStreamDecoder()
+        answer, confidence, used_citation_indices = "無法生成回答。", "no_answer", []
+        generated = False
+        started = time.perf_counter()
+        try:
+            stream = await plan.call(
+                "generate_open", client.models.generate_content_stream,
+                model=GEMINI_MODEL,
+                contents=ctx.prompt,
+                config=_GENERATION_CONFIG,
+            )
+            while True:
+                chunk = await asyncio.to_thread(next, stream, None)
+                if chunk is None:
+                    break
+                delta = decoder.feed(getattr(chunk, "text", None) or "")
+                if delta:
+                    if "first_token" not in plan.timings:
+                        plan.mark("first_token")
+                    yield sse_event("token", {"text": delta})
+            answer, confidence, used_citation_indices = _parse_grounded_answer(decoder.raw)
+            generated = True
+        except Exception as e:
+            reset_gemini_client_on_transport_error(e)
+            logger.error(f"[RAG] Gemini streaming generation failed: {e}")
+            answer = f"（回答生成失敗，但以下是最相關的會議段落供參考）\n\n錯誤: {str(e)}"
+            confidence = "no_answer"
+        plan.record("generate", started)
+
+        answer, confidence = _title_match_fallback(
+            request.question, answer, confidence, ctx.title_match_citations
+        )
+        if cache_key and generated:
+            answer_cache.put_answer(
+                cache_key, _answer_cache_payload(answer, confidence, used_citation_indices, ctx)
+            )
+        _log_rag_query(
+            db,
+            user_upn=request.user_upn,
+            query=request.question,
+            answer=answer,
+            citations=ctx.citations,
+            citation_count=len(ctx.citations),
+            confidence=confidence,
+            response_time_ms=int((time.time() - _t0) * 1000),
+        )
+        yield sse_event("done", RAGResponse(
+            answer=answer,
+            citations=ctx.citations,
+            segments_searched=ctx.total_searched,
+            question=request.question,
+            confidence=confidence,
+            used_citation_indices=used_citation_indices,
+            timings=plan.breakdown() if request.debug else None,
+        ).model_dump())
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        # 關閉 proxy 緩衝（nginx / Cloud Run 前的 LB），否則 token 會被攢成一包
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -1164,35 +1435,51 @@ async def get_rag_history(
 
 
 @router.post("/backfill")
-async def trigger_backfill(db: Session = Depends(get_db)):
+async def trigger_backfill(resume: bool = True, db: Session = Depends(get_db)):
     """
-    One-time endpoint to backfill embeddings for all existing meetings.
+    Backfill embeddings for all meetings/segments that don't have one yet.
     Should be called after enabling pgvector and deploying embedding pipeline.
+    Runs app.embedding_backfill (cross-meeting batches, rate-limited, checkpointed);
+    resume=true 會從上次中斷的會議之後接續。進度見 GET /backfill/status。
     """
+    from app.embedding_backfill import BackfillBusy
     try:
-        result = backfill_all_embeddings(db)
+        result = await asyncio.to_thread(backfill_all_embeddings, db, resume)
         return {"status": "ok", **result}
+    except BackfillBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"[RAG] Backfill failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/reembed")
-async def trigger_reembed(db: Session = Depends(get_db)):
+async def trigger_reembed(resume: bool = True, db: Session = Depends(get_db)):
     """
     Force re-embed ALL segments with windowed strategy.
     Use after upgrading embedding approach (e.g., window size change).
-    WARNING: This clears all existing segment embeddings and regenerates them.
+    Existing embeddings are overwritten batch by batch (not cleared first), so
+    search keeps working during the run; unchanged texts hit the embedding cache.
     """
     from app.embedding import force_reembed_all
+    from app.embedding_backfill import BackfillBusy
     try:
-        result = force_reembed_all(db)
+        result = await asyncio.to_thread(force_reembed_all, db, resume)
         return {"status": "ok", **result}
+    except BackfillBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"[RAG] Re-embed failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/backfill/status")
+async def backfill_status(db: Session = Depends(get_db)):
+    """Live backfill progress (items/s, ETA, retries) and stored checkpoints."""
+    from app.embedding_backfill import get_backfill_status
+    return get_backfill_status(db.get_bind())
+
+
 @router.get("/greeting", response_model=RagGreetingResponse)
 async def get_rag_greeting(
     user_upn: str,
@@ -1259,6 +1546,17 @@ async def rag_status(db: Session = Depends(get_db)):
                 "embedded": embedded_meetings,
                 "coverage": f"{(embedded_meetings/total_meetings*100):.1f}%" if total_meetings > 0 else "N/A",
             },
+            "query_cache": query_cache.get_stats(),
+            "title_index": title_index.get_stats(),
+            "answer_cache": answer_cache.get_stats(),
+            "access_set": access_set.get_stats(),
+            "embedding": get_embedding_provider().describe(),
+            "embedding_cache": embedding_cache.get_stats(),
+            "embedding_refresh": embedding_refresh.get_stats(),
+            "vector_quant": {
+                "mode": vector_index.RAG_VECTOR_QUANT,
+                "oversample": vector_index.quant_oversample(vector_index.RAG_VECTOR_QUANT),
+            },
         }
     except Exception as e:
         logger.error(f"[RAG] Status check failed: {e}")
@@ -4,11 +4,19 @@ WebSocket route — real-time audio transcription.
 Endpoint: /ws/transcribe
 
 Flow:
-  Frontend → audio chunks (16kHz PCM16) → VAD buffer → Gemini ASR
-    → optional Smith-Waterman alignment (script mode)
-    → optional Gemini polish/translate (transcription mode)
+  Frontend → audio chunks (16kHz PCM16) → VAD buffer
+    → LiveASRPipeline (bounded queue, concurrent ASR, in-order results)
+      ASR backend: Gemini (default) or local CPU faster-whisper (LIVE_ASR_BACKEND)
+    → optional interim "partial" captions while a segment grows (PartialCaptioner)
+    → optional Smith-Waterman alignment (script mode, off-loop via LiveAligner;
+      over LIVE_ALIGN_BUDGET the caption degrades to the raw transcript)
+    → optional Gemini polish/translate (transcription mode; segments within a short
+      window are batched per session, capped process-wide, raw kept past a deadline)
     → push back to client
 
+The receive loop never awaits ASR, so audio frames and client pings keep
+being read while Gemini is slow.
+
 Heartbeat ping/pong every 25s defends against Cloud Run proxy idle timeout.
 """
 
@@ -17,77 +25,29 @@ import json
 import logging
 import time
 import uuid
-from typing import Optional
+from typing import List, Optional
 
-import numpy as np
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models import Meeting
 from app.vad import VADAudioBuffer
-from app.llm_utils import get_gemini_client, polish_text
+from app.llm_utils import get_gemini_client, polish_text_batch
 from app.aligner import MultiSpeakerScriptAligner
-from app.asr_helpers import get_transcription_gemini, correct_keywords
+from app.asr_helpers import get_live_asr_backend, correct_keywords
+from app.live_pipeline import LiveAligner, LiveASRPipeline, PartialCaptioner, PolishCoalescer
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-async def polish_transcription_task(
-    segment_id: str,
-    transcript_text: str,
-    previous_context: str,
-    source_lang: str,
-    target_lang: str,
-    websocket: WebSocket,
-):
-    """Async task to call Gemini for polishing and send result back to WebSocket."""
-    try:
-        client = get_gemini_client()
-        if not client:
-            raise Exception("Gemini client unavailable")
-
-        def _run_polish():
-            return polish_text(
-                client=client,
-                raw_text=transcript_text,
-                source_lang=source_lang,
-                target_lang=target_lang,
-            )
-
-        polished_data = await asyncio.to_thread(_run_polish)
-
-        if "error" in polished_data:
-            raise Exception(polished_data["error"])
-
-        refined_text = polished_data.get("polished_text", transcript_text)
-        translated_text = polished_data.get("translated", "")
-
-        logger.info(f"Polished [{segment_id}]: {refined_text} | Translated: {translated_text}")
-
-        try:
-            await websocket.send_json({
-                "type": "polished",
-                "id": segment_id,
-                "content": refined_text,
-                "translated": translated_text,
-            })
-        except RuntimeError as e:
-            logger.warning(f"Could not send polished text, websocket probably closed: {e}")
-        except Exception as e:
-            logger.error(f"Error sending polished text via websocket: {e}")
-
-    except Exception as e:
-        logger.error(f"Polishing task failed for segment {segment_id}: {e}")
-        try:
-            await websocket.send_json({
-                "type": "error",
-                "id": segment_id,
-                "content": "Polishing failed.",
-            })
-        except Exception:
-            pass
+async def polish_segments_batch(texts: List[str], source_lang: str, target_lang: str) -> List[dict]:
+    """PolishCoalescer backend: one structured Gemini call for a batch of segments."""
+    client = get_gemini_client()
+    if not client:
+        raise RuntimeError("Gemini client unavailable")
+    return await asyncio.to_thread(polish_text_batch, client, texts, source_lang, target_lang)
 
 
 @router.websocket("/ws/transcribe")
@@ -111,13 +71,11 @@ async def websocket_transcribe(websocket: WebSocket, db: Session = Depends(get_d
     )
 
     # Pseudo-streaming state
-    last_partial_time = time.time()
     current_segment_id = str(uuid.uuid4())
     previous_context = ""
 
-    # Overlapping window buffer (currently 0.0 — VAD splits at silence)
-    OVERLAP_DURATION_SECONDS = 0.0
-    last_flushed_segment_np = np.array([], dtype=np.float32)
+    # Overlapping window (currently 0.0 — VAD splits at silence).
+    # The VAD buffer keeps the previous segment's tail and hands back one view.
 
     # Language config (default: ZH -> EN)
     source_lang = "zh"
@@ -126,10 +84,139 @@ async def websocket_transcribe(websocket: WebSocket, db: Session = Depends(get_d
     custom_initial_prompt = ""
     operation_mode = "transcription"
     script_aligner = MultiSpeakerScriptAligner()
+    # find_match / load_script run on the shared alignment pool, one at a time per session
+    live_aligner = LiveAligner(script_aligner, session_id=str(uuid.uuid4()))
 
     first_audio_time = None
     current_meeting_id = None
 
+    async def _emit_final(segment_id: str, transcript_text: str):
+        """Pipeline result handler — runs in segment order, off the receive loop."""
+        nonlocal previous_context
+
+        if transcript_text:
+            logger.info(f"Raw Transcription [{segment_id}]: {transcript_text}")
+
+            await websocket.send_json({
+                "type": "raw",
+                "id": segment_id,
+                "content": transcript_text,
+            })
+
+            # Alignment Mode
+            alignment_success = False
+            if operation_mode == "alignment" and script_aligner.has_script():
+                corrected_text = correct_keywords(transcript_text)
+                if corrected_text != transcript_text:
+                    logger.info(f"[DEBUG] Corrections applied: '{transcript_text}' -> '{corrected_text}'")
+
+                logger.info(f"[DEBUG] Attempting alignment for transcript: '{corrected_text}'")
+                logger.info(f"[DEBUG] Current cursor position: {script_aligner.current_cursor} / {len(script_aligner.full_cn_text)}")
+
+                match_result, align_outcome = await live_aligner.find_match(
+                    corrected_text, threshold=0.4, alignment_mode=True,
+                )
+                if align_outcome != "ok":
+                    # Over budget / still busy / error: caption falls back to the raw transcript
+                    await websocket.send_json({
+                        "type": "polished",
+                        "id": segment_id,
+                        "content": transcript_text,
+                        "translated": "",
+                        "low_confidence": True,
+                        "degraded": True,
+                    })
+                elif match_result:
+                    is_global = match_result.get('is_global_resync', False)
+                    is_low_conf = match_result.get('low_confidence', False)
+                    resync_tag = " [GLOBAL RESYNC]" if is_global else ""
+                    conf_tag = " [LOW CONFIDENCE]" if is_low_conf else ""
+                    match_symbol = "WARN" if is_low_conf else "OK"
+
+                    logger.info(f"[DEBUG] {match_symbol} Alignment Match!{resync_tag}{conf_tag} Score: {match_result['score']:.2f}")
+                    logger.info(f"[DEBUG]    Cursor: {match_result.get('cursor_position', 'N/A')}")
+
+                    all_matches = match_result.get('all_matches', [match_result])
+                    logger.info(f"[DEBUG]    Matched {len(all_matches)} segment(s)")
+
+                    for idx, seg_match in enumerate(all_matches):
+                        seg_low_conf = seg_match.get('low_confidence', False)
+                        conf_marker = " [?]" if seg_low_conf else ""
+                        logger.info(f"[DEBUG]    [{seg_match['index']}]{conf_marker} {seg_match['source'][:30]}... -> {seg_match['target'][:30]}...")
+
+                        seg_id = segment_id if idx == 0 else f"{segment_id}-{idx}"
+                        await websocket.send_json({
+                            "type": "polished",
+                            "id": seg_id,
+                            "content": seg_match['source'],
+                            "translated": seg_match['target'],
+                            "low_confidence": seg_low_conf,
+                        })
+
+                    alignment_success = True
+                else:
+                    failures = script_aligner.consecutive_failures
+                    logger.info(f"[DEBUG] X Alignment completely failed for: '{corrected_text[:50]}...' (failures: {failures}/{script_aligner.MAX_CONSECUTIVE_FAILURES})")
+                    if failures >= script_aligner.MAX_CONSECUTIVE_FAILURES:
+                        logger.info(f"[DEBUG] !! Next attempt will trigger GLOBAL RESYNC")
+            elif operation_mode == "alignment":
+                logger.warning(f"[DEBUG] Alignment mode active but no script loaded!")
+
+            # Polish/translate (transcription mode only, when alignment didn't succeed)
+            if not alignment_success and operation_mode != "alignment":
+                polisher.submit(segment_id, transcript_text, source_lang, target_lang)
+
+            previous_context = transcript_text
+        else:
+            logger.info(f"Received empty transcription from ASR for [{segment_id}]. Clearing partial.")
+            await websocket.send_json({
+                "type": "raw",
+                "id": segment_id,
+                "content": "",
+            })
+
+    async def _send_polished(segment_id: str, content: str, translated: str, degraded: bool):
+        if not degraded:
+            logger.info(f"Polished [{segment_id}]: {content} | Translated: {translated}")
+        message = {
+            "type": "polished",
+            "id": segment_id,
+            "content": content,
+            "translated": translated,
+        }
+        if degraded:
+            message["degraded"] = True
+        try:
+            await websocket.send_json(message)
+        except RuntimeError as e:
+            logger.warning(f"Could not send polished text, websocket probably closed: {e}")
+        except Exception as e:
+            logger.error(f"Error sending polished text via websocket: {e}")
+
+    # Polish calls are coalesced per session (see app.live_pipeline.PolishCoalescer)
+    polisher = PolishCoalescer(polish_segments_batch, _send_polished)
+
+    # Receive loop only runs VAD and submits segments; ASR runs concurrently
+    # and results are emitted in segment order (see app.live_pipeline).
+    # Backend is process-wide (Gemini by default, or on-box CPU faster-whisper).
+    live_asr = get_live_asr_backend()
+    asr_pipeline = LiveASRPipeline(live_asr.transcribe, _emit_final)
+    asr_pipeline.start()
+
+    async def _send_partial(segment_id: str, text: str):
+        try:
+            await websocket.send_json({
+                "type": "partial",
+                "id": segment_id,
+                "content": text,
+            })
+        except Exception as e:
+            logger.warning(f"Could not send partial text, websocket probably closed: {e}")
+
+    # Interim results: re-transcribe the growing segment on a timer (opt-in,
+    # capped per session). The final "raw" with the same id supersedes them.
+    partials = PartialCaptioner(live_asr.transcribe, _send_partial, sample_rate=RATE)
+
     # WebSocket heartbeat — defends against Cloud Run proxy idle timeout (~60s)
     WS_PING_INTERVAL = 25
 
@@ -172,7 +259,13 @@ async def websocket_transcribe(websocket: WebSocket, db: Session = Depends(get_d
                             logger.info(f"Received meeting_id: {current_meeting_id}")
 
                         if "overlap_duration" in config:
-                            OVERLAP_DURATION_SECONDS = float(config["overlap_duration"])
+                            vad_buffer.set_overlap(config["overlap_duration"])
+
+                        if "partials" in config or "partial_interval" in config:
+                            partials.configure(
+                                enabled=config.get("partials"),
+                                interval=config.get("partial_interval"),
+                            )
 
                         if "mode" in config:
                             operation_mode = config["mode"]
@@ -180,14 +273,14 @@ async def websocket_transcribe(websocket: WebSocket, db: Session = Depends(get_d
                             if operation_mode == "alignment":
                                 logger.info(f"[DEBUG] Alignment mode activated. initial_prompt length: {len(custom_initial_prompt)}")
                                 logger.info(f"[DEBUG] initial_prompt preview: {custom_initial_prompt[:200]}")
-                                script_aligner.load_script(custom_initial_prompt)
+                                await live_aligner.load_script(custom_initial_prompt)
                                 logger.info(f"[DEBUG] Loaded {len(script_aligner.segments)} segments for Alignment Mode.")
                                 logger.info(f"[DEBUG] Flattened text length: {len(script_aligner.full_cn_text)} characters")
                                 if len(script_aligner.segments) > 0:
                                     first_seg = script_aligner.segments[0]
                                     logger.info(f"[DEBUG] First segment: [{first_seg['start_idx']}-{first_seg['end_idx']}] {first_seg['source'][:30]}...")
 
-                        logger.info(f"Config updated: {source_lang} -> {target_lang} | Prompt len: {len(custom_initial_prompt)} | Overlap: {OVERLAP_DURATION_SECONDS} | Mode: {operation_mode}")
+                        logger.info(f"Config updated: {source_lang} -> {target_lang} | Prompt len: {len(custom_initial_prompt)} | Overlap: {vad_buffer.overlap_duration} | Mode: {operation_mode} | Partials: {partials.enabled}")
                 except Exception as e:
                     logger.error(f"Failed to parse config message: {e}")
                 continue
@@ -206,117 +299,24 @@ async def websocket_transcribe(websocket: WebSocket, db: Session = Depends(get_d
             if first_audio_time is not None:
                 is_initial_phase = (time.time() - first_audio_time) < 3.0
 
-            audio_bytes = vad_buffer.process_chunk(data, force_speech=is_initial_phase)
+            # float32 view (segment + overlap tail), valid until the next process_chunk
+            audio_for_transcription = vad_buffer.process_chunk(data, force_speech=is_initial_phase)
 
-            # Final transcription (split event)
-            if audio_bytes:
-                audio_np_current = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-
-                audio_for_transcription = audio_np_current
-                if last_flushed_segment_np.size > 0:
-                    overlap_samples = int(OVERLAP_DURATION_SECONDS * RATE)
-                    overlap_from_previous = last_flushed_segment_np[-min(overlap_samples, last_flushed_segment_np.size):]
-                    audio_for_transcription = np.concatenate((overlap_from_previous, audio_np_current))
-
-                last_flushed_segment_np = audio_np_current
+            combined_prompt = f"{custom_initial_prompt} {previous_context}".strip()
 
+            # Final transcription (split event)
+            if audio_for_transcription is not None:
                 if audio_for_transcription.size > 0:
                     logger.info(f"Transcribing {len(audio_for_transcription)/RATE:.2f} seconds of audio (VAD split with overlap)...")
 
-                    combined_prompt = f"{custom_initial_prompt} {previous_context}".strip()
+                    partials.finalize(current_segment_id)
+                    asr_pipeline.submit(current_segment_id, audio_for_transcription, source_lang, combined_prompt)
+                    current_segment_id = str(uuid.uuid4())
 
-                    try:
-                        transcript_text = await asyncio.wait_for(
-                            get_transcription_gemini(audio_for_transcription, source_lang, combined_prompt),
-                            timeout=30.0,
-                        )
-                        logger.info(f"Gemini ASR Output: '{transcript_text}'")
-                    except asyncio.TimeoutError:
-                        logger.error(f"Gemini ASR timed out for segment {current_segment_id}. Skipping segment.")
-                        transcript_text = ""
-                    except Exception as e:
-                        logger.error(f"Gemini ASR error for segment {current_segment_id}: {e}", exc_info=True)
-                        transcript_text = ""
-
-                    if transcript_text:
-                        logger.info(f"Raw Transcription [{current_segment_id}]: {transcript_text}")
-
-                        await websocket.send_json({
-                            "type": "raw",
-                            "id": current_segment_id,
-                            "content": transcript_text,
-                        })
-
-                        # Alignment Mode
-                        alignment_success = False
-                        if operation_mode == "alignment" and script_aligner.has_script():
-                            corrected_text = correct_keywords(transcript_text)
-                            if corrected_text != transcript_text:
-                                logger.info(f"[DEBUG] Corrections applied: '{transcript_text}' -> '{corrected_text}'")
-
-                            logger.info(f"[DEBUG] Attempting alignment for transcript: '{corrected_text}'")
-                            logger.info(f"[DEBUG] Current cursor position: {script_aligner.current_cursor} / {len(script_aligner.full_cn_text)}")
-
-                            match_result = script_aligner.find_match(corrected_text, threshold=0.4, alignment_mode=True)
-                            if match_result:
-                                is_global = match_result.get('is_global_resync', False)
-                                is_low_conf = match_result.get('low_confidence', False)
-                                resync_tag = " [GLOBAL RESYNC]" if is_global else ""
-                                conf_tag = " [LOW CONFIDENCE]" if is_low_conf else ""
-                                match_symbol = "WARN" if is_low_conf else "OK"
-
-                                logger.info(f"[DEBUG] {match_symbol} Alignment Match!{resync_tag}{conf_tag} Score: {match_result['score']:.2f}")
-                                logger.info(f"[DEBUG]    Cursor: {match_result.get('cursor_position', 'N/A')}")
-
-                                all_matches = match_result.get('all_matches', [match_result])
-                                logger.info(f"[DEBUG]    Matched {len(all_matches)} segment(s)")
-
-                                for idx, seg_match in enumerate(all_matches):
-                                    seg_low_conf = seg_match.get('low_confidence', False)
-                                    conf_marker = " [?]" if seg_low_conf else ""
-                                    logger.info(f"[DEBUG]    [{seg_match['index']}]{conf_marker} {seg_match['source'][:30]}... -> {seg_match['target'][:30]}...")
-
-                                    seg_id = current_segment_id if idx == 0 else f"{current_segment_id}-{idx}"
-                                    await websocket.send_json({
-                                        "type": "polished",
-                                        "id": seg_id,
-                                        "content": seg_match['source'],
-                                        "translated": seg_match['target'],
-                                        "low_confidence": seg_low_conf,
-                                    })
-
-                                alignment_success = True
-                            else:
-                                failures = script_aligner.consecutive_failures
-                                logger.info(f"[DEBUG] X Alignment completely failed for: '{corrected_text[:50]}...' (failures: {failures}/{script_aligner.MAX_CONSECUTIVE_FAILURES})")
-                                if failures >= script_aligner.MAX_CONSECUTIVE_FAILURES:
-                                    logger.info(f"[DEBUG] !! Next attempt will trigger GLOBAL RESYNC")
-                        elif operation_mode == "alignment":
-                            logger.warning(f"[DEBUG] Alignment mode active but no script loaded!")
-
-                        # Polish/translate (transcription mode only, when alignment didn't succeed)
-                        if not alignment_success and operation_mode != "alignment":
-                            asyncio.create_task(polish_transcription_task(
-                                current_segment_id,
-                                transcript_text,
-                                previous_context,
-                                source_lang,
-                                target_lang,
-                                websocket,
-                            ))
-
-                        previous_context = transcript_text
-                        current_segment_id = str(uuid.uuid4())
-                        last_partial_time = time.time()
-                    else:
-                        logger.info(f"Received empty transcription from ASR for [{current_segment_id}]. Clearing partial.")
-                        await websocket.send_json({
-                            "type": "raw",
-                            "id": current_segment_id,
-                            "content": "",
-                        })
-                        current_segment_id = str(uuid.uuid4())
-                        last_partial_time = time.time()
+            # Interim result — skipped while finals are backed up so partials
+            # never compete with them for ASR capacity.
+            elif asr_pipeline.depth < asr_pipeline.max_in_flight:
+                partials.maybe_submit(current_segment_id, vad_buffer.snapshot(), source_lang, combined_prompt)
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket client {websocket.client.host}:{websocket.client.port} disconnected.")
@@ -331,6 +331,12 @@ async def websocket_transcribe(websocket: WebSocket, db: Session = Depends(get_d
         if heartbeat_task:
             heartbeat_task.cancel()
 
+        await partials.close()
+        await asr_pipeline.close()
+        await polisher.close()
+        live_aligner.close()
+        vad_buffer.close()
+
         # Update Meeting's duration stat
         if current_meeting_id:
             try:
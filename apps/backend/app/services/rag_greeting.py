@@ -44,10 +44,15 @@ def get_accessible_meeting_stats(db: Session, user_upn: str) -> Dict[str, Any]:
 
 
 def get_recent_meetings_for_greeting(db: Session, user_upn: str, limit: int = 10) -> List[Dict]:
-    """Get recent completed meetings with summary_json for topic extraction."""
+    """Get recent completed meetings with their summary digest for topic extraction.
+
+    summary_json is only fetched for rows whose digest (app.summary_digest) is not
+    materialized yet; everything else reads the small precomputed columns.
+    """
     try:
         rows = db.execute(text("""
-            SELECT m.id, m.title, m.created_at, m.summary_json
+            SELECT m.id, m.title, m.created_at, m.summary_topics, m.summary_key_actions,
+                   CASE WHEN m.summary_topics IS NULL THEN m.summary_json END AS summary_json
             FROM meetings m
             JOIN meeting_participants mp ON mp.meeting_id = m.id AND mp.user_upn = :upn
             WHERE m.deleted_at IS NULL
@@ -55,7 +60,11 @@ def get_recent_meetings_for_greeting(db: Session, user_upn: str, limit: int = 10
             ORDER BY m.created_at DESC
             LIMIT :limit
         """), {"upn": user_upn, "limit": limit}).fetchall()
-        return [{"id": r[0], "title": r[1], "created_at": r[2], "summary_json": r[3]} for r in rows]
+        return [
+            {"id": r[0], "title": r[1], "created_at": r[2],
+             "summary_topics": r[3], "summary_key_actions": r[4], "summary_json": r[5]}
+            for r in rows
+        ]
     except Exception as e:
         logger.warning(f"get_recent_meetings_for_greeting failed: {e}")
     return []
@@ -80,37 +89,21 @@ def get_pending_action_count(db: Session, user_upn: str) -> int:
 
 def extract_top_topics(meetings: List[Dict], max_topics: int = 3) -> List[str]:
     """
-    Extract top recurring topics from meeting summary_json.
+    Extract top recurring topics from the meetings' summary digest.
     Deterministic: count frequency of chapter titles / speaker topics / meeting titles.
+    Falls back to parsing summary_json when summary_topics is not materialized.
     """
-    import json
     from collections import Counter
+    from app.summary_digest import topics_or_parse
 
     candidates = Counter()
     for m in meetings:
-        sj = m.get("summary_json")
-        if not sj:
+        topics = m.get("summary_topics")
+        if topics is None and not m.get("summary_json"):
             continue
-        if isinstance(sj, str):
-            try:
-                sj = json.loads(sj)
-            except Exception:
-                continue
-        if not isinstance(sj, dict):
-            continue
-
-        # Chapter titles
-        for ch in (sj.get("chapters") or []):
-            t = (ch.get("title") or "").strip()
-            if len(t) > 2:
-                candidates[t] += 2  # weight higher
-
-        # Speaker contribution topics
-        for sc in (sj.get("speaker_contributions") or []):
-            for topic in (sc.get("main_topics") or []):
-                t = str(topic).strip()
-                if len(t) > 2:
-                    candidates[t] += 1
+        # Chapter titles (weight 2) + speaker contribution topics (weight 1)
+        for t, weight in topics_or_parse(topics, m.get("summary_json")):
+            candidates[t] += weight
 
         # Meeting title words (lower weight)
         title = (m.get("title") or "").strip()
@@ -191,30 +184,11 @@ def build_suggested_questions(top_topics: List[str], last_meeting: Optional[Dict
 
 def get_last_meeting_summary(meetings: List[Dict]) -> Optional[Dict]:
     """Extract last meeting's title, date, and key actions."""
-    import json
+    from app.summary_digest import key_actions_or_parse
     if not meetings:
         return None
     m = meetings[0]
-    sj = m.get("summary_json")
-    if isinstance(sj, str):
-        try:
-            sj = json.loads(sj)
-        except Exception:
-            sj = {}
-    if not isinstance(sj, dict):
-        sj = {}
-
-    key_actions = []
-    for item in (sj.get("action_items") or [])[:2]:
-        if isinstance(item, str) and item.strip():
-            key_actions.append(item.strip())
-    for item in (sj.get("next_steps") or [])[:2]:
-        if isinstance(item, dict):
-            t = (item.get("action") or item.get("text") or "").strip()
-            if t:
-                key_actions.append(t)
-        elif isinstance(item, str) and item.strip():
-            key_actions.append(item.strip())
+    key_actions = key_actions_or_parse(m.get("summary_key_actions"), m.get("summary_json"))
 
     date_str = ""
     if m.get("created_at"):
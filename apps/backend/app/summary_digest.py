@@ -0,0 +1,243 @@
+"""
+Summary digest — 由 meetings.summary_json 衍生、寫入時就算好的小欄位。
+
+summary_json 是整份結構化摘要（章節 / 講者貢獻 / 決議 / 待辦…，常數 KB 以上）。
+讀取路徑只需要其中一小部分，過去卻每次都 json.loads 整份再重組：
+  - /rag/ask 的摘要 citation（向量命中、標題匹配各組一次）
+  - RAG greeting 的常談主題 / 上次會議重點
+  - 摘要 embedding 文字
+
+現在改為 summary_json 一被指派（ORM set event，見 app.models）就同步計算：
+  summary_citation      TEXT     摘要 + 決議事項 + 行動項目（前 5），/rag/ask citation 本文
+  summary_embed_text    TEXT     summary_embedding_text 去掉標題行的本文
+  summary_topics        TEXT     JSON [[topic, weight], ...]（章節標題 ×2、講者主題 ×1）
+  summary_key_actions   TEXT     JSON [str, ...]（greeting「上次提到…」，最多 4 筆）
+
+summary_citation IS NULL ⇔ 尚未計算（summary_json 為 NULL 或舊資料未回填）；
+空摘要存 ""。讀取端遇到 NULL 才退回解析 summary_json（*_or_parse helpers）。
+舊資料由 backfill_summary_digests() 回填（啟動時背景執行 / admin endpoint）。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+CITATION_MAX_ACTION_ITEMS = 5
+KEY_ACTIONS_PER_SOURCE = 2
+DIGEST_BACKFILL_BATCH = 200
+
+DIGEST_COLUMNS = (
+    "summary_citation",
+    "summary_embed_text",
+    "summary_topics",
+    "summary_key_actions",
+)
+
+SUMMARY_DIGEST_DDL = (
+    "ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_citation TEXT",
+    "ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_embed_text TEXT",
+    "ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_topics TEXT",
+    "ALTER TABLE meetings ADD COLUMN IF NOT EXISTS summary_key_actions TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_meetings_summary_digest_pending ON meetings (id) "
+    "WHERE summary_citation IS NULL AND summary_json IS NOT NULL",
+)
+
+
+def ensure_summary_digest_columns(engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for stmt in SUMMARY_DIGEST_DDL:
+            conn.execute(text(stmt))
+
+
+# ============================================
+# Builders (pure; summary dict → digest fields)
+# ============================================
+
+def parse_summary(summary_json: Any) -> Optional[dict]:
+    """summary_json（str 或 dict）→ dict；無法解析 / 不是 object 回 None。"""
+    if isinstance(summary_json, dict):
+        return summary_json
+    if not summary_json:
+        return None
+    try:
+        data = json.loads(summary_json)
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _texts(items, key: str) -> List[str]:
+    out = []
+    for item in items or []:
+        if isinstance(item, str):
+            out.append(item)
+        elif isinstance(item, dict):
+            out.append(item.get(key, ""))
+    return out
+
+
+def citation_text(data: dict) -> str:
+    """/rag/ask 摘要 citation 本文：摘要 + 決議事項 + 行動項目（前 5 筆）。"""
+    parts = []
+    if data.get("summary"):
+        parts.append(data["summary"])
+    dec_texts = [t for t in _texts(data.get("decisions"), "decision") if t]
+    if dec_texts:
+        parts.append("決議事項：" + "；".join(dec_texts))
+    item_texts = [
+        t for t in _texts((data.get("action_items") or [])[:CITATION_MAX_ACTION_ITEMS], "task") if t
+    ]
+    if item_texts:
+        parts.append("行動項目：" + "；".join(item_texts))
+    return "\n".join(filter(None, parts))
+
+
+def embed_body(data: dict) -> str:
+    """摘要 embedding 本文（不含標題行）：摘要 + 全部行動項目 + 決議。"""
+    parts = []
+    if data.get("summary"):
+        parts.append(data["summary"])
+    parts.extend(_texts(data.get("action_items"), "task"))
+    parts.extend(_texts(data.get("decisions"), "decision"))
+    return "\n".join(filter(None, parts))
+
+
+def topic_weights(data: dict) -> List[list]:
+    """greeting 常談主題：章節標題權重 2、講者 main_topics 權重 1（長度 > 2）。"""
+    weights: Counter = Counter()
+    for ch in data.get("chapters") or []:
+        t = (ch.get("title") or "").strip() if isinstance(ch, dict) else ""
+        if len(t) > 2:
+            weights[t] += 2
+    for sc in data.get("speaker_contributions") or []:
+        if not isinstance(sc, dict):
+            continue
+        for topic in sc.get("main_topics") or []:
+            t = str(topic).strip()
+            if len(t) > 2:
+                weights[t] += 1
+    return [[t, w] for t, w in weights.items()]
+
+
+def key_actions(data: dict) -> List[str]:
+    """greeting「上次提到…」：action_items 前 2 筆字串 + next_steps 前 2 筆。"""
+    out = []
+    for item in (data.get("action_items") or [])[:KEY_ACTIONS_PER_SOURCE]:
+        if isinstance(item, str) and item.strip():
+            out.append(item.strip())
+    for item in (data.get("next_steps") or [])[:KEY_ACTIONS_PER_SOURCE]:
+        if isinstance(item, dict):
+            t = (item.get("action") or item.get("text") or "").strip()
+            if t:
+                out.append(t)
+        elif isinstance(item, str) and item.strip():
+            out.append(item.strip())
+    return out
+
+
+def build_summary_digest(summary_json: Any) -> Dict[str, Any]:
+    """summary_json → {column: value}；None → 全部 NULL。
+
+    非 JSON 的舊摘要：citation 取前 500 字（與舊 /rag/ask 行為相同）；summary_embed_text
+    留 NULL，讓 embedding 路徑照舊判定為無效摘要而略過；其他欄位為空。
+    """
+    if summary_json is None:
+        return {col: None for col in DIGEST_COLUMNS}
+    data = parse_summary(summary_json)
+    if data is None:
+        raw = summary_json if isinstance(summary_json, str) else ""
+        return {
+            "summary_citation": raw[:500],
+            "summary_embed_text": None,
+            "summary_topics": "[]",
+            "summary_key_actions": "[]",
+        }
+    return {
+        "summary_citation": citation_text(data),
+        "summary_embed_text": embed_body(data),
+        "summary_topics": json.dumps(topic_weights(data), ensure_ascii=False),
+        "summary_key_actions": json.dumps(key_actions(data), ensure_ascii=False),
+    }
+
+
+def apply_summary_digest(meeting, summary_json: Any) -> None:
+    """把 digest 寫到 Meeting 物件上（不 commit）；由 Meeting.summary_json set event 呼叫。"""
+    for col, value in build_summary_digest(summary_json).items():
+        setattr(meeting, col, value)
+
+
+# ============================================
+# Read-side helpers (digest 優先，NULL 才解析 summary_json)
+# ============================================
+
+def citation_or_parse(citation: Optional[str], summary_json: Optional[str]) -> str:
+    if citation is not None:
+        return citation
+    return build_summary_digest(summary_json)["summary_citation"] or ""
+
+
+def topics_or_parse(topics: Optional[str], summary_json: Any) -> List[list]:
+    if topics is not None:
+        try:
+            return json.loads(topics)
+        except (TypeError, ValueError):
+            return []
+    data = parse_summary(summary_json)
+    return topic_weights(data) if data else []
+
+
+def key_actions_or_parse(actions: Optional[str], summary_json: Any) -> List[str]:
+    if actions is not None:
+        try:
+            return json.loads(actions)
+        except (TypeError, ValueError):
+            return []
+    data = parse_summary(summary_json)
+    return key_actions(data) if data else []
+
+
+def embed_body_or_parse(body: Optional[str], summary_json: Any) -> Optional[str]:
+    """None = summary_json 不是合法 JSON（呼叫端記 log 並略過）。"""
+    if body is not None:
+        return body
+    data = parse_summary(summary_json)
+    return embed_body(data) if data is not None else None
+
+
+# ============================================
+# Backfill (舊資料)
+# ============================================
+
+def backfill_summary_digests(bind, batch_size: int = DIGEST_BACKFILL_BATCH, limit: Optional[int] = None) -> int:
+    """回填 summary_citation IS NULL 的會議；每批一個 transaction，回傳處理筆數。"""
+    done = 0
+    while limit is None or done < limit:
+        size = batch_size if limit is None else min(batch_size, limit - done)
+        with bind.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, summary_json FROM meetings "
+                "WHERE summary_citation IS NULL AND summary_json IS NOT NULL "
+                "ORDER BY id LIMIT :n"
+            ), {"n": size}).fetchall()
+            if not rows:
+                break
+            conn.execute(text(
+                "UPDATE meetings SET summary_citation = :summary_citation, "
+                "summary_embed_text = :summary_embed_text, summary_topics = :summary_topics, "
+                "summary_key_actions = :summary_key_actions WHERE id = :id"
+            ), [{"id": r.id, **build_summary_digest(r.summary_json)} for r in rows])
+        done += len(rows)
+        if len(rows) < size:
+            break
+    if done:
+        logger.info(f"[SummaryDigest] Backfilled {done} meetings")
+    return done
@@ -16,6 +16,7 @@ from dotenv import load_dotenv
 from app.llm_utils import get_gemini_client, generate_summary
 from app.notify import send_completion_notification
 from app.embedding import embed_transcript_segments, embed_meeting_summary
+from app.embedding_refresh import schedule_reembed
 
 logger = logging.getLogger(__name__)
 
@@ -156,6 +157,7 @@ def _apply_glossary_deterministic(segments, glossary_map) -> int:
         if changed:
             seg.content_raw = raw
             seg.content_polished = polished
+            seg.embedding_dirty = True
             modified += 1
     return modified
 
@@ -202,6 +204,7 @@ def patch_summary_after_correction(db: Session, meeting_id: str, glossary_map: d
 
     if new_summary and new_summary != meeting.summary_json:
         meeting.summary_json = new_summary
+        meeting.summary_embedding_dirty = True
         db.commit()
         logger.info(f"[Glossary] Summary patched in-place for {meeting_id} (no full regen)")
         return True
@@ -266,6 +269,7 @@ def apply_glossary_correction(db: Session, meeting_id: str, user_upn: str = None
                             if seg is not None and c["text"] and c["text"] != (seg.content_polished or seg.content_raw or ""):
                                 seg.content_polished = c["text"]
                                 seg.content_raw = c["text"]
+                                seg.embedding_dirty = True
                                 corrected_ids.add(seg.id)
                     modified_count = len(corrected_ids)
                     llm_ok = True
@@ -283,11 +287,16 @@ def apply_glossary_correction(db: Session, meeting_id: str, user_upn: str = None
         )
 
     # P0-3: patch the existing summary in place (best-effort, non-fatal).
+    summary_patched = False
     try:
-        patch_summary_after_correction(db, meeting_id, glossary_map)
+        summary_patched = patch_summary_after_correction(db, meeting_id, glossary_map)
     except Exception as e:  # noqa: BLE001
         logger.warning(f"[Glossary] summary patch failed (non-fatal): {e}")
 
+    # 校正後的文字進了 embedding 視窗 → 背景只重算受影響的視窗（尚未 embed 的會議不做事）
+    if modified_count > 0 or summary_patched:
+        schedule_reembed(meeting_id)
+
     return modified_count
 
 
@@ -1,6 +1,9 @@
 import numpy as np
-import io
+import copy
+import os
 import logging
+import queue
+import threading
 
 # Conditional torch import - only needed for Silero VAD
 try:
@@ -12,7 +15,279 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Silero VAD (JIT) requires strictly 512 samples per window at 16kHz
+SILERO_WINDOW_SAMPLES = 512
+
+# Max idle per-session states kept for reuse (one per concurrent live room is plenty)
+VAD_STATE_POOL_MAX = int(os.getenv("VAD_STATE_POOL_MAX", "32"))
+
+# Copies of the shared Silero model that rooms can run on concurrently.
+# The recurrent state lives in each session, so any free replica will do.
+VAD_SILERO_REPLICAS = max(1, int(os.getenv("VAD_SILERO_REPLICAS", "2")))
+
+# Recurrent state attributes of the Silero JIT wrapper (v5: _state/_context, v4: _h/_c)
+SILERO_STATE_ATTRS = ("_state", "_context", "_last_sr", "_last_batch_size", "_h", "_c")
+
+
+# ============================================
+# Process-wide Silero model (shared by every /ws/transcribe session)
+# ============================================
+# 以前每條 WebSocket 連線都在 VADAudioBuffer.__init__ 跑一次 torch.hub.load，
+# 連線建立延遲與記憶體隨同時在線的會議數線性成長。改為進程級單例：
+# 首次使用（或 startup warm-up）載入一次，之後所有 session 共用。
+# JIT model 內含 streaming state 且非 thread-safe → 推論時向 replica pool 借一份 model，
+# 呼叫前換入該 session 的 recurrent state、呼叫後存回 VADSessionState，
+# 視窗依序逐一送入，跨 window / chunk 的語音上下文與每連線一份 model 時相同。
+
+_silero_model = None
+_silero_load_attempted = False
+_silero_load_lock = threading.Lock()
+_silero_replicas = None  # queue.Queue of model copies, built on first inference
+
+
+def _load_silero():
+    """Load Silero VAD from torch hub. Returns None if unavailable."""
+    if not TORCH_AVAILABLE:
+        logger.info("PyTorch not available. Using Energy-based VAD.")
+        return None
+    try:
+        logger.info("Loading Silero VAD model...")
+        # This requires internet access on first run to download the model (~2MB)
+        model, _ = torch.hub.load(repo_or_dir='snakers4/silero-vad',
+                                  model='silero_vad',
+                                  force_reload=False,
+                                  trust_repo=True)
+        model.eval()
+        logger.info("Silero VAD loaded successfully.")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load Silero VAD: {e}. Fallback to Energy VAD.")
+        return None
+
+
+def get_silero_model():
+    """
+    Get the process-wide Silero VAD model (lazy, loaded at most once).
+
+    A failed load is cached too, so sessions on a torch-less or offline
+    instance don't retry the hub download on every connection.
+    """
+    global _silero_model, _silero_load_attempted
+    if _silero_load_attempted:
+        return _silero_model
+    with _silero_load_lock:
+        if not _silero_load_attempted:
+            _silero_model = _load_silero()
+            _silero_load_attempted = True
+    return _silero_model
+
+
+def _replica_queue(model) -> "queue.Queue":
+    """Replica pool for the shared model: the model itself + deep copies (best effort)."""
+    global _silero_replicas
+    if _silero_replicas is None:
+        with _silero_load_lock:
+            if _silero_replicas is None:
+                replicas = queue.Queue()
+                replicas.put(model)
+                for _ in range(VAD_SILERO_REPLICAS - 1):
+                    try:
+                        replicas.put(copy.deepcopy(model))
+                    except Exception as e:
+                        logger.warning(f"Silero VAD replica copy failed, using {replicas.qsize()}: {e}")
+                        break
+                _silero_replicas = replicas
+    return _silero_replicas
+
+
+def _get_recurrent_state(model) -> dict:
+    state = {}
+    for name in SILERO_STATE_ATTRS:
+        if hasattr(model, name):
+            value = getattr(model, name)
+            state[name] = value.clone() if hasattr(value, "clone") else copy.copy(value)
+    return state
+
+
+def _set_recurrent_state(model, state) -> None:
+    if state is None:
+        model.reset_states()  # new session: start from a clean stream
+        return
+    for name, value in state.items():
+        setattr(model, name, value)
+
+
+def silero_speech_probs(model, windows: np.ndarray, sample_rate: int, session) -> np.ndarray:
+    """
+    Score N consecutive windows of 512 samples in order, carrying the session's
+    recurrent state across windows and across calls.
+
+    Args:
+        windows: float32 array of shape (N, 512)
+        session: VADSessionState holding this stream's Silero state
+
+    Returns:
+        float32 array of N speech probabilities
+    """
+    probs = np.empty(len(windows), dtype=np.float32)
+    replicas = _replica_queue(model)
+    replica = replicas.get()
+    try:
+        _set_recurrent_state(replica, session.silero_state)
+        with torch.no_grad():
+            for i in range(len(windows)):
+                probs[i] = replica(torch.from_numpy(windows[i:i + 1]), sample_rate).item()
+        session.silero_state = _get_recurrent_state(replica)
+    finally:
+        replicas.put(replica)
+    return probs
+
+
+# ============================================
+# Preallocated sample buffer (segment + overlap tail)
+# ============================================
+
+class AudioRingBuffer:
+    """
+    Preallocated float32 store for the live segment and the overlap tail of the
+    previous one. PCM16 is converted exactly once, straight into the buffer.
+
+    Layout (contiguous, so both regions are plain numpy views):
+
+        [ overlap tail | current segment ......... | free ]
+        0          seg_start                      end   capacity
+
+    After a flush the kept tail is moved to the front lazily — on the next
+    append — so the view handed out by flush() stays valid until then.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.clear()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.data)
+
+    def ensure_capacity(self, capacity: int):
+        """Grow (never shrink) the backing array. Only done at session start."""
+        if capacity > len(self.data):
+            self.data = np.zeros(capacity, dtype=np.float32)
+            self.clear()
+
+    def clear(self):
+        self.seg_start = 0
+        self.end = 0
+        self._pending_tail = None  # samples of the last flushed segment to keep
+
+    def append(self, pcm16: np.ndarray) -> np.ndarray:
+        """Convert int16 samples into the buffer; returns a float32 view of them."""
+        self._compact()
+        n = len(pcm16)
+        # Client frames larger than the slack: drop the oldest segment samples
+        # to stay bounded (never reached with the usual 4096-sample frames).
+        room = len(self.data) - self.seg_start
+        if n > room:
+            pcm16 = pcm16[-room:]
+            n = room
+        overflow = self.end + n - len(self.data)
+        if overflow > 0:
+            self.data[self.seg_start:self.end - overflow] = self.data[self.seg_start + overflow:self.end]
+            self.end -= overflow
+            logger.warning(f"VAD buffer full, dropped {overflow} oldest samples")
+        dst = self.data[self.end:self.end + n]
+        np.multiply(pcm16, 1.0 / 32768.0, out=dst, casting="unsafe")
+        self.end += n
+        return dst
+
+    def segment(self) -> np.ndarray:
+        """View of the current segment (without overlap)."""
+        return self.data[self.seg_start:self.end]
+
+    def window(self, overlap_samples: int) -> np.ndarray:
+        """View of the current segment preceded by up to `overlap_samples` of the previous one."""
+        return self.data[max(0, self.seg_start - overlap_samples):self.end]
+
+    def commit(self, keep_tail: int):
+        """Mark the current segment as flushed; keep its last `keep_tail` samples as overlap."""
+        keep_tail = min(keep_tail, self.end - self.seg_start)
+        self._pending_tail = (self.end - keep_tail, self.end)
+
+    def discard(self):
+        """Drop the current segment; the previous overlap tail stays in place."""
+        self.end = self.seg_start
+
+    def _compact(self):
+        if self._pending_tail is None:
+            return
+        a, b = self._pending_tail
+        self._pending_tail = None
+        if a > 0 and b > a:
+            self.data[:b - a] = self.data[a:b]
+        self.seg_start = self.end = b - a
+
+
+# ============================================
+# Pooled per-session VAD state
+# ============================================
+
+class VADSessionState:
+    """
+    Mutable per-session VAD state (counters + Silero recurrent state) and
+    reusable sample/window buffers.
+
+    Pooled so that connection setup doesn't allocate and concurrent rooms reuse
+    the same few objects instead of churning the allocator.
+    """
+
+    def __init__(self, max_windows: int = 8):
+        self.windows = np.zeros((max_windows, SILERO_WINDOW_SAMPLES), dtype=np.float32)
+        self.ring = AudioRingBuffer()
+        self.reset()
+
+    def reset(self):
+        self.silence_duration = 0.0
+        self.total_duration = 0.0
+        self.silero_state = None  # recurrent model state; None = fresh stream
+        self.ring.clear()
+
+    def window_batch(self, chunk_np: np.ndarray) -> np.ndarray:
+        """Copy chunk into the scratch buffer as (N, 512) windows, zero-padding the last one."""
+        n_windows = max(1, -(-len(chunk_np) // SILERO_WINDOW_SAMPLES))
+        if n_windows > self.windows.shape[0]:
+            self.windows = np.zeros((n_windows, SILERO_WINDOW_SAMPLES), dtype=np.float32)
+        batch = self.windows[:n_windows]
+        flat = batch.reshape(-1)
+        flat[:len(chunk_np)] = chunk_np
+        flat[len(chunk_np):] = 0.0
+        return batch
+
+
+_state_pool: list = []
+_state_pool_lock = threading.Lock()
+
+
+def acquire_session_state() -> VADSessionState:
+    """Take a per-session state from the pool (or create one)."""
+    with _state_pool_lock:
+        state = _state_pool.pop() if _state_pool else None
+    if state is None:
+        state = VADSessionState()
+    state.reset()
+    return state
+
+
+def release_session_state(state: VADSessionState):
+    """Return a per-session state to the pool when the session ends."""
+    with _state_pool_lock:
+        if len(_state_pool) < VAD_STATE_POOL_MAX:
+            _state_pool.append(state)
+
+
 class VADAudioBuffer:
+    # Extra room beyond max_duration for the chunk that crosses the limit
+    CHUNK_SLACK_SECONDS = 1.0
+
     def __init__(self, sample_rate=16000, silence_threshold=0.4, min_silence_duration=1.0, max_duration=5.0):
         self.sample_rate = sample_rate
         self.silence_threshold = silence_threshold # Restored to 0.4
@@ -20,48 +295,49 @@ class VADAudioBuffer:
         self.min_speech_duration = 0.5 # New: filter out speech segments shorter than 0.5s
         self.max_duration = max_duration # Aggressively reduced to 5.0s
         
-        self.buffer = io.BytesIO()
-        self.silence_duration = 0.0
-        self.total_duration = 0.0
-        
-        self.use_silero = False
-        self.model = None
-        
-        # Only try to load Silero if torch is available
-        if TORCH_AVAILABLE:
-            try:
-                logger.info("Loading Silero VAD model...")
-                # Load Silero VAD from torch hub
-                # This requires internet access on first run to download the model (~2MB)
-                self.model, _ = torch.hub.load(repo_or_dir='snakers4/silero-vad',
-                                               model='silero_vad',
-                                               force_reload=False,
-                                               trust_repo=True)
-                self.model.eval()
-                self.use_silero = True
-                logger.info("Silero VAD loaded successfully.")
-            except Exception as e:
-                logger.error(f"Failed to load Silero VAD: {e}. Fallback to Energy VAD.")
+        # Overlap prepended to each flushed segment (seconds, capped at max_duration)
+        self.overlap_duration = 0.0
+
+        # Memory per session is bounded: overlap tail (<= max_duration)
+        # + one segment (<= max_duration) + slack for the crossing chunk.
+        self.state = acquire_session_state()
+        max_samples = int(np.ceil(max_duration * sample_rate))
+        slack = int(self.CHUNK_SLACK_SECONDS * sample_rate)
+        self.state.ring.ensure_capacity(2 * max_samples + slack)
+
+        # Shared process-wide model (loaded once, see get_silero_model)
+        self.model = get_silero_model()
+        self.use_silero = self.model is not None
+        if not self.use_silero:
+            if TORCH_AVAILABLE:
                 self.silence_threshold = 0.01 # Reset threshold for Energy VAD fallback
-        else:
-            logger.info("PyTorch not available. Using Energy-based VAD.")
-            self.silence_threshold = 0.005 # Use energy-based threshold
+            else:
+                self.silence_threshold = 0.005 # Use energy-based threshold
+
+    def set_overlap(self, seconds: float):
+        """Set how much of the previous segment is prepended to the next flush."""
+        self.overlap_duration = min(max(float(seconds), 0.0), float(self.max_duration))
+
+    def close(self):
+        """Release pooled per-session state. Call once when the session ends."""
+        if self.state is not None:
+            release_session_state(self.state)
+            self.state = None
 
     def process_chunk(self, chunk_bytes, force_speech=False):
         """
-        Process a chunk of audio bytes.
-        Returns the accumulated audio bytes if a split point is found, otherwise None.
+        Process a chunk of PCM16 audio bytes.
+        Returns a float32 view of the segment (with overlap) if a split point is
+        found, otherwise None. See flush() for the view's lifetime.
         """
-        self.buffer.write(chunk_bytes)
-        
-        # Convert chunk to numpy for processing
-        chunk_np = np.frombuffer(chunk_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+        # Convert once, straight into the preallocated buffer
+        chunk_np = self.state.ring.append(np.frombuffer(chunk_bytes, dtype=np.int16))
         
         # Calculate RMS for Debugging
         rms = np.sqrt(np.mean(chunk_np**2))
         
         chunk_duration = len(chunk_np) / self.sample_rate
-        self.total_duration += chunk_duration
+        self.state.total_duration += chunk_duration
         
         is_speech = False
         
@@ -70,29 +346,13 @@ class VADAudioBuffer:
              # logger.info(f"DEBUG: Force Speech Active. RMS={rms:.4f}")
         elif self.use_silero:
             try:
-                # Silero VAD (JIT) requires strictly 512 samples at 16kHz
-                window_size_samples = 512
-                
-                # Iterate over sub-chunks (4096 / 512 = 8 checks)
-                # If ANY sub-chunk detects speech, the whole 250ms block is considered speech
-                for i in range(0, len(chunk_np), window_size_samples):
-                    sub_chunk = chunk_np[i : i + window_size_samples]
-                    
-                    # Ensure correct size (pad if necessary)
-                    if len(sub_chunk) != window_size_samples:
-                        sub_chunk = np.pad(sub_chunk, (0, window_size_samples - len(sub_chunk)))
-                    
-                    tensor = torch.from_numpy(sub_chunk)
-                    if len(tensor.shape) == 1:
-                        tensor = tensor.unsqueeze(0)
-                    
-                    with torch.no_grad():
-                        speech_prob = self.model(tensor, self.sample_rate).item()
-                    
-                    if speech_prob > self.silence_threshold:
-                        is_speech = True
-                        break # Stop checking once speech is found
-                
+                # Score the 512-sample windows of the block (4096 / 512 = 8) in order
+                # on this session's stream. If ANY window detects speech, the whole
+                # 250ms block is considered speech.
+                windows = self.state.window_batch(chunk_np)
+                speech_probs = silero_speech_probs(self.model, windows, self.sample_rate, self.state)
+                is_speech = bool(speech_probs.max() > self.silence_threshold)
+
                 # --- Secondary RMS Check for Hallucination Filtering ---
                 # Even if Silero thinks it's speech, if it's too quiet, it's likely noise/hallucination
                 # rms = np.sqrt(np.mean(chunk_np**2)) # Already calculated above
@@ -114,23 +374,23 @@ class VADAudioBuffer:
 
         # VAD State Machine
         if not is_speech:
-            self.silence_duration += chunk_duration
+            self.state.silence_duration += chunk_duration
         else:
-            self.silence_duration = 0.0 # Reset silence counter if speech detected
+            self.state.silence_duration = 0.0 # Reset silence counter if speech detected
             
         # Decision Logic
         should_split = False
         
         # 1. Silence split
         # If we have accumulated enough audio (> 1s) and detected a silence gap
-        if self.total_duration > 1.0 and self.silence_duration >= self.min_silence_duration:
+        if self.state.total_duration > 1.0 and self.state.silence_duration >= self.min_silence_duration:
              should_split = True
-             logger.info(f"Split triggered by silence. Total: {self.total_duration:.2f}s, Silence: {self.silence_duration:.2f}s")
+             logger.info(f"Split triggered by silence. Total: {self.state.total_duration:.2f}s, Silence: {self.state.silence_duration:.2f}s")
              
         # 2. Max duration split (Force split to avoid latency)
-        elif self.total_duration >= self.max_duration:
+        elif self.state.total_duration >= self.max_duration:
              should_split = True
-             logger.info(f"Split triggered by max duration. Total: {self.total_duration:.2f}s")
+             logger.info(f"Split triggered by max duration. Total: {self.state.total_duration:.2f}s")
              
         if should_split:
             return self.flush()
@@ -138,58 +398,49 @@ class VADAudioBuffer:
         return None
 
     def flush(self):
-        """Return the current buffer content and reset."""
-        buffer_size = self.buffer.tell()
-        if buffer_size == 0:
+        """
+        Return the current segment and reset.
+
+        The result is a float32 view into the session buffer: the segment
+        preceded by up to `overlap_duration` seconds of the previous flushed
+        segment. It stays valid until the next process_chunk()/flush() call —
+        copy it if it must outlive that.
+        """
+        ring = self.state.ring
+        segment = ring.segment()
+        if segment.size == 0:
             return None
-            
-        # Read data from buffer to calculate RMS
-        self.buffer.seek(0)
-        data = self.buffer.read()
-        
-        # Convert to numpy for RMS calculation
-        flushed_np = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
-        flushed_rms = np.sqrt(np.mean(flushed_np**2))
+
+        flushed_rms = np.sqrt(np.dot(segment, segment) / segment.size)
 
         # Calculate actual duration of the flushed data
-        flushed_duration = buffer_size / (self.sample_rate * 2) # 2 bytes per sample (Int16)
-        
+        flushed_duration = segment.size / self.sample_rate
+
+        # Reset counters (buffer bookkeeping below depends on the outcome)
+        self.state.silence_duration = 0.0
+        self.state.total_duration = 0.0
+
         # Filter very short segments (less than min_speech_duration) to prevent hallucinations
         if flushed_duration < self.min_speech_duration:
             logger.info(f"Flushed segment too short ({flushed_duration:.2f}s < {self.min_speech_duration}s), discarded. RMS={flushed_rms:.5f}")
-            # Reset
-            self.buffer = io.BytesIO()
-            self.silence_duration = 0.0
-            self.total_duration = 0.0
+            ring.discard()
             return None
 
         # Filter segments that are essentially silent (very low RMS)
         SILENT_RMS_THRESHOLD = 0.0001 # Threshold for effectively silent audio
         if flushed_rms < SILENT_RMS_THRESHOLD:
             logger.info(f"Flushed segment too silent (RMS={flushed_rms:.5f} < {SILENT_RMS_THRESHOLD:.5f}), discarded.")
-            # Reset
-            self.buffer = io.BytesIO()
-            self.silence_duration = 0.0
-            self.total_duration = 0.0
+            ring.discard()
             return None
 
-        # self.buffer.seek(0) # Already seeked to 0
-        # data = self.buffer.read() # Already read
-
-        # Reset
-        self.buffer = io.BytesIO()
-        self.silence_duration = 0.0
-        self.total_duration = 0.0
-        
-        return data
+        overlap_samples = int(self.overlap_duration * self.sample_rate)
+        window = ring.window(overlap_samples)
+        ring.commit(keep_tail=overlap_samples)
+        return window
 
     def snapshot(self):
-        """Return the current buffer content WITHOUT resetting. Used for partial transcription."""
-        if self.buffer.tell() == 0:
+        """Return a view of the current segment WITHOUT resetting. Used for partial transcription."""
+        segment = self.state.ring.segment()
+        if segment.size == 0:
             return None
-        
-        current_pos = self.buffer.tell()
-        self.buffer.seek(0)
-        data = self.buffer.read()
-        self.buffer.seek(current_pos) # Restore position
-        return data
+        return segment
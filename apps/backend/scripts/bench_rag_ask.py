@@ -0,0 +1,120 @@
+# bench_rag_ask.py - RAG 問答端到端基準：time-to-first-token（TTFT）為主指標
+#
+# Usage:
+#   cd apps/backend
+#   python scripts/bench_rag_ask.py --base-url http://localhost:8000 --user-upn me@company.com
+#   python scripts/bench_rag_ask.py --questions questions.txt --repeat 3 --mode stream
+#
+# 對同一組問題分別打 /api/v1/rag/ask（blocking）與 /api/v1/rag/ask/stream（SSE），
+# 量測：
+#   TTFT       : 使用者看到第一個答案字的時間（blocking 版 = 整個回應完成）
+#   citations  : 串流版送出 citations 事件的時間（檢索完成）
+#   total      : 回應完整結束
+# 並帶 debug=true，彙整伺服器端回報的 per-stage timings（first_token / generate 等）。
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+DEFAULT_QUESTIONS = [
+    "上次週會決定了哪些行動項目？",
+    "Q3 預算有什麼調整？",
+    "誰負責新產品上線的時程？",
+    "最近的會議有提到招募計畫嗎？",
+    "客戶回饋的主要問題是什麼？",
+]
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _ask_blocking(client, url, payload):
+    t0 = time.perf_counter()
+    resp = client.post(url, json=payload)
+    resp.raise_for_status()
+    total = (time.perf_counter() - t0) * 1000
+    body = resp.json()
+    return {"ttft_ms": total, "citations_ms": total, "total_ms": total,
+            "server": body.get("timings") or {}, "confidence": body.get("confidence")}
+
+
+def _ask_stream(client, url, payload):
+    out = {"ttft_ms": None, "citations_ms": None, "server": {}, "confidence": None}
+    t0 = time.perf_counter()
+    with client.stream("POST", url, json=payload) as resp:
+        resp.raise_for_status()
+        event = None
+        for line in resp.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                elapsed = (time.perf_counter() - t0) * 1000
+                if event == "citations" and out["citations_ms"] is None:
+                    out["citations_ms"] = elapsed
+                elif event == "token" and out["ttft_ms"] is None:
+                    out["ttft_ms"] = elapsed
+                elif event == "done":
+                    data = json.loads(line[len("data: "):])
+                    out["server"] = data.get("timings") or {}
+                    out["confidence"] = data.get("confidence")
+    out["total_ms"] = (time.perf_counter() - t0) * 1000
+    if out["ttft_ms"] is None:  # no-result / 生成失敗：答案只在 done 裡
+        out["ttft_ms"] = out["total_ms"]
+    return out
+
+
+def _report(name, runs):
+    print(f"\n== {name} ({len(runs)} requests)")
+    print(f"{'metric':<16}{'p50 ms':>10}{'p95 ms':>10}{'avg ms':>10}")
+    for key, label in (("ttft_ms", "TTFT"), ("citations_ms", "citations"), ("total_ms", "total")):
+        vals = [r[key] for r in runs if r[key] is not None]
+        if vals:
+            print(f"{label:<16}{_pct(vals, 0.5):>10.0f}{_pct(vals, 0.95):>10.0f}{statistics.mean(vals):>10.0f}")
+    stages = sorted({k for r in runs for k in r["server"]})
+    if stages:
+        print("server stages (avg ms): " + ", ".join(
+            f"{s}={statistics.mean(r['server'][s] for r in runs if s in r['server']):.0f}" for s in stages
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG ask benchmark (TTFT headline)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user-upn", required=True)
+    parser.add_argument("--questions", default=None, help="file with one question per line")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--mode", choices=("both", "stream", "blocking"), default="both")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [q.strip() for q in f if q.strip()]
+
+    modes = [("stream", "/api/v1/rag/ask/stream", _ask_stream),
+             ("blocking", "/api/v1/rag/ask", _ask_blocking)]
+    if args.mode != "both":
+        modes = [m for m in modes if m[0] == args.mode]
+
+    with httpx.Client(base_url=args.base_url, timeout=args.timeout) as client:
+        for name, path, fn in modes:
+            runs = []
+            for _ in range(args.repeat):
+                for q in questions:
+                    payload = {"question": q, "user_upn": args.user_upn, "top_k": args.top_k, "debug": True}
+                    try:
+                        runs.append(fn(client, path, payload))
+                    except httpx.HTTPError as e:
+                        print(f"[{name}] {q!r} failed: {e}")
+            if runs:
+                _report(name, runs)
+
+
+if __name__ == "__main__":
+    main()
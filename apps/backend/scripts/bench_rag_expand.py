@@ -0,0 +1,288 @@
+# bench_rag_expand.py - RAG sentence-window expansion 基準（set-based vs 逐筆）
+#
+# Usage:
+#   cd apps/backend
+#   python scripts/bench_rag_expand.py                         # temp SQLite, synthetic data
+#   python scripts/bench_rag_expand.py --rtt-ms 1.5            # add per-query latency (≈ Cloud SQL RTT)
+#   python scripts/bench_rag_expand.py --database-url postgresql://... --hits 15 --window 5
+#
+# Compares app.rag.chunker.expand_with_context (one windowed query, merged
+# overlaps) with the old per-hit expansion kept below (1 + N queries): round trips, latency, and
+# prompt size. Without --database-url the synthetic tables live in a temp file.
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Add parent to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.rag.chunker import ExpandedRow, _format_expanded_content, expand_with_context
+
+
+# ============================================
+# Old per-hit expansion (baseline)
+# ============================================
+def _get_segment_orders(db, segment_ids):
+    """
+    Batch query 取得每個 segment 的 (meeting_id, order)。
+
+    Returns:
+        {segment_id: (meeting_id, order_int)}
+    """
+    if not segment_ids:
+        return {}
+
+    placeholders = ",".join(f":id_{i}" for i in range(len(segment_ids)))
+    sql = text(
+        'SELECT id, meeting_id, "order" '
+        "FROM transcript_segments "
+        f"WHERE id IN ({placeholders})"
+    )
+    params = {f"id_{i}": sid for i, sid in enumerate(segment_ids)}
+
+    return {
+        r.id: (r.meeting_id, r.order)
+        for r in db.execute(sql, params).fetchall()
+    }
+
+
+def _fetch_neighbours(
+    db,
+    meeting_id: str,
+    center_order: int,
+    window: int,
+):
+    """
+    撈 [center_order - window, center_order + window] 範圍的 segments，
+    依 order 升序回傳。
+    """
+    sql = text(
+        'SELECT id, speaker, start_time, end_time, content_polished, '
+        'content_raw, "order" '
+        'FROM transcript_segments '
+        'WHERE meeting_id = :meeting_id '
+        '  AND "order" BETWEEN :lo AND :hi '
+        'ORDER BY "order"'
+    )
+    return db.execute(
+        sql,
+        {
+            "meeting_id": meeting_id,
+            "lo": center_order - window,
+            "hi": center_order + window,
+        },
+    ).fetchall()
+
+
+def _expand_per_hit(
+    db,
+    retrieved_rows,
+    window: int = 2,
+):
+    """
+    舊版逐筆擴展（1 次 order lookup + 每個命中 1 次 range query，O(N+1) round-trips，
+    不合併重疊視窗）。benchmark 對照組。
+    """
+    if not retrieved_rows:
+        return []
+
+    if window < 0:
+        window = 0
+
+    # Step 1: batch query 取每個 retrieved row 的 (meeting_id, order)
+    seg_ids = [str(r.id) for r in retrieved_rows]
+    orders_map = _get_segment_orders(db, seg_ids)
+
+    expanded_list = []
+
+    for row in retrieved_rows:
+        sid = str(row.id)
+
+        # Fallback: 若找不到 order（資料髒），原樣包成 ExpandedRow
+        if sid not in orders_map:
+            content = (
+                getattr(row, "content_polished", None)
+                or getattr(row, "content_raw", None)
+                or ""
+            )
+            expanded_list.append(
+                ExpandedRow(
+                    id=sid,
+                    meeting_id=getattr(row, "meeting_id", ""),
+                    meeting_title=getattr(row, "meeting_title", None),
+                    speaker=getattr(row, "speaker", None),
+                    start_time=getattr(row, "start_time", None),
+                    end_time=getattr(row, "end_time", None),
+                    content=content,
+                    distance=float(getattr(row, "distance", 0.0)),
+                    expansion_size=1,
+                    hit_content=content,
+                )
+            )
+            continue
+
+        meeting_id, center_order = orders_map[sid]
+
+        # window=0 時就只返回命中段本身的內容；用 _fetch_neighbours(0) 仍 work
+        neighbours = _fetch_neighbours(db, meeting_id, center_order, window)
+
+        if not neighbours:
+            # 極端情況：DB 內找不到（race condition）→ fallback 原 content
+            content = (
+                getattr(row, "content_polished", None)
+                or getattr(row, "content_raw", None)
+                or ""
+            )
+            hit_content = content
+        else:
+            content = _format_expanded_content(neighbours, center_order)
+            # 找出命中段的純文字（給 frontend 高亮）
+            hit_content = ""
+            for nb in neighbours:
+                if nb.order == center_order:
+                    hit_content = (
+                        getattr(nb, "content_polished", None)
+                        or getattr(nb, "content_raw", None)
+                        or ""
+                    )
+                    break
+
+        expanded_list.append(
+            ExpandedRow(
+                id=sid,
+                meeting_id=meeting_id,
+                meeting_title=getattr(row, "meeting_title", None),
+                speaker=getattr(row, "speaker", None),
+                start_time=getattr(row, "start_time", None),
+                end_time=getattr(row, "end_time", None),
+                content=content,
+                distance=float(getattr(row, "distance", 0.0)),
+                expansion_size=len(neighbours),
+                hit_content=hit_content,
+            )
+        )
+
+    return expanded_list
+
+
+def _seed_sqlite(engine, meetings: int, segments: int):
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE transcript_segments (id TEXT PRIMARY KEY, meeting_id TEXT, "order" INTEGER, '
+            'speaker TEXT, start_time REAL, end_time REAL, content_polished TEXT, content_raw TEXT)'
+        ))
+        conn.execute(text('CREATE INDEX idx_seg_meeting_order ON transcript_segments (meeting_id, "order")'))
+        for m in range(meetings):
+            conn.execute(
+                text("INSERT INTO transcript_segments VALUES (:id, :mid, :o, :spk, :st, :et, :c, NULL)"),
+                [
+                    {"id": f"m{m}-{o}", "mid": f"m{m}", "o": o, "spk": f"SPEAKER_0{o % 3}",
+                     "st": o * 4.0, "et": o * 4.0 + 4, "c": f"會議 {m} 第 {o} 句，討論預算與時程。"}
+                    for o in range(segments)
+                ],
+            )
+
+
+def _hit_sets(db, n_sets: int, hits: int, clustered: float, seed: int = 0):
+    """Retrieval-like hit lists: some hits land near each other in the same meeting."""
+    rng = random.Random(seed)
+    rows = db.execute(text('SELECT id, meeting_id, "order" FROM transcript_segments')).fetchall()
+    by_meeting = {}
+    for r in rows:
+        by_meeting.setdefault(r.meeting_id, []).append(r)
+    meetings = list(by_meeting)
+    out = []
+    for _ in range(n_sets):
+        picked = []
+        while len(picked) < hits:
+            if picked and rng.random() < clustered:
+                base = rng.choice(picked)
+                segs = by_meeting[base.meeting_id]
+                o = min(len(segs) - 1, max(0, base.order + rng.randint(-6, 6)))
+                r = segs[o]
+            else:
+                r = rng.choice(by_meeting[rng.choice(meetings)])
+            if all(p.id != r.id for p in picked):
+                picked.append(r)
+        out.append([
+            SimpleNamespace(id=r.id, meeting_id=r.meeting_id, meeting_title="bench", speaker=None,
+                            start_time=r.order * 4.0, end_time=r.order * 4.0 + 4,
+                            content_polished=None, content_raw=None, distance=0.1 + 0.01 * i)
+            for i, r in enumerate(picked)
+        ])
+    return out
+
+
+def _bench(db, fn, hit_sets, counter):
+    latencies, queries, chars = [], [], []
+    for rows in hit_sets:
+        before = counter["n"]
+        t0 = time.perf_counter()
+        expanded = fn(db, rows)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        queries.append(counter["n"] - before)
+        chars.append(sum(len(e.content) for e in expanded))
+    latencies.sort()
+    return {
+        "avg_ms": statistics.mean(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "queries": statistics.mean(queries),
+        "prompt_chars": statistics.mean(chars),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=None, help="existing DB (uses real transcript_segments)")
+    parser.add_argument("--meetings", type=int, default=50)
+    parser.add_argument("--segments", type=int, default=400, help="segments per synthetic meeting")
+    parser.add_argument("--hits", type=int, default=10, help="retrieved rows per question (top_k)")
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--clustered", type=float, default=0.4, help="share of hits near an earlier hit")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network round trip per query")
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "bench_expand.db")
+        engine = create_engine(f"sqlite:///{path}")
+        _seed_sqlite(engine, args.meetings, args.segments)
+
+    counter = {"n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+        if args.rtt_ms:
+            time.sleep(args.rtt_ms / 1000)
+
+    db = sessionmaker(bind=engine)()
+    hit_sets = _hit_sets(db, args.questions, args.hits, args.clustered)
+
+    variants = [
+        ("per-hit (old)", lambda d, rows: _expand_per_hit(d, rows, window=args.window)),
+        ("set-based", lambda d, rows: expand_with_context(d, rows, window=args.window, merge_overlaps=False)),
+        ("set-based + merge", lambda d, rows: expand_with_context(d, rows, window=args.window)),
+    ]
+    print(f"hits={args.hits} window={args.window} clustered={args.clustered} "
+          f"questions={args.questions} rtt={args.rtt_ms}ms")
+    print(f"{'variant':<20}{'avg ms':>10}{'p95 ms':>10}{'queries':>10}{'prompt chars':>14}")
+    for name, fn in variants:
+        _bench(db, fn, hit_sets[:5], counter)  # warm-up
+        r = _bench(db, fn, hit_sets, counter)
+        print(f"{name:<20}{r['avg_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['queries']:>10.1f}{r['prompt_chars']:>14.0f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Unit tests for app.access_set — cached per-user meeting-id access set."""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import access_set
+from app.models import Meeting, MeetingParticipant
+from app.services.rag_greeting import get_accessible_meeting_stats
+
+_run = asyncio.run
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    access_set.reset_stats()
+    yield
+    access_set.reset_stats()
+
+
+@pytest.fixture
+def bind(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'access.db'}")
+    Meeting.metadata.create_all(engine, tables=[Meeting.__table__, MeetingParticipant.__table__])
+    with Session(engine) as s:
+        for mid in ("m1", "m2", "m3"):
+            s.add(Meeting(id=mid, title=f"會議 {mid}", created_at=datetime(2026, 10, int(mid[1]))))
+        s.add(MeetingParticipant(meeting_id="m1", user_upn="a@x.com"))
+        s.add(MeetingParticipant(meeting_id="m2", user_upn="a@x.com"))
+        s.add(MeetingParticipant(meeting_id="m3", user_upn="b@x.com"))
+        s.commit()
+    return engine
+
+
+def _allowed(engine, upn="a@x.com"):
+    with Session(engine) as s:
+        return access_set.allowed_meeting_ids(s, upn)
+
+
+def test_access_set_is_cached_per_user(bind):
+    assert _allowed(bind) == {"m1", "m2"}
+    assert _allowed(bind) == {"m1", "m2"}
+    assert _allowed(bind, "b@x.com") == {"m3"}
+
+    stats = access_set.get_stats()
+    assert (stats["hits"], stats["misses"], stats["users"]) == (1, 2, 2)
+
+
+def test_participant_insert_invalidates_after_commit(bind):
+    assert _allowed(bind) == {"m1", "m2"}
+    with Session(bind) as writer:
+        writer.add(MeetingParticipant(meeting_id="m3", user_upn="a@x.com"))
+        writer.flush()
+        assert _allowed(bind) == {"m1", "m2"}  # 尚未 commit：仍是舊集合
+        writer.commit()
+    assert _allowed(bind) == {"m1", "m2", "m3"}
+    assert _allowed(bind, "b@x.com") == {"m3"}
+
+    with Session(bind) as writer:  # rollback：不失效
+        writer.add(MeetingParticipant(meeting_id="m1", user_upn="b@x.com"))
+        writer.flush()
+        writer.rollback()
+    assert access_set.get_stats()["invalidations"] == 1
+
+
+def test_bulk_participant_delete_invalidates_everyone(bind):
+    _allowed(bind)
+    _allowed(bind, "b@x.com")
+    with Session(bind) as s:
+        s.query(MeetingParticipant).filter_by(meeting_id="m2").delete()
+        s.commit()
+    assert access_set.get_stats()["users"] == 0
+    assert _allowed(bind) == {"m1"}
+
+
+def test_load_racing_with_invalidation_is_not_cached():
+    db = MagicMock()
+
+    def execute(sql, params=None):
+        access_set.invalidate_users(["a@x.com"])  # 載入期間另一個請求 commit 了授權
+        result = MagicMock()
+        result.fetchall.return_value = [("m1",)]
+        return result
+
+    db.execute.side_effect = execute
+    assert access_set.allowed_meeting_ids(db, "a@x.com") == {"m1"}
+    assert access_set.get_stats()["users"] == 0
+
+
+def test_scope_and_id_filter():
+    pg = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")))
+    assert access_set.id_filter(pg, "ts.meeting_id", {"m2", "m1"}) == (
+        " AND ts.meeting_id = ANY(:allowed_ids)", {"allowed_ids": ["m1", "m2"]},
+    )
+    db = MagicMock()
+    assert access_set.id_filter(db, "m.id", ["m2", "m1"]) == (
+        " AND m.id IN (:allowed_ids_0,:allowed_ids_1)", {"allowed_ids_0": "m1", "allowed_ids_1": "m2"},
+    )
+    assert access_set.id_filter(db, "m.id", []) == (" AND 1 = 0", {})
+
+    db.execute.return_value.fetchall.return_value = [("m1",), ("m2",)]
+    assert access_set.resolve_scope(db, "a@x.com", ["m2", "m9"]) == {"m2"}
+    assert access_set.resolve_scope(db, None, ["m9"]) == {"m9"}
+    assert access_set.resolve_scope(db) is None
+
+
+def test_rag_scope_uses_access_set_and_keeps_deleted_filter(bind):
+    from app.rag.answer_cache import load_scope
+
+    with Session(bind) as s:
+        s.get(Meeting, "m2").deleted_at = datetime(2026, 10, 5)
+        s.commit()
+
+    with Session(bind) as s:
+        assert [mid for mid, _ in load_scope(s, "a@x.com")] == ["m1"]
+
+
+def test_non_ann_paths_see_participants_written_elsewhere(bind):
+    """list_meetings / greeting 走 JOIN：別的 instance 寫入的授權（本 process 沒失效）立刻可見。"""
+    from app.routes.meetings import list_meetings
+
+    assert _allowed(bind, "b@x.com") == {"m3"}
+    with bind.begin() as conn:  # raw SQL：模擬另一個 instance，不觸發本地失效
+        conn.execute(MeetingParticipant.__table__.insert().values(meeting_id="m1", user_upn="b@x.com"))
+
+    with Session(bind) as s:
+        assert access_set.allowed_meeting_ids(s, "b@x.com") == {"m3"}  # 快取仍是舊集合
+        assert get_accessible_meeting_stats(s, "b@x.com")["meeting_count"] == 2
+        items = _run(list_meetings(skip=0, limit=100, user_upn=None, keyword=None, date_from=None,
+                                   date_to=None, include_meta=False, db=s,
+                                   current_user={"email": "b@x.com"}))
+        assert sorted(m.id for m in items) == ["m1", "m3"]
@@ -0,0 +1,190 @@
+"""
+Unit tests for app.aligner — NumPy-vectorized Smith-Waterman.
+
+Run:
+  cd apps/backend
+  pytest tests/test_aligner.py -v
+
+向量化版本必須與原本逐格的 _smith_waterman_python 結果完全一致
+（分數、起訖位置、traceback），含同音字部分分數。
+"""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.aligner import MultiSpeakerScriptAligner, ScriptAligner
+
+
+_ALPHABET = "諸祝竹朱夜一億的得地事是式晚碗萬我們今天來談談會議紀錄"
+
+
+def _random_text(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice(_ALPHABET) for _ in range(n))
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_vectorized_matches_reference(seed):
+    rng = random.Random(seed)
+    aligner = ScriptAligner()
+    target = _random_text(rng, rng.randint(1, 200))
+    query = _random_text(rng, rng.randint(1, 30))
+
+    assert aligner.smith_waterman(query, target) == aligner._smith_waterman_python(query, target)
+
+
+def test_homophone_scores_partial_match():
+    aligner = ScriptAligner()
+    # 祝 -> 諸 is a homophone pair: 2 exact + 1 homophone
+    result = aligner.smith_waterman("祝福你", "諸福你")
+    assert result == aligner._smith_waterman_python("祝福你", "諸福你")
+    assert result[2] == 2 * ScriptAligner.MATCH_SCORE + ScriptAligner.HOMOPHONE_SCORE
+
+
+def test_empty_inputs():
+    aligner = ScriptAligner()
+    assert aligner.smith_waterman("", "abc") == (0, 0, 0)
+    assert aligner.smith_waterman("abc", "") == (0, 0, 0)
+
+
+def test_band_restricts_to_expected_diagonal():
+    aligner = ScriptAligner()
+    target = "今天來談談會議紀錄" + "我們" * 20 + "今天來談談會議紀錄"
+    query = "今天來談談會議紀錄"
+
+    # Unbanded: the first (earliest) copy wins on ties
+    start, end, _ = aligner.smith_waterman(query, target)
+    assert (start, end) == (0, len(query))
+
+    # Banded around the second copy
+    offset = len(target) - len(query)
+    start, end, score = aligner.smith_waterman(query, target, band=(offset - 2, offset + 2))
+    assert (start, end) == (offset, len(target))
+    assert score == len(query) * ScriptAligner.MATCH_SCORE
+
+
+def test_find_match_uses_precomputed_index():
+    script = "\n".join([
+        "[1] 今天我們來談談會議紀錄 ||| Today we discuss meeting notes",
+        "[2] 祝大家新年快樂 ||| Happy new year everyone",
+        "[3] 萬事如意 ||| All the best",
+    ])
+    aligner = MultiSpeakerScriptAligner()
+    aligner.load_script(script)
+
+    assert len(aligner._script_ids) == len(aligner.full_cn_text)
+
+    match = aligner.find_match("諸大家新年快樂")  # homophone at the first char
+    assert match is not None
+    assert match["index"] == 1
+    assert match["target"] == "Happy new year everyone"
+
+
+def test_reload_rebuilds_index():
+    aligner = ScriptAligner()
+    aligner.load_script("[1] 甲乙丙丁 ||| A")
+    aligner.load_script("")
+    assert len(aligner._script_ids) == 0
+    assert aligner.find_match("甲乙丙丁") is None
+
+
+# ============================================
+# Normal window: cursor-centred band
+# ============================================
+def _spy_align(monkeypatch, aligner):
+    bands = []
+    real = aligner._align_ids
+    monkeypatch.setattr(aligner, "_align_ids",
+                        lambda *a: bands.append(a[4] if len(a) > 4 else None) or real(*a))
+    return bands
+
+
+def test_normal_window_band_matches_full_window(monkeypatch):
+    aligner = ScriptAligner()
+    aligner.load_script(_long_script(60))
+    for idx in (3, 10, 11):
+        seg = aligner.segments[idx]
+        aligner.current_cursor = seg["start_idx"]
+        start = max(0, aligner.current_cursor - aligner.NORMAL_WINDOW_BACK)
+        end = min(len(aligner.full_cn_text), aligner.current_cursor + aligner.NORMAL_WINDOW_FORWARD)
+        query = seg["normalized"]
+
+        expected = aligner._align_script(query, start, end)
+        bands = _spy_align(monkeypatch, aligner)
+        assert aligner._window_search(query, start, end, 0.5) == expected
+        assert len(bands) == 1 and bands[0] is not None  # band pass was enough
+        monkeypatch.undo()
+
+
+def test_normal_window_falls_back_beyond_band(monkeypatch):
+    aligner = ScriptAligner()
+    aligner.load_script(_long_script(60))
+    far = next(s for s in aligner.segments
+               if aligner.NORMAL_BAND_FORWARD + 60 < s["start_idx"] < aligner.NORMAL_WINDOW_FORWARD - 40)
+
+    bands = _spy_align(monkeypatch, aligner)
+    match = aligner.find_match(far["normalized"])
+
+    assert match["index"] == far["index"]
+    assert bands[0] is not None and bands[-1] is None  # band miss → full window
+
+
+# ============================================
+# k-gram anchor index (global resync)
+# ============================================
+def _long_script(n_lines=400, seed=7):
+    rng = random.Random(seed)
+    alphabet = "天地玄黃宇宙洪荒日月盈昃辰宿列張寒來暑往秋收冬藏閏餘成歲律呂調陽雲騰致雨露結為霜金生麗水玉出崑岡劍號巨闕珠稱夜光"
+    lines = []
+    for i in range(n_lines):
+        seg = "".join(rng.choice(alphabet) for _ in range(rng.randint(15, 30)))
+        lines.append(f"[{i + 1}] {seg} ||| line {i + 1}")
+    return "\n".join(lines)
+
+
+def test_resync_finds_far_segment_via_anchors(monkeypatch):
+    aligner = ScriptAligner()
+    aligner.load_script(_long_script())
+    target = aligner.segments[350]
+    aligner.consecutive_failures = aligner.MAX_CONSECUTIVE_FAILURES
+
+    calls = []
+    real = aligner._align_ids
+    monkeypatch.setattr(aligner, "_align_ids", lambda *a: calls.append(len(a[2])) or real(*a))
+
+    match = aligner.find_match(target["normalized"])
+
+    assert match["is_global_resync"] is True
+    assert match["index"] == 350
+    assert calls and len(calls) <= aligner.RESYNC_MAX_CANDIDATES
+    assert max(calls) < 200  # short windows, not the whole script
+
+
+def test_resync_matches_full_scan_with_homophone_keys():
+    aligner = ScriptAligner()
+    aligner.load_script(_long_script() + "\n[999] 我們祝大家的事業順利 ||| cheers")
+    text = aligner.full_cn_text
+    query = "我們諸大家地事業順利"  # 祝→諸, 的→地
+
+    expected = aligner._align_script(query, 0, len(text))
+    assert aligner._resync_search(query, 0, len(text)) == expected
+
+
+def test_resync_without_anchors_reports_no_match():
+    aligner = ScriptAligner()
+    aligner.load_script(_long_script())
+    assert aligner._resync_search("ABCDEFG", 0, len(aligner.full_cn_text)) == (0, 0, 0)
+
+
+def test_resync_restricted_to_zone():
+    script = "===SPEAKER:A===\n" + _long_script(60, seed=1) + "\n===SPEAKER:B===\n" + _long_script(60, seed=2)
+    aligner = MultiSpeakerScriptAligner()
+    aligner.load_script(script)
+    zone_a, zone_b = aligner.speaker_zones[0], aligner.speaker_zones[1]
+    query = aligner.full_cn_text[zone_b[0] + 40:zone_b[0] + 60]
+
+    start, end, score = aligner._resync_search(query, zone_a[0], zone_a[1])
+    assert zone_a[0] + end <= zone_a[1]
+    assert score < len(query) * aligner.MATCH_SCORE
@@ -0,0 +1,85 @@
+"""Unit tests for app.embedding_cache — (model, text hash) → vector cache."""
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from app import embedding_cache
+from app.embedding_cache import embed_with_cache, ensure_embedding_cache_table
+
+
+class _FakeProvider:
+    def __init__(self, model_id="fake@768", fail=()):
+        self.model_id = model_id
+        self.fail = set(fail)
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [None if t in self.fail else [float(len(t)), 0.5, -1.25] for t in texts]
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'emb.db'}")
+    ensure_embedding_cache_table(engine)
+    monkeypatch.setattr(embedding_cache, "_db_engine", lambda: engine)
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_ENABLED", True)
+    embedding_cache.reset_stats()
+    yield engine
+    embedding_cache.reset_stats()
+
+
+def test_second_run_skips_provider(cache_db):
+    provider = _FakeProvider()
+    texts = ["[甲] 預算砍一成", "[乙] 下季招募", "[甲] 預算砍一成"]
+
+    first = embed_with_cache(provider, texts)
+    second = embed_with_cache(provider, texts)
+
+    assert provider.calls == [["[甲] 預算砍一成", "[乙] 下季招募"]]  # in-batch dup embedded once
+    assert first == second and first[0] == first[2]
+    stats = embedding_cache.get_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["deduped"] == 2
+
+
+def test_vectors_round_trip_as_float32(cache_db):
+    provider = _FakeProvider()
+    provider.embed = lambda texts: [[0.1, 0.2, 0.3] for _ in texts]
+    embed_with_cache(provider, ["a"])
+    cached = embed_with_cache(provider, ["a"])[0]
+    assert np.allclose(cached, [0.1, 0.2, 0.3], atol=1e-7)
+
+
+def test_failed_items_are_not_cached(cache_db):
+    provider = _FakeProvider(fail={"bad"})
+    assert embed_with_cache(provider, ["ok", "bad"])[1] is None
+    provider.fail.clear()
+    assert embed_with_cache(provider, ["ok", "bad"])[1] is not None
+    assert provider.calls[-1] == ["bad"]
+
+
+def test_model_id_partitions_cache(cache_db):
+    embed_with_cache(_FakeProvider("m1"), ["同一段文字"])
+    other = _FakeProvider("m2")
+    embed_with_cache(other, ["同一段文字"])
+    assert other.calls == [["同一段文字"]]
+
+
+def test_bulk_lookup_and_insert_are_chunked(cache_db, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_CHUNK", 3)
+    provider = _FakeProvider()
+    texts = [f"segment {i}" for i in range(10)]
+    embed_with_cache(provider, texts)
+    assert embed_with_cache(provider, texts) == embed_with_cache(_FakeProvider(), texts)
+    assert len(provider.calls) == 1
+
+
+def test_missing_table_falls_back_to_provider(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    monkeypatch.setattr(embedding_cache, "_db_engine", lambda: engine)
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_ENABLED", True)
+    embedding_cache.reset_stats()
+    provider = _FakeProvider()
+
+    assert embed_with_cache(provider, ["x"]) == [[1.0, 0.5, -1.25]]
+    assert embedding_cache.get_stats()["errors"] == 2  # lookup + store, both non-fatal
@@ -0,0 +1,123 @@
+"""Unit tests for the pluggable EmbeddingProvider layer in app.embedding."""
+import hashlib
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app import embedding
+from app.embedding import (
+    EMBEDDING_DIMENSION,
+    GeminiEmbeddingProvider,
+    LocalEmbeddingProvider,
+    embed_single_text,
+    embed_texts,
+    set_embedding_provider,
+)
+
+
+def _hash_encoder(dim, calls=None):
+    """Deterministic offline stand-in for a sentence-transformer."""
+    def encode(texts):
+        if calls is not None:
+            calls.append(len(texts))
+        rows = []
+        for t in texts:
+            seed = int(hashlib.md5(t.encode()).hexdigest()[:8], 16)
+            rows.append(np.random.default_rng(seed).standard_normal(dim))
+        return np.array(rows, dtype=np.float32)
+    return encode
+
+
+@pytest.fixture(autouse=True)
+def _reset_provider(monkeypatch):
+    # embedding_cache has its own tests; keep these off the DB
+    monkeypatch.setattr("app.embedding_cache.EMBEDDING_CACHE_ENABLED", False)
+    yield
+    set_embedding_provider(None)
+
+
+def test_local_provider_projects_to_768_and_preserves_cosine():
+    enc = _hash_encoder(384)
+    provider = LocalEmbeddingProvider(model_name="fake-384", encoder=enc, max_wait_ms=0)
+    texts = ["預算砍一成", "下季招募計畫", "產品上線時程"]
+
+    vecs = np.array(provider.embed(texts))
+
+    assert vecs.shape == (3, EMBEDDING_DIMENSION)
+    assert np.allclose(np.linalg.norm(vecs, axis=1), 1.0, atol=1e-5)
+    native = enc(texts)
+    native /= np.linalg.norm(native, axis=1, keepdims=True)
+    assert np.allclose(vecs @ vecs.T, native @ native.T, atol=1e-4)
+    assert provider.model_id == "local:fake-384@768"
+
+
+def test_local_provider_is_deterministic_across_instances():
+    a = LocalEmbeddingProvider(model_name="fake", encoder=_hash_encoder(512), max_wait_ms=0)
+    b = LocalEmbeddingProvider(model_name="fake", encoder=_hash_encoder(512), max_wait_ms=0)
+    assert np.allclose(a.embed(["週會"]), b.embed(["週會"]))
+
+
+def test_dynamic_batching_coalesces_concurrent_callers():
+    calls = []
+    provider = LocalEmbeddingProvider(model_name="fake", encoder=_hash_encoder(768, calls),
+                                      max_batch=16, max_wait_ms=50, workers=2)
+    results = {}
+
+    def worker(i):
+        results[i] = provider.embed([f"q{i}-{j}" for j in range(3)])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(len(v) == 3 and all(x is not None for x in v) for v in results.values())
+    assert sum(calls) == 24 and max(calls) <= 16
+    assert len(calls) < 8  # fewer model calls than callers
+    # each caller gets its own vectors back, regardless of batch order
+    solo = LocalEmbeddingProvider(model_name="fake", encoder=_hash_encoder(768), max_wait_ms=0)
+    assert np.allclose(results[3], solo.embed(["q3-0", "q3-1", "q3-2"]))
+
+
+def test_local_failure_returns_none_per_item():
+    def boom(texts):
+        raise RuntimeError("model missing")
+
+    provider = LocalEmbeddingProvider(model_name="fake", encoder=boom, max_wait_ms=0)
+    assert provider.embed(["a", "b"]) == [None, None]
+    assert provider.describe()["batcher"]["failures"] == 2
+
+
+def test_gemini_provider_keeps_indices_aligned_on_batch_failure():
+    client = MagicMock()
+    client.models.embed_content.side_effect = [
+        SimpleNamespace(embeddings=[SimpleNamespace(values=[1.0]), SimpleNamespace(values=[2.0])]),
+        RuntimeError("503"),
+    ]
+    provider = GeminiEmbeddingProvider(client=client, batch_size=2)
+    assert provider.embed(["a", "b", "c"]) == [[1.0], [2.0], None]
+
+
+def test_module_helpers_route_through_configured_provider():
+    provider = LocalEmbeddingProvider(model_name="fake", encoder=_hash_encoder(768), max_wait_ms=0)
+    set_embedding_provider(provider)
+
+    assert len(embed_texts(None, ["a", "b"])) == 2
+    assert len(embed_single_text(MagicMock(), "  週會  ")) == EMBEDDING_DIMENSION
+    assert embedding.get_embedding_provider() is provider
+
+
+def test_query_cache_key_follows_provider_model_id():
+    from app.rag import query_cache
+
+    query_cache.reset_stats()
+    set_embedding_provider(LocalEmbeddingProvider(model_name="m1", encoder=_hash_encoder(768), max_wait_ms=0))
+    v1 = query_cache.cached_query_embedding(None, "預算")
+    set_embedding_provider(LocalEmbeddingProvider(model_name="m2", encoder=_hash_encoder(384), max_wait_ms=0))
+    v2 = query_cache.cached_query_embedding(None, "預算")
+    assert v1 != v2  # different vector space ⇒ no stale cache hit
+    query_cache.reset_stats()
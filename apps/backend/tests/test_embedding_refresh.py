@@ -0,0 +1,193 @@
+"""Unit tests for app.embedding_refresh — dirty tracking + coalesced windowed re-embed."""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import embedding_cache
+from app.embedding_refresh import (
+    ReembedScheduler,
+    affected_indices,
+    mark_segments_dirty,
+    mark_summary_dirty,
+    refresh_meeting,
+)
+from app.models import Meeting, TranscriptSegment
+
+DIM = 768
+_run = asyncio.run
+
+
+class _Provider:
+    provider_name = "fake"
+    model_id = "fake@768"
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def is_available(self):
+        return True
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [None if self.fail else [1.0] * DIM for _ in texts]
+
+
+@pytest.fixture
+def bind(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'refresh.db'}")
+    Meeting.metadata.create_all(engine, tables=[Meeting.__table__, TranscriptSegment.__table__])
+    with Session(engine) as s:
+        s.add(Meeting(id="m1", title="週會", summary_json=json.dumps({"summary": "預算"}),
+                      summary_embedding=[0.0] * DIM))
+        for o in range(8):
+            s.add(TranscriptSegment(id=f"s{o}", meeting_id="m1", order=o, speaker="A",
+                                    content_raw=f"第{o}句",
+                                    content_embedding=None if o == 7 else [0.0] * DIM))
+        s.commit()
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_ENABLED", False)
+    return engine
+
+
+def _state(engine):
+    with engine.connect() as conn:
+        segs = conn.execute(text(
+            "SELECT id, embedding_dirty, content_embedding FROM transcript_segments ORDER BY \"order\""
+        )).fetchall()
+        meeting = conn.execute(text(
+            "SELECT embedding_version, summary_embedding_dirty, summary_embedding FROM meetings"
+        )).first()
+    return segs, meeting
+
+
+def _refreshed(segs):
+    # raw SQL on SQLite returns the pgvector text form, e.g. "[1.0,1.0,...]"
+    return [r.id for r in segs if (r.content_embedding or "").startswith("[1.0,")]
+
+
+def test_affected_indices_unions_and_clips_windows():
+    assert affected_indices(10, [0, 8], 2) == [0, 1, 2, 6, 7, 8, 9]
+    assert affected_indices(10, [4, 5], 1) == [3, 4, 5, 6]
+    assert affected_indices(3, [], 5) == []
+
+
+def test_refresh_recomputes_only_windows_around_dirty_segments(bind):
+    with Session(bind) as s:
+        mark_segments_dirty(s, ["s3"])
+        s.commit()
+    provider = _Provider()
+
+    result = refresh_meeting(bind, "m1", provider=provider, window=1)
+
+    segs, meeting = _state(bind)
+    assert result["dirty"] == 1 and result["segments"] == 3 and not result["retry"]
+    assert _refreshed(segs) == ["s2", "s3", "s4"]
+    assert provider.calls == [["[A] 第1句 [A] 第2句 [A] 第3句",
+                               "[A] 第2句 [A] 第3句 [A] 第4句",
+                               "[A] 第3句 [A] 第4句 [A] 第5句"]]
+    assert not any(r.embedding_dirty for r in segs)
+    assert meeting.embedding_version == 1
+
+
+def test_refresh_skips_segments_without_embeddings(bind):
+    with Session(bind) as s:
+        mark_segments_dirty(s, ["s7"])
+        s.commit()
+
+    result = refresh_meeting(bind, "m1", provider=_Provider(), window=1)
+
+    segs, _ = _state(bind)
+    assert result["segments"] == 1 and _refreshed(segs) == ["s6"]
+    assert segs[7].content_embedding is None  # pipeline / backfill owns first embedding
+
+
+def test_refresh_summary_only(bind):
+    with Session(bind) as s:
+        mark_summary_dirty(s, "m1")
+        s.commit()
+    provider = _Provider()
+
+    result = refresh_meeting(bind, "m1", provider=provider)
+
+    _, meeting = _state(bind)
+    assert result["summary"] and result["segments"] == 0
+    assert provider.calls == [["會議標題: 週會\n預算"]]
+    assert not meeting.summary_embedding_dirty and meeting.embedding_version == 1
+
+
+def test_failed_embed_reflags_dirty_for_retry(bind):
+    with Session(bind) as s:
+        mark_segments_dirty(s, ["s2"])
+        mark_summary_dirty(s, "m1")
+        s.commit()
+
+    result = refresh_meeting(bind, "m1", provider=_Provider(fail=True), window=1)
+
+    segs, meeting = _state(bind)
+    assert result["retry"] and result["segments"] == 0
+    assert [r.id for r in segs if r.embedding_dirty] == ["s2"]
+    assert meeting.summary_embedding_dirty and meeting.embedding_version == 0
+
+
+def test_scheduler_coalesces_bursts_and_caps_delay():
+    clock = {"t": 0.0}
+    runs = []
+    sched = ReembedScheduler(runner=lambda mid: runs.append((mid, clock["t"])) or {},
+                             debounce=5, max_delay=12, clock=lambda: clock["t"], autostart=False)
+
+    for t in (0, 4, 8, 11):  # 持續編輯：每次都重設 debounce，但不超過 first + max_delay
+        clock["t"] = t
+        sched.schedule("m1")
+    sched.schedule("m2")
+    clock["t"] = 11.9
+    assert sched.run_due() == 0
+    clock["t"] = 12
+    assert sched.run_due() == 1
+    clock["t"] = 16
+    assert sched.run_due() == 1
+
+    assert runs == [("m1", 12), ("m2", 16)]
+    stats = sched.stats()
+    assert stats["scheduled"] == 2 and stats["coalesced"] == 3 and stats["pending"] == 0
+
+
+def test_scheduler_retries_failed_refresh():
+    clock = {"t": 0.0}
+    outcomes = iter([RuntimeError("db down"), {"segments": 3}])
+
+    def runner(mid):
+        out = next(outcomes)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+    sched = ReembedScheduler(runner=runner, debounce=1, retry_delay=30,
+                             clock=lambda: clock["t"], autostart=False)
+    sched.schedule("m1")
+    clock["t"] = 1
+    sched.run_due()
+    assert sched.pending() == {"m1": 30}
+    clock["t"] = 31
+    sched.run_due()
+
+    stats = sched.stats()
+    assert stats["failures"] == 1 and stats["runs"] == 2 and stats["segments_reembedded"] == 3
+
+
+def test_segment_speaker_route_marks_dirty_and_schedules(bind, monkeypatch):
+    from app.routes import meetings
+    from app.schemas import SegmentSpeakerBulkUpdate
+
+    scheduled = []
+    monkeypatch.setattr(meetings, "schedule_reembed", scheduled.append)
+    with Session(bind) as db:
+        out = _run(meetings.update_segment_speakers(
+            "m1", SegmentSpeakerBulkUpdate(updates={"s1": "B", "s2": "A"}), db=db,
+        ))
+
+    segs, _ = _state(bind)
+    assert out["changed"] == 1 and scheduled == ["m1"]
+    assert [r.id for r in segs if r.embedding_dirty] == ["s1"]
@@ -15,24 +15,38 @@ import uuid
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
 
 
 @pytest.fixture(scope="module")
 def client(tmp_path_factory):
     """SQLite 檔案 DB（避免 :memory: per-connection 看不到 table 的坑）。
-    每個 module 跑前建獨立檔，跑完 fixture cleanup 自動由 pytest 刪 tmp 目錄。"""
+    每個 module 跑前建獨立檔，跑完 fixture cleanup 自動由 pytest 刪 tmp 目錄。
+
+    其他 test module 可能已先 import app.routes，讓 app.database 綁定預設
+    DATABASE_URL（可能殘留舊資料）；因此明確把 SessionLocal 改綁到本 module 的 DB，
+    結束後還原。"""
     db_path = tmp_path_factory.mktemp("feedback") / "test.db"
     os.environ["DATABASE_URL"] = f"sqlite:///{db_path.as_posix()}"
 
+    from app import database
     from app.main import app
-    from app.database import engine
     from app.models import Base
 
+    engine = create_engine(
+        os.environ["DATABASE_URL"], connect_args={"check_same_thread": False, "timeout": 15.0},
+    )
+    original_bind = database.SessionLocal.kw["bind"]
+    database.SessionLocal.configure(bind=engine)
+
     # 確保 feedback_reports 表已建（main.py startup hook 在 lifespan event 才跑，
     # TestClient 不一定觸發；明確 create_all 一次保險）
     Base.metadata.create_all(bind=engine)
 
-    return TestClient(app)
+    yield TestClient(app)
+
+    database.SessionLocal.configure(bind=original_bind)
+    engine.dispose()
 
 
 @pytest.fixture
@@ -0,0 +1,118 @@
+"""Unit tests for app.llm_utils.get_gemini_client — cached process-wide factory.
+
+genai.Client 以 fake 取代，驗證：
+  - 多次呼叫只建立一次 client（含多執行緒同時呼叫）
+  - 超過 GEMINI_CLIENT_MAX_AGE 重建；重建失敗時沿用舊 client
+  - pool size > 1 時輪流回傳
+  - metadata server 查 project 只查一次
+  - 呼叫端遇到連線 / 協定錯誤時 reset_gemini_client_on_transport_error 重建，API 錯誤不重建
+"""
+import threading
+import types
+
+import pytest
+
+import app.llm_utils as llm_utils
+
+
+@pytest.fixture
+def fake_genai(monkeypatch):
+    created = []
+
+    class _FakeClient:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            created.append(self)
+
+    monkeypatch.setattr(llm_utils, "genai", types.SimpleNamespace(Client=_FakeClient))
+    monkeypatch.setattr(llm_utils, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_utils, "GEMINI_CLIENT_POOL_SIZE", 1)
+    monkeypatch.setattr(llm_utils, "GEMINI_CLIENT_MAX_AGE", 3000.0)
+    llm_utils.reset_gemini_client()
+    yield created
+    llm_utils.reset_gemini_client()
+
+
+def test_client_is_cached_across_threads(fake_genai):
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(llm_utils.get_gemini_client())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fake_genai) == 1
+    assert all(c is fake_genai[0] for c in seen)
+
+
+def test_client_rebuilt_after_max_age(fake_genai, monkeypatch):
+    first = llm_utils.get_gemini_client()
+    monkeypatch.setattr(llm_utils, "GEMINI_CLIENT_MAX_AGE", 0.0)
+    second = llm_utils.get_gemini_client()
+    assert second is not first
+    assert len(fake_genai) == 2
+
+
+def test_failed_refresh_keeps_previous_client(fake_genai, monkeypatch):
+    first = llm_utils.get_gemini_client()
+    monkeypatch.setattr(llm_utils, "GEMINI_CLIENT_MAX_AGE", 0.0)
+    monkeypatch.setattr(llm_utils, "_create_gemini_client", lambda: None)
+    assert llm_utils.get_gemini_client() is first
+
+
+def test_pool_round_robin(fake_genai, monkeypatch):
+    monkeypatch.setattr(llm_utils, "GEMINI_CLIENT_POOL_SIZE", 3)
+    got = {id(llm_utils.get_gemini_client()) for _ in range(6)}
+    assert len(fake_genai) == 3
+    assert got == {id(c) for c in fake_genai}
+
+
+def test_vertex_project_lookup_cached(fake_genai, monkeypatch):
+    calls = []
+
+    def fake_get(url, headers=None, timeout=None):
+        calls.append(url)
+        return types.SimpleNamespace(text="proj-1", raise_for_status=lambda: None)
+
+    import requests
+    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(llm_utils, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(llm_utils, "GCP_PROJECT", "")
+    monkeypatch.setattr(llm_utils, "GEMINI_CLIENT_MAX_AGE", 0.0)
+
+    for _ in range(3):
+        client = llm_utils.get_gemini_client()
+
+    assert client.kwargs["project"] == "proj-1"
+    assert len(calls) == 1
+
+
+def test_transport_error_rebuilds_pool(fake_genai, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    monkeypatch.setattr(llm_utils, "_TRANSPORT_RESET_MIN_AGE", 0.0)
+    first = llm_utils.get_gemini_client()
+    try:
+        try:
+            raise httpx.RemoteProtocolError("Server disconnected without sending a response.")
+        except httpx.RemoteProtocolError as inner:
+            raise RuntimeError("generate_content failed") from inner
+    except RuntimeError as e:
+        assert llm_utils.reset_gemini_client_on_transport_error(e) is True
+
+    second = llm_utils.get_gemini_client()
+    assert second is not first
+    assert len(fake_genai) == 2
+
+
+def test_api_error_keeps_pool(fake_genai, monkeypatch):
+    monkeypatch.setattr(llm_utils, "_TRANSPORT_RESET_MIN_AGE", 0.0)
+    first = llm_utils.get_gemini_client()
+    assert llm_utils.reset_gemini_client_on_transport_error(ValueError("429 RESOURCE_EXHAUSTED")) is False
+    assert llm_utils.get_gemini_client() is first
+
+
+def test_transport_error_burst_rebuilds_once(fake_genai):
+    first = llm_utils.get_gemini_client()
+    # pool 剛建好：同一波失敗不重建
+    assert llm_utils.reset_gemini_client_on_transport_error(ConnectionResetError()) is False
+    assert llm_utils.get_gemini_client() is first
@@ -0,0 +1,113 @@
+"""
+Unit tests for app.asr_helpers.get_live_asr_backend — live ASR backend selection
+and the on-box CPU faster-whisper backend.
+
+faster-whisper 不在 CPU image，以 fake module 注入 WhisperModel，驗證：
+  - 預設 / 未知值 → Gemini
+  - LIVE_ASR_BACKEND=local 但 faster-whisper 缺 → fallback Gemini
+  - local backend 模型只載入一次、跨 session 共用，推論走 bounded worker pool
+
+Run:
+  cd apps/backend
+  pytest tests/test_live_asr_backend.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+import app.asr_helpers as ah
+
+
+@pytest.fixture(autouse=True)
+def reset_singleton(monkeypatch):
+    """每個 test 之間重置 _live_backend singleton。"""
+    monkeypatch.setattr(ah, "_live_backend", None)
+    yield
+
+
+class _FakeWhisperModel:
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        type(self).instances += 1
+        self.kwargs = kwargs
+        self.threads = set()
+
+    def transcribe(self, audio, **kwargs):
+        self.threads.add(threading.current_thread().name)
+        self.last_kwargs = kwargs
+        return iter([SimpleNamespace(text=" 你好"), SimpleNamespace(text="世界 ")]), None
+
+
+@pytest.fixture
+def fake_faster_whisper():
+    _FakeWhisperModel.instances = 0
+    module = MagicMock()
+    module.WhisperModel = _FakeWhisperModel
+    with patch.dict("sys.modules", {"faster_whisper": module}):
+        yield module
+
+
+class TestBackendSelection:
+
+    def test_default_is_gemini(self, monkeypatch):
+        monkeypatch.setattr(ah, "LIVE_ASR_BACKEND", "gemini")
+        backend = ah.get_live_asr_backend()
+        assert isinstance(backend, ah.GeminiLiveASRBackend)
+
+    def test_local_without_faster_whisper_falls_back(self, monkeypatch):
+        monkeypatch.setattr(ah, "LIVE_ASR_BACKEND", "local")
+        with patch.object(ah.FasterWhisperLiveASRBackend, "is_available", return_value=False):
+            backend = ah.get_live_asr_backend()
+        assert isinstance(backend, ah.GeminiLiveASRBackend)
+
+    def test_local_selected_when_available(self, monkeypatch, fake_faster_whisper):
+        monkeypatch.setattr(ah, "LIVE_ASR_BACKEND", "local")
+        backend = ah.get_live_asr_backend()
+        assert isinstance(backend, ah.FasterWhisperLiveASRBackend)
+        assert ah.get_live_asr_backend() is backend
+
+
+class TestFasterWhisperBackend:
+
+    def test_shared_model_and_worker_pool(self, fake_faster_whisper):
+        backend = ah.FasterWhisperLiveASRBackend(model_name="small", workers=2)
+        audio = np.zeros(16000, dtype=np.float32)
+
+        async def main():
+            return await asyncio.gather(*[
+                backend.transcribe(audio, "zh", "前文") for _ in range(6)
+            ])
+
+        texts = asyncio.run(main())
+
+        assert texts == ["你好世界"] * 6
+        assert _FakeWhisperModel.instances == 1
+        model = backend._model
+        assert model.kwargs["device"] == "cpu"
+        assert model.kwargs["compute_type"] == "int8"
+        assert model.kwargs["num_workers"] == 2
+        assert all(name.startswith("live-asr") for name in model.threads)
+        assert len(model.threads) <= 2
+
+    def test_prompt_trimmed_and_lang_normalized(self, fake_faster_whisper):
+        backend = ah.FasterWhisperLiveASRBackend()
+        backend._transcribe_sync(np.zeros(100, dtype=np.float32), "zh-nan", "字" * 500)
+
+        kwargs = backend._model.last_kwargs
+        assert kwargs["language"] == "zh"
+        assert len(kwargs["initial_prompt"]) == ah.LIVE_ASR_LOCAL_PROMPT_CHARS
+        assert kwargs["vad_filter"] is False
+
+    def test_warm_up_loads_model(self, fake_faster_whisper):
+        backend = ah.FasterWhisperLiveASRBackend()
+        backend.warm_up()
+        backend.warm_up()
+        assert _FakeWhisperModel.instances == 1
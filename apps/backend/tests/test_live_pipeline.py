@@ -0,0 +1,450 @@
+"""Unit tests for app.live_pipeline — ordered, bounded live ASR pipeline.
+
+ASR 以 fake coroutine 模擬（可控延遲），驗證：
+  - 結果依 submit 順序送出，即使後段 ASR 先完成
+  - ASR 可重疊（端到端延遲 ≈ 單段延遲，而非總和）
+  - 背壓時丟棄最舊、未開始的段落，其結果為空字串
+  - timeout / exception 轉為空結果，不中斷 pipeline
+"""
+import asyncio
+import time
+
+import numpy as np
+
+from app.live_pipeline import LiveASRPipeline, PartialCaptioner
+
+AUDIO = np.zeros(1600, dtype=np.float32)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _drain(pipeline, results, n, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while len(results) < n and time.monotonic() < deadline:
+        await asyncio.sleep(0.005)
+
+
+def test_results_emitted_in_submission_order():
+    delays = {"a": 0.15, "b": 0.01, "c": 0.05}
+    results = []
+
+    async def transcribe(audio, lang, prompt):
+        await asyncio.sleep(delays[prompt])
+        return f"text-{prompt}"
+
+    async def on_result(segment_id, text):
+        results.append((segment_id, text))
+
+    async def main():
+        p = LiveASRPipeline(transcribe, on_result, max_in_flight=3, max_pending=5)
+        p.start()
+        for sid in "abc":
+            p.submit(sid, AUDIO, "zh", sid)
+        await _drain(p, results, 3)
+        await p.close()
+
+    _run(main())
+    assert results == [("a", "text-a"), ("b", "text-b"), ("c", "text-c")]
+
+
+def test_asr_calls_overlap():
+    results = []
+
+    async def transcribe(audio, lang, prompt):
+        await asyncio.sleep(0.1)
+        return prompt
+
+    async def on_result(segment_id, text):
+        results.append(text)
+
+    async def main():
+        p = LiveASRPipeline(transcribe, on_result, max_in_flight=3, max_pending=5)
+        p.start()
+        t0 = time.monotonic()
+        for sid in "abc":
+            p.submit(sid, AUDIO, "zh", sid)
+        await _drain(p, results, 3)
+        elapsed = time.monotonic() - t0
+        await p.close()
+        return elapsed
+
+    elapsed = _run(main())
+    assert results == ["a", "b", "c"]
+    assert elapsed < 0.25  # sequential would be ≥ 0.3s
+
+
+def test_backpressure_drops_oldest_waiting_segment():
+    results = []
+    release = None
+
+    async def transcribe(audio, lang, prompt):
+        await release.wait()
+        return prompt
+
+    async def on_result(segment_id, text):
+        results.append((segment_id, text))
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        p = LiveASRPipeline(transcribe, on_result, max_in_flight=1, max_pending=2)
+        p.start()
+        for sid in "abc":
+            p.submit(sid, AUDIO, "zh", sid)
+            await asyncio.sleep(0)
+        assert p.depth == 2
+        release.set()
+        await _drain(p, results, 3)
+        await p.close()
+        return p.stats.snapshot()
+
+    stats = _run(main())
+    # "a" was already running; "b" was the oldest waiting one
+    assert results == [("a", "a"), ("b", ""), ("c", "c")]
+    assert stats["total_dropped"] == 1
+
+
+def test_submitted_audio_is_copied():
+    seen = []
+
+    async def transcribe(audio, lang, prompt):
+        seen.append(audio.copy())
+        return "ok"
+
+    async def on_result(segment_id, text):
+        pass
+
+    async def main():
+        p = LiveASRPipeline(transcribe, on_result)
+        p.start()
+        buf = np.ones(10, dtype=np.float32)
+        p.submit("a", buf, "zh", "")
+        buf[:] = 0.0  # VAD buffer reuses its memory
+        await asyncio.sleep(0.05)
+        await p.close()
+
+    _run(main())
+    assert seen and seen[0].sum() == 10.0
+
+
+def test_timeout_and_error_become_empty_results():
+    results = []
+
+    async def transcribe(audio, lang, prompt):
+        if prompt == "slow":
+            await asyncio.sleep(1.0)
+        if prompt == "boom":
+            raise RuntimeError("asr down")
+        return prompt
+
+    async def on_result(segment_id, text):
+        results.append(text)
+
+    async def main():
+        p = LiveASRPipeline(transcribe, on_result, max_in_flight=3, timeout=0.05)
+        p.start()
+        for sid in ("slow", "boom", "ok"):
+            p.submit(sid, AUDIO, "zh", sid)
+        await _drain(p, results, 3)
+        await p.close()
+        return p.stats.snapshot()
+
+    stats = _run(main())
+    assert results == ["", "", "ok"]
+    assert stats["total_failed"] == 2
+
+
+# ---------------------------------------------------------------------------
+# PartialCaptioner (interim results)
+# ---------------------------------------------------------------------------
+
+LONG_AUDIO = np.zeros(32000, dtype=np.float32)  # 2s
+
+
+def _captioner(sent, delay=0.0, **kwargs):
+    async def transcribe(audio, lang, prompt):
+        await asyncio.sleep(delay)
+        return f"partial-{audio.size}"
+
+    async def send_partial(segment_id, text):
+        sent.append((segment_id, text))
+
+    kwargs.setdefault("interval", 0.0)
+    kwargs.setdefault("enabled", True)
+    return PartialCaptioner(transcribe, send_partial, **kwargs)
+
+
+def test_partial_emitted_for_growing_segment():
+    sent = []
+
+    async def main():
+        c = _captioner(sent)
+        assert c.maybe_submit("seg", LONG_AUDIO, "zh", "")
+        await asyncio.sleep(0.02)
+        await c.close()
+
+    _run(main())
+    assert sent == [("seg", "partial-32000")]
+
+
+def test_partial_disabled_or_short_audio_skipped():
+    sent = []
+
+    async def main():
+        off = _captioner(sent, enabled=False)
+        on = _captioner(sent)
+        assert not off.maybe_submit("seg", LONG_AUDIO, "zh", "")
+        assert not on.maybe_submit("seg", np.zeros(8000, dtype=np.float32), "zh", "")
+        assert not on.maybe_submit("seg", None, "zh", "")
+
+    _run(main())
+    assert sent == []
+
+
+def test_partial_superseded_by_final_is_not_sent():
+    sent = []
+
+    async def main():
+        c = _captioner(sent, delay=0.05)
+        c.maybe_submit("seg", LONG_AUDIO, "zh", "")
+        await asyncio.sleep(0)
+        c.finalize("seg")
+        await asyncio.sleep(0.1)
+        await c.close()
+        return c.stats.snapshot()
+
+    stats = _run(main())
+    assert sent == []
+    assert stats["partial_stale"] == 1
+
+
+def test_partial_cost_cap_per_minute():
+    sent = []
+
+    async def main():
+        c = _captioner(sent, max_per_minute=2)
+        started = 0
+        for _ in range(5):
+            started += c.maybe_submit("seg", LONG_AUDIO, "zh", "")
+            await asyncio.sleep(0.01)  # let the in-flight call finish
+        await c.close()
+        return started, c.stats.snapshot()
+
+    started, stats = _run(main())
+    assert started == 2
+    assert stats["partial_calls"] == 2
+    assert stats["partial_capped"] == 3
+
+
+def test_client_cannot_lower_interval_below_server_floor():
+    from app.live_pipeline import LIVE_PARTIAL_INTERVAL
+
+    c = PartialCaptioner(None, None, enabled=False)
+    c.configure(enabled=True, interval=LIVE_PARTIAL_INTERVAL / 10)
+    assert c.enabled
+    assert c.interval == LIVE_PARTIAL_INTERVAL
+    c.configure(interval=LIVE_PARTIAL_INTERVAL * 2)
+    assert c.interval == LIVE_PARTIAL_INTERVAL * 2
+
+
+# ---------------------------------------------------------------------------
+# LiveAligner — off-loop script alignment with a latency budget
+# ---------------------------------------------------------------------------
+
+class _SlowAligner:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = []
+        self.script = None
+
+    def find_match(self, text, **kwargs):
+        time.sleep(self.delay)
+        self.calls.append(text)
+        return {"source": text}
+
+    def load_script(self, script_text):
+        self.script = script_text
+
+
+def test_aligner_runs_off_loop_within_budget():
+    from app.live_pipeline import LiveAligner, get_stats
+
+    async def main():
+        la = LiveAligner(_SlowAligner(0.05), session_id="s-ok", budget=1.0)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        result, outcome = await la.find_match("abc", threshold=0.4)
+        t.cancel()
+        sessions = get_stats()["alignment_sessions"]
+        la.close()
+        return result, outcome, ticks, sessions
+
+    result, outcome, ticks, sessions = _run(main())
+    assert (result, outcome) == ({"source": "abc"}, "ok")
+    assert ticks >= 3  # the event loop kept running during alignment
+    assert sessions["s-ok"]["align_calls"] == 1
+    assert sessions["s-ok"]["avg_align_latency_sec"] >= 0.04
+
+
+def test_aligner_overrun_degrades_and_skips_while_busy():
+    from app.live_pipeline import LiveAligner, get_stats
+
+    aligner = _SlowAligner(0.2)
+
+    async def main():
+        la = LiveAligner(aligner, session_id="s-slow", budget=0.02)
+        first = await la.find_match("one")
+        second = await la.find_match("two")  # first still running
+        await la.load_script("new script")    # waits for the running job
+        third = await la.find_match("three")
+        la.close()
+        return first, second, third
+
+    first, second, third = _run(main())
+    assert first == (None, "overrun")
+    assert second == (None, "skipped")
+    assert third == (None, "overrun")
+    assert aligner.script == "new script"
+    assert aligner.calls[0] == "one" and "two" not in aligner.calls
+    assert "s-slow" not in get_stats()["alignment_sessions"]
+
+
+# ---------------------------------------------------------------------------
+# PolishCoalescer — batched live polish with a global cap and deadline
+# ---------------------------------------------------------------------------
+
+def test_polish_segments_coalesced_into_one_batch():
+    from app.live_pipeline import PolishCoalescer
+
+    batches, sent = [], []
+
+    async def polish_batch(texts, src, tgt):
+        batches.append(list(texts))
+        return [{"polished_text": t.upper(), "translated": f"en:{t}"} for t in texts]
+
+    async def send(segment_id, content, translated, degraded):
+        sent.append((segment_id, content, translated, degraded))
+
+    async def main():
+        pc = PolishCoalescer(polish_batch, send, window=0.05, max_batch=10)
+        for sid in "abc":
+            pc.submit(sid, f"t{sid}", "zh", "en")
+            await asyncio.sleep(0.01)
+        await _drain(pc, sent, 3)
+        await pc.close()
+
+    _run(main())
+    assert batches == [["ta", "tb", "tc"]]
+    assert sent == [("a", "TA", "en:ta", False), ("b", "TB", "en:tb", False), ("c", "TC", "en:tc", False)]
+
+
+def test_polish_batch_flushes_at_max_size_and_on_language_change():
+    from app.live_pipeline import PolishCoalescer
+
+    batches, sent = [], []
+
+    async def polish_batch(texts, src, tgt):
+        batches.append((src, tgt, list(texts)))
+        return [{"polished_text": t} for t in texts]
+
+    async def send(segment_id, content, translated, degraded):
+        sent.append(segment_id)
+
+    async def main():
+        pc = PolishCoalescer(polish_batch, send, window=10.0, max_batch=2)
+        pc.submit("a", "a", "zh", "en")
+        pc.submit("b", "b", "zh", "en")   # full → flush
+        pc.submit("c", "c", "zh", "en")
+        pc.submit("d", "d", "zh", "ja")   # language change → flush "c"
+        await _drain(pc, sent, 3)
+        await pc.close()                  # "d" still waiting → dropped
+
+    _run(main())
+    assert batches == [("zh", "en", ["a", "b"]), ("zh", "en", ["c"])]
+
+
+def test_polish_global_cap_and_deadline_keep_raw(monkeypatch):
+    import app.live_pipeline as lp
+
+    monkeypatch.setattr(lp, "LIVE_POLISH_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(lp, "_polish_sem", None)
+    in_flight = peak = 0
+    sent = []
+
+    async def polish_batch(texts, src, tgt):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.15)
+        finally:
+            in_flight -= 1
+        return [{"polished_text": "ok"} for _ in texts]
+
+    async def send(segment_id, content, translated, degraded):
+        sent.append((segment_id, content, degraded))
+
+    async def main():
+        # Two sessions sharing the process-wide cap of 1
+        a = lp.PolishCoalescer(polish_batch, send, window=0.0, deadline=0.25)
+        b = lp.PolishCoalescer(polish_batch, send, window=0.0, deadline=0.25)
+        a.submit("a1", "raw-a", "zh", "en")
+        b.submit("b1", "raw-b", "zh", "en")
+        await _drain(a, sent, 2)
+        await a.close()
+        await b.close()
+
+    _run(main())
+    assert peak == 1
+    assert sorted(sent) == [("a1", "ok", False), ("b1", "raw-b", True)]
+
+
+def test_polish_slot_held_until_worker_thread_returns(monkeypatch):
+    import threading
+
+    import app.live_pipeline as lp
+
+    monkeypatch.setattr(lp, "LIVE_POLISH_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(lp, "_polish_sem", None)
+    lock = threading.Lock()
+    in_threads = peak = 0
+    sent = []
+
+    def slow_gemini(texts):
+        nonlocal in_threads, peak
+        with lock:
+            in_threads += 1
+            peak = max(peak, in_threads)
+        time.sleep(0.2)
+        with lock:
+            in_threads -= 1
+        return [{"polished_text": "ok"} for _ in texts]
+
+    async def polish_batch(texts, src, tgt):
+        return await asyncio.to_thread(slow_gemini, texts)
+
+    async def send(segment_id, content, translated, degraded):
+        sent.append((segment_id, content, degraded))
+
+    async def main():
+        a = lp.PolishCoalescer(polish_batch, send, window=0.0, deadline=0.05)
+        a.submit("a1", "raw-a", "zh", "en")
+        await _drain(a, sent, 1)
+        await a.close()  # a 已逾時放棄，但它的 thread 還在跑
+        b = lp.PolishCoalescer(polish_batch, send, window=0.0, deadline=1.0)
+        b.submit("b1", "raw-b", "zh", "en")
+        await _drain(b, sent, 2)
+        await b.close()
+
+    _run(main())
+    assert peak == 1
+    assert sent == [("a1", "raw-a", True), ("b1", "ok", False)]
@@ -0,0 +1,166 @@
+"""Unit tests for app.rag.answer_cache — corpus-versioned /rag/ask answer cache."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.embedding import bump_embedding_version
+from app.models import Meeting, MeetingParticipant, TranscriptSegment
+from app.rag import answer_cache, retrieval_plan
+from app.rag.query_cache import TTLCache
+
+_run = asyncio.run
+
+
+@pytest.fixture
+def bind(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'answers.db'}")
+    Meeting.metadata.create_all(
+        engine, tables=[Meeting.__table__, TranscriptSegment.__table__, MeetingParticipant.__table__],
+    )
+    with Session(engine) as s:
+        for mid in ("m1", "m2", "m3"):
+            s.add(Meeting(id=mid, title=f"會議 {mid}"))
+            s.add(TranscriptSegment(id=f"{mid}-s0", meeting_id=mid, order=0, content_raw="預算"))
+        for mid in ("m1", "m2"):
+            s.add(MeetingParticipant(meeting_id=mid, user_upn="a@x.com"))
+        s.add(MeetingParticipant(meeting_id="m3", user_upn="b@x.com"))
+        s.commit()
+    return engine
+
+
+def _versions(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT id, corpus_version FROM meetings")).fetchall())
+
+
+def _key(engine, question="Q3 預算？", user="a@x.com", meeting_ids=None):
+    with Session(engine) as s:
+        scope = answer_cache.load_scope(s, user, meeting_ids)
+    return answer_cache.answer_key(question, scope, "gemini-x", meeting_ids)
+
+
+def test_content_writes_bump_only_affected_meeting(bind):
+    base = _versions(bind)
+    with Session(bind) as s:
+        s.get(TranscriptSegment, "m1-s0").content_polished = "預算砍一成"
+        s.get(Meeting, "m2").status = None  # 非語料欄位：不影響
+        s.commit()
+    assert _versions(bind) == {**base, "m1": base["m1"] + 1}
+
+    with Session(bind) as s:
+        s.get(Meeting, "m2").title = "改名"
+        s.add(TranscriptSegment(id="m3-s1", meeting_id="m3", order=1, content_raw="新段落"))
+        bump_embedding_version(s, ["m1"])
+        s.commit()
+    assert _versions(bind) == {"m1": base["m1"] + 2, "m2": base["m2"] + 1, "m3": base["m3"] + 1}
+
+
+def test_key_tracks_access_set_and_corpus_version(bind):
+    key = _key(bind)
+    assert _key(bind, question="q3 預算 ?") == key  # 正規化後相同
+    assert _key(bind, meeting_ids=["m1"]) != key
+
+    with Session(bind) as s:  # 別人的會議改了：不失效
+        s.get(TranscriptSegment, "m3-s0").content_raw = "改"
+        s.commit()
+    assert _key(bind) == key
+
+    with Session(bind) as s:  # 範圍內會議改了：失效
+        s.get(TranscriptSegment, "m2-s0").content_raw = "改"
+        s.commit()
+    changed = _key(bind)
+    assert changed != key
+
+    with Session(bind) as s:  # 參與者異動：access set 不同
+        s.query(MeetingParticipant).filter_by(meeting_id="m2").delete()
+        s.commit()
+    assert _key(bind) not in (key, changed)
+
+
+@pytest.fixture
+def rag_routes(monkeypatch):
+    from app.routes import rag
+
+    monkeypatch.setattr(retrieval_plan, "_default_session_factory", MagicMock)
+    monkeypatch.setattr(rag, "RAG_INTENT_ROUTER_ENABLED", False)
+    monkeypatch.setattr(rag.query_cache, "cached_query_embedding", lambda c, q: [0.1] * 3)
+    monkeypatch.setattr(answer_cache, "RAG_ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(answer_cache, "_answer_cache", TTLCache("answer", 16, 60))
+    scope = [("m1", 0)]
+    monkeypatch.setattr(answer_cache, "load_scope", lambda db, upn, ids: list(scope))
+
+    row = SimpleNamespace(
+        id="s1", meeting_id="m1", speaker="SPEAKER_00", start_time=0.0, end_time=5.0,
+        content_polished="Q3 預算砍一成", content_raw="", meeting_title="週會", distance=0.2,
+    )
+    monkeypatch.setattr(rag, "_search_segments", lambda db, q, emb, **kw: ([row], 42))
+    monkeypatch.setattr(rag, "_find_similar_summaries", lambda db, emb, **kw: [])
+    monkeypatch.setattr(rag, "_find_title_matched_meetings", lambda db, q, **kw: [])
+    monkeypatch.setattr(rag, "expand_with_context", lambda db, rows, window: rows)
+    monkeypatch.setattr(rag, "_fetch_speaker_mappings", lambda db, ids: {})
+    logged = []
+    monkeypatch.setattr(rag, "_log_rag_query", lambda db, **kw: logged.append(kw))
+
+    client = MagicMock()
+    client.models.generate_content.return_value = SimpleNamespace(
+        text=json.dumps({"answer": "預算砍一成 [來源1]", "confidence": "high", "used_citations": [0]})
+    )
+    monkeypatch.setattr(rag, "get_gemini_client", lambda: client)
+    return SimpleNamespace(module=rag, client=client, scope=scope, logged=logged)
+
+
+def _ask(routes, **kw):
+    rag = routes.module
+    return _run(rag.ask_across_meetings(rag.RAGRequest(question="Q3 預算？", user_upn="a@x.com", **kw),
+                                        db=MagicMock()))
+
+
+def test_repeat_question_is_served_from_cache(rag_routes):
+    first = _ask(rag_routes)
+    second = _ask(rag_routes)
+
+    assert not first.cached and second.cached
+    assert second.answer == first.answer and second.citations == first.citations
+    assert second.used_citation_indices == [0] and second.segments_searched == 42
+    assert rag_routes.client.models.generate_content.call_count == 1
+    assert len(rag_routes.logged) == 2  # 命中也寫 history
+
+
+def test_bypass_flag_and_corpus_change_force_regeneration(rag_routes):
+    _ask(rag_routes)
+    assert not _ask(rag_routes, bypass_cache=True).cached
+    assert _ask(rag_routes).cached
+
+    rag_routes.scope[0] = ("m1", 1)  # 段落被編輯 → corpus_version +1
+    assert not _ask(rag_routes).cached
+    assert rag_routes.client.models.generate_content.call_count == 3
+
+
+def test_generation_failure_is_not_cached(rag_routes):
+    rag_routes.client.models.generate_content.side_effect = RuntimeError("quota")
+    _ask(rag_routes)
+    rag_routes.client.models.generate_content.side_effect = None
+
+    assert not _ask(rag_routes).cached
+    assert _ask(rag_routes).cached
+
+
+def test_stream_replays_cached_answer(rag_routes):
+    rag = rag_routes.module
+    _ask(rag_routes)
+
+    async def _collect():
+        resp = await rag.ask_across_meetings_stream(
+            rag.RAGRequest(question="Q3 預算？", user_upn="a@x.com"), db=MagicMock())
+        return "".join([part async for part in resp.body_iterator])
+
+    frames = [f.split("\n", 1) for f in _run(_collect()).strip().split("\n\n")]
+    events = [(k.split(": ", 1)[1], json.loads(d.split(": ", 1)[1])) for k, d in frames]
+    assert [k for k, _ in events] == ["citations", "token", "done"]
+    assert events[1][1]["text"] == "預算砍一成 [來源1]" and events[2][1]["cached"] is True
+    rag_routes.client.models.generate_content_stream.assert_not_called()
@@ -63,24 +63,23 @@ def _neighbour(order: int, speaker="X", content="text"):
 
 def _make_db(orders_map: dict, neighbour_map: dict) -> MagicMock:
     """
-    Create a mock db that:
-      - First execute(...) call returns segment-id → (meeting_id, order) lookup
-      - Subsequent calls return per-meeting neighbour rows from neighbour_map
+    Create a mock db for the single set-based window query:
+      - orders_map:    retrieved segment id → (meeting_id, order)
+      - neighbour_map: (meeting_id, center order) → neighbour rows of that window
+    The one execute() returns the union of all windows, deduped per
+    (meeting_id, order) and sorted — like the DISTINCT join does. The neighbour
+    at a hit's center order carries the hit's id (it *is* that segment).
     """
     db = MagicMock()
 
-    # 先決定 execute 的 fetchall 序列
-    # 因為 chunker 先 batch query orders，再對每個 row query neighbours
-    orders_rows = [
-        SimpleNamespace(id=sid, meeting_id=mid, order=order)
-        for sid, (mid, order) in orders_map.items()
-    ]
-
-    fetchall_results = [orders_rows]
-    # 每個 retrieved row 對應一次 neighbour query
-    for sid in orders_map.keys():
-        meeting_id, order = orders_map[sid]
-        fetchall_results.append(neighbour_map.get((meeting_id, order), []))
+    rows = {}
+    for sid, (meeting_id, order) in orders_map.items():
+        for nb in neighbour_map.get((meeting_id, order), []):
+            rows.setdefault((meeting_id, nb.order), SimpleNamespace(**{**vars(nb), "meeting_id": meeting_id}))
+    for sid, key in orders_map.items():
+        if key in rows:
+            rows[key].id = sid
+    fetchall_results = [[rows[k] for k in sorted(rows)]]
 
     def execute_side_effect(*args, **kwargs):
         result = MagicMock()
@@ -222,6 +221,95 @@ class TestExpandFallback:
         assert result[0].content == "raw only"
 
 
+# ============================================
+# expand_with_context — set-based query + overlap merge
+# ============================================
+class TestExpandSetBased:
+    def _window(self, lo, hi):
+        return [_neighbour(o, content=f"t{o}") for o in range(lo, hi + 1)]
+
+    def test_single_round_trip(self):
+        rows = [_retrieved_row(sid=f"s{i}", meeting_id=f"m-{i}") for i in range(5)]
+        db = _make_db(
+            orders_map={f"s{i}": (f"m-{i}", 10) for i in range(5)},
+            neighbour_map={(f"m-{i}", 10): self._window(8, 12) for i in range(5)},
+        )
+        expand_with_context(db, rows, window=2)
+        assert db.execute.call_count == 1
+
+    def test_overlapping_windows_merged_without_repeating_text(self):
+        rows = [
+            _retrieved_row(sid="far", meeting_id="m-1", start_time=100.0, end_time=105.0, distance=0.3),
+            _retrieved_row(sid="a", meeting_id="m-1", start_time=20.0, end_time=25.0, distance=0.2),
+            _retrieved_row(sid="b", meeting_id="m-1", start_time=30.0, end_time=35.0, distance=0.1),
+        ]
+        db = _make_db(
+            orders_map={"a": ("m-1", 4), "b": ("m-1", 6), "far": ("m-1", 20)},
+            neighbour_map={
+                ("m-1", 4): self._window(2, 6),
+                ("m-1", 6): self._window(4, 8),
+                ("m-1", 20): self._window(18, 22),
+            },
+        )
+        result = expand_with_context(db, rows, window=2)
+
+        assert len(result) == 2
+        assert result[0].id == "far"  # keeps retrieval order
+        merged = result[1]
+        assert merged.id == "b"  # closest hit represents the block
+        assert merged.extra["hit_ids"] == ["a", "b"]
+        assert merged.content.count("t5") == 1
+        assert merged.content.count("➤") == 2
+        assert merged.expansion_size == 7  # orders 2..8
+        assert (merged.start_time, merged.end_time) == (20.0, 35.0)
+
+    def test_merge_disabled_keeps_one_row_per_hit(self):
+        rows = [_retrieved_row(sid="a"), _retrieved_row(sid="b")]
+        db = _make_db(
+            orders_map={"a": ("m-1", 4), "b": ("m-1", 5)},
+            neighbour_map={("m-1", 4): self._window(3, 5), ("m-1", 5): self._window(4, 6)},
+        )
+        result = expand_with_context(db, rows, window=1, merge_overlaps=False)
+        assert [r.id for r in result] == ["a", "b"]
+        assert result[1].content.count("➤") == 1
+
+
+def test_set_based_matches_per_hit_windows_on_sqlite(tmp_path):
+    """每個命中的結果等於逐筆擴展：同會議 [order - 2, order + 2] 依序串接、命中標 ➤。"""
+    from sqlalchemy import create_engine, text as sql_text
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(f"sqlite:///{(tmp_path / 'chunker.db').as_posix()}")
+    segments = {}
+    with engine.begin() as conn:
+        conn.execute(sql_text(
+            'CREATE TABLE transcript_segments (id TEXT PRIMARY KEY, meeting_id TEXT, "order" INTEGER, '
+            'speaker TEXT, start_time REAL, end_time REAL, content_polished TEXT, content_raw TEXT)'
+        ))
+        for mid in ("m-1", "m-2"):
+            for o in range(30):
+                seg = {"id": f"{mid}-{o}", "mid": mid, "o": o, "st": o * 5.0, "et": o * 5.0 + 5, "c": f"{mid} 第{o}句"}
+                conn.execute(
+                    sql_text("INSERT INTO transcript_segments VALUES (:id, :mid, :o, 'S', :st, :et, :c, NULL)"), seg,
+                )
+                segments[(mid, o)] = _neighbour(o, speaker="S", content=seg["c"])
+    db = sessionmaker(bind=engine)()
+    rows = [
+        _retrieved_row(sid=sid, meeting_id=sid.rsplit("-", 1)[0], distance=0.1 * i)
+        for i, sid in enumerate(["m-1-3", "m-2-15", "m-1-28", "m-1-0"])
+    ]
+
+    fast = expand_with_context(db, rows, window=2, merge_overlaps=False)
+
+    expected = []
+    for r in rows:
+        mid, center = r.meeting_id, int(r.id.rsplit("-", 1)[1])
+        window = [segments[(mid, o)] for o in range(center - 2, center + 3) if (mid, o) in segments]
+        expected.append((r.id, _format_expanded_content(window, center), len(window), f"{mid} 第{center}句"))
+    assert [(r.id, r.content, r.expansion_size, r.hit_content) for r in fast] == expected
+    db.close()
+
+
 # ============================================
 # _format_expanded_content
 # ============================================
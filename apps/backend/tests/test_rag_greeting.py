@@ -302,7 +302,8 @@ class TestBuildGreetingPayload:
                 result.fetchone.return_value = _row(meeting_count, datetime(2026, 5, 1))
             elif "summary_json IS NOT NULL" in q:
                 rows = [
-                    _row("m1", "Q2 週會", datetime(2026, 5, 1), SAMPLE_SUMMARY_JSON),
+                    # digest not materialized yet → summary_json fallback
+                    _row("m1", "Q2 週會", datetime(2026, 5, 1), None, None, SAMPLE_SUMMARY_JSON),
                 ]
                 result.fetchall.return_value = rows
             elif "meeting_action_items" in q:
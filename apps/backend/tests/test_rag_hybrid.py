@@ -0,0 +1,152 @@
+"""Unit tests for app.rag.hybrid — CJK bigram lexical leg + RRF fusion.
+
+PostgreSQL tsvector 路徑需真的 DB；這裡驗證：
+  - Python bigram tokenizer（與 rag_cjk_bigrams SQL 函式同規則）
+  - RRF 分數與融合順序
+  - lexical 命中足夠時向量 top_k 縮小、候選至少命中 k / n 個 bigram
+  - SQLite FTS5 dev fallback 端到端（含 user_upn 隔離；segment_fts 於寫入 / index check 時同步）
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import access_set
+from app.rag import hybrid
+
+
+@pytest.fixture
+def rag_routes():
+    # Lazy: importing app.routes at collection time would bind app.database to the
+    # default DATABASE_URL before test_feedback's per-module DB fixture sets it.
+    from app.routes import rag
+    return rag
+
+
+def _row(sid, distance=0.5):
+    return SimpleNamespace(id=sid, distance=distance)
+
+
+def test_bigrams_strip_punctuation_and_lowercase():
+    assert hybrid.cjk_bigrams("預算，Q3!") == ["預算", "算q", "q3"]
+    assert hybrid.cjk_bigrams("A") == []
+    assert hybrid.cjk_bigrams(None) == []
+
+
+def test_query_terms_dedupe_and_cap():
+    assert hybrid.query_terms("哈哈哈哈") == ["哈哈"]
+    assert len(hybrid.query_terms("一二三四五六七八九十", max_terms=3)) == 3
+
+
+def test_tsquery_and_fts5_query_format():
+    assert hybrid.build_tsquery(["預算", "q3"]) == "'預算' | 'q3'"
+    assert hybrid.build_fts5_query(["預算", "q3"]) == '"預算" OR "q3"'
+
+
+def test_lexical_min_match_is_k_of_n():
+    assert hybrid.lexical_min_match(1) == 1
+    assert hybrid.lexical_min_match(10, ratio=0.3) == 3
+    assert hybrid.lexical_min_match(40, ratio=0.3) == 12
+    assert hybrid.lexical_min_match(3, ratio=2.0) == 3
+
+
+def test_rrf_rewards_agreement_between_lists():
+    scores = hybrid.rrf_fuse([["a", "b", "c"], ["c", "d"]], k=60)
+    assert scores["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert max(scores, key=scores.get) == "c"
+
+
+def test_fuse_rows_prefers_vector_row_and_truncates():
+    vec = [_row("a", 0.1), _row("b", 0.2)]
+    lex = [_row("b", 0.9), _row("c", 0.3)]
+    fused = hybrid.fuse_rows(vec, lex, top_k=2)
+    assert [r.id for r in fused] == ["b", "a"]
+    assert fused[0] is vec[1]
+
+
+def test_vector_k_shrinks_when_lexical_is_strong(rag_routes):
+    assert rag_routes._hybrid_vector_k(10, 3) == 10
+    assert rag_routes._hybrid_vector_k(10, 10) == 5
+    assert rag_routes._hybrid_vector_k(4, 50) == hybrid.RAG_HYBRID_MIN_VECTOR_K
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    engine = create_engine(f"sqlite:///{(tmp_path / 'hybrid.db').as_posix()}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE meetings (id TEXT PRIMARY KEY, title TEXT)"))
+        conn.execute(text("CREATE TABLE meeting_participants (meeting_id TEXT, user_upn TEXT)"))
+        conn.execute(text(
+            "CREATE TABLE transcript_segments (id TEXT PRIMARY KEY, meeting_id TEXT, speaker TEXT, "
+            "start_time REAL, end_time REAL, content_polished TEXT, content_raw TEXT)"
+        ))
+        conn.execute(text("INSERT INTO meetings VALUES ('m1', '週會'), ('m2', '機密會議')"))
+        conn.execute(text("INSERT INTO meeting_participants VALUES ('m1', 'a@x.com'), ('m2', 'b@x.com')"))
+        for sid, mid, content in [
+            ("s1", "m1", "Q3 預算要再砍一成"),
+            ("s2", "m1", "午餐吃什麼"),
+            ("s3", "m2", "Q3 預算機密"),
+        ]:
+            conn.execute(
+                text("INSERT INTO transcript_segments VALUES (:id, :mid, 'SPEAKER_00', 0, 1, :c, :c)"),
+                {"id": sid, "mid": mid, "c": content},
+            )
+    hybrid.reset_lexical_index_state()
+    access_set.reset_stats()  # participants 以 raw SQL 寫入，不經 ORM 失效
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    hybrid.reset_lexical_index_state()
+    access_set.reset_stats()
+
+
+def test_sqlite_fts5_fallback_respects_user_scope(sqlite_db, rag_routes):
+    rows = rag_routes._find_lexical_segments(sqlite_db, "Q3 的預算", [], user_upn="a@x.com")
+
+    assert [r.id for r in rows] == ["s1"]
+    assert rows[0].meeting_title == "週會"
+    assert 0.0 <= rows[0].distance < 1.0
+
+
+def test_sqlite_fts5_catches_up_raw_writes_on_index_check(sqlite_db, rag_routes):
+    assert rag_routes._find_lexical_segments(sqlite_db, "午餐", []) != []
+    sqlite_db.execute(text(
+        "INSERT INTO transcript_segments VALUES ('s4', 'm1', NULL, 2, 3, '午餐改訂便當', NULL)"
+    ))
+    sqlite_db.commit()
+
+    # 查詢本身不掃差集：非 ORM 寫入要等下一次 index check
+    rows = rag_routes._find_lexical_segments(sqlite_db, "午餐", [], meeting_ids=["m1"])
+    assert {r.id for r in rows} == {"s2"}
+
+    hybrid.reset_lexical_index_state()
+    rows = rag_routes._find_lexical_segments(sqlite_db, "午餐", [], meeting_ids=["m1"])
+    assert {r.id for r in rows} == {"s2", "s4"}
+
+
+def test_sqlite_fts5_syncs_orm_writes_at_flush(tmp_path, rag_routes):
+    from app.models import Meeting, TranscriptSegment
+
+    engine = create_engine(f"sqlite:///{(tmp_path / 'orm.db').as_posix()}")
+    Meeting.metadata.create_all(engine, tables=[Meeting.__table__, TranscriptSegment.__table__])
+    hybrid.reset_lexical_index_state()
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add(Meeting(id="m1", title="週會"))
+        db.add(TranscriptSegment(id="s1", meeting_id="m1", content_raw="午餐吃什麼"))
+        db.commit()
+        assert [r.id for r in rag_routes._find_lexical_segments(db, "午餐", [])] == ["s1"]
+
+        db.add(TranscriptSegment(id="s2", meeting_id="m1", content_raw="午餐改訂便當"))
+        db.get(TranscriptSegment, "s1").content_polished = "預算再砍一成"
+        db.commit()
+        assert [r.id for r in rag_routes._find_lexical_segments(db, "午餐", [])] == ["s2"]
+        assert [r.id for r in rag_routes._find_lexical_segments(db, "預算", [])] == ["s1"]
+
+        db.delete(db.get(TranscriptSegment, "s2"))
+        db.commit()
+        assert rag_routes._find_lexical_segments(db, "便當", []) == []
+    finally:
+        db.close()
+        hybrid.reset_lexical_index_state()
@@ -0,0 +1,104 @@
+"""Unit tests for app.rag.query_cache — LRU+TTL cache for query embeddings / intents."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.rag import query_cache
+from app.rag.query_intent import QueryIntent
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    monkeypatch.setattr(query_cache, "RAG_QUERY_CACHE_ENABLED", True)
+    monkeypatch.setattr(query_cache, "RAG_QUERY_CACHE_DB", False)
+    query_cache.reset_stats()
+    yield
+    query_cache.reset_stats()
+
+
+def _embed_client(values=(0.1, 0.2)):
+    client = MagicMock()
+    client.models.embed_content.return_value = SimpleNamespace(
+        embeddings=[SimpleNamespace(values=list(values))]
+    )
+    return client
+
+
+def _intent_client(payload='{"scope": "single_meeting", "topic": "預算", "confidence": 0.9}'):
+    client = MagicMock()
+    client.models.generate_content.return_value = SimpleNamespace(text=payload)
+    return client
+
+
+def test_normalize_query_folds_width_case_and_trailing_punct():
+    assert query_cache.normalize_query("  Q3 預算 ？ ") == query_cache.normalize_query("ｑ３  預算?")
+
+
+def test_ttl_cache_evicts_lru_and_expired():
+    cache = query_cache.TTLCache("t", maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts b (least recently used)
+    assert cache.get("b") is None
+    cache.put("d", 4, ttl=-1)
+    assert cache.get("d") is None
+    snap = cache.snapshot()
+    assert snap["hits"] == 1 and snap["misses"] == 2
+
+
+def test_embedding_cached_across_equivalent_queries():
+    client = _embed_client()
+    first = query_cache.cached_query_embedding(client, "Q3 預算？")
+    second = query_cache.cached_query_embedding(client, "q3 預算")
+
+    assert first == second == [0.1, 0.2]
+    assert client.models.embed_content.call_count == 1
+    assert query_cache.get_stats()["embedding"]["hit_rate"] == 0.5
+
+
+def test_failed_embedding_not_cached():
+    client = MagicMock()
+    client.models.embed_content.side_effect = RuntimeError("quota")
+    assert query_cache.cached_query_embedding(client, "問題") is None
+    assert query_cache.cached_query_embedding(client, "問題") is None
+    assert client.models.embed_content.call_count == 2
+
+
+def test_intent_cached_but_passthrough_fallback_is_not():
+    client = _intent_client()
+    a = query_cache.cached_query_intent("上週預算？", client)
+    b = query_cache.cached_query_intent("上週預算", client)
+    assert a.scope == "single_meeting" and b == a
+    assert client.models.generate_content.call_count == 1
+
+    bad = _intent_client(payload="not json")
+    query_cache.cached_query_intent("別的問題", bad)
+    query_cache.cached_query_intent("別的問題", bad)
+    assert bad.models.generate_content.call_count == 2
+
+
+def test_disabled_cache_always_calls_through(monkeypatch):
+    monkeypatch.setattr(query_cache, "RAG_QUERY_CACHE_ENABLED", False)
+    client = _embed_client()
+    query_cache.cached_query_embedding(client, "x y")
+    query_cache.cached_query_embedding(client, "x y")
+    assert client.models.embed_content.call_count == 2
+
+
+def test_db_tier_survives_l1_reset(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{(tmp_path / 'cache.db').as_posix()}")
+    query_cache.ensure_cache_table(engine)
+    monkeypatch.setattr(query_cache, "RAG_QUERY_CACHE_DB", True)
+    monkeypatch.setattr(query_cache, "_db_engine", lambda: engine)
+
+    client = _intent_client()
+    query_cache.cached_query_intent("預算", client)
+    query_cache.reset_stats()  # simulates another instance / cold start
+    intent = query_cache.cached_query_intent("預算", client)
+
+    assert isinstance(intent, QueryIntent) and intent.topic == "預算"
+    assert client.models.generate_content.call_count == 1
+    assert query_cache.get_stats()["intent"]["db_hits"] == 1
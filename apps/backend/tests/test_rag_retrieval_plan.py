@@ -0,0 +1,168 @@
+"""Unit tests for app.rag.retrieval_plan and the concurrent /rag/ask fan-out.
+
+DB / Gemini 全部以 stub 取代；驗證：
+  - 每個 DB stage 拿自己的 session、用完關閉
+  - 互相獨立的 stage 真的重疊（wall-clock < 各自相加）
+  - 同一個 request 同時借用的連線數不超過 max_connections
+  - RAG_PARALLEL_RETRIEVAL=false 時退回 request session
+  - ask_across_meetings 在 debug 模式回傳 per-stage timings
+"""
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.rag import retrieval_plan
+from app.rag.retrieval_plan import RetrievalPlan
+
+_run = asyncio.run
+
+
+class _Session:
+    def __init__(self, log):
+        self.closed = False
+        log.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+def _slow(session, tag, delay=0.1):
+    time.sleep(delay)
+    return (session, tag)
+
+
+def test_query_uses_own_session_and_closes_it():
+    sessions = []
+    plan = RetrievalPlan(db="request-db", parallel=True, session_factory=lambda: _Session(sessions))
+
+    session, tag = _run(plan.query("stage", _slow, "a", delay=0))
+
+    assert tag == "a"
+    assert session is sessions[0] and session.closed
+    assert "stage" in plan.timings
+
+
+def test_independent_stages_overlap():
+    sessions = []
+    plan = RetrievalPlan(db=None, parallel=True, session_factory=lambda: _Session(sessions))
+
+    async def _both():
+        return await asyncio.gather(
+            plan.query("a", _slow, "a"),
+            plan.query("b", _slow, "b"),
+            plan.call("c", time.sleep, 0.1),
+        )
+
+    t0 = time.perf_counter()
+    _run(_both())
+    assert time.perf_counter() - t0 < 0.25
+    assert len(sessions) == 2
+    breakdown = plan.breakdown()
+    assert {"a", "b", "c", "total"} <= set(breakdown)
+
+
+def test_concurrent_stage_sessions_capped_per_request():
+    lock = threading.Lock()
+    open_now, peak = [0], [0]
+
+    def _release():
+        with lock:
+            open_now[0] -= 1
+
+    def _counted():
+        with lock:
+            open_now[0] += 1
+            peak[0] = max(peak[0], open_now[0])
+        session = MagicMock()
+        session.close.side_effect = _release
+        return session
+
+    plan = RetrievalPlan(db=None, parallel=True, session_factory=_counted, max_connections=2)
+
+    async def _many():
+        return await asyncio.gather(*[plan.query(f"s{i}", _slow, i, delay=0.05) for i in range(5)])
+
+    assert [tag for _, tag in _run(_many())] == [0, 1, 2, 3, 4]
+    assert peak[0] == 2
+
+
+def test_sequential_mode_uses_request_session():
+    plan = RetrievalPlan(db="request-db", parallel=False, session_factory=pytest.fail)
+    session, _ = _run(plan.query("stage", _slow, "x", delay=0))
+    assert session == "request-db"
+
+
+# ---------------------------------------------------------------------------
+# ask_across_meetings wiring
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def sessions():
+    return []
+
+
+@pytest.fixture
+def rag_routes(monkeypatch, sessions):
+    from app.routes import rag
+
+    monkeypatch.setattr(retrieval_plan, "_default_session_factory", lambda: _Session(sessions))
+    monkeypatch.setattr(rag, "RAG_INTENT_ROUTER_ENABLED", False)
+    monkeypatch.setattr(rag.answer_cache, "RAG_ANSWER_CACHE_ENABLED", False)
+
+    client = MagicMock()
+    client.models.generate_content.return_value = SimpleNamespace(
+        text=json.dumps({"answer": "預算砍一成 [來源1]", "confidence": "high", "used_citations": [0]})
+    )
+    monkeypatch.setattr(rag, "get_gemini_client", lambda: client)
+    monkeypatch.setattr(rag.query_cache, "cached_query_embedding", lambda c, q: [0.1] * 3)
+
+    row = SimpleNamespace(
+        id="s1", meeting_id="m1", speaker="SPEAKER_00", start_time=0.0, end_time=5.0,
+        content_polished="Q3 預算砍一成", content_raw="", meeting_title="週會", distance=0.2,
+    )
+
+    def _segments(db, query, emb, **kw):
+        time.sleep(0.1)
+        return [row], 42
+
+    def _summaries(db, emb, **kw):
+        time.sleep(0.1)
+        return []
+
+    def _titles(db, query, **kw):
+        time.sleep(0.1)
+        return []
+
+    monkeypatch.setattr(rag, "_search_segments", _segments)
+    monkeypatch.setattr(rag, "_find_similar_summaries", _summaries)
+    monkeypatch.setattr(rag, "_find_title_matched_meetings", _titles)
+    monkeypatch.setattr(rag, "expand_with_context", lambda db, rows, window: rows)
+    monkeypatch.setattr(rag, "_fetch_speaker_mappings", lambda db, ids: {})
+    monkeypatch.setattr(rag, "_log_rag_query", lambda *a, **kw: None)
+    return rag
+
+
+def test_ask_runs_retrieval_concurrently_and_reports_timings(rag_routes, sessions):
+    req = rag_routes.RAGRequest(question="Q3 預算？", user_upn="a@x.com", debug=True)
+
+    t0 = time.perf_counter()
+    resp = _run(rag_routes.ask_across_meetings(req, db=MagicMock()))
+    elapsed = time.perf_counter() - t0
+
+    assert resp.confidence == "high"
+    assert resp.segments_searched == 42
+    assert elapsed < 0.28  # title ∥ segment ∥ summary, not 0.3s in sequence
+    assert {"title_match", "segment_search", "summary_search", "expand",
+            "speaker_mappings", "generate", "total"} <= set(resp.timings)
+    assert sessions and all(s.closed for s in sessions)
+
+
+def test_ask_omits_timings_without_debug(rag_routes):
+    req = rag_routes.RAGRequest(question="Q3 預算？", user_upn="a@x.com")
+    resp = _run(rag_routes.ask_across_meetings(req, db=MagicMock()))
+    assert resp.timings is None
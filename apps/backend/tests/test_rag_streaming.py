@@ -0,0 +1,129 @@
+"""Unit tests for app.rag.streaming and the /rag/ask/stream SSE endpoint."""
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.rag import retrieval_plan
+from app.rag.streaming import AnswerStreamDecoder, sse_event
+
+_run = asyncio.run
+
+
+def _chunks(s, rng):
+    out, i = [], 0
+    while i < len(s):
+        n = rng.randint(1, 7)
+        out.append(s[i:i + n])
+        i += n
+    return out
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_decoder_matches_json_loads_for_any_split(seed):
+    rng = random.Random(seed)
+    answer = '預算砍一成 [來源1]。\n下一步："確認" \\ 時程\t😀 done/ok'
+    for ensure_ascii in (True, False):
+        raw = json.dumps({"answer": answer, "used_citations": [1], "confidence": "high"},
+                         ensure_ascii=ensure_ascii)
+        decoder = AnswerStreamDecoder()
+        streamed = "".join(decoder.feed(c) for c in _chunks(raw, rng))
+        assert streamed == answer
+        assert decoder.done and decoder.raw == raw
+
+
+def test_decoder_ignores_non_json_output():
+    decoder = AnswerStreamDecoder()
+    assert decoder.feed("純文字回答，沒有 JSON") == ""
+    assert not decoder.done
+
+
+def test_sse_event_frame():
+    frame = sse_event("token", {"text": "甲\n乙"})
+    assert frame.startswith("event: token\ndata: ")
+    assert frame.endswith("\n\n") and frame.count("\n") == 3
+    assert json.loads(frame.split("data: ", 1)[1]) == {"text": "甲\n乙"}
+
+
+# ---------------------------------------------------------------------------
+# /rag/ask/stream
+# ---------------------------------------------------------------------------
+
+def _parse_sse(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def rag_routes(monkeypatch):
+    from app.routes import rag
+
+    monkeypatch.setattr(retrieval_plan, "_default_session_factory", MagicMock)
+    monkeypatch.setattr(rag, "RAG_INTENT_ROUTER_ENABLED", False)
+    monkeypatch.setattr(rag.answer_cache, "RAG_ANSWER_CACHE_ENABLED", False)
+    monkeypatch.setattr(rag.query_cache, "cached_query_embedding", lambda c, q: [0.1] * 3)
+
+    row = SimpleNamespace(
+        id="s1", meeting_id="m1", speaker="SPEAKER_00", start_time=0.0, end_time=5.0,
+        content_polished="Q3 預算砍一成", content_raw="", meeting_title="週會", distance=0.2,
+    )
+    monkeypatch.setattr(rag, "_search_segments", lambda db, q, emb, **kw: ([row], 42))
+    monkeypatch.setattr(rag, "_find_similar_summaries", lambda db, emb, **kw: [])
+    monkeypatch.setattr(rag, "_find_title_matched_meetings", lambda db, q, **kw: [])
+    monkeypatch.setattr(rag, "expand_with_context", lambda db, rows, window: rows)
+    monkeypatch.setattr(rag, "_fetch_speaker_mappings", lambda db, ids: {})
+    logged = []
+    monkeypatch.setattr(rag, "_log_rag_query", lambda db, **kw: logged.append(kw))
+    return SimpleNamespace(module=rag, logged=logged, monkeypatch=monkeypatch)
+
+
+def _stream(routes, client, **req):
+    rag = routes.module
+    routes.monkeypatch.setattr(rag, "get_gemini_client", lambda: client)
+
+    async def _collect():
+        request = rag.RAGRequest(question="Q3 預算？", user_upn="a@x.com", **req)
+        resp = await rag.ask_across_meetings_stream(request, db=MagicMock())
+        assert resp.media_type == "text/event-stream"
+        return "".join([part async for part in resp.body_iterator])
+
+    return _parse_sse(_run(_collect()))
+
+
+def test_stream_sends_citations_then_tokens_then_done(rag_routes):
+    raw = json.dumps({"answer": "預算砍一成 [來源1]", "used_citations": [1], "confidence": "high"},
+                     ensure_ascii=False)
+    client = MagicMock()
+    client.models.generate_content_stream.return_value = iter(
+        SimpleNamespace(text=raw[i:i + 5]) for i in range(0, len(raw), 5)
+    )
+
+    events = _stream(rag_routes, client, debug=True)
+
+    kinds = [k for k, _ in events]
+    assert kinds[0] == "citations" and kinds[-1] == "done"
+    assert set(kinds[1:-1]) == {"token"}
+    assert events[0][1]["segments_searched"] == 42
+    assert "".join(d["text"] for k, d in events if k == "token") == "預算砍一成 [來源1]"
+    done = events[-1][1]
+    assert done["confidence"] == "high" and done["used_citation_indices"] == [1]
+    assert "first_token" in done["timings"] and "generate" in done["timings"]
+    assert rag_routes.logged[0]["confidence"] == "high"
+
+
+def test_stream_generation_error_finishes_with_done(rag_routes):
+    client = MagicMock()
+    client.models.generate_content_stream.side_effect = RuntimeError("quota")
+
+    events = _stream(rag_routes, client)
+
+    assert [k for k, _ in events] == ["citations", "done"]
+    assert events[-1][1]["confidence"] == "no_answer"
+    assert "quota" in events[-1][1]["answer"]
+    assert len(rag_routes.logged) == 1
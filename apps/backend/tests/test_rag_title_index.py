@@ -0,0 +1,125 @@
+"""Unit tests for app.rag.title_index — cached per-user meeting-title index."""
+import random
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.rag import title_index
+from app.rag.title_index import TitleIndex, query_core, score_title, title_tokens
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    title_index.reset_stats()
+    yield
+    title_index.reset_stats()
+
+
+def _full_scan(titles, query, limit=3):
+    """Reference: score every title (the pre-index behaviour)."""
+    qn, core = query_core(query)
+    scored = [(i, score_title(t, title_tokens(t), qn, core)) for i, t in enumerate(titles)]
+    scored = [(i, s) for i, s in scored if s >= title_index.MIN_MATCH_SCORE]
+    scored.sort(key=lambda x: (-x[1], x[0]))
+    return [(f"m{i}", titles[i], s) for i, s in scored[:limit]]
+
+
+def test_query_core_strips_question_filler():
+    assert query_core("鴻才會議討論什麼")[1] == "鴻才"
+    assert query_core("討論什麼")[1] == "討論什麼"  # never empties the query
+
+
+def test_matches_title_referenced_in_question():
+    idx = TitleIndex(ids=["a", "b", "c"], titles=["鴻才討論", "季度預算審查", "午餐"])
+    hits = idx.match("鴻才會議討論什麼")
+    assert hits[0][0] == "a"
+    assert all(mid != "c" for mid, _, _ in hits)
+
+
+def test_equal_length_unrelated_title_does_not_match():
+    qn, core = query_core("A議案的主要內容")
+    assert score_title("事品I", title_tokens("事品I"), qn, core) == 0.0
+
+
+def test_index_agrees_with_full_scan_on_random_titles():
+    rng = random.Random(7)
+    alphabet = "會議預算審查季度產品規劃週會鴻才專案討論人事招募測試上線檢討AI平台"
+    titles = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 9)))
+        for _ in range(300)
+    ]
+    idx = TitleIndex(ids=[f"m{i}" for i in range(len(titles))], titles=titles)
+    for _ in range(200):
+        q = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10)))
+        q += rng.choice(["", "討論什麼", "的主要內容"])
+        assert idx.match(q) == _full_scan(titles, q), q
+
+
+def test_allowed_ids_filter_applied_before_top_k():
+    idx = TitleIndex(ids=["a", "b", "c", "d"], titles=["預算", "預算", "預算", "預算"])
+    assert [m for m, _, _ in idx.match("預算", allowed_ids=["d"])] == ["d"]
+
+
+def test_cache_hit_and_invalidation():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [("m1", "週會"), ("m2", " ")]
+
+    idx = title_index.get_title_index("a@x.com", loader)
+    assert idx.ids == ["m1"]  # blank titles dropped
+    title_index.get_title_index("a@x.com", loader)
+    assert len(loads) == 1
+
+    assert title_index.invalidate_meeting("m1") == 1
+    title_index.get_title_index("a@x.com", loader)
+    assert len(loads) == 2
+
+    title_index.invalidate_users(["A@x.com"])
+    title_index.get_title_index("a@x.com", loader)
+    assert len(loads) == 3
+    assert title_index.get_stats()["hits"] == 1
+
+
+def test_new_meeting_invalidates_owner_and_global_index():
+    title_index.get_title_index("a@x.com", lambda: [])
+    title_index.get_title_index(None, lambda: [])
+    assert title_index.invalidate_meeting("new", user_upns=["a@x.com"]) == 2
+
+
+def test_route_fetches_summary_only_for_matches(monkeypatch):
+    from app import access_set
+    from app.routes.rag import _find_title_matched_meetings
+
+    monkeypatch.setattr(access_set, "allowed_meeting_ids", lambda db, upn: frozenset({"m1", "m2"}))
+
+    calls = []
+
+    def execute(sql, params=None):
+        calls.append((str(sql), params))
+        result = MagicMock()
+        if "summary_citation" in str(sql):
+            result.fetchall.return_value = [
+                SimpleNamespace(id="m1", summary_citation="s\n行動項目：a", summary_json=None)
+            ]
+        else:
+            result.fetchall.return_value = [
+                SimpleNamespace(id="m1", title="鴻才討論"),
+                SimpleNamespace(id="m2", title="季度預算審查"),
+            ]
+        return result
+
+    db = MagicMock()
+    db.execute.side_effect = execute
+
+    first = _find_title_matched_meetings(db, "鴻才會議討論什麼", user_upn="a@x.com")
+    second = _find_title_matched_meetings(db, "鴻才會議討論什麼", user_upn="a@x.com")
+
+    assert first == second
+    assert first[0]["meeting_id"] == "m1" and first[0]["summary_citation"] == "s\n行動項目：a"
+    title_loads = [c for c in calls if "summary_citation" not in c[0]]
+    summary_loads = [c for c in calls if "summary_citation" in c[0]]
+    assert len(title_loads) == 1
+    assert len(summary_loads) == 2 and summary_loads[0][1] == {"mid_0": "m1"}
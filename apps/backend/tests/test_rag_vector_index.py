@@ -0,0 +1,184 @@
+"""
+Unit tests for app.rag.vector_index — ANN index DDL + per-query search params.
+
+Run:
+  cd apps/backend
+  pytest tests/test_rag_vector_index.py -v
+
+Strategy: mock SQLAlchemy session（dialect name 決定是否為 PostgreSQL），不依賴真實 DB。
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+import app.rag.vector_index as vi
+
+
+def _session(dialect="postgresql"):
+    db = MagicMock()
+    db.get_bind.return_value = SimpleNamespace(dialect=SimpleNamespace(name=dialect))
+    return db
+
+
+def _executed_sql(db):
+    return [str(call.args[0]) for call in db.execute.call_args_list]
+
+
+def test_hnsw_ddl_uses_cosine_ops_concurrently():
+    spec = vi.VECTOR_INDEXES[0]
+    ddl = vi.index_ddl(spec, "hnsw")
+    assert ddl.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_segments_content_embedding")
+    assert "USING hnsw (content_embedding vector_cosine_ops)" in ddl
+    assert f"m = {vi.RAG_HNSW_M}" in ddl
+
+
+def test_ivfflat_ddl_uses_lists():
+    ddl = vi.index_ddl(vi.VECTOR_INDEXES[1], "ivfflat", concurrently=False, lists=42)
+    assert "CONCURRENTLY" not in ddl
+    assert "USING ivfflat (summary_embedding vector_cosine_ops) WITH (lists = 42)" in ddl
+
+
+def test_unknown_method_rejected():
+    with pytest.raises(ValueError):
+        vi.index_ddl(vi.VECTOR_INDEXES[0], "flat")
+
+
+def test_search_params_set_local_and_clamped():
+    db = _session()
+    vi.apply_search_params(db, ef_search=5000, probes=7)
+    sql = _executed_sql(db)
+    assert "SET LOCAL hnsw.ef_search = 1000" in sql
+    assert "SET LOCAL ivfflat.probes = 7" in sql
+
+
+def test_search_params_default_noop(monkeypatch):
+    monkeypatch.setattr(vi, "RAG_HNSW_EF_SEARCH", 0)
+    monkeypatch.setattr(vi, "RAG_IVFFLAT_PROBES", 0)
+    monkeypatch.setattr(vi, "RAG_HNSW_ITERATIVE_SCAN", "off")
+    db = _session()
+    vi.apply_search_params(db)
+    assert db.execute.call_count == 0
+
+
+def test_search_params_env_default(monkeypatch):
+    monkeypatch.setattr(vi, "RAG_HNSW_EF_SEARCH", 80)
+    db = _session()
+    vi.apply_search_params(db)
+    assert "SET LOCAL hnsw.ef_search = 80" in _executed_sql(db)
+
+
+def test_search_params_skipped_on_sqlite():
+    db = _session("sqlite")
+    vi.apply_search_params(db, ef_search=100)
+    assert db.execute.call_count == 0
+    assert vi.vector_index_status(db) == []
+
+
+# ---------- quantized ANN (halfvec / binary) ----------
+
+def test_quant_index_ddl_uses_expression_indexes():
+    half = vi.quant_index_ddl("halfvec")
+    assert "idx_segments_content_embedding_half ON transcript_segments" in half
+    assert "USING hnsw ((content_embedding::halfvec(768)) halfvec_cosine_ops)" in half
+    binary = vi.quant_index_ddl("binary", concurrently=False)
+    assert "CONCURRENTLY" not in binary
+    assert "((binary_quantize(content_embedding)::bit(768)) bit_hamming_ops)" in binary
+    with pytest.raises(ValueError):
+        vi.quant_index_ddl("int8")
+
+
+def test_knn_sql_full_precision_when_quant_off():
+    sql, params = vi.segment_knn_sql("SELECT ts.id FROM transcript_segments ts WHERE 1=1", 10, "off")
+    assert sql.endswith("ORDER BY ts.content_embedding <=> CAST(:query_embedding AS vector)\nLIMIT :top_k")
+    assert params == {"top_k": 10}
+
+
+def test_knn_sql_quantized_candidates_then_exact_rerank():
+    sql, params = vi.segment_knn_sql("SELECT ts.id, d AS distance FROM transcript_segments ts WHERE 1=1",
+                                     10, "binary")
+    # 內層走量化 index（expression 與 index 定義一致），外層依 float32 distance 重排
+    assert "ORDER BY (binary_quantize(ts.content_embedding)::bit(768)) <~> " \
+           "binary_quantize(CAST(:query_embedding AS vector))::bit(768)" in sql
+    assert "LIMIT :ann_k\n) AS cand\nORDER BY cand.distance\nLIMIT :top_k" in sql
+    assert params == {"top_k": 10, "ann_k": 10 * vi.DEFAULT_OVERSAMPLE["binary"]}
+
+
+def test_knn_oversample_override_and_cap(monkeypatch):
+    monkeypatch.setattr(vi, "RAG_VECTOR_QUANT", "halfvec")
+    monkeypatch.setattr(vi, "RAG_QUANT_OVERSAMPLE", 3)
+    _, params = vi.segment_knn_sql("SELECT ...", 20)
+    assert params["ann_k"] == 60
+    _, params = vi.segment_knn_sql("SELECT ...", 400, oversample=10)
+    assert params["ann_k"] == vi.MAX_RERANK_CANDIDATES
+
+
+def test_status_lists_quantized_indexes():
+    db = _session()
+    db.execute.return_value.fetchall.return_value = []
+    status = vi.vector_index_status(db)
+    assert [s["quant"] for s in status] == ["off", "off", "halfvec", "binary"]
+    assert not any(s["exists"] for s in status)
+
+
+def test_quant_report_requires_postgres():
+    assert "error" in vi.quant_recall_report(_session("sqlite"))
+
+
+def test_similar_segments_uses_quantized_path(monkeypatch):
+    from app.routes import rag
+
+    monkeypatch.setattr(vi, "RAG_VECTOR_QUANT", "halfvec")
+    monkeypatch.setattr(rag.access_set, "allowed_meeting_ids", lambda db, upn: frozenset({"m2", "m1"}))
+    db = _session()
+    db.execute.return_value.fetchall.return_value = []
+    db.execute.return_value.scalar.return_value = 0
+
+    rag._find_similar_segments(db, [0.1] * 768, user_upn="a@example.com", top_k=5)
+
+    sql = str(db.execute.call_args_list[0].args[0])
+    params = db.execute.call_args_list[0].args[1]
+    assert "::halfvec(768)) <=> CAST(:query_embedding AS halfvec(768))" in sql
+    assert "ORDER BY cand.distance" in sql
+    assert "ts.meeting_id = ANY(:allowed_ids)" in sql and "meeting_participants" not in sql
+    assert params["ann_k"] == 10 and params["top_k"] == 5 and params["allowed_ids"] == ["m1", "m2"]
+
+
+def test_access_report_requires_postgres():
+    assert "error" in vi.access_filter_report(_session("sqlite"))
+
+
+def test_access_report_compares_join_and_id_filter(monkeypatch):
+    from app import access_set
+
+    monkeypatch.setattr(access_set, "load_allowed_ids", lambda db, upn: frozenset({"m1"}))
+    monkeypatch.setattr(vi, "RAG_VECTOR_QUANT", "off")
+    db = _session()
+
+    def execute(sql, params=None):
+        result = MagicMock()
+        q = str(sql)
+        if q.startswith("EXPLAIN"):
+            index = "idx_ts_meeting_id" if "ANY(" in q else "idx_segments_content_embedding"
+            result.scalar.return_value = [{"Plan": {"Node Type": "Limit", "Plans": [
+                {"Node Type": "Index Scan", "Index Name": index}]}}]
+        elif "random()" in q:
+            result.fetchall.return_value = [SimpleNamespace(emb="[0.1]")]
+        elif "COUNT(*)" in q:
+            result.scalar.return_value = 42
+        else:  # exact 有 3 筆；JOIN 版的 ANN 漏了一筆
+            ids = ["s1", "s2"] if "meeting_participants" in q else ["s1", "s2", "s3"]
+            result.fetchall.return_value = [SimpleNamespace(id=i) for i in ids]
+        return result
+
+    db.execute.side_effect = execute
+    report = vi.access_filter_report(db, user_upn="a@x.com", samples=1, k=3)
+
+    user = report["users"][0]
+    assert user["meetings"] == 1 and user["segments"] == 42
+    assert user["join"]["recall_at_k"] == round(2 / 3, 4) and user["id_filter"]["recall_at_k"] == 1.0
+    assert user["join"]["indexes_used"] == ["idx_segments_content_embedding"]
+    assert user["id_filter"]["indexes_used"] == ["idx_ts_meeting_id"]
@@ -0,0 +1,134 @@
+"""Unit tests for app.summary_digest — materialized summary digest columns."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.embedding import summary_embedding_text
+from app.models import Meeting, TranscriptSegment
+from app.services.rag_greeting import extract_top_topics, get_last_meeting_summary
+from app.summary_digest import (
+    backfill_summary_digests,
+    build_summary_digest,
+    citation_or_parse,
+    embed_body_or_parse,
+)
+
+SUMMARY = {
+    "summary": "討論 Q3 預算",
+    "decisions": ["預算砍一成", {"decision": "延後招募"}],
+    "action_items": ["小王整理報表", {"task": "小李聯絡供應商"}, "", "a4", "a5", "a6"],
+    "next_steps": [{"action": "下週再議"}],
+    "chapters": [{"title": "預算檢討"}, {"title": "OK"}],
+    "speaker_contributions": [{"main_topics": ["預算檢討", "人力規劃"]}],
+}
+
+
+@pytest.fixture
+def bind(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'digest.db'}")
+    Meeting.metadata.create_all(engine, tables=[Meeting.__table__, TranscriptSegment.__table__])
+    return engine
+
+
+def test_digest_matches_legacy_citation_and_embedding_text():
+    digest = build_summary_digest(json.dumps(SUMMARY, ensure_ascii=False))
+
+    assert digest["summary_citation"] == (
+        "討論 Q3 預算\n決議事項：預算砍一成；延後招募\n"
+        "行動項目：小王整理報表；小李聯絡供應商；a4；a5"
+    )
+    assert summary_embedding_text("週會", body=digest["summary_embed_text"]) == \
+        summary_embedding_text("週會", SUMMARY)
+    assert json.loads(digest["summary_topics"]) == [["預算檢討", 3], ["人力規劃", 1]]
+    assert json.loads(digest["summary_key_actions"]) == ["小王整理報表", "下週再議"]
+
+
+def test_digest_for_missing_and_non_json_summaries():
+    assert set(build_summary_digest(None).values()) == {None}
+
+    legacy = build_summary_digest("純文字摘要" * 200)
+    assert legacy["summary_citation"] == ("純文字摘要" * 200)[:500]
+    assert legacy["summary_embed_text"] is None
+    assert embed_body_or_parse(legacy["summary_embed_text"], "純文字摘要") is None
+
+
+def test_orm_write_materializes_and_clears_digest(bind):
+    with Session(bind) as s:
+        s.add(Meeting(id="m1", title="週會", summary_json=json.dumps(SUMMARY, ensure_ascii=False)))
+        s.commit()
+        m = s.get(Meeting, "m1")
+        assert m.summary_citation.startswith("討論 Q3 預算") and m.summary_topics is not None
+
+        m.summary_json = json.dumps({"summary": "改過的摘要"}, ensure_ascii=False)
+        s.commit()
+        assert m.summary_citation == "改過的摘要" and m.summary_topics == "[]"
+
+        m.summary_json = None  # regenerate-summary 清空
+        s.commit()
+        assert m.summary_citation is None and m.summary_embed_text is None
+
+
+def test_backfill_fills_only_missing_rows(bind):
+    with Session(bind) as s:
+        s.add(Meeting(id="m1", title="新", summary_json=json.dumps({"summary": "已算"})))
+        s.add(Meeting(id="m3", title="無摘要"))
+        s.commit()
+    with bind.begin() as conn:  # 模擬 migration 前寫入的舊資料
+        for mid in ("m2", "m4"):
+            conn.execute(text("INSERT INTO meetings (id, title, summary_json, created_at, embedding_version, "
+                              "summary_embedding_dirty, is_confidential) "
+                              "VALUES (:id, '舊', :sj, CURRENT_TIMESTAMP, 0, 0, 0)"),
+                         {"id": mid, "sj": json.dumps({"summary": f"舊摘要 {mid}"}, ensure_ascii=False)})
+
+    assert backfill_summary_digests(bind, batch_size=1) == 2
+    assert backfill_summary_digests(bind) == 0
+
+    with bind.connect() as conn:
+        rows = dict(conn.execute(text("SELECT id, summary_citation FROM meetings")).fetchall())
+    assert rows == {"m1": "已算", "m2": "舊摘要 m2", "m3": None, "m4": "舊摘要 m4"}
+
+
+def test_read_paths_prefer_digest_over_summary_json():
+    # digest 已算好：summary_json 不應被讀（這裡給無效 JSON 證明沒被解析）
+    assert citation_or_parse("預先算好", "BAD{") == "預先算好"
+    assert citation_or_parse(None, json.dumps({"summary": "s"})) == "s"
+
+    meetings = [
+        {"title": "預算週會", "summary_topics": '[["預算檢討", 3]]',
+         "summary_key_actions": '["下週再議"]', "summary_json": None},
+        {"title": "舊會議", "summary_topics": None, "summary_key_actions": None,
+         "summary_json": json.dumps({"chapters": [{"title": "人力規劃"}]}, ensure_ascii=False)},
+    ]
+    assert extract_top_topics(meetings) == ["預算檢討", "人力規劃", "預算週會"]
+    assert get_last_meeting_summary(meetings)["key_actions"] == ["下週再議"]
+
+
+def test_rag_retrieval_builds_summary_citations_from_digest(monkeypatch):
+    from app.rag.retrieval_plan import RetrievalPlan
+    from app.routes import rag
+
+    monkeypatch.setattr(rag, "RAG_INTENT_ROUTER_ENABLED", False)
+    monkeypatch.setattr(rag.query_cache, "cached_query_embedding", lambda c, q: [0.1] * 3)
+    monkeypatch.setattr(rag, "_search_segments", lambda *a, **kw: ([], 0))
+    monkeypatch.setattr(rag, "_fetch_meeting_top_segments", lambda *a, **kw: [])
+    monkeypatch.setattr(rag, "_find_similar_summaries", lambda db, emb, **kw: [SimpleNamespace(
+        meeting_id="m1", meeting_title="週會", summary_citation="摘要本文", summary_json=None, distance=0.2,
+    )])
+    monkeypatch.setattr(rag, "_find_title_matched_meetings", lambda db, q, **kw: [
+        {"meeting_id": "m2", "title": "預算會", "summary_citation": "標題摘要", "match_score": 0.9},
+    ])
+    monkeypatch.setattr(rag, "_fetch_speaker_mappings", lambda db, ids: {})
+
+    req = rag.RAGRequest(question="Q3 預算？", user_upn="a@x.com")
+    ctx = asyncio.run(rag._retrieve_answer_context(
+        req, MagicMock(), RetrievalPlan(db=MagicMock(), parallel=False), MagicMock(),
+    ))
+
+    contents = [c.content for c in ctx.citations + ctx.title_match_citations]
+    assert "[會議摘要] 摘要本文" in contents
+    assert "[會議摘要 - 標題匹配] 標題摘要" in contents
@@ -0,0 +1,209 @@
+"""Unit tests for app.vad — process-wide Silero singleton + per-session recurrent state.
+
+torch 在 CPU image 不一定存在，這裡以 fake torch / fake model 驗證：
+  - 模型每個進程只載入一次（含載入失敗也只試一次）
+  - 共用 model 上每個 session 的 window 機率與「每連線一份 model、逐 window 呼叫」相同
+  - per-session state 會回收到 pool 重用
+"""
+import contextlib
+import types
+
+import numpy as np
+import pytest
+
+import app.vad as vad
+
+
+class _FakeProb:
+    def __init__(self, value):
+        self._value = value
+
+    def item(self):
+        return self._value
+
+
+class _FakeSilero:
+    """Streaming fake：機率取決於 _state（前面所有 window 的指數平均振幅）。"""
+
+    def __init__(self):
+        self.calls = []
+        self.reset_states()
+
+    def reset_states(self):
+        self._state = np.zeros(1, dtype=np.float32)
+
+    def __call__(self, tensor, sr):
+        self.calls.append(tensor.shape)
+        self._state = 0.5 * self._state + np.abs(tensor).mean()
+        return _FakeProb(float(self._state[0] > 0.05) * 0.5 + float(self._state[0]) * 0.1)
+
+
+@pytest.fixture
+def fake_silero(monkeypatch):
+    model = _FakeSilero()
+    fake_torch = types.SimpleNamespace(from_numpy=lambda a: a, no_grad=contextlib.nullcontext)
+    monkeypatch.setattr(vad, "torch", fake_torch)
+    monkeypatch.setattr(vad, "_silero_model", model)
+    monkeypatch.setattr(vad, "_silero_load_attempted", True)
+    monkeypatch.setattr(vad, "_silero_replicas", None)
+    monkeypatch.setattr(vad, "_state_pool", [])
+    return model
+
+
+def _pcm16(samples: np.ndarray) -> bytes:
+    return (samples * 32767).astype(np.int16).tobytes()
+
+
+def test_model_loaded_once_across_sessions(monkeypatch):
+    loads = []
+    monkeypatch.setattr(vad, "_silero_model", None)
+    monkeypatch.setattr(vad, "_silero_load_attempted", False)
+    monkeypatch.setattr(vad, "_load_silero", lambda: loads.append(1) or None)
+
+    a = vad.VADAudioBuffer()
+    b = vad.VADAudioBuffer()
+
+    assert loads == [1]  # failed load is cached too
+    assert not a.use_silero and not b.use_silero
+
+
+def test_block_scored_window_by_window_in_order(fake_silero, monkeypatch):
+    monkeypatch.setattr(vad, "VAD_SILERO_REPLICAS", 1)
+    buf = vad.VADAudioBuffer(silence_threshold=0.5)
+    chunk = np.full(4096, 0.3, dtype=np.float32)
+
+    buf.process_chunk(_pcm16(chunk))
+
+    assert fake_silero.calls == [(1, vad.SILERO_WINDOW_SAMPLES)] * 8
+    assert buf.state.silence_duration == 0.0
+
+
+def test_shared_model_matches_per_session_sequential_loop(fake_silero, monkeypatch):
+    """兩個 room 交錯使用共用 model，window 機率要與舊版每連線一份 model 的逐 window 迴圈一致。"""
+    monkeypatch.setattr(vad, "VAD_SILERO_REPLICAS", 2)
+    rng = np.random.default_rng(0)
+    streams = [
+        [rng.uniform(-a, a, 4096).astype(np.float32) for a in (0.3, 0.0, 0.02, 0.4, 0.0)],
+        [rng.uniform(-a, a, 4096).astype(np.float32) for a in (0.0, 0.5, 0.0, 0.0, 0.1)],
+    ]
+
+    def old_loop(chunks):
+        model = _FakeSilero()  # baseline: one model per connection
+        probs = []
+        for chunk in chunks:
+            for i in range(0, len(chunk), vad.SILERO_WINDOW_SAMPLES):
+                window = chunk[i:i + vad.SILERO_WINDOW_SAMPLES][None, :]
+                probs.append(model(window, 16000).item())
+        return probs
+
+    sessions = [vad.acquire_session_state(), vad.acquire_session_state()]
+    got = [[], []]
+    for step in range(5):
+        for s, state in enumerate(sessions):
+            windows = state.window_batch(streams[s][step])
+            got[s].extend(vad.silero_speech_probs(fake_silero, windows, 16000, state))
+
+    for s in range(2):
+        np.testing.assert_allclose(got[s], old_loop(streams[s]), rtol=1e-6)
+    assert vad._silero_replicas.qsize() == 2  # replicas returned to the pool
+
+
+def test_reused_session_state_starts_a_fresh_stream(fake_silero):
+    buf = vad.VADAudioBuffer()
+    buf.process_chunk(_pcm16(np.full(4096, 0.3, dtype=np.float32)))
+    assert buf.state.silero_state is not None
+    buf.close()
+
+    assert vad.VADAudioBuffer().state.silero_state is None
+
+
+def test_partial_last_window_is_zero_padded(fake_silero):
+    buf = vad.VADAudioBuffer()
+    # 1000 samples → 2 windows, the second one zero-padded
+    batch = buf.state.window_batch(np.ones(1000, dtype=np.float32))
+    assert batch.shape == (2, vad.SILERO_WINDOW_SAMPLES)
+    assert batch[1, 1000 - 512:].sum() == 0.0
+
+
+def test_silence_accumulates_and_splits(fake_silero):
+    buf = vad.VADAudioBuffer(silence_threshold=0.5, min_silence_duration=0.5)
+    speech = _pcm16(np.full(4096, 0.3, dtype=np.float32))
+    silence = _pcm16(np.zeros(4096, dtype=np.float32))
+
+    results = [buf.process_chunk(speech) for _ in range(4)]
+    results += [buf.process_chunk(silence) for _ in range(2)]
+
+    assert all(r is None for r in results[:-1])
+    assert results[-1] is not None
+
+
+def test_session_state_returned_to_pool(fake_silero):
+    buf = vad.VADAudioBuffer()
+    state = buf.state
+    buf.state.total_duration = 3.0
+    buf.close()
+
+    assert buf.state is None
+    reused = vad.VADAudioBuffer()
+    assert reused.state is state
+    assert reused.state.total_duration == 0.0
+
+
+# ---------------------------------------------------------------------------
+# AudioRingBuffer / overlap window
+# ---------------------------------------------------------------------------
+
+def test_flush_returns_float_view_with_overlap_tail(fake_silero):
+    buf = vad.VADAudioBuffer(max_duration=1.0)
+    buf.set_overlap(0.1)
+    first = np.linspace(-0.5, 0.5, 16000, dtype=np.float32)
+    second = np.full(12000, 0.2, dtype=np.float32)
+
+    buf.process_chunk(_pcm16(first))  # hits max_duration → returns segment
+    buf.process_chunk(_pcm16(second))
+    out = buf.flush()
+
+    assert out.dtype == np.float32
+    assert np.shares_memory(out, buf.state.ring.data)
+    assert out.size == 1600 + 12000
+    np.testing.assert_allclose(out[:1600], first[-1600:], atol=1e-4)
+    np.testing.assert_allclose(out[1600:], 0.2, atol=1e-4)
+
+
+def test_discarded_segment_keeps_previous_overlap(fake_silero):
+    buf = vad.VADAudioBuffer(max_duration=1.0)
+    buf.set_overlap(0.1)
+    first = np.full(16000, 0.3, dtype=np.float32)
+
+    assert buf.process_chunk(_pcm16(first)) is not None
+    buf.process_chunk(_pcm16(np.full(1000, 0.1, dtype=np.float32)))
+    assert buf.flush() is None  # < min_speech_duration
+    buf.process_chunk(_pcm16(np.full(9000, 0.1, dtype=np.float32)))
+    out = buf.flush()
+
+    assert out.size == 1600 + 9000
+    np.testing.assert_allclose(out[:1600], 0.3, atol=1e-4)
+
+
+def test_memory_bounded_by_max_duration(fake_silero):
+    buf = vad.VADAudioBuffer(max_duration=2.0)
+    buf.set_overlap(10.0)  # capped at max_duration
+    capacity = buf.state.ring.capacity
+    chunk = _pcm16(np.full(4096, 0.3, dtype=np.float32))
+
+    for _ in range(200):
+        buf.process_chunk(chunk)
+
+    assert buf.overlap_duration == 2.0
+    assert buf.state.ring.capacity == capacity
+    assert capacity <= int((2 * 2.0 + vad.VADAudioBuffer.CHUNK_SLACK_SECONDS) * 16000)
+
+
+def test_oversized_frame_keeps_newest_samples():
+    ring = vad.AudioRingBuffer(100)
+    ring.append(np.arange(60, dtype=np.int16))
+    ring.append(np.arange(60, 120, dtype=np.int16))
+
+    segment = ring.segment()
+    assert segment.size == 100
+    np.testing.assert_allclose(segment * 32768.0, np.arange(20, 120))
@@ -28,45 +28,15 @@ GCP_LOCATION = os.getenv("GCP_LOCATION", "asia-southeast1")
 
 print(f"USE_GEMINI:{USE_GEMINI}, GEMINI_MODEL:{GEMINI_MODEL}, MOCK_LLM:{MOCK_LLM}")
 
-# Initialize Gemini client
-# Priority: API Key (local dev) > ADC via Vertex AI (Cloud Run Service Account)
-gemini_client = None
+# Gemini client: cached process-wide factory (see gemini_client.py), warmed at startup
+from gemini_client import get_gemini_client, reset_gemini_client_on_transport_error, warm_up_gemini_client
+
 if USE_GEMINI:
-    try:
-        from google import genai
-        if GEMINI_API_KEY:
-            # Local development: use API key from .env
-            gemini_client = genai.Client(api_key=GEMINI_API_KEY)
-            logger.info(f"Gemini client initialized with API Key, model: {GEMINI_MODEL}")
-        else:
-            # GCP Cloud Run: use ADC via Vertex AI backend
-            # Auto-detect project from metadata server if not set
-            project = GCP_PROJECT
-            if not project:
-                try:
-                    import requests as _req
-                    resp = _req.get(
-                        "http://metadata.google.internal/computeMetadata/v1/project/project-id",
-                        headers={"Metadata-Flavor": "Google"}, timeout=2
-                    )
-                    project = resp.text
-                    logger.info(f"Auto-detected GCP project: {project}")
-                except Exception:
-                    logger.warning("Could not auto-detect GCP project from metadata server")
-
-            if project:
-                gemini_client = genai.Client(
-                    vertexai=True,
-                    project=project,
-                    location=GCP_LOCATION
-                )
-                logger.info(f"Gemini client initialized with ADC (Vertex AI), project={project}, location={GCP_LOCATION}, model: {GEMINI_MODEL}")
-            else:
-                logger.error("No GEMINI_API_KEY and no GCP_PROJECT — cannot initialize Gemini client")
-    except ImportError:
-        logger.error("google-genai not installed!")
-    except Exception as e:
-        logger.error(f"Failed to initialize Gemini client: {e}")
+    warm_up_gemini_client()
+
+
+def _gemini():
+    return get_gemini_client() if USE_GEMINI else None
 
 # --- Pydantic Schemas for Structured Output ---
 # 模板改善 A (uplift)：對齊 HackMD-style 設計原則
@@ -252,7 +222,7 @@ def get_template(template_name: str) -> SummaryTemplate:
 # --- Health Check Endpoint ---
 @app.route('/health', methods=['GET'])
 def health_check():
-    gemini_available = gemini_client is not None
+    gemini_available = _gemini() is not None
     auth_mode = "api_key" if GEMINI_API_KEY else "adc"
     return jsonify({
         "status": "ready",
@@ -281,6 +251,7 @@ def polish_text():
             "translated": f"[Mock Translation] {raw_text[:50]}..."
         })
 
+    gemini_client = _gemini()
     if not gemini_client:
         return jsonify({"error": "Gemini client not available"}), 503
 
@@ -307,6 +278,7 @@ def polish_text():
         })
 
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"Polish error: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
@@ -332,6 +304,7 @@ def summarize_meeting():
         })
 
     # --- Check Gemini availability ---
+    gemini_client = _gemini()
     if not gemini_client:
         return jsonify({
             "summary": "Gemini API 未設定，無法生成摘要。",
@@ -423,6 +396,7 @@ def summarize_meeting():
             })
             
     except Exception as e:
+        reset_gemini_client_on_transport_error(e)
         logger.error(f"[Gemini] Error: {e}", exc_info=True)
         return jsonify({
             "summary": f"摘要生成失敗：{str(e)}",
@@ -0,0 +1,169 @@
+"""
+Process-wide Gemini client factory for the LLM service.
+
+Same contract as apps/backend/app/llm_utils.get_gemini_client (this service is
+built as its own image, so it carries its own copy):
+  - clients are built once and reused (with their HTTP connection pools)
+  - rebuilt after GEMINI_CLIENT_MAX_AGE seconds so rotated credentials apply;
+    reset_gemini_client() forces a rebuild; reset_gemini_client_on_transport_error()
+    does so from a caller's except block when the transport / credentials broke
+  - GEMINI_CLIENT_POOL_SIZE > 1 round-robins several clients under load
+  - the metadata-server project lookup is cached (failures retried after 60s)
+
+Priority: API Key (local dev) > ADC via Vertex AI (Cloud Run Service Account).
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+GCP_PROJECT = os.getenv("GCP_PROJECT", "")
+GCP_LOCATION = os.getenv("GCP_LOCATION", "asia-southeast1")
+GEMINI_CLIENT_POOL_SIZE = max(1, int(os.getenv("GEMINI_CLIENT_POOL_SIZE", "1")))
+GEMINI_CLIENT_MAX_AGE = float(os.getenv("GEMINI_CLIENT_MAX_AGE", "3000"))
+_PROJECT_RETRY_SECONDS = 60.0
+# reset_gemini_client_on_transport_error keeps pools younger than this (one rebuild per failure burst)
+_TRANSPORT_RESET_MIN_AGE = 10.0
+
+_client_lock = threading.Lock()
+_client_pool: List = []
+_client_created_at = 0.0
+_client_next = itertools.count()
+_detected_project: Optional[str] = None
+_project_failed_at: Optional[float] = None
+
+
+def _resolve_gcp_project() -> str:
+    global _detected_project, _project_failed_at
+    if GCP_PROJECT:
+        return GCP_PROJECT
+    if _detected_project:
+        return _detected_project
+    if _project_failed_at is not None and time.monotonic() - _project_failed_at < _PROJECT_RETRY_SECONDS:
+        return ""
+    try:
+        import requests as _req
+        resp = _req.get(
+            "http://metadata.google.internal/computeMetadata/v1/project/project-id",
+            headers={"Metadata-Flavor": "Google"}, timeout=2
+        )
+        resp.raise_for_status()
+        _detected_project = resp.text
+        logger.info(f"Auto-detected GCP project: {_detected_project}")
+        return _detected_project
+    except Exception:
+        _project_failed_at = time.monotonic()
+        logger.warning("Could not auto-detect GCP project from metadata server")
+        return ""
+
+
+def _create_gemini_client():
+    from google import genai
+    if GEMINI_API_KEY:
+        return genai.Client(api_key=GEMINI_API_KEY)
+    project = _resolve_gcp_project()
+    if not project:
+        logger.error("No GEMINI_API_KEY and no GCP_PROJECT — cannot initialize Gemini client")
+        return None
+    return genai.Client(vertexai=True, project=project, location=GCP_LOCATION)
+
+
+def _build_client_pool() -> List:
+    pool = []
+    for _ in range(GEMINI_CLIENT_POOL_SIZE):
+        client = _create_gemini_client()
+        if client is None:
+            break
+        pool.append(client)
+    if pool:
+        mode = "API Key" if GEMINI_API_KEY else f"ADC (Vertex AI), project={_resolve_gcp_project()}, location={GCP_LOCATION}"
+        logger.info(f"Gemini client pool initialized with {mode}, size={len(pool)}")
+    return pool
+
+
+def get_gemini_client():
+    """Return a cached Gemini client (thread-safe; None if unavailable)."""
+    global _client_pool, _client_created_at
+    now = time.monotonic()
+    pool = _client_pool
+    if not pool or now - _client_created_at >= GEMINI_CLIENT_MAX_AGE:
+        with _client_lock:
+            if not _client_pool or now - _client_created_at >= GEMINI_CLIENT_MAX_AGE:
+                try:
+                    new_pool = _build_client_pool()
+                except ImportError:
+                    logger.error("google-genai not installed!")
+                    new_pool = []
+                except Exception as e:
+                    logger.error(f"Failed to initialize Gemini client: {e}")
+                    new_pool = []
+                if new_pool:
+                    _client_pool = new_pool
+                    _client_created_at = now
+                elif _client_pool:
+                    logger.warning("Gemini client refresh failed; reusing existing clients")
+                    _client_created_at = now - GEMINI_CLIENT_MAX_AGE + _PROJECT_RETRY_SECONDS
+            pool = _client_pool
+    if not pool:
+        return None
+    return pool[next(_client_next) % len(pool)]
+
+
+def reset_gemini_client():
+    """Drop cached clients so the next call rebuilds them."""
+    global _client_pool, _client_created_at, _detected_project, _project_failed_at
+    with _client_lock:
+        _client_pool = []
+        _client_created_at = 0.0
+        _detected_project = None
+        _project_failed_at = None
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    """Connection / protocol / credential-refresh failure anywhere in the exception chain
+    (an API-level error response or a timeout does not count)."""
+    types_: tuple = (ConnectionError,)
+    try:
+        import httpx
+        types_ += (httpx.NetworkError, httpx.ProtocolError)
+    except ImportError:
+        pass
+    try:
+        from google.auth import exceptions as auth_exceptions
+        types_ += (auth_exceptions.TransportError, auth_exceptions.RefreshError)
+    except ImportError:
+        pass
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, types_):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def reset_gemini_client_on_transport_error(exc: BaseException) -> bool:
+    """
+    Call from a Gemini caller's except block: if exc means the pooled clients'
+    transport or credentials are broken, rebuild the pool on the next call
+    instead of reusing it until GEMINI_CLIENT_MAX_AGE. Pools younger than
+    _TRANSPORT_RESET_MIN_AGE are kept, so a burst of failures rebuilds once.
+    """
+    if not _is_transport_error(exc):
+        return False
+    if _client_pool and time.monotonic() - _client_created_at < _TRANSPORT_RESET_MIN_AGE:
+        return False
+    logger.warning(f"Gemini transport error ({type(exc).__name__}); rebuilding client pool")
+    reset_gemini_client()
+    return True
+
+
+def warm_up_gemini_client() -> bool:
+    """Build the client pool before the first request."""
+    return get_gemini_client() is not None